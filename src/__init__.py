@@ -113,7 +113,9 @@ __all__ = [
     # This is just to make help(Individual) available to users.
     'Individual',
     'Simulator',
+    'FreqSimulator',
     'Pedigree',
+    'PopulationView',
     # splitters
     'SexSplitter',
     'AffectionSplitter',
@@ -178,6 +180,8 @@ __all__ = [
     'SelfingGenoTransmitter',
     'CloneGenoTransmitter',
     'Recombinator',
+    'Genealogy',
+    'SimplifyGenealogy',
     # 
     'PointMutator',
     'MatrixMutator',
@@ -226,6 +230,7 @@ __all__ = [
     'NoneOp',
     'Dumper',
     'SavePopulation',
+    'Checkpoint',
     'IfElse',
     'Pause',
     'TicToc',
@@ -277,6 +282,7 @@ __all__ = [
     'loadPopulation',
     'loadPedigree',
     'moduleInfo',
+    'storageAllocations',
     'turnOffDebug',
     'turnOnDebug',
     'setOptions',
@@ -302,7 +308,7 @@ __all__ = [
 
 # get options
 from simuOpt import simuOptions
-import os, sys, re
+import os, sys, re, struct
 
 if simuOptions['Optimized']:
     if simuOptions['AlleleType'] == 'short':
@@ -385,7 +391,7 @@ ALL_AVAIL = True
 UNSPECIFIED = False
 
 def evolve_pop(self, initOps=[], preOps=[], matingScheme=MatingScheme(), postOps=[],
-    finalOps=[], gen=-1, dryrun=False):
+    finalOps=[], gen=-1, dryrun=False, resume=None):
     '''Evolve the current population *gen* generations using mating scheme
     *matingScheme* and operators *initOps* (applied before evolution), *preOps*
     (applied to the parental population at the beginning of each life cycle),
@@ -393,17 +399,23 @@ def evolve_pop(self, initOps=[], preOps=[], matingScheme=MatingScheme(), postOps
     cycle) and *finalOps* (applied at the end of evolution). More specifically,
     this function creates a *Simulator* using the current population, call its
     *evolve* function using passed parameters and then replace the current
-    population with the evolved population. Please refer to function 
-    ``Simulator.evolve`` for more details about each parameter.'''
+    population with the evolved population. If a checkpoint saved by operator
+    *Checkpoint* is given to *resume*, the current population is replaced by
+    the population in the checkpoint and an interrupted evolution is resumed.
+    Please refer to function ``Simulator.evolve`` for more details about each
+    parameter.'''
     if dryrun:
         print(describeEvolProcess(initOps, preOps, matingScheme, postOps, finalOps, gen, 1))
         return (0,)
     if isinstance(self, Pedigree):
         raise ValueError("Evolving a pedigree object directly is not allowed.")
+    if isinstance(self, PopulationView):
+        raise ValueError("Evolving a population view is not allowed.")
     # create a simulator with self
     simu = Simulator(self)
     # evolve
-    gen = simu.evolve(initOps, preOps, matingScheme, postOps, finalOps, gen)
+    gen = simu.evolve(initOps, preOps, matingScheme, postOps, finalOps, gen,
+        resume=[] if resume is None else [resume])
     # get the evolved population
     self.swap(simu.population(0))
     return gen[0]
@@ -496,6 +508,16 @@ def as_population(self):
 
 Pedigree.asPopulation = as_population
 
+_PopulationView_init = PopulationView.__init__
+
+def view_init(self, pop, *args, **kwargs):
+    _PopulationView_init(self, pop, *args, **kwargs)
+    # a view refers to genotypes of pop so pop should live as long as the view
+    self._parent = pop
+
+view_init.__doc__ = _PopulationView_init.__doc__
+PopulationView.__init__ = view_init
+
 # Other definitions that does not really belong to simuUtil.py
 class _dw(object):
     def __init__(self, var):
@@ -527,6 +549,103 @@ Population.__deepcopy__ = _deepcopy
 Simulator.__deepcopy__ = _deepcopy
 BaseOperator.__deepcopy__ = _deepcopy
 
+# pickle populations, pedigrees and simulators in the binary format used by
+# Population.save(). With protocol 5 or higher, the saved population is passed
+# as a PickleBuffer so that it can be sent out-of-band without being copied
+# to the pickle stream (e.g. by a buffer_callback of a process pool).
+def _population_data(pop, protocol):
+    data = pop.toBytes()
+    if protocol >= 5:
+        try:
+            from pickle import PickleBuffer
+            return PickleBuffer(data)
+        except ImportError:
+            # PickleBuffer is only available for Python 3.8 or later
+            pass
+    return data
+
+def _unpickle_population(data):
+    pop = Population()
+    pop.fromBytes(data)
+    return pop
+
+def _unpickle_pedigree(data, idField, fatherField, motherField):
+    return Pedigree(_unpickle_population(data), loci=ALL_AVAIL,
+        infoFields=ALL_AVAIL, ancGens=ALL_AVAIL, idField=idField,
+        fatherField=fatherField, motherField=motherField, stealPop=True)
+
+def _reduce_population(self, protocol):
+    return (_unpickle_population, (_population_data(self, protocol),))
+
+def _reduce_pedigree(self, protocol):
+    return (_unpickle_pedigree, (_population_data(self, protocol),) +
+        tuple(self.pedigreeFields()))
+
+def _reduce_simulator(self, protocol):
+    # populations are pickled with their own __reduce_ex__ and moved to
+    # the new simulator.
+    return (Simulator, (list(self.populations()), 1, True))
+
+# copy.copy() returns an object that refers to the same underlying object,
+# which was the behavior before __reduce_ex__ was defined.
+def _copy(self):
+    obj = self.__class__.__new__(self.__class__)
+    obj.__dict__.update(self.__dict__)
+    return obj
+
+Population.__reduce_ex__ = _reduce_population
+Pedigree.__reduce_ex__ = _reduce_pedigree
+Simulator.__reduce_ex__ = _reduce_simulator
+Population.__copy__ = _copy
+Simulator.__copy__ = _copy
+
+def _to_shared_memory(self):
+    '''Save the population to a block of shared memory and return it as a
+    ``multiprocessing.shared_memory.SharedMemory`` object, which can be
+    passed to other processes (it is pickled by name) and attached with
+    function ``Population.fromSharedMemory``. The population is saved in the
+    uncompressed binary format of ``Population.save``, preceded by its length.
+    The caller is responsible for calling ``close()`` and ``unlink()`` of the
+    returned object after all processes have attached to it. This function
+    requires Python 3.8 or later.'''
+    from multiprocessing import shared_memory
+    data = self.toBytes()
+    shm = shared_memory.SharedMemory(create=True, size=len(data) + 8)
+    shm.buf[:8] = struct.pack('<Q', len(data))
+    shm.buf[8:len(data) + 8] = data
+    return shm
+
+def _from_shared_memory(handle):
+    '''Return a population from a block of shared memory created by function
+    ``Population.toSharedMemory``. *handle* can be the returned
+    ``SharedMemory`` object or its name. The shared block only serves as a
+    transport that avoids sending the population through a pipe. Each call
+    deserializes a complete, independent copy of the population, so memory
+    and time used by this function are proportional to the size of the
+    population, and changes to the returned population do not affect the
+    shared block.'''
+    from multiprocessing import shared_memory
+    if isinstance(handle, shared_memory.SharedMemory):
+        shm = handle
+    else:
+        shm = shared_memory.SharedMemory(name=handle)
+    try:
+        size = struct.unpack('<Q', bytes(shm.buf[:8]))[0]
+        # views of shared memory have to be released before it is closed
+        data = shm.buf[8:size + 8]
+        try:
+            pop = Population()
+            pop.fromBytes(data)
+        finally:
+            data.release()
+    finally:
+        if shm is not handle:
+            shm.close()
+    return pop
+
+Population.toSharedMemory = _to_shared_memory
+Population.fromSharedMemory = staticmethod(_from_shared_memory)
+
 def ind_setInfo2(self, field, value):
     self.setInfo(value, field)
 
@@ -1328,6 +1328,87 @@ array_ass_subscr_template(struct arrayobject_template<T> * self, PyObject * item
 }
 
 
+/* Buffer protocol (PEP 3118). A carray object is a window to the genotype
+   (or lineage) storage of a population so the buffer exposes this storage
+   directly, without copying. Allele types that are not stored as plain
+   contiguous integers (binary and mutant modules) do not support this
+   protocol. */
+
+template <typename T>
+int
+array_getbuffer_template(struct arrayobject_template<T> * self, Py_buffer * view, int flags)
+{
+	PyErr_SetString(PyExc_BufferError,
+		"Buffer protocol is not supported by this array type.");
+	view->obj = NULL;
+	return -1;
+}
+
+
+/// CPPONLY
+template <typename T, typename V>
+int
+array_fillbuffer_template(struct arrayobject_template<T> * self, Py_buffer * view, int flags,
+                          V * buf, const char * format)
+{
+	if (view == NULL) {
+		PyErr_SetString(PyExc_BufferError,
+			"array_getbuffer: view==NULL argument is obsolete");
+		return -1;
+	}
+	view->buf = (void *)buf;
+	view->obj = (PyObject *)self;
+	Py_INCREF(self);
+	view->len = Py_SIZE(self) * sizeof(V);
+	view->readonly = 0;
+	view->itemsize = sizeof(V);
+	view->format = NULL;
+	if ((flags & PyBUF_FORMAT) == PyBUF_FORMAT)
+		view->format = (char *)format;
+	view->ndim = 1;
+	view->shape = NULL;
+	if ((flags & PyBUF_ND) == PyBUF_ND)
+		view->shape = &((PyVarObject *)self)->ob_size;
+	view->strides = NULL;
+	if ((flags & PyBUF_STRIDES) == PyBUF_STRIDES)
+		view->strides = &(view->itemsize);
+	view->suboffsets = NULL;
+	view->internal = NULL;
+	return 0;
+}
+
+
+#  if !defined(BINARYALLELE) && !defined(MUTANTALLELE)
+template <>
+int
+array_getbuffer_template<GenoIterator>(struct arrayobject_template<GenoIterator> * self, Py_buffer * view, int flags)
+{
+	// an empty array (e.g. genotype of an empty subpopulation) may not
+	// point to valid storage so we use a static placeholder.
+	static Allele empty = 0;
+	Allele * buf = Py_SIZE(self) == 0 ? &empty : &*(self->ob_iter);
+
+#    ifdef LONGALLELE
+	return array_fillbuffer_template<GenoIterator, Allele>(self, view, flags, buf, "L");
+#    else
+	return array_fillbuffer_template<GenoIterator, Allele>(self, view, flags, buf, "B");
+#    endif
+}
+
+
+#  endif
+
+template <>
+int
+array_getbuffer_template<LineageIterator>(struct arrayobject_template<LineageIterator> * self, Py_buffer * view, int flags)
+{
+	static long empty = 0;
+	long * buf = Py_SIZE(self) == 0 ? &empty : &*(self->ob_iter);
+
+	return array_fillbuffer_template<LineageIterator, long>(self, view, flags, buf, "l");
+}
+
+
 template <typename T>
 PyObject * array_new_template(PyTypeObject * type, PyObject * args, PyObject * kwds)
 {
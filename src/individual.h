@@ -331,7 +331,9 @@ public:
 	 *  will be returned. If multiple chromosomes are specified, there should
 	 *  not be gaps between chromosomes. This function ignores type of
 	 *  chromosomes so it will return unused alleles for sex and mitochondrial
-	 *  chromosomes.
+	 *  chromosomes. Except for binary and mutant modules, the returned array
+	 *  supports the Python buffer protocol and can be used as a writable
+	 *  numpy array without copying.
 	 *  <group>2-genotype</group>
 	 */
 	PyObject * genotype(const uintList & ploidy = uintList(), const uintList & chroms = uintList());
@@ -1038,13 +1040,14 @@ private:
 	bool m_allInds;
 };
 
-//
-typedef vector<Individual>::iterator RawIndIterator;
-typedef vector<Individual>::const_iterator ConstRawIndIterator;
-typedef vector<Individual>::pointer RawIndPointer;
-typedef vector<Individual>::const_pointer ConstRawIndPointer;
-typedef vector<Individual>::reference RawIndReference;
-typedef vector<Individual>::const_reference ConstRawIndReference;
+// individuals of populations, allocations of which are counted
+typedef vector<Individual, MmapAllocator<Individual> > vectorind;
+typedef vectorind::iterator RawIndIterator;
+typedef vectorind::const_iterator ConstRawIndIterator;
+typedef vectorind::pointer RawIndPointer;
+typedef vectorind::const_pointer ConstRawIndPointer;
+typedef vectorind::reference RawIndReference;
+typedef vectorind::const_reference ConstRawIndReference;
 
 typedef IndividualIterator<RawIndIterator, RawIndPointer, RawIndReference> IndIterator;
 typedef IndividualIterator<ConstRawIndIterator, ConstRawIndPointer, ConstRawIndReference> ConstIndIterator;
@@ -68,19 +68,21 @@ bool InitSex::apply(Population & pop) const
 		if (!m_sex.empty())
 			for (; ind.valid(); ++ind, ++idx)
 				ind->setSex(m_sex[idx % sexSz] == 1 ? MALE : FEMALE);
-		else {
-			if (numThreads() > 1) {
-#ifdef _OPENMP
-#  pragma omp parallel private(ind)
-				{
-					ind = pop.indIterator(sp->subPop(), omp_get_thread_num());
-					for (; ind.valid(); ++ind)
-						ind->setSex(ws.draw() == 0 ? MALE : FEMALE);
-				}
-#endif
-			} else
-				for (; ind.valid(); ++ind)
-					ind->setSex(ws.draw() == 0 ? MALE : FEMALE);
+		else if (m_maleProp >= 0) {
+			// sexes are drawn from a shuffled sequence of given proportion
+			for (; ind.valid(); ++ind)
+				ind->setSex(ws.draw() == 0 ? MALE : FEMALE);
+		} else {
+			// blocks of individuals use their own random number streams so
+			// that sexes do not depend on the number of threads
+			uint64_t key = RNGStream::newKey();
+			ssize_t nBlocks = RNGStream::numBlocks(pop.subPopSize(sp->subPop()));
+#pragma omp parallel for if(numThreads() > 1)
+			for (ssize_t b = 0; b < nBlocks; ++b) {
+				RNGStream stream(key, b);
+				for (IndIterator it = pop.indBlockIterator(sp->subPop(), b); it.valid(); ++it)
+					it->setSex(ws.draw() == 0 ? MALE : FEMALE);
+			}
 		}
 		pop.deactivateVirtualSubPop(sp->subPop());
 	}
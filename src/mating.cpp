@@ -68,81 +68,183 @@ GlobalSeqSexModel::GlobalSeqSexModel(const vectorf & sex) : m_sex(), m_index(0)
 }
 
 
+namespace {
+
+// Call the function of a FuncNumOffModel or FuncSexModel, with parameters
+// gen, pop, subPop and size (number of offspring) if they are requested.
+PyObject * callModelFunc(const pyFunc & func, ssize_t gen, const Population * pop,
+                         size_t subPop, size_t size, const string & param)
+{
+	PyObject * args = PyTuple_New(func.numArgs());
+
+	DBG_ASSERT(args, RuntimeError, "Failed to create a parameter tuple");
+	for (size_t i = 0; i < func.numArgs(); ++i) {
+		const string & arg = func.arg(i);
+		if (arg == "gen")
+			PyTuple_SET_ITEM(args, i, PyInt_FromLong(static_cast<long>(gen)));
+		else if (arg == "size")
+			PyTuple_SET_ITEM(args, i, PyInt_FromLong(static_cast<long>(size)));
+		else if (arg == "subPop")
+			PyTuple_SET_ITEM(args, i, PyInt_FromLong(static_cast<long>(subPop)));
+		else if (arg == "pop" && pop != NULL)
+			PyTuple_SET_ITEM(args, i, pyPopObj(static_cast<void *>(const_cast<Population *>(pop))));
+		else {
+			Py_DECREF(args);
+			throw ValueError("Only parameters 'gen', 'pop', 'subPop' and 'size' are acceptable in a function passed to parameter "
+				+ param + ".");
+		}
+	}
+	PyObject * obj = func(args);
+	Py_DECREF(args);
+	return obj;
+}
+
+
+// Read values from an array (an object with the buffer protocol or a
+// sequence) returned by the function or generator of a FuncNumOffModel
+// or FuncSexModel. Return false if obj is not an array.
+bool readModelValues(PyObject * obj, vectori & values)
+{
+	if (PyObject_CheckBuffer(obj)) {
+		pyBuffer buf(obj);
+		values.resize(buf.size());
+		for (size_t i = 0; i < values.size(); ++i)
+			values[i] = buf.value<long>(i);
+		return true;
+	} else if (PySequence_Check(obj)) {
+		PyObj_As_IntArray(obj, values);
+		return true;
+	}
+	return false;
+}
+
+
+}
+
+void FuncSexModel::initialize(const Population & pop, size_t subPop, size_t numOffspring)
+{
+	m_pop = &pop;
+	m_subPop = subPop;
+	m_numOffspring = numOffspring;
+	m_used = 0;
+	m_sex.clear();
+	m_next = 0;
+}
+
+
 Sex FuncSexModel::getSex(UINT count)
 {
-	if (m_generator.isValid()) {
-		long val;
-		PyObject * obj = m_generator.next();
+	// use sex returned in an array
+	if (m_next < m_sex.size()) {
+		++m_used;
+		return m_sex[m_next++];
+	}
+
+	PyObject * obj = NULL;
+	if (m_generator.isValid())
+		obj = m_generator.next();
+	else {
+		// the function is called with the number of offspring whose sex
+		// has not been determined
+		obj = callModelFunc(m_func, m_pop == NULL ? 0 : m_pop->gen(), m_pop, m_subPop,
+			m_numOffspring > m_used ? m_numOffspring - m_used : 1, "sexMode");
+		if (PyGen_Check(obj)) {
+			m_generator.set(obj);
+			return getSex(count);
+		}
+	}
+
+	vectori values;
+	if (readModelValues(obj, values)) {
+		Py_DECREF(obj);
+		DBG_FAILIF(values.empty(), ValueError, "An empty array of sex is returned.");
+		m_sex.resize(values.size());
+		for (size_t i = 0; i < values.size(); ++i)
+			m_sex[i] = static_cast<Sex>(values[i]);
+		m_next = 0;
+		return getSex(count);
+	}
+
+	long val;
+	try {
 		PyObj_As_Int(obj, val);
+	} catch (ValueError &) {
+		PyErr_Clear();
 		Py_DECREF(obj);
-		return static_cast<Sex>(val);
-	} else {
-		PyObject * obj = NULL;
-		try {
-			obj = m_func("()");
-			long val;
-			PyObj_As_Int(obj, val);
-			Py_DECREF(obj);
-			return static_cast<Sex>(val);
-		} catch (ValueError &) {
-			if (PyGen_Check(obj)) {
-				PyErr_Clear();
-				m_generator.set(obj);
-				return getSex(count);
-			} else
-				throw ValueError("Passed function should be a function that return MALE/FEMALE or a generator.");
-		}
-		// this should not be reached.
-		return MALE;
+		throw ValueError("Passed function should be a function that return MALE/FEMALE, an array of MALE/FEMALE or a generator.");
 	}
-	return MALE;
+	Py_DECREF(obj);
+	++m_used;
+	return static_cast<Sex>(val);
+}
+
+
+void FuncNumOffModel::initialize(const Population & pop, size_t subPop, size_t numOffspring)
+{
+	m_pop = &pop;
+	m_subPop = subPop;
+	m_numOffspring = numOffspring;
+	m_used = 0;
+	m_numOff.clear();
+	m_next = 0;
 }
 
 
 UINT FuncNumOffModel::getNumOff(ssize_t gen)
 {
-	if (m_generator.isValid()) {
-		int attempts = 0;
+	int attempts = 0;
+
+	while (++attempts < 50) {
+		// use numbers of offspring returned in an array, families with zero
+		// offspring are ignored.
+		while (m_next < m_numOff.size()) {
+			size_t numOff = m_numOff[m_next++];
+			if (numOff > 0) {
+				m_used += numOff;
+				return static_cast<UINT>(numOff);
+			}
+		}
+
+		PyObject * obj = NULL;
+		if (m_generator.isValid())
+			obj = m_generator.next();
+		else {
+			// the function is called with the number of offspring that are
+			// not yet assigned to any family
+			obj = callModelFunc(m_func, gen, m_pop, m_subPop,
+				m_numOffspring > m_used ? m_numOffspring - m_used : 1, "numOffspring");
+			if (PyGen_Check(obj)) {
+				m_generator.set(obj);
+				continue;
+			}
+		}
+
+		vectori values;
+		if (readModelValues(obj, values)) {
+			Py_DECREF(obj);
+			m_numOff.resize(values.size());
+			for (size_t i = 0; i < values.size(); ++i)
+				m_numOff[i] = values[i] > 0 ? values[i] : 0;
+			m_next = 0;
+			continue;
+		}
+
 		long numOff = 0;
-		while (++attempts < 50) {
-			PyObject * obj = m_generator.next();
+		try {
 			PyObj_As_Int(obj, numOff);
+		} catch (ValueError &) {
+			PyErr_Clear();
 			Py_DECREF(obj);
-			DBG_DO(DBG_DEVEL, cerr << "Number of offspring produced from a generator: " << numOff << endl);
-			if (numOff > 0)
-				return numOff;
+			throw ValueError("Function should return a number, an array of numbers or a generator.");
 		}
-		DBG_WARNIF(true, "One offspring is returned because user provided function returns 0 (#offspring) for more than 50 times.");
-		return 1;
-	} else {
-		DBG_FAILIF(m_func.numArgs() > 1 || (m_func.numArgs() == 1 && m_func.arg(0) != "gen"),
-			ValueError, "Function passed to parameter numOffspring should have no parameter or a parameter named gen");
-		int attempts = 0;
-		long numOff = 0;
-		while (++attempts < 50) {
-			PyObject * obj = NULL;
-			try {
-				if (m_func.numArgs() == 0)
-					obj = m_func("()");
-				else
-					obj = m_func("(i)", gen);
-				PyObj_As_Int(obj, numOff);
-				Py_DECREF(obj);
-				if (numOff > 0)
-					return numOff;
-			} catch (ValueError &) {
-				if (PyGen_Check(obj)) {
-					PyErr_Clear();
-					m_generator.set(obj);
-					return getNumOff(gen);
-				} else {
-					throw ValueError("Function should return a number or a generator.");
-				}
-			}
+		Py_DECREF(obj);
+		DBG_DO(DBG_DEVEL, cerr << "Number of offspring produced from a function or generator: " << numOff << endl);
+		if (numOff > 0) {
+			m_used += numOff;
+			return numOff;
 		}
-		DBG_WARNIF(true, "One offspring is returned because user provided function returns 0 (#offspring) for more than 50 times.");
-		return 1;
 	}
+	DBG_WARNIF(true, "One offspring is returned because user provided function returns 0 (#offspring) for more than 50 times.");
 	return 1;
 }
 
@@ -258,7 +360,7 @@ Sex OffspringGenerator::getSex(UINT count)
 }
 
 
-void OffspringGenerator::initialize(const Population & pop, size_t /* subPop */)
+void OffspringGenerator::initialize(const Population & pop, size_t subPop, size_t numOffspring)
 {
 	opList::const_iterator iop = m_transmitters.begin();
 	opList::const_iterator iopEnd = m_transmitters.end();
@@ -266,6 +368,9 @@ void OffspringGenerator::initialize(const Population & pop, size_t /* subPop */)
 	for (; iop != iopEnd; ++iop)
 		(*iop)->initializeIfNeeded(*pop.rawIndBegin());
 
+	m_numOffModel->initialize(pop, subPop, numOffspring);
+	m_sexModel->initialize(pop, subPop, numOffspring);
+
 	m_initialized = true;
 }
 
@@ -453,9 +558,9 @@ void ControlledOffspringGenerator::getExpectedAlleles(const Population & pop,
 }
 
 
-void ControlledOffspringGenerator::initialize(const Population & pop, size_t subPop)
+void ControlledOffspringGenerator::initialize(const Population & pop, size_t subPop, size_t numOffspring)
 {
-	OffspringGenerator::initialize(pop, subPop);
+	OffspringGenerator::initialize(pop, subPop, numOffspring);
 
 	// expected frequency at each locus
 	if (subPop == 0) {
@@ -729,6 +834,35 @@ ParentChooser::IndividualPair RandomParentChooser::chooseParents()
 }
 
 
+void RandomParentChooser::chooseParentsBatch(size_t n, vector<IndividualPair> & parents)
+{
+	DBG_ASSERT(initialized(), SystemError,
+		"Please initialize this parent chooser before using it");
+	if (!m_replacement) {
+		ParentChooser::chooseParentsBatch(n, parents);
+		return;
+	}
+	// draw indexes of all parents
+	vectoru index(n);
+	if (m_selection)
+		m_sampler.fillSamples(index);
+	else {
+		for (size_t i = 0; i < n; ++i)
+			index[i] = getRNG().randInt(static_cast<ULONG>(m_size));
+	}
+	// look up parents
+	parents.resize(n);
+	if (m_index.empty()) {
+		RawIndIterator base = m_basePtr + m_shift;
+		for (size_t i = 0; i < n; ++i)
+			parents[i] = IndividualPair(&*(base + index[i]), (Individual *)(0));
+	} else {
+		for (size_t i = 0; i < n; ++i)
+			parents[i] = IndividualPair(&*(m_index[index[i]]), (Individual *)(0));
+	}
+}
+
+
 void RandomParentsChooser::initialize(Population & pop, size_t subPop)
 {
 	m_numMale = 0;
@@ -829,6 +963,39 @@ ParentChooser::IndividualPair RandomParentsChooser::chooseParents()
 }
 
 
+void RandomParentsChooser::chooseParentsBatch(size_t n, vector<IndividualPair> & parents)
+{
+	DBG_ASSERT(initialized(), SystemError,
+		"Please initialize this parent chooser before using it");
+	if (!m_replacement) {
+		ParentChooser::chooseParentsBatch(n, parents);
+		return;
+	}
+	if (m_numMale == 0)
+		throw RuntimeError("RandomParentsChooser fails because there is no male individual in a subpopulation.");
+	if (m_numFemale == 0)
+		throw RuntimeError("RandomParentsChooser fails because there is no female individual in a subpopulation ");
+
+	// draw indexes of all fathers and mothers
+	vectoru dadIndex(n);
+	vectoru momIndex(n);
+	if (m_selection) {
+		m_malesampler.fillSamples(dadIndex);
+		m_femalesampler.fillSamples(momIndex);
+	} else {
+		for (size_t i = 0; i < n; ++i)
+			dadIndex[i] = getRNG().randInt(static_cast<ULONG>(m_numMale));
+		for (size_t i = 0; i < n; ++i)
+			momIndex[i] = getRNG().randInt(static_cast<ULONG>(m_numFemale));
+	}
+	// look up parents
+	parents.resize(n);
+	for (size_t i = 0; i < n; ++i)
+		parents[i] = std::make_pair(&**(m_index.begin() + dadIndex[i]),
+			&**(m_index.rbegin() + momIndex[i]));
+}
+
+
 void PolyParentsChooser::initialize(Population & pop, size_t subPop)
 {
 	m_numMale = 0;
@@ -1122,7 +1289,7 @@ void CombinedParentsChooser::finalize()
 
 PyParentsChooser::PyParentsChooser(PyObject * pc)
 	: ParentChooser(), m_func(pc), m_popObj(NULL),
-	m_generator(NULL)
+	m_generator(NULL), m_parents(), m_next(0)
 {
 }
 
@@ -1137,9 +1304,7 @@ void PyParentsChooser::initialize(Population & pop, size_t sp)
 	DBG_FAILIF(pop.hasActivatedVirtualSubPop(sp), ValueError,
 		"Python parent chooser can not be used in a virtual subpopulation.");
 
-#ifndef OPTIMIZED
 	m_size = pop.subPopSize(sp);
-#endif
 	m_begin = pop.indIterator(sp);
 
 	m_popObj = pyPopObj(static_cast<void *>(&pop));
@@ -1159,15 +1324,54 @@ void PyParentsChooser::initialize(Population & pop, size_t sp)
 	}
 	m_generator.set(m_func(args));
 	Py_DECREF(args);
+	m_parents.clear();
+	m_next = 0;
 	m_initialized = true;
 }
 
 
+bool PyParentsChooser::readParents(PyObject * item)
+{
+	pyBuffer buf(item);
+
+	if (buf.ndim() != 2)
+		return false;
+
+	size_t numFamilies = buf.shape(0);
+	size_t numParents = buf.shape(1);
+	PARAM_FAILIF(numParents != 1 && numParents != 2, ValueError,
+		(boost::format("Parents should be returned in an array of shape (n, 2) or (n, 1), an array of shape (%1%, %2%) is returned.")
+		 % numFamilies % numParents).str());
+	PARAM_FAILIF(numFamilies == 0, ValueError,
+		"User-defined function yield an empty array of parents.");
+
+	// individuals in a non-virtual subpopulation are stored continuously
+	Individual * base = &*m_begin;
+	m_parents.resize(numFamilies);
+	for (size_t i = 0; i < numFamilies; ++i) {
+		Individual * parents[2] = { NULL, NULL };
+		for (size_t p = 0; p < numParents; ++p) {
+			size_t idx = buf.value<size_t>(i * numParents + p);
+			PARAM_FAILIF(idx >= m_size, ValueError,
+				(boost::format("Returned parent index (%1%) is greater than subpopulation size %2%") % idx % m_size).str());
+			parents[p] = base + idx;
+		}
+		m_parents[i] = ParentChooser::IndividualPair(parents[0], parents[1]);
+	}
+	m_next = 0;
+	return true;
+}
+
+
 ParentChooser::IndividualPair PyParentsChooser::chooseParents()
 {
 	DBG_ASSERT(initialized(), SystemError,
 		"Please initialize this parent chooser before using it");
 
+	// use parents from the last yielded array
+	if (m_next < m_parents.size())
+		return m_parents[m_next++];
+
 	PyObject * item = m_generator.next();
 
 #ifndef OPTIMIZED
@@ -1179,6 +1383,21 @@ ParentChooser::IndividualPair PyParentsChooser::chooseParents()
 		"User-defined function yield invalid value.");
 #endif
 
+	// an array of parents
+	if (PyObject_CheckBuffer(item)) {
+		bool isArray = false;
+		try {
+			isArray = readParents(item);
+		} catch (...) {
+			Py_DECREF(item);
+			throw;
+		}
+		if (isArray) {
+			Py_DECREF(item);
+			return m_parents[m_next++];
+		}
+	}
+
 
 	if (PyInt_Check(item) || PyLong_Check(item)) {
 		long parent;
@@ -1227,6 +1446,8 @@ void PyParentsChooser::finalize()
 	Py_DECREF(m_popObj);
 	m_generator.set(NULL);
 	m_popObj = NULL;
+	m_parents.clear();
+	m_next = 0;
 	m_initialized = false;
 }
 
@@ -1242,6 +1463,10 @@ bool MatingScheme::prepareScratchPop(Population & pop, Population & scratch)
 	if (scratch.genoStruIdx() != pop.genoStruIdx())
 		scratch.fitGenoStru(pop.genoStruIdx());
 
+	// offspring genotypes use the same storage as their parents
+	if (scratch.storage() != pop.storage())
+		scratch.setStorage(pop.storage());
+
 	// use population structure of pop
 	if (m_subPopSize.empty() && !m_subPopSize.func().isValid())
 		scratch.fitSubPopStru(pop.subPopSizes(), pop.subPopNames());
@@ -1325,7 +1550,8 @@ HomoMating::HomoMating(ParentChooser & chooser,
 	OffspringGenerator & generator,
 	const uintListFunc & subPopSize,
 	subPopList subPops, double weight)
-	: MatingScheme(subPopSize), m_subPops(subPops), m_weight(weight)
+	: MatingScheme(subPopSize), m_subPops(subPops), m_weight(weight),
+	m_offBegin(), m_offEnd(), m_numOffspring(0), m_blockSize(0), m_key(0)
 {
 	m_ParentChooser = chooser.clone();
 	m_OffspringGenerator = generator.clone();
@@ -1342,6 +1568,85 @@ string HomoMating::describe(bool format) const
 }
 
 
+namespace {
+
+// a block of offspring populated by a homogeneous mating scheme
+typedef std::pair<HomoMating *, size_t> MatingBlock;
+
+// offspring populated by a homogeneous mating scheme with parents from a
+// (virtual) subpopulation
+struct MatingTask
+{
+	MatingTask(HomoMating * ms, size_t idx, vspID vsp, RawIndIterator begin, RawIndIterator end) :
+		ms(ms), idx(idx), vsp(vsp), begin(begin), end(end)
+	{
+	}
+
+
+	HomoMating * ms;
+	// index of mating scheme in the subpopulation
+	size_t idx;
+	vspID vsp;
+	RawIndIterator begin;
+	RawIndIterator end;
+};
+
+// Populate blocks of offspring, which can be prepared by different mating
+// schemes, in parallel. Exceptions raised in threads are raised again after
+// all threads are finished.
+void mateBlocks(Population & pop, Population & offPop, const vector<MatingBlock> & blocks)
+{
+	ssize_t nBlocks = blocks.size();
+	int except = 0;
+	string msg;
+
+#pragma omp parallel for schedule(dynamic) if(numThreads() > 1)
+	for (ssize_t i = 0; i < nBlocks; i++) {
+		if (except)
+			continue;
+		try {
+			blocks[i].first->mateBlock(pop, offPop, blocks[i].second);
+		} catch (StopEvolution e) {
+			if (!except) {
+				except = 1;
+				msg = e.message();
+			}
+		} catch (ValueError e) {
+			if (!except) {
+				except = 2;
+				msg = e.message();
+			}
+		} catch (RuntimeError e) {
+			if (!except) {
+				except = 3;
+				msg = e.message();
+			}
+		} catch (Exception e) {
+			if (!except) {
+				except = 4;
+				msg = e.message();
+			}
+		} catch (...) {
+			if (!except)
+				except = -1;
+		}
+	}
+
+	if (except == 1)
+		throw  StopEvolution(msg);
+	else if (except == 2)
+		throw ValueError(msg);
+	else if (except == 3)
+		throw RuntimeError(msg);
+	else if (except == 4)
+		throw Exception(msg);
+	else if (except == -1)
+		throw Exception("Unexpected error from openMP parallel region");
+}
+
+
+}
+
 bool HomoMating::mateSubPop(Population & pop, Population & offPop, size_t subPop,
                             RawIndIterator offBegin, RawIndIterator offEnd)
 {
@@ -1349,18 +1654,17 @@ bool HomoMating::mateSubPop(Population & pop, Population & offPop, size_t subPop
 	if (offBegin == offEnd)
 		return true;
 
-	if (!m_ParentChooser->initialized())
-		m_ParentChooser->initialize(pop, subPop);
+	// If the parent chooser is not parallelizable, use the sequential method.
+	if (!parallelizable()) {
+		if (!m_ParentChooser->initialized())
+			m_ParentChooser->initialize(pop, subPop);
 
-	if (!m_OffspringGenerator->initialized())
-		m_OffspringGenerator->initialize(pop, subPop);
+		if (!m_OffspringGenerator->initialized())
+			m_OffspringGenerator->initialize(pop, subPop, offEnd - offBegin);
 
-	// generate scratch.subPopSize(sp) individuals.
-	RawIndIterator it = offBegin;
-	// If the parent chooser is not parallelizable, or if openMP is not supported
-	// or if number of thread is set to 1, use the sequential method.
-	if (!m_ParentChooser->parallelizable() || numThreads() == 1 || !m_OffspringGenerator->parallelizable()) {
 		DBG_DO(DBG_MATING, cerr << "Mating is done in single-thread mode" << endl);
+		// generate scratch.subPopSize(sp) individuals.
+		RawIndIterator it = offBegin;
 		while (it != offEnd) {
 			Individual * dad = NULL;
 			Individual * mom = NULL;
@@ -1370,73 +1674,69 @@ bool HomoMating::mateSubPop(Population & pop, Population & offPop, size_t subPop
 
 			m_OffspringGenerator->generateOffspring(pop, offPop, dad, mom, it, offEnd);
 		}
+		m_ParentChooser->finalize();
+		m_OffspringGenerator->finalize(pop);
 	} else {
 		DBG_DO(DBG_MATING, cerr << "Mating is done in " << numThreads() << " threads" << endl);
-		// in this case, openMP must have been supported with numThreads() > 1
-#ifdef _OPENMP
-		size_t offPopSize = offEnd - offBegin;
-		ssize_t nBlocks = numThreads() * 2;
-		ssize_t numOffspring = m_OffspringGenerator->numOffspring(pop.gen());
-		int except = 0;
-		string msg;
-#  pragma omp parallel for
-		for (int i = 0; i < nBlocks; i++) {
-			try {
-				RawIndIterator local_it = offBegin + i * (offPopSize / nBlocks / numOffspring) * numOffspring;
-				RawIndIterator local_offEnd = i == nBlocks - 1 ? offEnd : local_it + (offPopSize / nBlocks / numOffspring) * numOffspring ;
-
-				while (local_it != local_offEnd) {
-					if (except)
-						break;
-					Individual * dad = NULL;
-					Individual * mom = NULL;
-					ParentChooser::IndividualPair const parents = m_ParentChooser->chooseParents();
-					dad = parents.first;
-					mom = parents.second;
-					m_OffspringGenerator->generateOffspring(pop, offPop, dad, mom, local_it, local_offEnd);
-				}
-			} catch (StopEvolution e) {
-				if (!except) {
-					except = 1;
-					msg = e.message();
-				}
-			} catch (ValueError e) {
-				if (!except) {
-					except = 2;
-					msg = e.message();
-				}
-			} catch (RuntimeError e) {
-				if (!except) {
-					except = 3;
-					msg = e.message();
-				}
-			} catch (Exception e) {
-				if (!except) {
-					except = 4;
-					msg = e.message();
-				}
-			} catch (...) {
-				if (!except)
-					except = -1;
-			}
+		size_t nBlocks = prepareBlocks(pop, subPop, offBegin, offEnd);
+		vector<MatingBlock> blocks;
+		for (size_t b = 0; b < nBlocks; ++b)
+			blocks.push_back(MatingBlock(this, b));
+		mateBlocks(pop, offPop, blocks);
+		finishBlocks(pop);
+	}
+	return true;
+}
 
-		}
 
-		if (except == 1)
-			throw  StopEvolution(msg);
-		else if (except == 2)
-			throw ValueError(msg);
-		else if (except == 3)
-			throw RuntimeError(msg);
-		else if (except == 4)
-			throw Exception(msg);
-		else if (except == -1)
-			throw Exception("Unexpected error from openMP parallel region");
-#endif
+size_t HomoMating::prepareBlocks(Population & pop, size_t subPop,
+                                 RawIndIterator offBegin, RawIndIterator offEnd)
+{
+	if (!m_ParentChooser->initialized())
+		m_ParentChooser->initialize(pop, subPop);
+
+	if (!m_OffspringGenerator->initialized())
+		m_OffspringGenerator->initialize(pop, subPop, offEnd - offBegin);
+
+	// Offspring are generated in blocks of families, each with its own
+	// random number stream, so that the offspring population does not
+	// depend on the number of threads.
+	m_numOffspring = std::max(m_OffspringGenerator->numOffspring(pop.gen()), 1U);
+	m_blockSize = std::max<size_t>(RNGStream::blockSize / m_numOffspring, 1) * m_numOffspring;
+	m_offBegin = offBegin;
+	m_offEnd = offEnd;
+	m_key = RNGStream::newKey();
+	return (offEnd - offBegin + m_blockSize - 1) / m_blockSize;
+}
+
+
+void HomoMating::mateBlock(Population & pop, Population & offPop, size_t block)
+{
+	RNGStream stream(m_key, block);
+	RawIndIterator it = m_offBegin + block * m_blockSize;
+	RawIndIterator itEnd = static_cast<size_t>(m_offEnd - it) > m_blockSize ? it + m_blockSize : m_offEnd;
+
+	// Parents of all families in the block are chosen before offspring are
+	// generated, so that the random selection of parents and the transmission
+	// of genotypes are done in separate passes. More parents are chosen if
+	// families are smaller than expected.
+	vector<ParentChooser::IndividualPair> parents;
+	size_t next = 0;
+	while (it != itEnd) {
+		if (next == parents.size()) {
+			m_ParentChooser->chooseParentsBatch((itEnd - it + m_numOffspring - 1) / m_numOffspring, parents);
+			next = 0;
+		}
+		const ParentChooser::IndividualPair & family = parents[next++];
+		m_OffspringGenerator->generateOffspring(pop, offPop, family.first, family.second, it, itEnd);
 	}
+}
+
+
+void HomoMating::finishBlocks(Population & pop)
+{
 	m_ParentChooser->finalize();
 	m_OffspringGenerator->finalize(pop);
-	return true;
 }
 
 
@@ -1471,19 +1771,17 @@ bool PedigreeMating::mate(Population & pop, Population & scratch)
 	for (; iop != iopEnd; ++iop)
 		(*iop)->initializeIfNeeded(*pop.rawIndBegin());
 
-#pragma omp parallel private(it, it_end) if (numThreads() > 1 && parallelizable())
-	{
-#ifdef _OPENMP
-		size_t id = omp_get_thread_num();
-		size_t offPopSize = scratch.rawIndEnd() - scratch.rawIndBegin();
-		it = scratch.rawIndBegin() + id * (offPopSize / numThreads());
-		it_end = id == numThreads() - 1 ? scratch.rawIndEnd() : it + (offPopSize / numThreads());
-		size_t i = id * (offPopSize / numThreads());
-#else
-		it = scratch.rawIndBegin();
-		it_end = scratch.rawIndEnd();
-		size_t i = 0;
-#endif
+	// offspring are generated in blocks with their own random number streams
+	// so that genotypes of offspring do not depend on the number of threads
+	size_t offPopSize = scratch.rawIndEnd() - scratch.rawIndBegin();
+	ssize_t nBlocks = RNGStream::numBlocks(offPopSize);
+	uint64_t key = RNGStream::newKey();
+#pragma omp parallel for private(it, it_end) if (numThreads() > 1 && parallelizable())
+	for (ssize_t b = 0; b < nBlocks; ++b) {
+		RNGStream stream(key, b);
+		size_t i = b * RNGStream::blockSize;
+		it = scratch.rawIndBegin() + i;
+		it_end = scratch.rawIndBegin() + std::min(i + RNGStream::blockSize, offPopSize);
 		for (; it != it_end; ++it, ++i) {
 			const Individual & pedInd = m_ped.individual(static_cast<double>(i));
 
@@ -1634,6 +1932,10 @@ bool HeteroMating::mate(Population & pop, Population & scratch)
 	if (!prepareScratchPop(pop, scratch))
 		return false;
 
+	// offspring to be populated by each mating scheme
+	vector<MatingTask> tasks;
+	// subpopulations with offspring to be shuffled
+	vectoru shuffled;
 	for (size_t sp = 0; sp < static_cast<size_t>(pop.numSubPop()); ++sp) {
 		vectormating m;
 		vectorf w_pos;                          // positive weights
@@ -1747,37 +2049,63 @@ bool HeteroMating::mate(Population & pop, Population & scratch)
 				                     "of another mating scheme.");
 			if (*itSize == 0)
 				continue;
-			if (sps[idx].isVirtual())
-				pop.activateVirtualSubPop(sps[idx]);
-			// if previous mating scheme works on a virtual subpop,
-			// and the current one is not. deactivate it.
-			else if (pop.hasActivatedVirtualSubPop(sp))
-				pop.deactivateVirtualSubPop(sp);
-
-			// real mating
-			try {
-				if (!m[idx]->mateSubPop(pop, scratch, sp, ind, ind + *itSize))
-					return false;
-			} catch (Exception &) {
-				cerr << "Mating scheme " << idx << " in subpopulation " << sp <<
-				" failed to produce " << (*itSize) << " offspring." << endl;
-				throw;
-			}
+			tasks.push_back(MatingTask(m[idx], idx, sps[idx], ind, ind + *itSize));
 			ind += *itSize;
 		}
 		DBG_ASSERT(ind == scratch.rawIndEnd(sp), SystemError,
 			"Mating scheme somehow does not fill the whole offspring population.");
-		// we do not deactivate each time to save some time
+		if (m.size() > 1 && m_shuffleOffspring)
+			shuffled.push_back(sp);
+	}                         // each subpopulation.
+
+	// Parallelizable mating schemes are prepared one by one, with their
+	// virtual subpopulations activated, and then populate their offspring
+	// together in blocks of families. Because a mating scheme can only be
+	// prepared for one (virtual) subpopulation at a time, a mating scheme that
+	// has been prepared, or a mating scheme that is not parallelizable, waits
+	// until all prepared offspring are populated.
+	vectormating prepared;
+	vector<MatingBlock> blocks;
+	for (size_t t = 0; t <= tasks.size(); ++t) {
+		if (!prepared.empty() && (t == tasks.size() || !tasks[t].ms->parallelizable() ||
+		                          std::find(prepared.begin(), prepared.end(), tasks[t].ms) != prepared.end())) {
+			mateBlocks(pop, scratch, blocks);
+			for (size_t i = 0; i < prepared.size(); ++i)
+				prepared[i]->finishBlocks(pop);
+			prepared.clear();
+			blocks.clear();
+		}
+		if (t == tasks.size())
+			break;
+
+		const MatingTask & task = tasks[t];
+		size_t sp = task.vsp.subPop();
+		pop.activateVirtualSubPop(task.vsp);
+		// real mating
+		try {
+			if (task.ms->parallelizable()) {
+				size_t nBlocks = task.ms->prepareBlocks(pop, sp, task.begin, task.end);
+				for (size_t b = 0; b < nBlocks; ++b)
+					blocks.push_back(MatingBlock(task.ms, b));
+				prepared.push_back(task.ms);
+			} else if (!task.ms->mateSubPop(pop, scratch, sp, task.begin, task.end))
+				return false;
+		} catch (Exception &) {
+			cerr << "Mating scheme " << task.idx << " in subpopulation " << sp <<
+			" failed to produce " << (task.end - task.begin) << " offspring." << endl;
+			throw;
+		}
 		if (pop.hasActivatedVirtualSubPop(sp))
 			pop.deactivateVirtualSubPop(sp);
-		// if more than two mating schemes working on the same subpopulation,
-		// it is better to shuffle offspring afterwards,
-		if (m.size() > 1 && m_shuffleOffspring) {
-			DBG_DO(DBG_MATING, cerr << "Random shuffle individuals in the offspring generation." << endl);
-			getRNG().randomShuffle(scratch.rawIndBegin(sp), scratch.rawIndEnd(sp));
-			scratch.setIndOrdered(false);
-		}
-	}                         // each subpopulation.
+	}
+
+	// if more than two mating schemes working on the same subpopulation,
+	// it is better to shuffle offspring afterwards,
+	for (size_t i = 0; i < shuffled.size(); ++i) {
+		DBG_DO(DBG_MATING, cerr << "Random shuffle individuals in the offspring generation." << endl);
+		getRNG().randomShuffle(scratch.rawIndBegin(shuffled[i]), scratch.rawIndEnd(shuffled[i]));
+		scratch.setIndOrdered(false);
+	}
 	submitScratch(pop, scratch);
 	return true;
 }
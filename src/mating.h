@@ -55,6 +55,11 @@ public:
 	virtual ~SexModel() {}
 	virtual Sex getSex(UINT count) = 0;
 
+	/// prepare the model for \e numOffspring offspring with parents from
+	/// subpopulation \e subPop of \e pop.
+	virtual void initialize(const Population & /* pop */, size_t /* subPop */,
+	                        size_t /* numOffspring */) {}
+
 	virtual void reset() {}
 	virtual SexModel * clone() = 0;
 
@@ -283,7 +288,14 @@ private:
 class FuncSexModel : public SexModel
 {
 public:
-	FuncSexModel(const pyFunc & func) : m_func(func), m_generator(NULL)
+	FuncSexModel(const pyFunc & func) : m_func(func), m_generator(NULL),
+		m_pop(NULL), m_subPop(0), m_numOffspring(0), m_used(0), m_sex(), m_next(0)
+	{
+	}
+
+
+	FuncSexModel(const FuncSexModel & rhs) : SexModel(rhs), m_func(rhs.m_func), m_generator(NULL),
+		m_pop(NULL), m_subPop(0), m_numOffspring(0), m_used(0), m_sex(), m_next(0)
 	{
 	}
 
@@ -296,10 +308,14 @@ public:
 
 	Sex getSex(UINT count);
 
+	void initialize(const Population & pop, size_t subPop, size_t numOffspring);
 
 	void reset()
 	{
 		m_generator.set(NULL);
+		m_pop = NULL;
+		m_sex.clear();
+		m_next = 0;
 	}
 
 
@@ -312,6 +328,16 @@ public:
 private:
 	pyFunc m_func;
 	pyGenerator m_generator;
+
+	const Population * m_pop;
+	size_t m_subPop;
+	size_t m_numOffspring;
+	/// number of offspring whose sex has been determined
+	size_t m_used;
+
+	/// sex returned in an array by the function or generator
+	vector<Sex> m_sex;
+	size_t m_next;
 };
 
 /// CPPONLY
@@ -322,6 +348,11 @@ public:
 	virtual ~NumOffModel() {}
 	virtual UINT getNumOff(ssize_t gen) = 0;
 
+	/// prepare the model for \e numOffspring offspring with parents from
+	/// subpopulation \e subPop of \e pop.
+	virtual void initialize(const Population & /* pop */, size_t /* subPop */,
+	                        size_t /* numOffspring */) {}
+
 	virtual void reset() {}
 	virtual NumOffModel * clone() = 0;
 
@@ -485,7 +516,14 @@ private:
 class FuncNumOffModel : public NumOffModel
 {
 public:
-	FuncNumOffModel(const pyFunc & func) : m_func(func), m_generator(NULL)
+	FuncNumOffModel(const pyFunc & func) : m_func(func), m_generator(NULL),
+		m_pop(NULL), m_subPop(0), m_numOffspring(0), m_used(0), m_numOff(), m_next(0)
+	{
+	}
+
+
+	FuncNumOffModel(const FuncNumOffModel & rhs) : NumOffModel(rhs), m_func(rhs.m_func), m_generator(NULL),
+		m_pop(NULL), m_subPop(0), m_numOffspring(0), m_used(0), m_numOff(), m_next(0)
 	{
 	}
 
@@ -498,15 +536,30 @@ public:
 
 	UINT getNumOff(ssize_t gen);
 
+	void initialize(const Population & pop, size_t subPop, size_t numOffspring);
+
 	void reset()
 	{
 		m_generator.set(NULL);
+		m_pop = NULL;
+		m_numOff.clear();
+		m_next = 0;
 	}
 
 
 private:
 	pyFunc m_func;
 	pyGenerator m_generator;
+
+	const Population * m_pop;
+	size_t m_subPop;
+	size_t m_numOffspring;
+	/// number of offspring in families that have been determined
+	size_t m_used;
+
+	/// numbers of offspring returned in an array by the function or generator
+	vectoru m_numOff;
+	size_t m_next;
 };
 
 
@@ -543,7 +596,13 @@ public:
 	 *  called for each subpopulation to provide number of offspring for all
 	 *  mating events during the populating of this subpopulation. Current
 	 *  generation number will be passed to this function or generator function
-	 *  if parameter "gen" is used in this function. In the last case, a tuple
+	 *  if parameter "gen" is used in this function. The function can also
+	 *  accept parameters "pop" (parental population), "subPop" (index of
+	 *  parental subpopulation) and "size" (number of offspring that have not
+	 *  been assigned to any family) and return an array (e.g. a numpy array)
+	 *  of numbers of offspring, which will be used for the next families
+	 *  before the function is called again. A generator function can yield
+	 *  such arrays as well. In the last case, a tuple
 	 *  (or a list) in one of the following forms can be given:
 	 *  \li <tt>(GEOMETRIC_DISTRIBUTION, p)</tt>
 	 *  \li <tt>(POISSON_DISTRIBUTION, p)</tt>, p > 0
@@ -587,7 +646,12 @@ public:
 	 *  Finally, parameter \e sexMode accepts a function or a generator function.
 	 *  A function will be called whenever an offspring is produced. A generator
 	 *  will be created at each subpopulation and will be used to produce sex
-	 *  for all offspring in this subpopulation. No parameter is accepted.
+	 *  for all offspring in this subpopulation. The function can accept
+	 *  parameters "gen", "pop", "subPop" and "size" (number of offspring whose
+	 *  sex has not been determined) and return an array of \c MALE and
+	 *  \c FEMALE, which will be used for the next offspring before the
+	 *  function is called again. A generator function can yield such arrays as
+	 *  well.
 	 */
 	OffspringGenerator(const opList & ops, const floatListFunc & numOffspring = 1,
 		const floatListFunc & sexMode = RANDOM_SEX);
@@ -616,10 +680,11 @@ public:
 
 
 	/** create an offspring generator, save information from \c pop and \c ops to
-	 *  speed up the calls to \c generateOffspring
+	 *  speed up the calls to \c generateOffspring, which will produce
+	 *  \e numOffspring offspring with parents from subpopulation \e subPop.
 	 *  CPPONLY
 	 */
-	virtual void initialize(const Population & pop, size_t subPop);
+	virtual void initialize(const Population & pop, size_t subPop, size_t numOffspring);
 
 	/// CPPONLY
 	virtual UINT generateOffspring(Population & pop, Population & offPop, Individual * dad, Individual * mom,
@@ -724,7 +789,7 @@ public:
 	ControlledOffspringGenerator(const ControlledOffspringGenerator & rhs);
 
 	/// CPPONLY
-	void initialize(const Population & pop, size_t subPop);
+	void initialize(const Population & pop, size_t subPop, size_t numOffspring);
 
 	/// CPPONLY
 	virtual UINT generateOffspring(Population & pop, Population & offPop, Individual * dad, Individual * mom,
@@ -833,6 +898,18 @@ public:
 	}
 
 
+	/** CPPONLY
+	 *  Choose parents of \e n families and save them to \e parents. The
+	 *  default implementation calls chooseParents() \e n times.
+	 */
+	virtual void chooseParentsBatch(size_t n, vector<IndividualPair> & parents)
+	{
+		parents.resize(n);
+		for (size_t i = 0; i < n; ++i)
+			parents[i] = chooseParents();
+	}
+
+
 	/// destructor
 	virtual ~ParentChooser()
 	{
@@ -964,6 +1041,12 @@ public:
 	/// Return chosen parents from a population if the parent chooser object is created with a population
 	IndividualPair chooseParents();
 
+	/** CPPONLY
+	 *  Choose parents of \e n families. Indexes of all parents are drawn
+	 *  before parents are looked up.
+	 */
+	void chooseParentsBatch(size_t n, vector<IndividualPair> & parents);
+
 protected:
 	RawIndIterator m_basePtr;
 
@@ -1042,6 +1125,12 @@ public:
 	/// Return chosen parents from a population if the parent chooser object is created with a population
 	IndividualPair chooseParents();
 
+	/** CPPONLY
+	 *  Choose parents of \e n families. Indexes of all fathers and mothers
+	 *  are drawn before parents are looked up.
+	 */
+	void chooseParentsBatch(size_t n, vector<IndividualPair> & parents);
+
 private:
 	bool m_replacement;
 
@@ -1349,14 +1438,20 @@ public:
 	 *  parameters \e pop (the parental population) and \e subPop (index
 	 *  of subpopulation) and return the reference or index (relative to
 	 *  subpopulation) of a parent or a pair of parents repeatedly using
-	 *  the iterator interface of the generator function.
+	 *  the iterator interface of the generator function. To avoid calling
+	 *  the generator once for each family, the generator can also yield a
+	 *  two-dimensional array (e.g. a numpy array or other objects that
+	 *  support the buffer protocol) of shape <tt>(n, 2)</tt> with indexes
+	 *  of \c n pairs of parents, or of shape <tt>(n, 1)</tt> with indexes
+	 *  of \c n parents. These parents are used before the generator is
+	 *  called again.
 	 */
 	PyParentsChooser(PyObject * generator);
 
 	/// CPPONLY
 	PyParentsChooser(const PyParentsChooser & rhs)
 		: ParentChooser(rhs), m_func(rhs.m_func),
-		m_popObj(NULL), m_generator(NULL)
+		m_popObj(NULL), m_generator(NULL), m_parents(), m_next(0)
 	{
 		m_initialized = false;
 	}
@@ -1406,14 +1501,20 @@ public:
 	IndividualPair chooseParents();
 
 private:
-#ifndef OPTIMIZED
+	/// read parents from an array yielded by the generator, return false
+	/// if \e item is not a two-dimensional array.
+	bool readParents(PyObject * item);
+
 	size_t m_size;
-#endif
 	IndIterator m_begin;
 
 	pyFunc m_func;
 	PyObject * m_popObj;
 	pyGenerator m_generator;
+
+	/// parents read from the last array yielded by the generator
+	vector<IndividualPair> m_parents;
+	size_t m_next;
 };
 
 
@@ -1551,7 +1652,8 @@ public:
 
 	/// CPPONLY
 	HomoMating(const HomoMating & rhs) :
-		MatingScheme(rhs), m_subPops(rhs.m_subPops), m_weight(rhs.m_weight)
+		MatingScheme(rhs), m_subPops(rhs.m_subPops), m_weight(rhs.m_weight),
+		m_offBegin(), m_offEnd(), m_numOffspring(0), m_blockSize(0), m_key(0)
 	{
 		m_OffspringGenerator = rhs.m_OffspringGenerator->clone();
 		m_ParentChooser = rhs.m_ParentChooser->clone();
@@ -1587,6 +1689,38 @@ public:
 	virtual bool mateSubPop(Population & pop, Population & offPop, size_t subPop,
 		RawIndIterator offBegin, RawIndIterator offEnd);
 
+	/** CPPONLY
+	 *  Whether or not offspring can be generated in blocks of families, which
+	 *  requires that both parent chooser and offspring generator are
+	 *  parallelizable.
+	 */
+	bool parallelizable() const
+	{
+		return m_ParentChooser->parallelizable() && m_OffspringGenerator->parallelizable();
+	}
+
+
+	/** CPPONLY
+	 *  Initialize parent chooser and offspring generator to populate offspring
+	 *  from \e offBegin to \e offEnd with parents from subpopulation \e subPop
+	 *  of \e pop, and return the number of blocks of families that can be
+	 *  populated independently by mateBlock().
+	 */
+	size_t prepareBlocks(Population & pop, size_t subPop,
+		RawIndIterator offBegin, RawIndIterator offEnd);
+
+	/** CPPONLY
+	 *  Populate the \e block-th block of offspring prepared by prepareBlocks(),
+	 *  using a random number stream of the block.
+	 */
+	void mateBlock(Population & pop, Population & offPop, size_t block);
+
+	/** CPPONLY
+	 *  Finalize parent chooser and offspring generator after all blocks have
+	 *  been populated.
+	 */
+	void finishBlocks(Population & pop);
+
 private:
 	ParentChooser * m_ParentChooser;
 	OffspringGenerator * m_OffspringGenerator;
@@ -1597,6 +1731,12 @@ private:
 	///
 	double m_weight;
 
+	/// offspring populated by blocks, set by prepareBlocks()
+	RawIndIterator m_offBegin;
+	RawIndIterator m_offEnd;
+	size_t m_numOffspring;
+	size_t m_blockSize;
+	uint64_t m_key;
 };
 
 
@@ -1730,7 +1870,9 @@ public:
 	virtual string describe(bool format = true) const;
 
 	/** CPPONLY Call each homogeneous mating scheme to populate offspring
-	 *  generation.
+	 *  generation. Parallelizable mating schemes that are applied to
+	 *  different (virtual) subpopulations populate their offspring
+	 *  concurrently.
 	 */
 	bool mate(Population & pop, Population & scratch);
 
@@ -181,23 +181,15 @@ bool Migrator::apply(Population & pop) const
 		} else if (m_mode == BY_PROBABILITY) {
 			WeightedSampler ws(migrationRate[from]);
 
-			// for each individual, migrate according to migration probability
-			if (numThreads() > 1) {
-#ifdef _OPENMP
-#  pragma omp parallel private(toIndex)
-				{
-					for (IndIterator ind = pop.indIterator(spFrom, omp_get_thread_num()); ind.valid(); ++ind) {
-						toIndex = ws.draw();
-						DBG_ASSERT(toIndex < migrationRate[from].size(), ValueError,
-							"Return index out of range.");
-						if (toIndex < toSize && toSubPops[toIndex] != spFrom)
-							ind->setInfo(static_cast<double>(toSubPops[toIndex]), info);
-					}
-				}
-#endif
-			} else {
-				for (IndIterator ind = pop.indIterator(spFrom); ind.valid(); ++ind) {
-					//toIndex = getRNG().randIntByFreq( rateSize, &migrationRate[from][0] ) ;
+			// for each individual, migrate according to migration probability.
+			// Blocks of individuals use their own random number streams so
+			// that migration does not depend on the number of threads.
+			uint64_t key = RNGStream::newKey();
+			ssize_t nBlocks = RNGStream::numBlocks(pop.subPopSize(spFrom));
+#pragma omp parallel for private(toIndex) if(numThreads() > 1)
+			for (ssize_t b = 0; b < nBlocks; ++b) {
+				RNGStream stream(key, b);
+				for (IndIterator ind = pop.indBlockIterator(spFrom, b); ind.valid(); ++ind) {
 					toIndex = ws.draw();
 
 					DBG_ASSERT(toIndex < migrationRate[from].size(), ValueError,
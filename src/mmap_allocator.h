@@ -0,0 +1,233 @@
+/**
+ *  $File: mmap_allocator.h $
+ *  $LastChangedDate$
+ *  $Rev$
+ *
+ *  This file is part of simuPOP, a forward-time population genetics
+ *  simulation environment. Please visit http://simupop.sourceforge.net
+ *  for details.
+ *
+ *  Copyright (C) 2004 - 2010 Bo Peng (bpeng@mdanderson.org)
+ *
+ *  This program is free software: you can redistribute it and/or modify
+ *  it under the terms of the GNU General Public License as published by
+ *  the Free Software Foundation, either version 3 of the License, or
+ *  (at your option) any later version.
+ *
+ *  This program is distributed in the hope that it will be useful,
+ *  but WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ *  GNU General Public License for more details.
+ *
+ *  You should have received a copy of the GNU General Public License
+ *  along with this program. If not, see <http://www.gnu.org/licenses/>.
+ */
+
+#ifndef _MMAP_ALLOCATOR_H
+#define _MMAP_ALLOCATOR_H
+
+/**
+   \file
+   \brief an allocator that optionally allocates memory from memory-mapped files.
+
+   Genotypes, lineage, information fields and individuals of a population are
+   stored in vectors that use this allocator, which counts all allocations
+   (see storageAllocations()). A default-constructed allocator allocates memory from the heap, just like
+   std::allocator. An allocator constructed with a directory allocates memory
+   from a temporary file under that directory. The file is removed right after
+   it is mapped so nothing is left on disk after the memory is released, but
+   the operating system can page cold genotypes out to the file instead of
+   keeping them in RAM (or swap).
+ */
+
+#include <new>
+#include <string>
+#include <cstddef>
+#include <cstdlib>
+#include <cstring>
+#include <limits>
+
+#if defined(_WIN32) || defined(_WIN64)
+#  define SIMUPOP_NO_MMAP
+#else
+#  include <sys/mman.h>
+#  include <unistd.h>
+#endif
+
+namespace simuPOP {
+
+/// CPPONLY record an allocation of \e bytes bytes of population storage,
+/// which can be called from multiple threads.
+void countStorageAllocation(size_t bytes);
+
+/// CPPONLY
+inline void * mmapAllocate(const std::string & dir, size_t bytes)
+{
+#ifdef SIMUPOP_NO_MMAP
+	(void)dir;
+	return ::operator new(bytes);
+#else
+	std::string name = dir + "/simuPOP_geno_XXXXXX";
+	char * tmpl = new char[name.size() + 1];
+	std::strcpy(tmpl, name.c_str());
+	int fd = mkstemp(tmpl);
+	if (fd == -1) {
+		delete[] tmpl;
+		throw std::bad_alloc();
+	}
+	// the file will be removed when it is unmapped
+	unlink(tmpl);
+	delete[] tmpl;
+	if (ftruncate(fd, bytes) != 0) {
+		close(fd);
+		throw std::bad_alloc();
+	}
+	void * ptr = mmap(NULL, bytes, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+	close(fd);
+	if (ptr == MAP_FAILED)
+		throw std::bad_alloc();
+	return ptr;
+#endif
+}
+
+
+/// CPPONLY
+inline void mmapDeallocate(void * ptr, size_t bytes)
+{
+#ifdef SIMUPOP_NO_MMAP
+	(void)bytes;
+	::operator delete(ptr);
+#else
+	munmap(ptr, bytes);
+#endif
+}
+
+
+/** CPPONLY
+ *  An allocator that allocates memory from the heap (default), or from
+ *  temporary memory-mapped files under a specified directory, and counts
+ *  all allocations.
+ */
+template <typename T>
+class MmapAllocator
+{
+public:
+	typedef T value_type;
+	typedef T * pointer;
+	typedef const T * const_pointer;
+	typedef T & reference;
+	typedef const T & const_reference;
+	typedef std::size_t size_type;
+	typedef std::ptrdiff_t difference_type;
+
+#if __cplusplus >= 201103L
+	// storage moves with the data when vectors are swapped or assigned.
+	typedef std::true_type propagate_on_container_swap;
+	typedef std::true_type propagate_on_container_copy_assignment;
+	typedef std::true_type propagate_on_container_move_assignment;
+#endif
+
+	template <typename U>
+	struct rebind
+	{
+		typedef MmapAllocator<U> other;
+	};
+
+	MmapAllocator() : m_dir()
+	{
+	}
+
+
+	explicit MmapAllocator(const std::string & dir) : m_dir(dir)
+	{
+	}
+
+
+	template <typename U>
+	MmapAllocator(const MmapAllocator<U> & rhs) : m_dir(rhs.dir())
+	{
+	}
+
+
+	/// directory of memory-mapped files, empty for memory allocated from heap
+	const std::string & dir() const
+	{
+		return m_dir;
+	}
+
+
+	pointer address(reference x) const
+	{
+		return &x;
+	}
+
+
+	const_pointer address(const_reference x) const
+	{
+		return &x;
+	}
+
+
+	pointer allocate(size_type n, const void * = 0)
+	{
+		if (n == 0)
+			return 0;
+		if (n > max_size())
+			throw std::bad_alloc();
+		countStorageAllocation(n * sizeof(T));
+		if (m_dir.empty())
+			return static_cast<pointer>(::operator new(n * sizeof(T)));
+		return static_cast<pointer>(mmapAllocate(m_dir, n * sizeof(T)));
+	}
+
+
+	void deallocate(pointer p, size_type n)
+	{
+		if (p == 0)
+			return;
+		if (m_dir.empty())
+			::operator delete(p);
+		else
+			mmapDeallocate(p, n * sizeof(T));
+	}
+
+
+	size_type max_size() const
+	{
+		return std::numeric_limits<size_type>::max() / sizeof(T);
+	}
+
+
+	void construct(pointer p, const T & val)
+	{
+		new (static_cast<void *>(p))T(val);
+	}
+
+
+	void destroy(pointer p)
+	{
+		p->~T();
+	}
+
+
+private:
+	std::string m_dir;
+};
+
+
+template <typename T, typename U>
+inline bool operator==(const MmapAllocator<T> & lhs, const MmapAllocator<U> & rhs)
+{
+	return lhs.dir() == rhs.dir();
+}
+
+
+template <typename T, typename U>
+inline bool operator!=(const MmapAllocator<T> & lhs, const MmapAllocator<U> & rhs)
+{
+	return lhs.dir() != rhs.dir();
+}
+
+
+}
+#endif
@@ -23,6 +23,14 @@
  *  along with this program. If not, see <http://www.gnu.org/licenses/>.
  */
 #include "outputer.h"
+#include "tagger.h"
+#include <cstdio>
+
+#if PY_VERSION_HEX >= 0x03000000
+#  define PyString_FromString(x) PyUnicode_FromString(x)
+#  define PyString_Check PyUnicode_Check
+#  define PyInt_Check PyLong_Check
+#endif
 
 namespace simuPOP {
 
@@ -193,4 +201,214 @@ bool SavePopulation::apply(Population & pop) const
 }
 
 
+Checkpoint::Checkpoint(const stringFunc & output, PyObject * objs, int compress,
+	int begin, int end, int step, const intList & at, const intList & reps,
+	const subPopList & subPops, const stringList & infoFields) :
+	BaseOperator("", begin, end, step, at, reps, subPops, infoFields),
+	m_filename(output.value()), m_objs(NULL), m_compress(compress), m_startGens()
+{
+	PARAM_FAILIF(compress < 0 || compress > 9, ValueError,
+		(boost::format("Compression level should be between 0 and 9, %1% given.") % compress).str());
+	DBG_WARNIF(output.empty(), "An empty output string is passed to operator Checkpoint. No checkpoint will be saved.");
+	// save objects as a list
+	if (objs == NULL || objs == Py_None)
+		m_objs = pyObject(PyList_New(0));
+	else if (PyList_Check(objs) || PyTuple_Check(objs))
+		m_objs = pyObject(PySequence_List(objs));
+	else {
+		m_objs = pyObject(PyList_New(1));
+		Py_INCREF(objs);
+		PyList_SetItem(m_objs.object(), 0, objs);
+	}
+	// pyObject holds its own reference
+	Py_DECREF(m_objs.object());
+}
+
+
+string Checkpoint::describe(bool /* format */) const
+{
+	return "<simuPOP.Checkpoint> save checkpoint to file " + m_filename;
+}
+
+
+bool Checkpoint::apply(Population & pop) const
+{
+	if (m_filename.empty())
+		return true;
+
+	string filename;
+
+	if (m_filename[0] != '!')
+		filename = m_filename;
+	else {
+		Expression filenameParser(m_filename.substr(1));
+		filenameParser.setLocalDict(pop.dict());
+		filename = filenameParser.valueAsString();
+	}
+
+	size_t startGen = pop.rep() < m_startGens.size() ? m_startGens[pop.rep()] : pop.gen();
+	PyObject * state = PyDict_New();
+	PyObject * val = PyLong_FromSize_t(startGen);
+	PyDict_SetItemString(state, "start_gen", val);
+	Py_DECREF(val);
+	val = PyLong_FromUnsignedLong(nextIndID());
+	PyDict_SetItemString(state, "next_id", val);
+	Py_DECREF(val);
+	val = PyString_FromString(getRNG().name());
+	PyDict_SetItemString(state, "rng_name", val);
+	Py_DECREF(val);
+	val = PyLong_FromUnsignedLong(getRNG().seed());
+	PyDict_SetItemString(state, "rng_seed", val);
+	Py_DECREF(val);
+	vectorstr rngStates = getRNGStates();
+	val = PyList_New(rngStates.size());
+	for (size_t i = 0; i < rngStates.size(); ++i)
+		PyList_SetItem(val, i, PyBytes_FromStringAndSize(rngStates[i].data(), rngStates[i].size()));
+	PyDict_SetItemString(state, "rng_states", val);
+	Py_DECREF(val);
+	// attributes of objects are pickled separately, without items that
+	// cannot be pickled.
+	size_t numObjs = PyList_Size(m_objs.object());
+	val = PyList_New(numObjs);
+	for (size_t i = 0; i < numObjs; ++i) {
+		PyObject * attrs = PyObject_GetAttrString(PyList_GetItem(m_objs.object(), i), "__dict__");
+		if (attrs == NULL || !PyDict_Check(attrs)) {
+			PyErr_Clear();
+			Py_XDECREF(attrs);
+			Py_DECREF(val);
+			Py_DECREF(state);
+			throw ValueError("Attributes of objects passed to operator Checkpoint cannot be saved.");
+		}
+		SharedVariables attrVars(PyDict_Copy(attrs), true);
+		Py_DECREF(attrs);
+		string pickled = attrVars.to_pickle();
+		PyList_SetItem(val, i, PyBytes_FromStringAndSize(pickled.data(), pickled.size()));
+	}
+	PyDict_SetItemString(state, "objs", val);
+	Py_DECREF(val);
+
+	DBG_DO(DBG_POPULATION, cerr << "Save checkpoint to file " << filename << endl);
+	// states are saved as a population variable
+	PyDict_SetItemString(pop.dict(), CHECKPOINT_VAR, state);
+	Py_DECREF(state);
+	string tmpFile = filename + ".tmp";
+	try {
+		pop.save(tmpFile, m_compress);
+	} catch (...) {
+		PyDict_DelItemString(pop.dict(), CHECKPOINT_VAR);
+		throw;
+	}
+	PyDict_DelItemString(pop.dict(), CHECKPOINT_VAR);
+	// rename does not replace an existing file under windows
+	if (rename(tmpFile.c_str(), filename.c_str()) != 0 &&
+	    (remove(filename.c_str()) != 0 || rename(tmpFile.c_str(), filename.c_str()) != 0))
+		throw RuntimeError("Failed to save checkpoint to file " + filename);
+	return true;
+}
+
+
+namespace {
+
+// return item \e key of checkpoint states, which should be an integer, a
+// string or a list of bytes.
+PyObject * checkpointItem(PyObject * state, const char * key, char type, const string & filename)
+{
+	PyObject * item = PyDict_GetItemString(state, key);
+	bool valid = item != NULL;
+
+	if (valid && type == 'i')
+		valid = (PyInt_Check(item) || PyLong_Check(item)) && !PyBool_Check(item);
+	else if (valid && type == 's')
+		valid = PyString_Check(item) != 0;
+	else if (valid && type == 'l') {
+		valid = PyList_Check(item) != 0;
+		for (Py_ssize_t i = 0; valid && i < PyList_Size(item); ++i)
+			valid = PyBytes_Check(PyList_GetItem(item, i)) != 0;
+	}
+	if (!valid)
+		throw ValueError("File " + filename + " is not a valid checkpoint (invalid or missing " + key + ").");
+	return item;
+}
+
+
+string checkpointBytes(PyObject * item)
+{
+	char * buf = NULL;
+	Py_ssize_t sz = 0;
+
+	PyBytes_AsStringAndSize(item, &buf, &sz);
+	return string(buf, sz);
+}
+
+
+}
+
+size_t loadCheckpoint(const string & filename, Population & pop, bool restoreStates, PyObject * objs)
+{
+	pop.load(filename, subPopList(), lociList(), uintList(), true);
+	PyObject * state = PyDict_GetItemString(pop.dict(), CHECKPOINT_VAR);
+	if (state == NULL || !PyDict_Check(state))
+		throw ValueError("File " + filename + " is not a checkpoint saved by operator Checkpoint.");
+	// hold a reference because the variable is removed from population
+	Py_INCREF(state);
+	PyDict_DelItemString(pop.dict(), CHECKPOINT_VAR);
+
+	size_t startGen = 0;
+	try {
+		// check all states before any of them is restored
+		PyObject * startGenObj = checkpointItem(state, "start_gen", 'i', filename);
+		PyObject * nextID = checkpointItem(state, "next_id", 'i', filename);
+		PyObject * rngName = checkpointItem(state, "rng_name", 's', filename);
+		PyObject * rngSeed = checkpointItem(state, "rng_seed", 'i', filename);
+		PyObject * rngStateList = checkpointItem(state, "rng_states", 'l', filename);
+		PyObject * objStates = checkpointItem(state, "objs", 'l', filename);
+
+		startGen = PyLong_AsSize_t(startGenObj);
+		if (PyErr_Occurred()) {
+			PyErr_Clear();
+			throw ValueError("File " + filename + " is not a valid checkpoint (invalid start_gen).");
+		}
+		// a checkpoint is saved after mating so the population is at the next generation
+		pop.setGen(pop.gen() + 1);
+		if (restoreStates) {
+			Py_ssize_t numObjs = objs == NULL ? 0 : PyList_Size(objs);
+			if (numObjs != PyList_Size(objStates))
+				throw ValueError((boost::format("Checkpoint %1% has states of %2% objects but %3% objects are given.")
+						          % filename % PyList_Size(objStates) % numObjs).str());
+
+			vectorstr rngStates;
+			for (Py_ssize_t i = 0; i < PyList_Size(rngStateList); ++i)
+				rngStates.push_back(checkpointBytes(PyList_GetItem(rngStateList, i)));
+			string name;
+			PyObj_As_String(rngName, name);
+			unsigned long seed = PyLong_AsUnsignedLong(rngSeed);
+			unsigned long id = PyLong_AsUnsignedLong(nextID);
+			if (PyErr_Occurred()) {
+				PyErr_Clear();
+				throw ValueError("File " + filename + " is not a valid checkpoint (invalid rng_seed or next_id).");
+			}
+			setRNGStates(name, seed, rngStates);
+			IdTagger().reset(id);
+
+			for (Py_ssize_t i = 0; i < numObjs; ++i) {
+				SharedVariables attrVars;
+				attrVars.from_pickle(checkpointBytes(PyList_GetItem(objStates, i)));
+				PyObject * attrs = PyObject_GetAttrString(PyList_GetItem(objs, i), "__dict__");
+				if (attrs == NULL || PyDict_Update(attrs, attrVars.dict()) != 0) {
+					PyErr_Clear();
+					Py_XDECREF(attrs);
+					throw ValueError("Failed to restore attributes of objects from checkpoint " + filename);
+				}
+				Py_DECREF(attrs);
+			}
+		}
+	} catch (...) {
+		Py_DECREF(state);
+		throw;
+	}
+	Py_DECREF(state);
+	return startGen;
+}
+
+
 }
@@ -216,5 +216,98 @@ private:
 	const string m_filename;
 };
 
+
+/** An operator that saves a checkpoint of a population so that an
+ *  interrupted evolution can be resumed by function \c Simulator.evolve
+ *  (parameter \e resume). A checkpoint is a population saved in the binary
+ *  format to \e output (see \c Population.save for compression level
+ *  \e compress), along with the generation at which the evolution started,
+ *  the states of random number generators, the ID of the next individual
+ *  to be assigned by \c IdTagger, and attributes of Python objects \e objs,
+ *  which should be used to save the progress of objects such as demographic
+ *  models that are called during evolution. Attributes that cannot be
+ *  pickled are not saved. A checkpoint is written to a temporary file and
+ *  renamed to \e output so an existing checkpoint is kept if the evolution
+ *  is interrupted while a checkpoint is being written.
+ *
+ *  This operator can only be used as a post-mating operator (preferably
+ *  the last one) so that an evolution is resumed from the next generation
+ *  in exactly the same state. Parameter \e output should be an expression (e.g.
+ *  <tt>"!'ckpt_%d.pop' % rep"</tt>) if there are more than one replicate.
+ *  Checkpoints are saved as complete populations because genotypes of
+ *  offspring generations are newly created from their parents. Parameter
+ *  \e subPops is ignored. Please refer to class \c BaseOperator for a
+ *  detailed description about common operator parameters such as \e begin
+ *  and \e step.
+ */
+class Checkpoint : public BaseOperator
+{
+public:
+	/** Create an operator that saves a checkpoint to \e output, with
+	 *  attributes of Python objects \e objs (a single object or a list of
+	 *  objects), at compression level \e compress.
+	 */
+	Checkpoint(const stringFunc & output = "", PyObject * objs = NULL, int compress = 1,
+		int begin = 0, int end = -1, int step = 1, const intList & at = vectori(),
+		const intList & reps = intList(), const subPopList & subPops = subPopList(),
+		const stringList & infoFields = vectorstr());
+
+	/// destructor.
+	~Checkpoint()
+	{
+	}
+
+
+	/// HIDDEN Deep copy of a Checkpoint operator.
+	virtual BaseOperator * clone() const
+	{
+		return new Checkpoint(*this);
+	}
+
+
+	/// HIDDEN apply operator to population \e pop.
+	virtual bool apply(Population & pop) const;
+
+	/// HIDDEN
+	string describe(bool format = true) const;
+
+	/// CPPONLY set the generations at which replicates start to evolve.
+	void setStartGens(const vectoru & gens) const
+	{
+		m_startGens = gens;
+	}
+
+
+	/// CPPONLY Python objects whose attributes are saved
+	PyObject * objs() const
+	{
+		return m_objs.object();
+	}
+
+
+private:
+	/// filename,
+	const string m_filename;
+
+	/// a list of Python objects
+	pyObject m_objs;
+
+	/// compression level
+	const int m_compress;
+
+	/// generation at which each replicate starts to evolve
+	mutable vectoru m_startGens;
+};
+
+
+/** CPPONLY Load population \e pop from a checkpoint \e filename saved by
+ *  operator \c Checkpoint and set its generation to the next generation.
+ *  If \e restoreStates is \c true, also restore random number generators,
+ *  individual IDs and attributes of Python objects \e objs (can be \c NULL)
+ *  recorded in the checkpoint. Return the generation at which the evolution
+ *  started.
+ */
+size_t loadCheckpoint(const string & filename, Population & pop, bool restoreStates, PyObject * objs);
+
 }
 #endif
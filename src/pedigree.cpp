@@ -25,13 +25,18 @@
 
 #include "pedigree.h"
 #include <fstream>
+#include <sstream>
 using std::ifstream;
 using std::ofstream;
 
 #include <set>
+#include <cstring>
 
 namespace simuPOP {
 
+const char BinaryPedigreeMagic[8] = { 's', 'i', 'm', 'u', 'P', 'E', 'D', '\x89' };
+const uint32_t BinaryPedigreeVersion = 1;
+
 Pedigree::Pedigree(const Population & pop, const lociList & loci,
 	const stringList & infoFields, const uintList & ancGens, const string & idField,
 	const string & fatherField, const string & motherField, bool stealPop)
@@ -118,13 +123,24 @@ Pedigree * Pedigree::clone() const
 }
 
 
+// size of buffer for records of a compressed pedigree file
+#define PEDIGREE_BUFFER_SIZE (16 * 1024 * 1024)
+
 void Pedigree::save(const string & filename, const stringList & fieldList,
-                    const lociList & lociList) const
+                    const lociList & lociList, int compress) const
 {
-	ofstream file(filename.c_str());
+	PARAM_FAILIF(compress < 0 || compress > 9, ValueError,
+		(boost::format("Compression level should be between 0 and 9, %1% given.") % compress).str());
+
+	ofstream out(filename.c_str(), compress > 0 ? std::ios::binary : std::ios::out);
 
-	if (!file)
+	if (!out)
 		throw RuntimeError("Cannot open file " + filename + " for write.");
+	// compressed files are written to a buffer, which is compressed in
+	// blocks whenever it becomes large
+	std::ostringstream buf;
+	string data;
+	std::ostream & file = compress > 0 ? buf : static_cast<std::ostream &>(out);
 
 	vectorstr fields = fieldList.allAvail() ? infoFields() : fieldList.elems();
 	vectoru indexes;
@@ -176,10 +192,23 @@ void Pedigree::save(const string & filename, const stringList & fieldList,
 				for (size_t p = 0; p < ply; ++p)
 					file << " " << it->allele(loci[i], p);
 			file << '\n';
+			if (compress > 0 && static_cast<size_t>(buf.tellp()) >= PEDIGREE_BUFFER_SIZE) {
+				data = buf.str();
+				writeBGZF(out, data, compress, false);
+				// keep the incomplete block
+				buf.str(data);
+				buf.seekp(0, std::ios::end);
+			}
 		}
 	}
 	const_cast<Pedigree *>(this)->useAncestralGen(curGen);
-	file.close();
+	if (compress > 0) {
+		data = buf.str();
+		writeBGZF(out, data, compress);
+	}
+	out.close();
+	if (!out)
+		throw RuntimeError("Failed to write to file " + filename);
 }
 
 
@@ -1335,6 +1364,130 @@ struct IndInfo
 	IndInfo(size_t off) : sex(MALE), parents(), offspring(1, off), affectionStatus(false), fields(), genotype() {}
 };
 
+#if TR1_SUPPORT == 0
+typedef std::map<size_t, IndInfo *> IdMap;
+#else
+typedef std::tr1::unordered_map<size_t, IndInfo *> IdMap;
+#endif
+
+namespace {
+
+// add an individual with ID myID, and register it as offspring of its parents
+IndInfo * addIndInfo(IdMap & individuals, size_t myID)
+{
+	if (individuals.find(myID) != individuals.end())
+		throw ValueError((boost::format("Duplicate individual ID %1%") % myID).str());
+	return (individuals.insert(IdMap::value_type(myID, new IndInfo())).first)->second;
+}
+
+
+void addParent(IdMap & individuals, IndInfo * info, size_t myID, size_t id)
+{
+	info->parents.push_back(id);
+	IdMap::iterator it = individuals.find(id);
+	// this is a parent but we do not know if he or she has parent
+	if (it == individuals.end())
+		individuals[id] = new IndInfo(myID);
+	else
+		it->second->offspring.push_back(myID);
+}
+
+
+// read records of a pedigree file in the binary format, after its magic
+// string. Records are decoded in chunks, and a file can contain several
+// headers if it is appended by several operators or runs.
+void readBinaryPedigree(std::istream & input, IdMap & individuals, size_t numInfoFields,
+                        int pldy, vectoru & loci, size_t & genoCols, size_t & maxParents)
+{
+	const size_t magicSize = sizeof(BinaryPedigreeMagic);
+	const size_t chunkRecords = 65536;
+	string chunk;
+	bool more = true;
+
+	while (more) {
+		char header[24];
+		if (!input.read(header, 24))
+			throw ValueError("Incomplete header of binary pedigree file.");
+		if (getLE(header, 4) > BinaryPedigreeVersion)
+			throw ValueError("Binary pedigree file of a newer version is not supported.");
+		size_t numParents = static_cast<size_t>(getLE(header + 4, 4));
+		size_t numFields = static_cast<size_t>(getLE(header + 8, 4));
+		size_t ploidy = static_cast<size_t>(getLE(header + 12, 4));
+		size_t numLoci = static_cast<size_t>(getLE(header + 16, 4));
+		size_t alleleBytes = static_cast<size_t>(getLE(header + 20, 4));
+		if (numParents > 2)
+			throw ValueError("At most two parental IDs are allowed.");
+		if (alleleBytes == 0 || alleleBytes > 8)
+			throw ValueError("Invalid size of alleles in binary pedigree file.");
+		size_t cols = ploidy * numLoci;
+		if (cols > 0) {
+			if (loci.empty()) {
+				loci.push_back(cols / pldy);
+				genoCols = cols;
+				if (loci.back() * pldy != genoCols)
+					throw ValueError("Incorrect number of genotype colmns for a diploid population.");
+			} else if (genoCols != cols)
+				throw ValueError("Inconsistent number of columns of genotypes.");
+		}
+		size_t recordSize = 8 * (1 + numParents + numFields) + 1 + cols * alleleBytes;
+		size_t loadedFields = std::min(numFields, numInfoFields);
+		//
+		more = false;
+		while (true) {
+			std::streamoff chunkStart = input.tellg();
+			chunk.resize(recordSize * chunkRecords);
+			input.read(&chunk[0], chunk.size());
+			size_t size = static_cast<size_t>(input.gcount());
+			if (size == 0)
+				break;
+			size_t pos = 0;
+			for (; pos < size; pos += recordSize) {
+				const char * p = chunk.data() + pos;
+				// another header
+				if (size - pos >= magicSize && memcmp(p, BinaryPedigreeMagic, magicSize) == 0) {
+					more = true;
+					break;
+				}
+				if (size - pos < recordSize)
+					throw ValueError("Binary pedigree file is truncated.");
+				size_t myID = static_cast<size_t>(getLE(p, 8));
+				IndInfo * info = addIndInfo(individuals, myID);
+				p += 8;
+				for (size_t i = 0; i < numParents; ++i, p += 8) {
+					size_t id = static_cast<size_t>(getLE(p, 8));
+					if (id)
+						addParent(individuals, info, myID, id);
+				}
+				info->sex = (*p & 1) ? FEMALE : MALE;
+				info->affectionStatus = (*p & 2) != 0;
+				++p;
+				info->fields.resize(loadedFields);
+				for (size_t i = 0; i < loadedFields; ++i) {
+					uint64_t bits = getLE(p + i * 8, 8);
+					memcpy(&info->fields[i], &bits, sizeof(double));
+				}
+				p += numFields * 8;
+				info->genotype.resize(cols);
+				for (size_t i = 0; i < cols; ++i, p += alleleBytes)
+					info->genotype[i] = TO_ALLELE(getLE(p, alleleBytes));
+				if (maxParents < info->parents.size())
+					maxParents = info->parents.size();
+			}
+			if (more) {
+				// continue from the header
+				input.clear();
+				input.seekg(chunkStart + static_cast<std::streamoff>(pos + magicSize));
+				break;
+			}
+			if (size < chunk.size())
+				break;
+		}
+	}
+}
+
+
+}
+
 
 Pedigree loadPedigree(const string & file, const string & idField, const string & fatherField,
                       const string & motherField, float ploidy, const uintList & _lociList, const uintList & chromTypes,
@@ -1353,19 +1506,32 @@ Pedigree loadPedigree(const string & file, const string & idField, const string
 	vectoru loci = _lociList.elems();
 	size_t genoCols = accumulate(loci.begin(), loci.end(), size_t(0)) * pldy;
 
-	ifstream input(file.c_str());
-	if (!input)
-		throw RuntimeError("Cannot open specified pedigree file " + file);
+	// pedigree files saved with compression are decompressed in parallel
+	string content;
+	std::istringstream bgzfInput;
+	ifstream fileInput;
+	bool compressed = readBGZF(file, content);
+	if (compressed) {
+		bgzfInput.str(content);
+		string().swap(content);
+	} else {
+		fileInput.open(file.c_str());
+		if (!fileInput)
+			throw RuntimeError("Cannot open specified pedigree file " + file);
+	}
+	std::istream & input = compressed ? static_cast<std::istream &>(bgzfInput) : fileInput;
 	//
 	size_t max_parents = 0;
 	string line;
 	// individual and their parents
-#if TR1_SUPPORT == 0
-	typedef std::map<size_t, IndInfo *> IdMap;
-#else
-	typedef std::tr1::unordered_map<size_t, IndInfo *> IdMap;
-#endif
 	IdMap individuals;
+	char magic[sizeof(BinaryPedigreeMagic)];
+	if (input.read(magic, sizeof(magic)) && memcmp(magic, BinaryPedigreeMagic, sizeof(magic)) == 0)
+		readBinaryPedigree(input, individuals, infoFields.size(), pldy, loci, genoCols, max_parents);
+	else {
+		input.clear();
+		input.seekg(0);
+	}
 	while (getline(input, line)) {
 		if (line.empty())
 			continue;
@@ -1381,9 +1547,7 @@ Pedigree loadPedigree(const string & file, const string & idField, const string
 			// collect self ID
 			if (part == 0) {
 				myID = atoi(q);
-				if (individuals.find(myID) != individuals.end())
-					throw ValueError((boost::format("Duplicate individual ID %1%") % myID).str());
-				info = (individuals.insert(IdMap::value_type(myID, new IndInfo())).first)->second;
+				info = addIndInfo(individuals, myID);
 				++part;
 				continue;
 				// parental ID and sex
@@ -1398,15 +1562,8 @@ Pedigree loadPedigree(const string & file, const string & idField, const string
 					continue;
 				} else {
 					size_t id = atoi(q);
-					if (id) {
-						info->parents.push_back(id);
-						IdMap::iterator it = individuals.find(id);
-						// this is a parent but we do not know if he or she has parent
-						if (it == individuals.end())
-							individuals[id] = new IndInfo(myID);
-						else
-							it->second->offspring.push_back(myID);
-					}
+					if (id)
+						addParent(individuals, info, myID, id);
 					if (info->parents.size() > 2)
 						throw ValueError("At most two parental IDs are allowed before sex information");
 				}
@@ -1450,7 +1607,6 @@ Pedigree loadPedigree(const string & file, const string & idField, const string
 		if (max_parents < info->parents.size())
 			max_parents = info->parents.size();
 	}
-	input.close();
 	elapsedTime("Readfile");
 	DBG_DO(DBG_POPULATION, cerr << "Information about " << individuals.size() << " individuals are loaded." << endl);
 	// create the top most ancestral generation
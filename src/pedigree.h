@@ -119,6 +119,21 @@ public:
 	 */
 	Pedigree * clone() const;
 
+	/** HIDDEN Return names of the ID, father ID and mother ID information
+	 *  fields of the pedigree. Empty names are returned for parents that are
+	 *  not tracked. This function is used to pickle pedigrees.
+	 */
+	vectorstr pedigreeFields() const
+	{
+		vectorstr fields(3);
+
+		fields[0] = m_idField;
+		fields[1] = m_fatherField;
+		fields[2] = m_motherField;
+		return fields;
+	}
+
+
 	/** Save a pedigree to file \e filename. This function goes through all
 	 *  individuals of a pedigree and outputs in each line the ID of individual,
 	 *  IDs of his or her parents, sex (\c 'M' or \c 'F'), affection status
@@ -133,11 +148,16 @@ public:
 	 *  no family ID and IDs of all individuals have to be unique. Note that
 	 *  parental IDs will be set to zero if the parent is not in the pedigree
 	 *  object. Therefore, the parents of individuals in the top-most ancestral
-	 *  generation will always be zero.
+	 *  generation will always be zero. If a compression level \e compress
+	 *  (\c 1 for fastest to \c 9 for best compression) is given, the file
+	 *  is compressed in independent blocks, in parallel if multiple threads
+	 *  are used, and written as concatenated gzip blocks (the BGZF format)
+	 *  that can be decompressed by \c gzip and are loaded by
+	 *  \c loadPedigree directly.
 	 *  <group>1-ped</group>
 	 */
 	void save(const string & filename, const stringList & infoFields = vectorstr(),
-		const lociList & loci = vectoru()) const;
+		const lociList & loci = vectoru(), int compress = 0) const;
 
 	/** Return a reference to individual with \e id. An \c IndexError will be
 	 *  raised if no individual with \e id is found. An float \e id is
@@ -405,7 +425,9 @@ private:
  *  values of information fields and genotype at some loci. IDs of each
  *  individual and their parents are loaded to information fields \e idField,
  *  \e fatherField and \e motherField. Only numeric IDs are allowed, and
- *  individual IDs must be unique across all generations.
+ *  individual IDs must be unique across all generations. Files compressed by
+ *  \c Pedigree.save are decompressed in parallel if multiple threads are
+ *  used.
  *
  *  Because this file does not contain generation information, generations to
  *  which offspring belong are determined by the parent-offspring relationships.
@@ -434,6 +456,12 @@ private:
  *  \e chromTypes, \e lociPos, \e chromNames, \e alleleNames, \e lociNames
  *  could be used to specified the genotype structured of the loaded pedigree.
  *  Please refer to class \c Population for details about these parameters.
+ *
+ *  Files written by operator \c PedigreeTagger in the binary format
+ *  (parameter \e binary) are recognized automatically. Their records are
+ *  decoded in large chunks, and genotypes are loaded according to the
+ *  number of loci and ploidy recorded in the file. Values of the first
+ *  <tt>len(infoFields)</tt> recorded information fields are loaded.
  */
 Pedigree loadPedigree(const string & file,
 	const string & idField = "ind_id",
@@ -449,5 +477,13 @@ Pedigree loadPedigree(const string & file,
 	const stringList & subPopNames = vectorstr(),
 	const stringList & infoFields = vectorstr());
 
+#ifndef SWIG
+/// CPPONLY magic string at the beginning of pedigree files in the binary format
+extern const char BinaryPedigreeMagic[8];
+
+/// CPPONLY version of the binary pedigree format
+extern const uint32_t BinaryPedigreeVersion;
+#endif
+
 }
 #endif
@@ -63,11 +63,15 @@ bool BasePenetrance::apply(Population & pop) const
 			if (sp->isVirtual())
 				pop.activateVirtualSubPop(*sp);
 
-			if (numThreads() > 1 && parallelizable()) {
-#pragma omp parallel
-				{
-#ifdef _OPENMP
-					IndIterator ind = pop.indIterator(sp->subPop(), omp_get_thread_num());
+			if (parallelizable()) {
+				// blocks of individuals use their own random number streams
+				// so that affection status does not depend on the number of threads
+				uint64_t key = RNGStream::newKey();
+				ssize_t nBlocks = RNGStream::numBlocks(pop.subPopSize(sp->subPop()));
+#pragma omp parallel for if(numThreads() > 1)
+				for (ssize_t b = 0; b < nBlocks; ++b) {
+					RNGStream stream(key, b);
+					IndIterator ind = pop.indBlockIterator(sp->subPop(), b);
 					for (; ind.valid(); ++ind) {
 						double p = penet(&pop, ind.rawIter());
 
@@ -79,7 +83,6 @@ bool BasePenetrance::apply(Population & pop) const
 						else
 							ind->setAffected(false);
 					}
-#endif
 				}
 			} else {
 				IndIterator ind = pop.indIterator(sp->subPop());
@@ -29,6 +29,13 @@
 // for file compression
 #include "boost_pch.hpp"
 
+#include <boost/iostreams/device/array.hpp>
+#include <boost/iostreams/stream.hpp>
+
+#include <zlib.h>
+#include <fstream>
+#include <cstring>
+
 #if PY_VERSION_HEX >= 0x03000000
 #  define PyInt_FromLong(x) PyLong_FromLong(x)
 #endif
@@ -38,6 +45,53 @@ using std::max_element;
 
 namespace simuPOP {
 
+// number and total size of allocations of genotype, lineage, information
+// field and individual storage of populations, see storageAllocations().
+// They are updated atomically because storage can be allocated by threads.
+static ATOMICLONG g_storageAllocations = 0;
+static ATOMICLONG g_storageAllocatedBytes = 0;
+
+void countStorageAllocation(size_t bytes)
+{
+	fetchAndIncrement(&g_storageAllocations);
+	fetchAndAdd(&g_storageAllocatedBytes, static_cast<ATOMICLONG>(bytes));
+}
+
+
+namespace {
+
+// make sure that storage can hold size elements. Storage grows in chunks
+// of at least half of its existing capacity so that a slowly growing
+// population does not have to be reallocated every generation.
+template <typename T>
+void reserveStorage(T & storage, size_t size)
+{
+	if (size <= storage.capacity())
+		return;
+	storage.reserve(std::max(size, storage.capacity() + storage.capacity() / 2));
+}
+
+
+}
+
+
+PyObject * storageAllocations(bool reset)
+{
+	PyObject * dict = PyDict_New();
+	PyObject * val = NULL;
+
+	PyDict_SetItemString(dict, "count", val = PyLong_FromUnsignedLong(static_cast<ULONG>(g_storageAllocations)));
+	Py_DECREF(val);
+	PyDict_SetItemString(dict, "bytes", val = PyLong_FromUnsignedLong(static_cast<ULONG>(g_storageAllocatedBytes)));
+	Py_DECREF(val);
+	if (reset) {
+		g_storageAllocations = 0;
+		g_storageAllocatedBytes = 0;
+	}
+	return dict;
+}
+
+
 Population::Population(const uintList & size,
 	float ploidy,
 	const uintList & loci,
@@ -48,7 +102,8 @@ Population::Population(const uintList & size,
 	const stringMatrix & alleleNames,
 	const stringList & lociNames,
 	const stringList & subPopNames,
-	const stringList & infoFields)
+	const stringList & infoFields,
+	const string & storage)
 	:
 	GenoStruTrait(),
 	m_popSize(0),
@@ -66,9 +121,11 @@ Population::Population(const uintList & size,
 	m_vars(NULL, true),
 	m_ancestralPops(0),
 	m_curAncestralGen(0),
+	m_compressAncestors(false),
 	m_indOrdered(true),
 	m_gen(0),
-	m_rep(0)
+	m_rep(0),
+	m_genealogyLoci()
 {
 	DBG_DO(DBG_POPULATION, cerr << "Constructor of population is called\n");
 
@@ -93,6 +150,7 @@ Population::Population(const uintList & size,
 	if (m_subPopSize.empty())
 		m_subPopSize.resize(1, 0);
 
+	setStorage(storage);
 	fitSubPopStru(m_subPopSize, subPopNames.elems());
 }
 
@@ -109,6 +167,78 @@ Population::~Population()
 }
 
 
+string Population::storage() const
+{
+#ifdef MUTANTALLELE
+	return string();
+#else
+	const string & dir = m_genotype.get_allocator().dir();
+	return dir.empty() ? string() : "mmap:" + dir;
+#endif
+}
+
+
+void Population::setStorage(const string & storage)
+{
+	string dir;
+
+	if (!storage.empty()) {
+		PARAM_FAILIF(storage.compare(0, 5, "mmap:") != 0, ValueError,
+			"Unsupported genotype storage " + storage + ". Please use '' or 'mmap:DIR'.");
+#if defined(MUTANTALLELE)
+		throw ValueError("Memory-mapped genotype storage is not supported for the mutant module.");
+#elif defined(SIMUPOP_NO_MMAP)
+		throw ValueError("Memory-mapped genotype storage is not supported on this platform.");
+#else
+		dir = storage.substr(5);
+		if (dir.empty()) {
+			const char * tmpDir = getenv("TMPDIR");
+			dir = tmpDir != NULL && *tmpDir != '\0' ? tmpDir : "/tmp";
+		}
+		PARAM_FAILIF(access(dir.c_str(), W_OK) != 0, ValueError,
+			"Directory " + dir + " does not exist or is not writable.");
+#endif
+	}
+#ifndef MUTANTALLELE
+	if (dir == m_genotype.get_allocator().dir())
+		return;
+	// move genotypes of the present and all ancestral generations
+	// and point individuals to their new locations
+	for (int depth = -1; depth < static_cast<int>(m_ancestralPops.size()); ++depth) {
+		vectora & genotype = depth == -1 ? m_genotype : m_ancestralPops[depth].m_genotype;
+		vectorind & inds = depth == -1 ? m_inds : m_ancestralPops[depth].m_inds;
+		vectora newGenotype(genotype.begin(), genotype.end(), MmapAllocator<Allele>(dir));
+		// compressed generations only need to use the new storage when they are restored
+		if (depth == -1 || !m_ancestralPops[depth].m_packed) {
+			GenoIterator oldBegin = genotype.begin();
+			GenoIterator newBegin = newGenotype.begin();
+			for (size_t i = 0; i < inds.size(); ++i)
+				inds[i].setGenoPtr(newBegin + (inds[i].genoPtr() - oldBegin));
+		}
+		genotype.swap(newGenotype);
+	}
+#endif
+}
+
+
+void Population::setGenealogyLoci(const vectoru & loci)
+{
+	m_genealogyLoci = loci;
+	std::sort(m_genealogyLoci.begin(), m_genealogyLoci.end());
+}
+
+
+void Population::checkGenealogyLoci(const vectoru & loci) const
+{
+	if (m_genealogyLoci.empty())
+		return;
+	for (size_t i = 0; i < loci.size(); ++i)
+		PARAM_FAILIF(std::binary_search(m_genealogyLoci.begin(), m_genealogyLoci.end(), loci[i]),
+			ValueError, (boost::format("Alleles at locus %1% are recorded in a genealogy and "
+			                           "have not been set. Please call Genealogy.mutate() first.") % loci[i]).str());
+}
+
+
 Population::Population(const Population & rhs) :
 	GenoStruTrait(rhs),
 	m_popSize(rhs.m_popSize),
@@ -125,15 +255,21 @@ Population::Population(const Population & rhs) :
 	m_ancestralGens(rhs.m_ancestralGens),
 	m_vars(rhs.m_vars),                                                                     // variables will be copied
 	m_curAncestralGen(rhs.m_curAncestralGen),
+	m_compressAncestors(rhs.m_compressAncestors),
 	m_indOrdered(true),
 	m_gen(rhs.m_gen),
-	m_rep(rhs.m_rep)
+	m_rep(rhs.m_rep),
+	m_genealogyLoci(rhs.m_genealogyLoci)
 {
 	DBG_DO(DBG_POPULATION,
 		cerr << "Copy constructor of population is called" << endl);
 
 	try {
 		m_inds.resize(rhs.m_popSize);
+#ifndef MUTANTALLELE
+		// use the same storage as rhs
+		vectora(rhs.m_genotype.get_allocator()).swap(m_genotype);
+#endif
 		m_genotype.resize(m_popSize * genoSize());
 		LINEAGE_EXPR(m_lineage.resize(m_popSize * genoSize()));
 		// have 0 length for mpi/non-head node
@@ -178,8 +314,8 @@ Population::Population(const Population & rhs) :
 			popData & lp = m_ancestralPops[ap];
 			const popData & rp = rhs.m_ancestralPops[ap];
 
-			vector<Individual> & linds = lp.m_inds;
-			const vector<Individual> & rinds = rp.m_inds;
+			vectorind & linds = lp.m_inds;
+			const vectorind & rinds = rp.m_inds;
 			GenoIterator lg = lp.m_genotype.begin();
 #ifdef MUTANTALLELE
 			GenoIterator rg = const_cast<vectorm &>(rp.m_genotype).begin();
@@ -197,9 +333,12 @@ Population::Population(const Population & rhs) :
 			size_t ps = rinds.size();
 
 			for (size_t i = 0; i < ps; ++i) {
-				linds[i].setGenoPtr(lg + (rinds[i].genoPtr() - rg));
+				// genotype pointers are reset when a compressed generation is restored
+				if (!rp.m_packed) {
+					linds[i].setGenoPtr(lg + (rinds[i].genoPtr() - rg));
+					LINEAGE_EXPR(linds[i].setLineagePtr(rinds[i].lineagePtr() - rlin + llin));
+				}
 				linds[i].setInfoPtr(li + (rinds[i].infoPtr() - ri));
-				LINEAGE_EXPR(linds[i].setLineagePtr(rinds[i].lineagePtr() - rlin + llin));
 			}
 		}
 	} catch (...) {
@@ -217,6 +356,8 @@ Population::Population(const Population & rhs) :
 
 void Population::popData::swap(Population & pop)
 {
+	if (m_packed)
+		unpack();
 #ifdef MUTANTALLELE
 	size_t genoSize = 0;
 	if (m_inds.size() != 0)
@@ -242,6 +383,138 @@ void Population::popData::swap(Population & pop)
 }
 
 
+void Population::popData::swap(popData & rhs)
+{
+	m_subPopSize.swap(rhs.m_subPopSize);
+	m_subPopNames.swap(rhs.m_subPopNames);
+	m_genotype.swap(rhs.m_genotype);
+	LINEAGE_EXPR(m_lineage.swap(rhs.m_lineage));
+	m_info.swap(rhs.m_info);
+	m_inds.swap(rhs.m_inds);
+	std::swap(m_indOrdered, rhs.m_indOrdered);
+	m_packedGenotype.swap(rhs.m_packedGenotype);
+	LINEAGE_EXPR(m_packedLineage.swap(rhs.m_packedLineage));
+	std::swap(m_packed, rhs.m_packed);
+	std::swap(m_packedGenoSize, rhs.m_packedGenoSize);
+#ifdef MUTANTALLELE
+	GenoIterator ptr = m_genotype.begin();
+	for (size_t i = 0; i < m_inds.size(); ++i, ptr += m_genotype.size() / m_inds.size())
+		m_inds[i].setGenoPtr(ptr);
+	ptr = rhs.m_genotype.begin();
+	for (size_t i = 0; i < rhs.m_inds.size(); ++i, ptr += rhs.m_genotype.size() / rhs.m_inds.size())
+		rhs.m_inds[i].setGenoPtr(ptr);
+#endif
+}
+
+
+namespace {
+
+void compressBuffer(const unsigned char * data, size_t size, vector<unsigned char> & packed)
+{
+	uLongf packedSize = compressBound(static_cast<uLong>(size));
+
+	packed.resize(packedSize);
+	if (compress2(&packed[0], &packedSize, data, static_cast<uLong>(size), Z_BEST_SPEED) != Z_OK)
+		throw RuntimeError("Failed to compress genotype of an ancestral generation.");
+	packed.resize(packedSize);
+	// release unused memory
+	vector<unsigned char>(packed).swap(packed);
+}
+
+
+void uncompressBuffer(const vector<unsigned char> & packed, unsigned char * data, size_t size)
+{
+	uLongf dataSize = static_cast<uLongf>(size);
+
+	if (uncompress(data, &dataSize, &packed[0], static_cast<uLong>(packed.size())) != Z_OK
+	    || dataSize != size)
+		throw RuntimeError("Failed to decompress genotype of an ancestral generation.");
+}
+
+
+}
+
+
+void Population::popData::pack()
+{
+#ifndef MUTANTALLELE
+	if (m_packed)
+		return;
+
+	size_t genoSize = m_inds.empty() ? 0 : m_inds[0].genoSize();
+	size_t numAlleles = m_inds.size() * genoSize;
+	// genotypes are packed in the order of individuals so that
+	// individuals will be in order after unpack.
+#  ifdef BINARYALLELE
+	vector<unsigned char> data((numAlleles + 7) / 8 + 1, 0);
+	size_t bit = 0;
+	for (size_t i = 0; i < m_inds.size(); ++i) {
+		GenoIterator ptr = m_inds[i].genoPtr();
+		for (size_t j = 0; j < genoSize; ++j, ++bit, ++ptr)
+			if (*ptr)
+				data[bit / 8] |= static_cast<unsigned char>(1 << (bit % 8));
+	}
+	compressBuffer(&data[0], data.size(), m_packedGenotype);
+#  else
+	vector<Allele> data(numAlleles + 1);
+	for (size_t i = 0; i < m_inds.size(); ++i)
+		std::copy(m_inds[i].genoBegin(), m_inds[i].genoEnd(), data.begin() + i * genoSize);
+	compressBuffer(reinterpret_cast<unsigned char *>(&data[0]), numAlleles * sizeof(Allele), m_packedGenotype);
+#  endif
+	vectora(m_genotype.get_allocator()).swap(m_genotype);
+
+#  ifdef LINEAGE
+	vectori lineage(numAlleles + 1);
+	for (size_t i = 0; i < m_inds.size(); ++i)
+		std::copy(m_inds[i].lineageBegin(), m_inds[i].lineageEnd(), lineage.begin() + i * genoSize);
+	compressBuffer(reinterpret_cast<unsigned char *>(&lineage[0]), numAlleles * sizeof(long), m_packedLineage);
+	vectorlineage().swap(m_lineage);
+#  endif
+	m_packedGenoSize = genoSize;
+	m_packed = true;
+#endif
+}
+
+
+void Population::popData::unpack()
+{
+#ifndef MUTANTALLELE
+	if (!m_packed)
+		return;
+
+	size_t numAlleles = m_inds.size() * m_packedGenoSize;
+	m_genotype.resize(numAlleles);
+#  ifdef BINARYALLELE
+	vector<unsigned char> data((numAlleles + 7) / 8 + 1);
+	uncompressBuffer(m_packedGenotype, &data[0], data.size());
+	GenoIterator ptr = m_genotype.begin();
+	for (size_t bit = 0; bit < numAlleles; ++bit, ++ptr)
+		*ptr = (data[bit / 8] & (1 << (bit % 8))) != 0;
+#  else
+	if (numAlleles > 0)
+		uncompressBuffer(m_packedGenotype, reinterpret_cast<unsigned char *>(&*m_genotype.begin()),
+			numAlleles * sizeof(Allele));
+#  endif
+	vector<unsigned char>().swap(m_packedGenotype);
+	GenoIterator genoPtr = m_genotype.begin();
+	for (size_t i = 0; i < m_inds.size(); ++i, genoPtr += m_packedGenoSize)
+		m_inds[i].setGenoPtr(genoPtr);
+
+#  ifdef LINEAGE
+	m_lineage.resize(numAlleles);
+	if (numAlleles > 0)
+		uncompressBuffer(m_packedLineage, reinterpret_cast<unsigned char *>(&m_lineage[0]),
+			numAlleles * sizeof(long));
+	vector<unsigned char>().swap(m_packedLineage);
+	LineageIterator lineagePtr = m_lineage.begin();
+	for (size_t i = 0; i < m_inds.size(); ++i, lineagePtr += m_packedGenoSize)
+		m_inds[i].setLineagePtr(lineagePtr);
+#  endif
+	m_packed = false;
+#endif
+}
+
+
 Population * Population::clone() const
 {
 	return new Population(*this);
@@ -402,23 +675,34 @@ Individual & Population::indByID(double fid, const uintList & ancGens, const str
 
 	for (size_t genIdx = 0; genIdx < gens.size(); ++genIdx) {
 		ssize_t gen = gens[genIdx];
-		vector<Individual> * inds = NULL;
+		vectorind * inds = NULL;
+		// IDs are read from information fields, which are not compressed,
+		// so only the generation with the individual is decompressed.
+		ssize_t ancIdx = -1;
 		// search in current, not necessarily the present generation
 		if (gen == m_curAncestralGen)
 			inds = &m_inds;
-		else
-			inds = &m_ancestralPops[gen == 0 ? m_curAncestralGen - 1 : gen - 1].m_inds;
+		else {
+			ancIdx = gen == 0 ? m_curAncestralGen - 1 : gen - 1;
+			inds = &m_ancestralPops[ancIdx].m_inds;
+		}
+		Individual * found = NULL;
 		// first try our luck
 		size_t startID = (*inds)[0].intInfo(idx);
 		if (idx >= startID && startID + (*inds).size() > id) {
 			Individual & ind = (*inds)[id - startID];
 			if (toID(ind.intInfo(idx)) == id)
-				return ind;
+				found = &ind;
 		}
 		// now we have to search all individuals
-		for (size_t i = 0; i < (*inds).size(); ++i) {
+		for (size_t i = 0; found == NULL && i < (*inds).size(); ++i) {
 			if (toID((*inds)[i].intInfo(idx)) == id)
-				return (*inds)[i];
+				found = &(*inds)[i];
+		}
+		if (found != NULL) {
+			if (ancIdx >= 0)
+				unpackAncestralGen(ancIdx);
+			return *found;
 		}
 	}
 	// if still cannot be found, raise an IndexError.
@@ -474,6 +758,7 @@ Individual & Population::ancestor(double fidx, ssize_t gen, vspID vsp)
 		ssize_t genIdx = gen == 0 ? m_curAncestralGen - 1 : gen - 1;
 		DBG_FAILIF(idx > m_ancestralPops[genIdx].m_inds.size(),
 			IndexError, "individual index out of range");
+		unpackAncestralGen(genIdx);
 		return m_ancestralPops[genIdx].m_inds[idx];
 	} else {
 		size_t subPop = vsp.subPop();
@@ -489,6 +774,7 @@ Individual & Population::ancestor(double fidx, ssize_t gen, vspID vsp)
 			for (size_t i = 0; i < subPop; ++i)
 				shift += m_ancestralPops[genIdx].m_subPopSize[i];
 		}
+		unpackAncestralGen(genIdx);
 		return m_ancestralPops[genIdx].m_inds[shift + idx];
 	}
 }
@@ -511,6 +797,7 @@ const Individual & Population::ancestor(double fidx, ssize_t gen, vspID vsp) con
 		ssize_t genIdx = gen == 0 ? m_curAncestralGen - 1 : gen - 1;
 		DBG_FAILIF(idx > m_ancestralPops[genIdx].m_inds.size(),
 			IndexError, "individual index out of range");
+		unpackAncestralGen(genIdx);
 		return m_ancestralPops[genIdx].m_inds[idx];
 	} else {
 		size_t subPop = vsp.subPop();
@@ -526,6 +813,7 @@ const Individual & Population::ancestor(double fidx, ssize_t gen, vspID vsp) con
 			for (size_t i = 0; i < subPop; ++i)
 				shift += m_ancestralPops[genIdx].m_subPopSize[i];
 		}
+		unpackAncestralGen(genIdx);
 		return m_ancestralPops[genIdx].m_inds[shift + idx];
 	}
 }
@@ -613,6 +901,88 @@ ConstIndAlleleIterator Population::alleleIterator(size_t locus, size_t subPop) c
 }
 
 
+#ifndef MUTANTALLELE
+size_t Population::locusMajorGenotype(const vectoru & loci, size_t subPop, vector<Allele> & alleles)
+{
+	CHECKRANGESUBPOP(subPop);
+
+	size_t ply = ploidy();
+	size_t nLoci = totNumLoci();
+	size_t numInds = 0;
+	for (IndIterator ind = indIterator(subPop); ind.valid(); ++ind)
+		++numInds;
+	size_t numAlleles = numInds * ply;
+	alleles.resize(numAlleles * loci.size());
+	// reading individuals one by one is cache friendly, and each locus
+	// is written to its own contiguous stretch of alleles.
+	IndIterator ind = indIterator(subPop);
+	for (size_t k = 0; ind.valid(); ++ind, ++k) {
+		GenoIterator geno = ind->genoBegin();
+		for (size_t p = 0; p < ply; ++p) {
+			GenoIterator ptr = geno + p * nLoci;
+			size_t offset = k * ply + p;
+			for (size_t i = 0; i < loci.size(); ++i, offset += numAlleles)
+				alleles[offset] = *(ptr + loci[i]);
+		}
+	}
+	return numAlleles;
+}
+
+
+#endif
+
+#ifdef BINARYALLELE
+size_t Population::locusBitPlanes(const vectoru & loci, size_t subPop, vector<WORDTYPE> & planes)
+{
+	CHECKRANGESUBPOP(subPop);
+
+	size_t ply = ploidy();
+	size_t nLoci = totNumLoci();
+	vector<GenoIterator> genos;
+	for (IndIterator ind = indIterator(subPop); ind.valid(); ++ind)
+		genos.push_back(ind->genoBegin());
+	size_t numInds = genos.size();
+	size_t numWords = (numInds + WORDBIT - 1) / WORDBIT;
+	planes.assign(loci.size() * ply * numWords, 0);
+
+	WORDTYPE block[WORDBIT];
+	for (size_t lociStart = 0; lociStart < loci.size(); lociStart += WORDBIT) {
+		size_t numBlockLoci = std::min(static_cast<size_t>(WORDBIT), loci.size() - lociStart);
+		// consecutive loci can be read as a whole word
+		bool consecutive = true;
+		for (size_t i = 1; i < numBlockLoci && consecutive; ++i)
+			consecutive = loci[lociStart + i] == loci[lociStart] + i;
+		for (size_t p = 0; p < ply; ++p) {
+			for (size_t w = 0; w < numWords; ++w) {
+				size_t numBlockInds = std::min(static_cast<size_t>(WORDBIT), numInds - w * WORDBIT);
+				// bit c of block[r] is the allele of individual r at locus c
+				for (size_t r = 0; r < numBlockInds; ++r) {
+					GenoIterator geno = genos[w * WORDBIT + r] + p * nLoci;
+					if (consecutive)
+						block[r] = readBits(geno + loci[lociStart], numBlockLoci);
+					else {
+						block[r] = 0;
+						for (size_t c = 0; c < numBlockLoci; ++c)
+							if (*(geno + loci[lociStart + c]))
+								block[r] |= WORDTYPE(1) << c;
+					}
+				}
+				for (size_t r = numBlockInds; r < WORDBIT; ++r)
+					block[r] = 0;
+				// bit r of block[c] is the allele of individual r at locus c
+				transposeBits(block);
+				for (size_t c = 0; c < numBlockLoci; ++c)
+					planes[((lociStart + c) * ply + p) * numWords + w] = block[c];
+			}
+		}
+	}
+	return numInds;
+}
+
+
+#endif
+
+
 #ifdef LINEAGE
 
 /// CPPONLY allele begin
@@ -708,6 +1078,9 @@ PyObject * Population::genotype(vspID subPopID)
 		"Function genotype currently does not support virtual subpopulation");
 	DBG_FAILIF(hasActivatedVirtualSubPop(), ValueError,
 		"This operation is not allowed when there is an activated virtual subpopulation");
+	PARAM_FAILIF(hasGenealogyLoci(), ValueError,
+		"Alleles at some loci are recorded in a genealogy and have not been set. "
+		"Please call Genealogy.mutate() first.");
 
 	syncIndPointers();
 	if (!vsp.valid()) {
@@ -744,93 +1117,172 @@ pyMutantIterator Population::mutants(vspID subPopID)
 }
 
 
-void Population::setGenotype(const uintList & genoList, vspID subPopID)
+void Population::selectedIndividuals(vspID subPop, const uintList & indexList,
+                                     vector<Individual *> & inds)
+{
+	inds.clear();
+	if (!indexList.allAvail()) {
+		PARAM_FAILIF(subPop.isVirtual(), ValueError,
+			"Parameter indexes cannot be used with a virtual subpopulation");
+		size_t begin = subPop.valid() ? subPopBegin(subPop.subPop()) : 0;
+		size_t end = subPop.valid() ? subPopEnd(subPop.subPop()) : popSize();
+		const vectoru & indexes = indexList.elems();
+		inds.reserve(indexes.size());
+		for (size_t i = 0; i < indexes.size(); ++i) {
+			PARAM_FAILIF(begin + indexes[i] >= end, IndexError,
+				(boost::format("Individual index %1% out of range of 0 ~ %2%") % indexes[i] % (end - begin - 1)).str());
+			inds.push_back(&m_inds[begin + indexes[i]]);
+		}
+		return;
+	}
+	if (subPop.valid()) {
+		activateVirtualSubPop(subPop);
+		IndIterator it = indIterator(subPop.subPop());
+		for (; it.valid(); ++it)
+			inds.push_back(&*it);
+		deactivateVirtualSubPop(subPop.subPop());
+	} else {
+		inds.reserve(popSize());
+		for (IndIterator it = indIterator(); it.valid(); ++it)
+			inds.push_back(&*it);
+	}
+}
+
+
+void Population::lociOffsets(const lociList & loci, vectoru & offsets) const
+{
+	const vectoru & loc = loci.elems(this);
+
+	offsets.resize(ploidy() * loc.size());
+	vectoru::iterator it = offsets.begin();
+	for (size_t p = 0; p < ploidy(); ++p)
+		for (size_t i = 0; i < loc.size(); ++i, ++it) {
+			CHECKRANGEABSLOCUS(loc[i]);
+			*it = p * totNumLoci() + loc[i];
+		}
+}
+
+
+void Population::setGenotype(const uintList & genoList, vspID subPopID,
+                             const uintList & indexList, const lociList & loci)
 {
 	const vectoru & geno = genoList.elems();
 
+	DBG_FAILIF(geno.empty(), ValueError, "Cannot set genotype from an empty list of alleles.");
+
 	vspID subPop = subPopID.resolve(*this);
 
+	bool allInds = indexList.allAvail();
+	bool allLoci = loci.allAvail();
 #ifdef MUTANTALLELE
 	// a special case: clear genotype for every one. This is
 	// useful for mutant modules
-	if (!subPop.valid() && geno.size() == 1 && geno[0] == 0) {
+	if (!subPop.valid() && allInds && allLoci && geno.size() == 1 && geno[0] == 0) {
 		m_genotype.clear();
 		return;
 	}
 #endif
 
 	syncIndPointers();
-	if (!subPop.valid()) {
+	size_t sz = geno.size();
+	if (!subPop.valid() && allInds && allLoci) {
 		GenoIterator ptr = m_genotype.begin();
-		size_t sz = geno.size();
 		for (size_t i = 0; i < popSize() * genoSize(); ++i, ++ptr) {
 			REF_ASSIGN_ALLELE(ptr, TO_ALLELE(geno[i % sz]));
 		}
 		return;
 	}
 
-	DBG_FAILIF(hasActivatedVirtualSubPop(), ValueError,
+	DBG_FAILIF(subPop.valid() && hasActivatedVirtualSubPop(), ValueError,
 		"This operation is not allowed when there is an activated virtual subpopulation");
 
-	size_t sp = subPop.subPop();
-	CHECKRANGESUBPOP(sp);
+	if (subPop.valid())
+		CHECKRANGESUBPOP(subPop.subPop());
 
-	size_t sz = geno.size();
-	if (!subPop.isVirtual()) {
+	if (subPop.valid() && !subPop.isVirtual() && allInds && allLoci) {
+		size_t sp = subPop.subPop();
 		GenoIterator ptr = genoBegin(sp, true);
 		for (size_t i = 0; i < subPopSize(sp) * genoSize(); ++i, ++ptr)
 			REF_ASSIGN_ALLELE(ptr, TO_ALLELE(geno[i % sz]));
-	} else {
-		activateVirtualSubPop(subPop);
-		IndIterator it = indIterator(sp);
-		size_t i = 0;
-		for (; it.valid(); ++it)
-			for (GenoIterator git = it->genoBegin(); git != it->genoEnd(); ++git, ++i)
+		return;
+	}
+
+	vector<Individual *> inds;
+	selectedIndividuals(subPop, indexList, inds);
+	size_t i = 0;
+	if (allLoci) {
+		for (size_t idx = 0; idx < inds.size(); ++idx)
+			for (GenoIterator git = inds[idx]->genoBegin(); git != inds[idx]->genoEnd(); ++git, ++i)
 				REF_ASSIGN_ALLELE(git, TO_ALLELE(geno[i % sz]));
-		deactivateVirtualSubPop(subPop.subPop());
+	} else {
+		vectoru offsets;
+		lociOffsets(loci, offsets);
+		for (size_t idx = 0; idx < inds.size(); ++idx) {
+			GenoIterator ptr = inds[idx]->genoBegin();
+			for (size_t j = 0; j < offsets.size(); ++j, ++i)
+				REF_ASSIGN_ALLELE(ptr + offsets[j], TO_ALLELE(geno[i % sz]));
+		}
 	}
 }
 
 
-void Population::setLineage(const uintList & lineageList, vspID subPopID)
+void Population::setLineage(const uintList & lineageList, vspID subPopID,
+                            const uintList & indexList, const lociList & loci)
 {
 #ifdef LINEAGE
 	const vectoru & lineage = lineageList.elems();
 
+	DBG_FAILIF(lineage.empty(), ValueError, "Cannot set lineage from an empty list.");
+
 	vspID subPop = subPopID.resolve(*this);
 
+	bool allInds = indexList.allAvail();
+	bool allLoci = loci.allAvail();
+
 	syncIndPointers();
-	if (!subPop.valid()) {
+	size_t sz = lineage.size();
+	if (!subPop.valid() && allInds && allLoci) {
 		LineageIterator ptr = m_lineage.begin();
-		size_t sz = lineage.size();
 		for (size_t i = 0; i < popSize() * genoSize(); ++i)
 			*(ptr++) = static_cast<long>(lineage[i % sz]);
 		return;
 	}
 
-	DBG_FAILIF(hasActivatedVirtualSubPop(), ValueError,
+	DBG_FAILIF(subPop.valid() && hasActivatedVirtualSubPop(), ValueError,
 		"This operation is not allowed when there is an activated virtual subpopulation");
 
-	size_t sp = subPop.subPop();
-	CHECKRANGESUBPOP(sp);
+	if (subPop.valid())
+		CHECKRANGESUBPOP(subPop.subPop());
 
-	size_t sz = lineage.size();
-	if (!subPop.isVirtual()) {
+	if (subPop.valid() && !subPop.isVirtual() && allInds && allLoci) {
+		size_t sp = subPop.subPop();
 		LineageIterator ptr = lineageBegin(sp, true);
 		for (size_t i = 0; i < subPopSize(sp) * genoSize(); ++i)
 			*(ptr++) = static_cast<long>(lineage[i % sz]);
-	} else {
-		activateVirtualSubPop(subPop);
-		IndIterator it = indIterator(sp);
-		size_t i = 0;
-		for (; it.valid(); ++it)
-			for (LineageIterator git = it->lineageBegin(); git != it->lineageEnd(); ++git, ++i)
+		return;
+	}
+
+	vector<Individual *> inds;
+	selectedIndividuals(subPop, indexList, inds);
+	size_t i = 0;
+	if (allLoci) {
+		for (size_t idx = 0; idx < inds.size(); ++idx)
+			for (LineageIterator git = inds[idx]->lineageBegin(); git != inds[idx]->lineageEnd(); ++git, ++i)
 				*git = static_cast<long>(lineage[i % sz]);
-		deactivateVirtualSubPop(subPop.subPop());
+	} else {
+		vectoru offsets;
+		lociOffsets(loci, offsets);
+		for (size_t idx = 0; idx < inds.size(); ++idx) {
+			LineageIterator ptr = inds[idx]->lineageBegin();
+			for (size_t j = 0; j < offsets.size(); ++j, ++i)
+				*(ptr + offsets[j]) = static_cast<long>(lineage[i % sz]);
+		}
 	}
 #else
 	(void)lineageList;
 	(void)subPopID;
+	(void)indexList;
+	(void)loci;
 #endif
 }
 
@@ -887,6 +1339,14 @@ void Population::fitSubPopStru(const vectoru & newSubPopSizes,
 		try {
 			if (step != 0 && m_popSize > MaxIndexSize / step)
 				throw RuntimeError("Population size times number of loci exceed maximum index size.");
+			// existing storage (e.g. of a recycled offspring generation) is
+			// reused if it is large enough.
+#ifndef MUTANTALLELE
+			reserveStorage(m_genotype, m_popSize * step);
+#endif
+			LINEAGE_EXPR(reserveStorage(m_lineage, m_popSize * step));
+			reserveStorage(m_info, m_popSize * is);
+			reserveStorage(m_inds, m_popSize);
 			m_genotype.resize(m_popSize * step);
 			LINEAGE_EXPR(m_lineage.resize(m_popSize * step));
 			m_info.resize(m_popSize * is);
@@ -1087,11 +1547,11 @@ void Population::setSubPopByIndInfo(const string & field)
 #ifdef MUTANTALLELE
 		vectorm newGenotype(genoSize() * newPopSize);
 #else
-		vectora newGenotype(genoSize() * newPopSize);
+		vectora newGenotype(genoSize() * newPopSize, Allele(), m_genotype.get_allocator());
 #endif
-		LINEAGE_EXPR(vectori newLineage(genoSize() * newPopSize));
-		vectorf newInfo(newPopSize * infoSize());
-		vector<Individual> newInds(newPopSize);
+		LINEAGE_EXPR(vectorlineage newLineage(genoSize() * newPopSize));
+		vectorinfo newInfo(newPopSize * infoSize());
+		vectorind newInds(newPopSize);
 
 		// assign genotype location and set structure information for individuals
 		InfoIterator infoPtr = newInfo.begin();
@@ -1599,16 +2059,16 @@ size_t Population::mergeSubPops(const uintList & subPops, const string & name, i
 
 	size_t step = genoSize();
 	size_t infoStep = infoSize();
-	vector<Individual> new_inds;
-	vectorf new_info;
+	vectorind new_inds;
+	vectorinfo new_info;
 #ifdef MUTANTALLELE
 	vectorm new_genotype;
 #else
-	vectora new_genotype;
+	vectora new_genotype(m_genotype.get_allocator());
 	new_genotype.reserve(step * popSize());
 #endif
 #ifdef LINEAGE
-	vectori new_lineage;
+	vectorlineage new_lineage;
 	new_lineage.reserve(step * popSize());
 #endif
 	new_inds.reserve(popSize());
@@ -1675,12 +2135,12 @@ void Population::addChromFrom(const Population & pop)
 #ifdef MUTANTALLELE
 		vectorm newGenotype(genoSize() * m_popSize);
 #else
-		vectora newGenotype(genoSize() * m_popSize);
+		vectora newGenotype(genoSize() * m_popSize, Allele(), m_genotype.get_allocator());
 #endif
 		// append pop2 chromosomes to the first one
 		GenoIterator ptr = newGenotype.begin();
 #ifdef LINEAGE
-		vectori newLineage(genoSize() * m_popSize);
+		vectorlineage newLineage(genoSize() * m_popSize);
 		LineageIterator lineagePtr = newLineage.begin();
 #endif
 
@@ -1823,12 +2283,12 @@ void Population::addLociFrom(const Population & pop, bool byName)
 #ifdef MUTANTALLELE
 		vectorm newGenotype(genoSize() * m_popSize);
 #else
-		vectora newGenotype(genoSize() * m_popSize);
+		vectora newGenotype(genoSize() * m_popSize, Allele(), m_genotype.get_allocator());
 #endif
 		// merge chromosome by chromosome
 		GenoIterator ptr = newGenotype.begin();
 #ifdef LINEAGE
-		vectori newLineage(genoSize() * m_popSize);
+		vectorlineage newLineage(genoSize() * m_popSize);
 		LineageIterator lineagePtr = newLineage.begin();
 #endif
 		size_t pEnd = ploidy();
@@ -1897,13 +2357,13 @@ void Population::addChrom(const floatList & lociPosList, const stringList & loci
 #ifdef MUTANTALLELE
 		vectorm newGenotype(newPopGenoSize);
 #else
-		vectora newGenotype(newPopGenoSize, 0);
+		vectora newGenotype(newPopGenoSize, Allele(), m_genotype.get_allocator());
 #endif
 
 		// copy data over
 		GenoIterator newPtr = newGenotype.begin();
 #ifdef LINEAGE
-		vectori newLineage(newPopGenoSize, 0);
+		vectorlineage newLineage(newPopGenoSize, 0);
 		LineageIterator newLineagePtr = newLineage.begin();
 #endif
 
@@ -1979,12 +2439,12 @@ vectoru Population::addLoci(const uintList & chromList, const floatList & posLis
 #ifdef MUTANTALLELE
 		vectorm newGenotype(newPopGenoSize);
 #else
-		vectora newGenotype(newPopGenoSize, 0);
+		vectora newGenotype(newPopGenoSize, Allele(), m_genotype.get_allocator());
 #endif
 		// copy data over
 		GenoIterator newPtr = newGenotype.begin();
 #ifdef LINEAGE
-		vectori newLineage(newPopGenoSize, 0);
+		vectorlineage newLineage(newPopGenoSize, 0);
 		LineageIterator newLineagePtr = newLineage.begin();
 #endif
 		size_t pEnd = ploidy();
@@ -2035,8 +2495,8 @@ void Population::resize(const uintList & sizeList, bool propagate)
 	size_t newPopSize = accumulate(newSubPopSizes.begin(), newSubPopSizes.end(), size_t(0));
 
 	// prepare new Population
-	vector<Individual> newInds(newPopSize);
-	vectorf newInfo(newPopSize * infoSize());
+	vectorind newInds(newPopSize);
+	vectorinfo newInfo(newPopSize * infoSize());
 	// iterators ready
 	InfoIterator infoPtr = newInfo.begin();
 	size_t step = genoSize();
@@ -2044,7 +2504,7 @@ void Population::resize(const uintList & sizeList, bool propagate)
 #ifdef MUTANTALLELE
 	vectorm newGenotype(genoSize() * newPopSize);
 #else
-	vectora newGenotype(genoSize() * newPopSize);
+	vectora newGenotype(genoSize() * newPopSize, Allele(), m_genotype.get_allocator());
 #endif
 	GenoIterator ptr = newGenotype.begin();
 	for (size_t i = 0; i < newPopSize; ++i, ptr += step, infoPtr += infoStep) {
@@ -2054,7 +2514,7 @@ void Population::resize(const uintList & sizeList, bool propagate)
 		newInds[i].setInfoPtr(infoPtr);
 	}
 #ifdef LINEAGE
-	vectori newLineage(genoSize() * newPopSize);
+	vectorlineage newLineage(genoSize() * newPopSize);
 	LineageIterator lineagePtr = newLineage.begin();
 	for (size_t i = 0; i < newPopSize; ++i, lineagePtr += step) {
 		newInds[i].setLineagePtr(lineagePtr);
@@ -2118,14 +2578,14 @@ Population & Population::extractSubPops(const subPopList & subPops, bool rearran
 	size_t step = genoSize();
 	size_t infoStep = infoSize();
 
-	vector<Individual> new_inds;
+	vectorind new_inds;
 #ifdef MUTANTALLELE
 	vectorm new_genotype;
 #else
-	vectora new_genotype;
+	vectora new_genotype(m_genotype.get_allocator());
 #endif
-	LINEAGE_EXPR(vectori new_lineage);
-	vectorf new_info;
+	LINEAGE_EXPR(vectorlineage new_lineage);
+	vectorinfo new_info;
 
 	if (rearrange) {
 		size_t sz = 0;
@@ -2299,15 +2759,13 @@ Population & Population::extractMarkedIndividuals() const
 	incGenoStruRef();
 	pop.setVirtualSplitter(virtualSplitter());
 
-	syncIndPointers();
+	// genotypes are copied through individuals so there is no need to
+	// sort the whole population (or materialize a population view)
 	vectoru new_size;
 
 	size_t step = genoSize();
 	size_t infoStep = infoSize();
 	ConstRawIndIterator oldInd = m_inds.begin();
-	ConstGenoIterator oldPtr = m_genotype.begin();
-	LINEAGE_EXPR(ConstLineageIterator oldLineagePtr = m_lineage.begin());
-	ConstInfoIterator oldInfoPtr = m_info.begin();
 
 	size_t sz = 0;
 	ConstRawIndIterator it = rawIndBegin();
@@ -2316,14 +2774,14 @@ Population & Population::extractMarkedIndividuals() const
 		if (it->marked())
 			++sz;
 
-	vector<Individual> new_inds(sz);
+	vectorind new_inds(sz);
 #ifdef MUTANTALLELE
 	vectorm new_genotype(sz * step);
 #else
-	vectora new_genotype(sz * step);
+	vectora new_genotype(sz * step, Allele(), m_genotype.get_allocator());
 #endif
-	LINEAGE_EXPR(vectori new_lineage(sz * step));
-	vectorf new_info(sz * infoStep);
+	LINEAGE_EXPR(vectorlineage new_lineage(sz * step));
+	vectorinfo new_info(sz * infoStep);
 
 	RawIndIterator newInd = new_inds.begin();
 	GenoIterator newPtr = new_genotype.begin();
@@ -2339,21 +2797,18 @@ Population & Population::extractMarkedIndividuals() const
 				++newSize;
 				*newInd = *oldInd;
 #ifdef MUTANTALLELE
-				copyGenotype(oldPtr, oldPtr + step, newPtr);
+				copyGenotype(oldInd->genoBegin(), oldInd->genoEnd(), newPtr);
 #else
-				copy(oldPtr, oldPtr + step, newPtr);
+				copy(oldInd->genoBegin(), oldInd->genoEnd(), newPtr);
 #endif
-				copy(oldInfoPtr, oldInfoPtr + infoStep, newInfoPtr);
-				LINEAGE_EXPR(copy(oldLineagePtr, oldLineagePtr + step, newLineagePtr));
+				copy(oldInd->infoBegin(), oldInd->infoEnd(), newInfoPtr);
+				LINEAGE_EXPR(copy(oldInd->lineageBegin(), oldInd->lineageEnd(), newLineagePtr));
 				++newInd;
 				newPtr += step;
 				newInfoPtr += infoStep;
 				LINEAGE_EXPR(newLineagePtr += step);
 			}
 			++oldInd;
-			oldPtr += step;
-			oldInfoPtr += infoStep;
-			LINEAGE_EXPR(oldLineagePtr += step);
 		}
 		new_size.push_back(newSize);
 	}
@@ -2481,6 +2936,107 @@ Population & Population::extractIndividuals(const uintList & indexList,
 }
 
 
+PopulationView::PopulationView(Population & pop, const subPopList & subPopsList,
+	bool rearrange, const uintList & indexList) : Population()
+{
+	DBG_FAILIF(pop.hasActivatedVirtualSubPop(), ValueError,
+		"Cannot create a view of a population with an activated virtual subpopulation");
+	DBG_FAILIF(!subPopsList.allAvail() && !indexList.allAvail(), ValueError,
+		"Please specify only one of parameters subPops and indexes");
+
+	setGenoStruIdx(pop.genoStruIdx());
+	incGenoStruRef();
+	setVirtualSplitter(pop.virtualSplitter());
+	m_gen = pop.m_gen;
+	m_rep = pop.m_rep;
+
+	vectorind new_inds;
+	vectoru new_size;
+	vectorstr new_spNames;
+
+	if (!indexList.allAvail()) {
+		const vectoru & indexes = indexList.elems();
+		pop.markIndividuals(vspID(), false);
+		for (size_t i = 0; i < indexes.size(); ++i) {
+			DBG_FAILIF(indexes[i] >= pop.m_popSize, IndexError,
+				(boost::format("individual index %1% out of range of 0 ~ %2%.") % indexes[i] % pop.m_popSize).str());
+			pop.m_inds[indexes[i]].setMarked(true);
+		}
+		for (size_t sp = 0; sp < pop.numSubPop(); ++sp) {
+			size_t newSize = 0;
+			ConstRawIndIterator it = pop.rawIndBegin(sp);
+			ConstRawIndIterator itEnd = pop.rawIndEnd(sp);
+			for (; it != itEnd; ++it) {
+				if (it->marked()) {
+					new_inds.push_back(*it);
+					++newSize;
+				}
+			}
+			new_size.push_back(newSize);
+		}
+		new_spNames = pop.m_subPopNames;
+	} else {
+		subPopList subPops = subPopsList.expandFrom(pop);
+#ifndef OPTIMIZED
+		subPopList::const_iterator spIt = subPops.begin();
+		for (; spIt != subPops.end(); ++spIt) {
+			DBG_FAILIF(spIt->subPop() >= pop.numSubPop(), IndexError,
+				(boost::format("Subpopulation index %1% out of range of 0 ~ %2%.") % spIt->subPop()
+				 % (pop.numSubPop() - 1)).str());
+			DBG_FAILIF(spIt->isVirtual() && spIt->virtualSubPop() >= pop.numVirtualSubPop(), IndexError,
+				(boost::format("Virtual subpopulation index %1% out of range") % spIt->virtualSubPop()).str());
+		}
+#endif
+		if (rearrange) {
+			subPopList::const_iterator it = subPops.begin();
+			subPopList::const_iterator itEnd = subPops.end();
+			for (; it != itEnd; ++it) {
+				pop.activateVirtualSubPop(*it);
+				size_t newSize = 0;
+				IndIterator ind = pop.indIterator(it->subPop());
+				for (; ind.valid(); ++ind, ++newSize)
+					new_inds.push_back(*ind);
+				pop.deactivateVirtualSubPop(it->subPop());
+				new_size.push_back(newSize);
+				if (!pop.m_subPopNames.empty())
+					new_spNames.push_back(pop.m_subPopNames[it->subPop()]);
+			}
+		} else {
+			for (size_t sp = 0; sp < pop.numSubPop(); ++sp) {
+				bool whole = subPops.contains(sp);
+				if (!whole && !subPops.overlap(sp))
+					continue;
+				if (!whole) {
+					pop.markIndividuals(sp, false);
+					subPopList::const_iterator it = subPops.begin();
+					subPopList::const_iterator itEnd = subPops.end();
+					for (; it != itEnd; ++it)
+						if (it->subPop() == sp)
+							pop.markIndividuals(*it, true);
+				}
+				size_t newSize = 0;
+				ConstRawIndIterator it = pop.rawIndBegin(sp);
+				ConstRawIndIterator itEnd = pop.rawIndEnd(sp);
+				for (; it != itEnd; ++it) {
+					if (whole || it->marked()) {
+						new_inds.push_back(*it);
+						++newSize;
+					}
+				}
+				new_size.push_back(newSize);
+				if (!pop.m_subPopNames.empty())
+					new_spNames.push_back(pop.m_subPopNames[sp]);
+			}
+		}
+	}
+	// individuals refer to genotype and information fields of pop
+	m_inds.swap(new_inds);
+	m_popSize = m_inds.size();
+	setSubPopStru(new_size, new_spNames);
+	setIndOrdered(false);
+}
+
+
 Population & Population::extract(const lociList & extractedLoci, const stringList & infoFieldList,
                                  const subPopList & _subPops, const uintList & ancGens) const
 {
@@ -2614,7 +3170,7 @@ Population & Population::extract(const lociList & extractedLoci, const stringLis
 			DBG_DO(DBG_POPULATION, cerr << "New subpopulation size " << spSizes << endl);
 		}
 
-		vector<Individual> new_inds;
+		vectorind new_inds;
 #ifdef MUTANTALLELE
 		size_t newIdx = 0;
 		vectorm new_genotype;
@@ -2623,14 +3179,14 @@ Population & Population::extract(const lociList & extractedLoci, const stringLis
 		if (removeLoci)
 			new_genotype.resize(size * step);
 #else
-		vectora new_genotype;
+		vectora new_genotype(m_genotype.get_allocator());
 		new_genotype.reserve(size * step);
 #endif
 #ifdef LINEAGE
-		vectori new_lineage;
+		vectorlineage new_lineage;
 		new_lineage.reserve(size * step);
 #endif
-		vectorf new_info;
+		vectorinfo new_info;
 
 		new_inds.reserve(size);
 		new_info.reserve(size * infoStep);
@@ -2715,7 +3271,7 @@ Population & Population::extract(const lociList & extractedLoci, const stringLis
 		else
 			pop.setSubPopStru(spSizes, m_subPopNames);
 		// set pointer
-		vectorf::iterator infoPtr = new_info.begin();
+		InfoIterator infoPtr = new_info.begin();
 #ifdef MUTANTALLELE
 		vectorm::iterator ptr = new_genotype.begin();
 #else
@@ -2727,7 +3283,7 @@ Population & Population::extract(const lociList & extractedLoci, const stringLis
 			new_inds[i].setInfoPtr(infoPtr);
 		}
 #ifdef LINEAGE
-		vectori::iterator lineagePtr = new_lineage.begin();
+		LineageIterator lineagePtr = new_lineage.begin();
 		for (size_t i = 0; i < size; ++i, lineagePtr += step) {
 			new_inds[i].setLineagePtr(lineagePtr);
 		}
@@ -2816,12 +3372,12 @@ void Population::removeLoci(const lociList & removeList, const lociList & keepLi
 #ifdef MUTANTALLELE
 		vectorm newGenotype(genoSize() * m_popSize);
 #else
-		vectora newGenotype(genoSize() * m_popSize);
+		vectora newGenotype(genoSize() * m_popSize, Allele(), m_genotype.get_allocator());
 #endif
 		// copy data over
 		GenoIterator newPtr = newGenotype.begin();
 #ifdef LINEAGE
-		vectori newLineage(genoSize() * m_popSize);
+		vectorlineage newLineage(genoSize() * m_popSize);
 		LineageIterator newLineagePtr = newLineage.begin();
 #endif
 		size_t pEnd = ploidy();
@@ -3029,9 +3585,15 @@ void Population::push(Population & rhs)
 
 	// front -1 pop, -2 pop, .... end
 	//
+	// storage of the discarded ancestral generation is given to rhs
+	// so that it can be reused for the next offspring generation.
+	popData recycled;
 	if (m_ancestralGens > 0
-	    && ancestralGens() == m_ancestralGens)
+	    && ancestralGens() == m_ancestralGens) {
+		if (!m_ancestralPops.back().m_packed)
+			recycled.swap(m_ancestralPops.back());
 		m_ancestralPops.pop_back();
+	}
 
 	// save current population
 	if (m_ancestralGens != 0) {
@@ -3042,6 +3604,7 @@ void Population::push(Population & rhs)
 		// swap with real data
 		// current population may *not* be in order
 		pd.swap(*this);
+		packAncestralGens();
 	}
 
 	// then swap out data
@@ -3067,6 +3630,11 @@ void Population::push(Population & rhs)
 		rhs.m_inds[i].setGenoPtr(ptr);
 #endif
 
+	// rhs receives storage of the discarded generation if its own storage
+	// has been moved to the ancestral generations.
+	if (m_ancestralGens != 0 && !recycled.m_inds.empty())
+		recycled.swap(rhs);
+
 	// current population should be working well
 	// (with all datamember copied form rhs
 	// rhs may not be working well since m_genotype etc
@@ -3098,11 +3666,98 @@ vectorf Population::indInfo(const uintString & field, vspID subPopID)
 }
 
 
-void Population::addInfoFields(const stringList & fieldList, double init)
+PyObject * Population::infoArray(const stringList & fieldList, vspID subPopID)
 {
-	const vectorstr & fields = fieldList.elems();
+	PARAM_FAILIF(hasActivatedVirtualSubPop(), ValueError,
+		"This operation is not allowed when there is an activated virtual subpopulation");
+	vspID subPop = subPopID.resolve(*this);
+	PARAM_FAILIF(subPop.isVirtual(), ValueError,
+		"Function infoArray currently does not support virtual subpopulation");
+
+	const vectorstr & fields = fieldList.elems(this);
+	vectoru idx(fields.size());
+	for (size_t i = 0; i < fields.size(); ++i)
+		idx[i] = infoIdx(fields[i]);
+	// fields should be evenly spaced to be exposed as a strided array
+	Py_ssize_t step = idx.size() > 1 ? static_cast<Py_ssize_t>(idx[1]) - static_cast<Py_ssize_t>(idx[0]) : 1;
+	for (size_t i = 2; i < idx.size(); ++i)
+		if (static_cast<Py_ssize_t>(idx[i]) - static_cast<Py_ssize_t>(idx[i - 1]) != step)
+			throw ValueError("Information fields passed to infoArray should be evenly spaced. "
+				             "Please use all fields and select columns from the returned array.");
+
+	size_t begin = 0;
+	size_t end = popSize();
+	if (subPop.valid()) {
+		CHECKRANGESUBPOP(subPop.subPop());
+		begin = subPopBegin(subPop.subPop());
+		end = subPopEnd(subPop.subPop());
+	}
+	// make sure that information fields are stored in the order of individuals
+	syncIndPointers(true);
 
-	DBG_ASSERT(m_info.size() == infoSize() * popSize(), SystemError,
+	static char format[] = "d";
+	static double empty = 0;
+	Py_ssize_t shape[2] = { static_cast<Py_ssize_t>(end - begin), static_cast<Py_ssize_t>(idx.size()) };
+	Py_ssize_t strides[2] = { static_cast<Py_ssize_t>(infoSize() * sizeof(double)),
+		                      static_cast<Py_ssize_t>(step * sizeof(double)) };
+	Py_buffer view;
+	view.buf = (begin == end || idx.empty()) ? &empty : &*(m_info.begin() + begin * infoSize() + idx[0]);
+	view.obj = NULL;
+	view.len = shape[0] * shape[1] * sizeof(double);
+	view.readonly = 0;
+	view.itemsize = sizeof(double);
+	view.format = format;
+	view.ndim = 2;
+	view.shape = shape;
+	view.strides = strides;
+	view.suboffsets = NULL;
+	view.internal = NULL;
+	// memoryview copies shape and strides so it is ok to pass local variables.
+	PyObject * res = PyMemoryView_FromBuffer(&view);
+	DBG_FAILIF(res == NULL, ValueError, "Failed to create a view of information fields.");
+	return res;
+}
+
+
+void Population::setInfoArray(PyObject * values, const stringList & fieldList, vspID subPopID)
+{
+	vspID subPop = subPopID.resolve(*this);
+
+	DBG_FAILIF(subPop.valid() && hasActivatedVirtualSubPop(), ValueError,
+		"This operation is not allowed when there is an activated virtual subpopulation");
+
+	const vectorstr & fields = fieldList.elems(this);
+	vectoru idx(fields.size());
+	for (size_t i = 0; i < fields.size(); ++i)
+		idx[i] = infoIdx(fields[i]);
+	if (idx.empty())
+		return;
+
+	pyBuffer buf(values);
+	size_t valueSize = buf.size();
+	DBG_FAILIF(valueSize == 0, ValueError, "Cannot set information fields from an empty buffer.");
+	const double * data = buf.data<double>();
+
+	if (subPop.valid())
+		activateVirtualSubPop(subPop);
+	IndIterator ind = subPop.valid() ? indIterator(subPop.subPop()) : indIterator();
+	for (size_t k = 0; ind.valid(); ++ind) {
+		for (size_t j = 0; j < idx.size(); ++j, ++k) {
+			if (k == valueSize)
+				k = 0;
+			ind->setInfo(data ? data[k] : buf.value<double>(k), idx[j]);
+		}
+	}
+	if (subPop.valid())
+		deactivateVirtualSubPop(subPop.subPop());
+}
+
+
+void Population::addInfoFields(const stringList & fieldList, double init)
+{
+	const vectorstr & fields = fieldList.elems();
+
+	DBG_ASSERT(m_info.size() == infoSize() * popSize(), SystemError,
 		"Info size is wrong");
 
 	vectorstr newfields;
@@ -3136,7 +3791,7 @@ void Population::addInfoFields(const stringList & fieldList, double init)
 		int oldAncPop = m_curAncestralGen;
 		for (size_t anc = 0; anc <= m_ancestralPops.size(); anc++) {
 			useAncestralGen(anc);
-			vectorf newInfo(is * popSize(), 0.);
+			vectorinfo newInfo(is * popSize(), 0.);
 			// copy the old stuff in
 			InfoIterator ptr = newInfo.begin();
 			for (IndIterator ind = indIterator(); ind.valid(); ++ind) {
@@ -3163,7 +3818,7 @@ void Population::setInfoFields(const stringList & fieldList, double init)
 	size_t is = infoSize();
 	for (size_t anc = 0; anc <= m_ancestralPops.size(); anc++) {
 		useAncestralGen(anc);
-		vectorf newInfo(is * popSize(), init);
+		vectorinfo newInfo(is * popSize(), init);
 		InfoIterator ptr = newInfo.begin();
 		for (IndIterator ind = indIterator(); ind.valid(); ++ind, ptr += is) {
 			ind->setInfoPtr(ptr);
@@ -3201,7 +3856,7 @@ void Population::removeInfoFields(const stringList & fieldList)
 	size_t sz = infoSize();
 	for (size_t anc = 0; anc <= m_ancestralPops.size(); anc++) {
 		useAncestralGen(anc);
-		vectorf newInfo(sz * popSize(), 0.);
+		vectorinfo newInfo(sz * popSize(), 0.);
 		// copy the old stuff in
 		InfoIterator ptr = newInfo.begin();
 
@@ -3334,23 +3989,7 @@ void Population::keepAncestralGens(const uintList & ancGens)
 			if (depth != genIdx) {
 				// depth is the existing place
 				// genIdx is the new location
-				popData & pd = m_ancestralPops[depth - 1];
-				popData & pd1 = m_ancestralPops[genIdx - 1];
-				pd1.m_subPopSize.swap(pd.m_subPopSize);
-				pd1.m_subPopNames.swap(pd.m_subPopNames);
-				pd1.m_genotype.swap(pd.m_genotype);
-				LINEAGE_EXPR(pd1.m_lineage.swap(pd.m_lineage));
-				pd1.m_info.swap(pd.m_info);
-				pd1.m_inds.swap(pd.m_inds);
-				std::swap(pd1.m_indOrdered, pd.m_indOrdered);
-#ifdef MUTANTALLELE
-				GenoIterator ptr = pd1.m_genotype.begin();
-				for (size_t i = 0; i < pd1.m_inds.size(); ++i, ptr += pd1.m_genotype.size() / pd1.m_inds.size())
-					pd1.m_inds[i].setGenoPtr(ptr);
-				ptr = pd.m_genotype.begin();
-				for (size_t i = 0; i < pd.m_inds.size(); ++i, ptr += pd.m_genotype.size() / pd.m_inds.size())
-					pd.m_inds[i].setGenoPtr(ptr);
-#endif
+				m_ancestralPops[genIdx - 1].swap(m_ancestralPops[depth - 1]);
 			}
 		}
 	}
@@ -3360,6 +3999,39 @@ void Population::keepAncestralGens(const uintList & ancGens)
 }
 
 
+void Population::compressAncestralGens(bool compress)
+{
+	m_compressAncestors = compress;
+	for (size_t genIdx = 0; genIdx < m_ancestralPops.size(); ++genIdx) {
+		if (compress)
+			m_ancestralPops[genIdx].pack();
+		else
+			m_ancestralPops[genIdx].unpack();
+	}
+}
+
+
+void Population::unpackAncestralGen(size_t genIdx) const
+{
+	popData & pd = const_cast<popData &>(m_ancestralPops[genIdx]);
+
+	if (pd.m_packed)
+		pd.unpack();
+}
+
+
+void Population::packAncestralGens()
+{
+	if (!m_compressAncestors)
+		return;
+	// the present generation is stored in m_ancestralPops if an ancestral
+	// generation is being used.
+	for (size_t genIdx = 0; genIdx < m_ancestralPops.size(); ++genIdx)
+		if (m_curAncestralGen == 0 || genIdx != static_cast<size_t>(m_curAncestralGen - 1))
+			m_ancestralPops[genIdx].pack();
+}
+
+
 void Population::useAncestralGen(ssize_t idx)
 {
 	DBG_FAILIF(hasActivatedVirtualSubPop(), RuntimeError, "Can not switch ancestral generation with an activated virtual subpopulation");
@@ -3370,9 +4042,14 @@ void Population::useAncestralGen(ssize_t idx)
 	DBG_DO(DBG_POPULATION, cerr << "Use ancestral generation: " << idx <<
 		" Current ancestral index: " << m_curAncestralGen << endl);
 
+	// generations decompressed by lookups are compressed again
+	packAncestralGens();
+
 	if (idx == 0 || m_curAncestralGen != 0) {         // recover pop.
 		popData & pd = m_ancestralPops[ m_curAncestralGen - 1];
 		pd.swap(*this);
+		if (m_compressAncestors)
+			pd.pack();
 		m_curAncestralGen = 0;
 		if (idx == 0) {                                               // restore key parameters from data
 			m_popSize = m_inds.size();
@@ -4046,7 +4723,7 @@ void Population::load(boost::archive::text_iarchive & ar, const unsigned int ver
 		// now set pointers
 		popData & p = m_ancestralPops.back();
 		// set pointers
-		vector<Individual> & inds = p.m_inds;
+		vectorind & inds = p.m_inds;
 		size_t ps = inds.size();
 		infoPtr = p.m_info.begin();
 		ptr = p.m_genotype.begin();
@@ -4077,28 +4754,876 @@ void Population::load(boost::archive::text_iarchive & ar, const unsigned int ver
 }
 
 
-void Population::save(const string & filename) const
+namespace {
+
+// Binary population files start with a magic string, a format version and
+// flags, followed by blocks of data. Each block has a header of four 32-bit
+// and two 64-bit little-endian integers (block type, data format, encoding,
+// reserved, size of data, size of stored data) and stored data, which are
+// data compressed with zlib if encoding is BINARY_ZLIB.
+//
+// Individuals and information fields of each subpopulation, and genotype
+// and lineage of each subpopulation and block of BinaryLociBlockSize loci,
+// are saved in separate blocks. The file ends with an index block that
+// lists the offsets of all blocks by type, generation, subpopulation and
+// block of loci, followed by the offset of the index block and the magic
+// string, so that selected parts of a population can be loaded.
+const char BinaryPopMagic[8] = { 's', 'i', 'm', 'u', 'P', 'O', 'P', '\x89' };
+const uint32_t BinaryPopVersion = 1;
+const size_t BinaryBlockHeaderSize = 32;
+const size_t BinaryIndexEntrySize = 24;
+const size_t BinaryLociBlockSize = 1024;
+
+enum BinaryBlockType {
+	// genotypic structure and number of generations, as a text archive
+	BLOCK_HEADER = 1,
+	// subpopulation sizes and names of a generation, as a text archive
+	BLOCK_GENERATION = 2,
+	BLOCK_GENOTYPE = 3,
+	BLOCK_LINEAGE = 4,
+	BLOCK_INFO = 5,
+	// sex (bit 0) and affection status (bit 1) of individuals, one byte each
+	BLOCK_INDIVIDUAL = 6,
+	// pickled population variables
+	BLOCK_VARS = 7,
+	// offsets of all blocks
+	BLOCK_INDEX = 8
+};
+
+enum BinaryBlockEncoding {
+	BINARY_RAW = 0,
+	BINARY_ZLIB = 1
+};
+
+// Genotypes are stored as bits (GENO_BITS), as unsigned integers of the
+// specified number of bits, or as (64-bit position, value) pairs of
+// non-zero alleles if GENO_SPARSE is set.
+const uint32_t GENO_BITS = 1;
+const uint32_t GENO_SPARSE = 0x100;
+
+#ifdef MUTANTALLELE
+typedef vectorm GenoVector;
+#else
+typedef vectora GenoVector;
+#endif
+
+// offsets of blocks indexed by block type, generation, subpopulation and
+// block of loci
+typedef map<vectoru, size_t> BlockIndex;
+
+vectoru blockKey(size_t type, size_t gen, size_t subPop = 0, size_t lociBlock = 0)
+{
+	vectoru key(4);
+
+	key[0] = type;
+	key[1] = gen;
+	key[2] = subPop;
+	key[3] = lociBlock;
+	return key;
+}
+
+
+void copyAlleles(GenoIterator from, GenoIterator to, size_t n)
+{
+#ifdef BINARYALLELE
+	copyGenotype(from, to, n);
+#elif defined(MUTANTALLELE)
+	copyGenotype(from, from + n, to);
+#else
+	std::copy(from, from + n, to);
+#endif
+}
+
+bool littleEndian()
+{
+	const uint16_t one = 1;
+
+	return *reinterpret_cast<const unsigned char *>(&one) == 1;
+}
+
+
+// append n values of type T as little-endian integers of given bytes
+template <typename T>
+void putArray(string & buf, const T * data, size_t n, size_t bytes)
 {
-	boost::iostreams::filtering_ostream ofs;
+	if (n == 0)
+		return;
+	if (bytes == sizeof(T) && littleEndian())
+		buf.append(reinterpret_cast<const char *>(data), n * sizeof(T));
+	else {
+		buf.reserve(buf.size() + n * bytes);
+		for (size_t i = 0; i < n; ++i)
+			putLE(buf, static_cast<uint64_t>(data[i]), bytes);
+	}
+}
+
+
+void putDoubles(string & buf, const double * data, size_t n)
+{
+	if (n == 0)
+		return;
+	if (littleEndian())
+		buf.append(reinterpret_cast<const char *>(data), n * sizeof(double));
+	else {
+		for (size_t i = 0; i < n; ++i) {
+			uint64_t value;
+			memcpy(&value, data + i, sizeof(double));
+			putLE(buf, value, sizeof(double));
+		}
+	}
+}
+
+
+void getDoubles(const string & buf, double * data, size_t n)
+{
+	if (buf.size() != n * sizeof(double))
+		throw ValueError("Incorrect size of information fields.");
+	if (n == 0)
+		return;
+	if (littleEndian())
+		memcpy(data, buf.data(), n * sizeof(double));
+	else {
+		for (size_t i = 0; i < n; ++i) {
+			uint64_t value = getLE(buf.data() + i * sizeof(double), sizeof(double));
+			memcpy(data + i, &value, sizeof(double));
+		}
+	}
+}
+
+
+// header and stored data of a block
+struct StoredBlock
+{
+	uint32_t format;
+	uint32_t encoding;
+	size_t size;
+	string stored;
+};
+
+// pack header and data of a block to \e block, with data compressed at
+// compression \e level unless level is zero or compression does not help.
+bool packBlock(uint32_t type, uint32_t format, const string & data, int level, string & block)
+{
+	uint32_t encoding = BINARY_RAW;
+	string stored;
+
+	if (level > 0 && !data.empty()) {
+		uLongf packedSize = compressBound(static_cast<uLong>(data.size()));
+		stored.resize(packedSize);
+		if (compress2(reinterpret_cast<Bytef *>(&stored[0]), &packedSize,
+			    reinterpret_cast<const Bytef *>(data.data()), static_cast<uLong>(data.size()),
+			    level) != Z_OK)
+			return false;
+		// keep uncompressed data if compression does not help
+		if (packedSize < data.size()) {
+			stored.resize(packedSize);
+			encoding = BINARY_ZLIB;
+		}
+	}
+	const string & body = encoding == BINARY_RAW ? data : stored;
+	block.clear();
+	block.reserve(BinaryBlockHeaderSize + body.size());
+	putLE(block, type, 4);
+	putLE(block, format, 4);
+	putLE(block, encoding, 4);
+	putLE(block, 0, 4);
+	putLE(block, data.size(), 8);
+	putLE(block, body.size(), 8);
+	block.append(body);
+	return true;
+}
+
+
+void writeBlock(std::ostream & out, uint32_t type, uint32_t format, const string & data, int level)
+{
+	string block;
+
+	if (!packBlock(type, format, data, level, block))
+		throw RuntimeError("Failed to compress population data.");
+	out.write(block.data(), block.size());
+}
+
+
+void readStoredBlock(std::istream & in, uint32_t expectedType, StoredBlock & block)
+{
+	char header[BinaryBlockHeaderSize];
+
+	if (!in.read(header, BinaryBlockHeaderSize))
+		throw ValueError("Unexpected end of population file.");
+	uint32_t type = static_cast<uint32_t>(getLE(header, 4));
+	block.format = static_cast<uint32_t>(getLE(header + 4, 4));
+	block.encoding = static_cast<uint32_t>(getLE(header + 8, 4));
+	block.size = static_cast<size_t>(getLE(header + 16, 8));
+	size_t storedSize = static_cast<size_t>(getLE(header + 24, 8));
+
+	if (type != expectedType)
+		throw ValueError((boost::format("Unexpected block of type %1% (type %2% expected).")
+			              % type % expectedType).str());
+	if (block.encoding != BINARY_RAW && block.encoding != BINARY_ZLIB)
+		throw ValueError((boost::format("Unsupported encoding %1% of population data.") % block.encoding).str());
+	block.stored.assign(storedSize, '\0');
+	if (storedSize > 0 && !in.read(&block.stored[0], storedSize))
+		throw ValueError("Unexpected end of population file.");
+}
+
+
+// unpack stored data of \e block to \e data, which swaps out stored data
+// if they are not compressed.
+bool unpackBlock(StoredBlock & block, string & data)
+{
+	if (block.encoding == BINARY_RAW) {
+		data.swap(block.stored);
+		return true;
+	}
+	data.resize(block.size);
+	uLongf dataSize = static_cast<uLongf>(block.size);
+	return uncompress(reinterpret_cast<Bytef *>(&data[0]), &dataSize,
+		reinterpret_cast<const Bytef *>(block.stored.data()), static_cast<uLong>(block.stored.size())) == Z_OK
+	       && dataSize == block.size;
+}
+
+
+void readBlock(std::istream & in, uint32_t expectedType, uint32_t & format, string & data)
+{
+	StoredBlock block;
+
+	readStoredBlock(in, expectedType, block);
+	if (!unpackBlock(block, data))
+		throw ValueError("Failed to decompress population data.");
+	format = block.format;
+}
+
+
+// write a block and record its offset in index
+void writeIndexedBlock(std::ostream & out, BlockIndex & index, const vectoru & key,
+                       uint32_t format, const string & data, int level)
+{
+	index[key] = static_cast<size_t>(out.tellp());
+	writeBlock(out, static_cast<uint32_t>(key[0]), format, data, level);
+}
+
+
+// pack blocks in parallel, write them and record their offsets in index
+void writeIndexedBlocks(std::ostream & out, BlockIndex & index, const vector<vectoru> & keys,
+                        const vector<uint32_t> & formats, const vectorstr & data, int level)
+{
+	vectorstr blocks(keys.size());
+	// status of each block, which is written by one thread only
+	vector<char> packed(keys.size(), 0);
+
+#pragma omp parallel for if(numThreads() > 1)
+	for (ssize_t i = 0; i < static_cast<ssize_t>(keys.size()); ++i)
+		packed[i] = packBlock(static_cast<uint32_t>(keys[i][0]), formats[i], data[i], level, blocks[i]);
+	if (std::find(packed.begin(), packed.end(), 0) != packed.end())
+		throw RuntimeError("Failed to compress population data.");
+	for (size_t i = 0; i < keys.size(); ++i) {
+		index[keys[i]] = static_cast<size_t>(out.tellp());
+		out.write(blocks[i].data(), blocks[i].size());
+	}
+}
+
+
+// read blocks at offsets recorded in index and unpack them in parallel
+void readIndexedBlocks(std::istream & in, const BlockIndex & index, const vector<vectoru> & keys,
+                       vector<uint32_t> & formats, vectorstr & data)
+{
+	vector<StoredBlock> blocks(keys.size());
+
+	for (size_t i = 0; i < keys.size(); ++i) {
+		BlockIndex::const_iterator it = index.find(keys[i]);
+		if (it == index.end())
+			throw ValueError((boost::format("Block of type %1% for generation %2%, subpopulation %3% "
+				                            "and block of loci %4% is missing.") % keys[i][0] % keys[i][1]
+				              % keys[i][2] % keys[i][3]).str());
+		in.clear();
+		in.seekg(static_cast<std::streamoff>(it->second));
+		readStoredBlock(in, static_cast<uint32_t>(keys[i][0]), blocks[i]);
+	}
+	formats.resize(keys.size());
+	data.resize(keys.size());
+	// status of each block, which is written by one thread only
+	vector<char> unpacked(keys.size(), 0);
+#pragma omp parallel for if(numThreads() > 1)
+	for (ssize_t i = 0; i < static_cast<ssize_t>(keys.size()); ++i) {
+		formats[i] = blocks[i].format;
+		unpacked[i] = unpackBlock(blocks[i], data[i]);
+	}
+	if (std::find(unpacked.begin(), unpacked.end(), 0) != unpacked.end())
+		throw ValueError("Failed to decompress population data.");
+}
+
+
+// read a block at the offset recorded in index
+void readIndexedBlock(std::istream & in, const BlockIndex & index, const vectoru & key,
+                      uint32_t & format, string & data)
+{
+	vector<vectoru> keys(1, key);
+	vector<uint32_t> formats;
+	vectorstr blocks;
+
+	readIndexedBlocks(in, index, keys, formats, blocks);
+	format = formats[0];
+	data.swap(blocks[0]);
+}
+
+
+// encode genotypes in the native format of the module
+uint32_t encodeGenotype(const GenoVector & geno, string & data)
+{
+#ifdef BINARYALLELE
+	size_t n = geno.size();
+	data.reserve((n + 7) / 8);
+	GenoIterator ptr = const_cast<GenoVector &>(geno).begin();
+	for (size_t i = 0; i < n; i += WORDBIT) {
+		size_t bits = std::min(static_cast<size_t>(WORDBIT), n - i);
+		putLE(data, readBits(ptr + i, bits), (bits + 7) / 8);
+	}
+	return GENO_BITS;
+#elif defined(MUTANTALLELE)
+	putLE(data, geno.data().size(), 8);
+	vectorm::const_val_iterator ptr = geno.begin().get_val_iterator();
+	vectorm::const_val_iterator end = geno.end().get_val_iterator();
+	for (; ptr != end; ++ptr) {
+		putLE(data, ptr->first, 8);
+		putLE(data, ptr->second, sizeof(Allele));
+	}
+	return GENO_SPARSE | (8 * sizeof(Allele));
+#else
+	putArray(data, geno.empty() ? NULL : &geno[0], geno.size(), sizeof(Allele));
+	return 8 * sizeof(Allele);
+#endif
+}
 
-	// compress output
-	ofs.push(boost::iostreams::gzip_compressor());
-	// open file to write
-	boost::iostreams::file_sink dest(filename, std::ios::binary);
-	if (!dest.is_open())
+
+// decode genotypes saved in any format to the module, and record the
+// largest allele in maxAllele
+void decodeGenotype(const string & data, uint32_t format, size_t n, GenoVector & geno, size_t & maxAllele)
+{
+	geno.resize(n);
+	if (format == GENO_BITS) {
+		if (data.size() != (n + 7) / 8)
+			throw ValueError("Incorrect size of genotype.");
+		if (n == 0)
+			return;
+#ifdef BINARYALLELE
+		WORDTYPE * ptr = BITPTR(geno.begin());
+		for (size_t i = 0; i < n; i += WORDBIT, ++ptr) {
+			size_t bits = std::min(static_cast<size_t>(WORDBIT), n - i);
+			*ptr = static_cast<WORDTYPE>(getLE(data.data() + i / 8, (bits + 7) / 8));
+		}
+#else
+		for (size_t i = 0; i < n; ++i) {
+			if (data[i / 8] & (1 << (i % 8))) {
+#  ifdef MUTANTALLELE
+				geno.push_back(i, 1);
+#  else
+				geno[i] = 1;
+#  endif
+			}
+		}
+#endif
+		maxAllele = std::max(maxAllele, size_t(1));
+	} else if (format & GENO_SPARSE) {
+		size_t bytes = (format & 0xFF) / 8;
+		if (data.size() < 8)
+			throw ValueError("Incorrect size of genotype.");
+		size_t numMut = static_cast<size_t>(getLE(data.data(), 8));
+		if (data.size() != 8 + numMut * (8 + bytes))
+			throw ValueError("Incorrect size of genotype.");
+		const char * ptr = data.data() + 8;
+		for (size_t i = 0; i < numMut; ++i, ptr += 8 + bytes) {
+			size_t pos = static_cast<size_t>(getLE(ptr, 8));
+			size_t value = static_cast<size_t>(getLE(ptr + 8, bytes));
+			if (pos >= n)
+				throw ValueError("Incorrect position of allele.");
+			maxAllele = std::max(maxAllele, value);
+#ifdef MUTANTALLELE
+			geno.push_back(pos, TO_ALLELE(value));
+#else
+			geno[pos] = TO_ALLELE(value);
+#endif
+		}
+	} else {
+		size_t bytes = format / 8;
+		if (bytes == 0 || data.size() != n * bytes)
+			throw ValueError("Incorrect size of genotype.");
+#if !defined(BINARYALLELE) && !defined(MUTANTALLELE)
+		if (bytes == sizeof(Allele) && littleEndian()) {
+			if (n > 0)
+				memcpy(&geno[0], data.data(), n * sizeof(Allele));
+			return;
+		}
+#endif
+		const char * ptr = data.data();
+		for (size_t i = 0; i < n; ++i, ptr += bytes) {
+			size_t value = static_cast<size_t>(getLE(ptr, bytes));
+			if (value == 0)
+				continue;
+			maxAllele = std::max(maxAllele, value);
+#ifdef MUTANTALLELE
+			geno.push_back(i, TO_ALLELE(value));
+#else
+			geno[i] = TO_ALLELE(value);
+#endif
+		}
+	}
+}
+
+
+}
+
+
+void Population::writeGeneration(std::ostream & out, size_t gen, int level,
+                                 map<vectoru, size_t> & index) const
+{
+	// subpopulation structure
+	std::ostringstream os;
+	{
+		boost::archive::text_oarchive ar(os);
+		ar << m_subPopSize;
+		ar << m_subPopNames;
+	}
+	writeIndexedBlock(out, index, blockKey(BLOCK_GENERATION, gen), 0, os.str(), level);
+
+	size_t ply = ploidy();
+	size_t nLoci = totNumLoci();
+	size_t infoStep = infoSize();
+	for (size_t sp = 0; sp < numSubPop(); ++sp) {
+		size_t spBegin = subPopBegin(sp);
+		size_t spSize = subPopSize(sp);
+		// blocks of a subpopulation are compressed in parallel
+		vector<vectoru> keys;
+		vector<uint32_t> formats;
+		vectorstr blocks;
+
+		string data;
+		data.reserve(spSize);
+		for (size_t i = spBegin; i < spBegin + spSize; ++i)
+			data.push_back(static_cast<char>((m_inds[i].sex() == FEMALE ? 1 : 0) |
+				                             (m_inds[i].affected() ? 2 : 0)));
+		keys.push_back(blockKey(BLOCK_INDIVIDUAL, gen, sp));
+		formats.push_back(8);
+		blocks.push_back(data);
+
+		// individuals are in order so their information fields are contiguous
+		data.clear();
+		putDoubles(data, spSize * infoStep == 0 ? NULL : &m_info[spBegin * infoStep], spSize * infoStep);
+		keys.push_back(blockKey(BLOCK_INFO, gen, sp));
+		formats.push_back(64);
+		blocks.push_back(data);
+
+		for (size_t lb = 0; lb * BinaryLociBlockSize < nLoci; ++lb) {
+			size_t lociBegin = lb * BinaryLociBlockSize;
+			size_t len = std::min(BinaryLociBlockSize, nLoci - lociBegin);
+			// alleles at the block of loci, by individual and homologous copy
+			GenoVector geno(spSize * ply * len);
+			GenoIterator ptr = geno.begin();
+			for (size_t i = spBegin; i < spBegin + spSize; ++i)
+				for (size_t p = 0; p < ply; ++p, ptr += len)
+					copyAlleles(m_inds[i].genoBegin(p) + lociBegin, ptr, len);
+			data.clear();
+			keys.push_back(blockKey(BLOCK_GENOTYPE, gen, sp, lb));
+			formats.push_back(encodeGenotype(geno, data));
+			blocks.push_back(data);
+
+			// lineage block is empty for modules without lineage
+			data.clear();
+#ifdef LINEAGE
+			vectori lineage(spSize * ply * len);
+			vectori::iterator lin = lineage.begin();
+			for (size_t i = spBegin; i < spBegin + spSize; ++i)
+				for (size_t p = 0; p < ply; ++p, lin += len)
+					std::copy(m_inds[i].lineageBegin(p) + lociBegin, m_inds[i].lineageBegin(p) + lociBegin + len, lin);
+			putArray(data, lineage.empty() ? NULL : &lineage[0], lineage.size(), 8);
+#endif
+			keys.push_back(blockKey(BLOCK_LINEAGE, gen, sp, lb));
+			formats.push_back(64);
+			blocks.push_back(data);
+		}
+		writeIndexedBlocks(out, index, keys, formats, blocks, level);
+	}
+}
+
+
+void Population::readGeneration(std::istream & in, const map<vectoru, size_t> & index, size_t gen,
+                                const vectoru & subPops, const vectoru & loci, size_t fileLoci,
+                                size_t lociBlockSize, popData & pd, size_t & maxAllele)
+{
+	uint32_t format;
+	string data;
+
+	readIndexedBlock(in, index, blockKey(BLOCK_GENERATION, gen), format, data);
+	vectoru sizes;
+	vectorstr names;
+	{
+		std::istringstream is(data);
+		boost::archive::text_iarchive ar(is);
+		ar >> sizes;
+		ar >> names;
+	}
+	vectoru sps = subPops;
+	if (sps.empty())
+		for (size_t sp = 0; sp < sizes.size(); ++sp)
+			sps.push_back(sp);
+	pd.m_subPopSize.clear();
+	pd.m_subPopNames.clear();
+	for (size_t i = 0; i < sps.size(); ++i) {
+		if (sps[i] >= sizes.size())
+			throw IndexError((boost::format("Subpopulation index %1% out of range of 0 ~ %2% at generation %3%")
+					          % sps[i] % (sizes.size() - 1) % gen).str());
+		pd.m_subPopSize.push_back(sizes[sps[i]]);
+		if (!names.empty())
+			pd.m_subPopNames.push_back(names[sps[i]]);
+	}
+	size_t popSize = accumulate(pd.m_subPopSize.begin(), pd.m_subPopSize.end(), size_t(0));
+	size_t ply = ploidy();
+	size_t nLoci = totNumLoci();
+	size_t step = genoSize();
+	size_t infoStep = infoSize();
+
+	pd.m_genotype.resize(popSize * step);
+	LINEAGE_EXPR(pd.m_lineage.assign(popSize * step, 0));
+	pd.m_info.resize(popSize * infoStep);
+	pd.m_inds.resize(popSize);
+
+	// consecutive selected loci in the same block of loci
+	vectoru groups;
+	for (size_t idx = 0; idx < loci.size(); ++idx)
+		if (idx == 0 || loci[idx] / lociBlockSize != loci[idx - 1] / lociBlockSize)
+			groups.push_back(idx);
+	groups.push_back(loci.size());
+
+	size_t start = 0;
+	for (size_t i = 0; i < sps.size(); ++i) {
+		size_t sp = sps[i];
+		size_t spSize = sizes[sp];
+
+		// read blocks of the subpopulation and decompress them in parallel
+		vector<vectoru> keys;
+		keys.push_back(blockKey(BLOCK_INDIVIDUAL, gen, sp));
+		keys.push_back(blockKey(BLOCK_INFO, gen, sp));
+		for (size_t g = 0; g + 1 < groups.size(); ++g) {
+			keys.push_back(blockKey(BLOCK_GENOTYPE, gen, sp, loci[groups[g]] / lociBlockSize));
+			keys.push_back(blockKey(BLOCK_LINEAGE, gen, sp, loci[groups[g]] / lociBlockSize));
+		}
+		vector<uint32_t> formats;
+		vectorstr blocks;
+		readIndexedBlocks(in, index, keys, formats, blocks);
+
+		if (blocks[0].size() != spSize)
+			throw ValueError("Number of individuals does not match population size.");
+		for (size_t j = 0; j < spSize; ++j) {
+			pd.m_inds[start + j].setSex(blocks[0][j] & 1 ? FEMALE : MALE);
+			pd.m_inds[start + j].setAffected((blocks[0][j] & 2) != 0);
+		}
+
+		getDoubles(blocks[1], spSize * infoStep == 0 ? NULL : &pd.m_info[start * infoStep], spSize * infoStep);
+
+		// copy selected loci from blocks of loci
+		for (size_t g = 0; g + 1 < groups.size(); ++g) {
+			size_t idx = groups[g];
+			size_t idxEnd = groups[g + 1];
+			size_t lb = loci[idx] / lociBlockSize;
+			size_t lociBegin = lb * lociBlockSize;
+			size_t len = std::min(lociBlockSize, fileLoci - lociBegin);
+			bool consecutive = loci[idxEnd - 1] - loci[idx] == idxEnd - 1 - idx;
+
+			GenoVector geno;
+			decodeGenotype(blocks[2 + 2 * g], formats[2 + 2 * g], spSize * ply * len, geno, maxAllele);
+			for (size_t j = 0; j < spSize; ++j) {
+				for (size_t p = 0; p < ply; ++p) {
+					GenoIterator from = geno.begin() + (j * ply + p) * len;
+					GenoIterator to = pd.m_genotype.begin() + (start + j) * step + p * nLoci;
+					if (consecutive)
+						copyAlleles(from + (loci[idx] - lociBegin), to + idx, idxEnd - idx);
+					else
+						for (size_t k = idx; k < idxEnd; ++k)
+							REF_ASSIGN_ALLELE(to + k, DEREF_ALLELE(from + (loci[k] - lociBegin)));
+				}
+			}
+
+			// lineage is ignored by modules without lineage, and is set to zero
+			// if the population is saved by such a module.
+#ifdef LINEAGE
+			const string & lineage = blocks[3 + 2 * g];
+			if (!lineage.empty()) {
+				if (lineage.size() != spSize * ply * len * 8)
+					throw ValueError("Incorrect size of lineage.");
+				for (size_t j = 0; j < spSize; ++j) {
+					for (size_t p = 0; p < ply; ++p) {
+						const char * from = lineage.data() + (j * ply + p) * len * 8;
+						LineageIterator to = pd.m_lineage.begin() + (start + j) * step + p * nLoci;
+						for (size_t k = idx; k < idxEnd; ++k)
+							*(to + k) = static_cast<long>(static_cast<int64_t>(getLE(from + (loci[k] - lociBegin) * 8, 8)));
+					}
+				}
+			}
+#endif
+		}
+		start += spSize;
+	}
+
+	GenoIterator ptr = pd.m_genotype.begin();
+	InfoIterator infoPtr = pd.m_info.begin();
+	for (size_t i = 0; i < popSize; ++i, ptr += step, infoPtr += infoStep) {
+		pd.m_inds[i].setGenoStruIdx(genoStruIdx());
+		pd.m_inds[i].setGenoPtr(ptr);
+		pd.m_inds[i].setInfoPtr(infoPtr);
+	}
+#ifdef LINEAGE
+	LineageIterator lineagePtr = pd.m_lineage.begin();
+	for (size_t i = 0; i < popSize; ++i, lineagePtr += step)
+		pd.m_inds[i].setLineagePtr(lineagePtr);
+#endif
+	pd.m_indOrdered = true;
+}
+
+
+void Population::saveBinary(std::ostream & out, int level) const
+{
+	// deep adjustment: everyone in order
+	const_cast<Population *>(this)->syncIndPointers();
+
+	string header(BinaryPopMagic, sizeof(BinaryPopMagic));
+	putLE(header, BinaryPopVersion, 4);
+	putLE(header, 0, 4);
+	out.write(header.data(), header.size());
+
+	BlockIndex index;
+	std::ostringstream os;
+	{
+		boost::archive::text_oarchive ar(os);
+		ar << genoStru();
+		const int ancestralGens = m_ancestralGens;
+		const size_t numGens = m_ancestralPops.size() + 1;
+		const size_t lociBlockSize = BinaryLociBlockSize;
+		ar << ancestralGens;
+		ar << numGens;
+		ar << lociBlockSize;
+	}
+	writeIndexedBlock(out, index, blockKey(BLOCK_HEADER, 0), 0, os.str(), level);
+
+	writeGeneration(out, 0, level, index);
+	for (size_t i = 0; i < m_ancestralPops.size(); ++i) {
+		const_cast<Population *>(this)->useAncestralGen(i + 1);
+		// need to make sure ancestral pop also in order
+		const_cast<Population *>(this)->syncIndPointers();
+		writeGeneration(out, i + 1, level, index);
+	}
+	const_cast<Population *>(this)->useAncestralGen(0);
+
+	writeIndexedBlock(out, index, blockKey(BLOCK_VARS, 0), 0, varsAsString(true), level);
+
+	// index of blocks, followed by its offset and the magic string
+	size_t indexOffset = static_cast<size_t>(out.tellp());
+	string data;
+	data.reserve(index.size() * BinaryIndexEntrySize);
+	BlockIndex::const_iterator it = index.begin();
+	BlockIndex::const_iterator itEnd = index.end();
+	for (; it != itEnd; ++it) {
+		for (size_t i = 0; i < 4; ++i)
+			putLE(data, it->first[i], 4);
+		putLE(data, it->second, 8);
+	}
+	writeBlock(out, BLOCK_INDEX, 0, data, level);
+	string trailer;
+	putLE(trailer, indexOffset, 8);
+	trailer.append(BinaryPopMagic, sizeof(BinaryPopMagic));
+	out.write(trailer.data(), trailer.size());
+}
+
+
+void Population::loadBinary(std::istream & in, const subPopList & subPops,
+                            const lociList & loci, const uintList & ancGens)
+{
+	char header[16];
+
+	if (!in.read(header, 16) || memcmp(header, BinaryPopMagic, sizeof(BinaryPopMagic)) != 0)
+		throw ValueError("Not a binary population file.");
+	uint32_t version = static_cast<uint32_t>(getLE(header + 8, 4));
+	if (version > BinaryPopVersion)
+		throw ValueError((boost::format("Population file of version %1% is not supported. "
+			                            "Please upgrade simuPOP to load this file.") % version).str());
+
+	// read index from the end of the file
+	char trailer[16];
+	in.seekg(0, std::ios::end);
+	std::streamoff fileSize = in.tellg();
+	if (fileSize < 32)
+		throw ValueError("Unexpected end of population file.");
+	in.seekg(fileSize - 16);
+	if (!in.read(trailer, 16) || memcmp(trailer + 8, BinaryPopMagic, sizeof(BinaryPopMagic)) != 0)
+		throw ValueError("Population file is truncated or corrupted.");
+	in.seekg(static_cast<std::streamoff>(getLE(trailer, 8)));
+	uint32_t format;
+	string data;
+	readBlock(in, BLOCK_INDEX, format, data);
+	BlockIndex index;
+	for (size_t i = 0; i + BinaryIndexEntrySize <= data.size(); i += BinaryIndexEntrySize) {
+		vectoru key(4);
+		for (size_t j = 0; j < 4; ++j)
+			key[j] = static_cast<size_t>(getLE(data.data() + i + j * 4, 4));
+		index[key] = static_cast<size_t>(getLE(data.data() + i + 16, 8));
+	}
+
+	readIndexedBlock(in, index, blockKey(BLOCK_HEADER, 0), format, data);
+	GenoStructure stru;
+	int ancestralGens = 0;
+	size_t numGens = 0;
+	size_t lociBlockSize = 0;
+	{
+		std::istringstream is(data);
+		boost::archive::text_iarchive ar(is);
+		ar >> stru;
+		ar >> ancestralGens;
+		ar >> numGens;
+		ar >> lociBlockSize;
+	}
+	setGenoStructure(stru);
+
+	// selected subpopulations
+	vectoru sps;
+	if (!subPops.allAvail()) {
+		subPopList::const_iterator sp = subPops.begin();
+		for (; sp != subPops.end(); ++sp) {
+			if (!sp->valid() || sp->isVirtual() || sp->allAvailSP())
+				throw ValueError("Subpopulations to be loaded should be specified by their indexes.");
+			sps.push_back(sp->subPop());
+		}
+		// subpopulations are loaded in the order they are stored
+		std::sort(sps.begin(), sps.end());
+		sps.erase(std::unique(sps.begin(), sps.end()), sps.end());
+	}
+	// selected loci, in order
+	size_t fileLoci = totNumLoci();
+	vectoru kept;
+	if (loci.allAvail() || loci.unspecified()) {
+		for (size_t i = 0; i < fileLoci; ++i)
+			kept.push_back(i);
+	} else {
+		kept = loci.elems(this);
+		std::sort(kept.begin(), kept.end());
+		kept.erase(std::unique(kept.begin(), kept.end()), kept.end());
+		if (!kept.empty() && kept.back() >= fileLoci)
+			throw IndexError((boost::format("Locus index %1% out of range of 0 ~ %2%")
+					          % kept.back() % (fileLoci - 1)).str());
+		setGenoStructure(gsRemoveLoci(kept));
+	}
+	// selected generations, in order
+	vectoru gens;
+	if (ancGens.allAvail() || ancGens.unspecified()) {
+		for (size_t i = 0; i < numGens; ++i)
+			gens.push_back(i);
+	} else {
+		gens = ancGens.elems();
+		std::sort(gens.begin(), gens.end());
+		gens.erase(std::unique(gens.begin(), gens.end()), gens.end());
+		if (gens.empty())
+			throw ValueError("At least one generation should be loaded.");
+		if (gens.back() >= numGens)
+			throw IndexError((boost::format("Ancestral generation %1% out of range of 0 ~ %2%")
+					          % gens.back() % (numGens - 1)).str());
+	}
+	// check subpopulation indexes before any generation is read
+	if (!sps.empty()) {
+		for (size_t i = 0; i < gens.size(); ++i) {
+			readIndexedBlock(in, index, blockKey(BLOCK_GENERATION, gens[i]), format, data);
+			vectoru sizes;
+			std::istringstream is(data);
+			boost::archive::text_iarchive ar(is);
+			ar >> sizes;
+			if (sps.back() >= sizes.size())
+				throw IndexError((boost::format("Subpopulation index %1% out of range of 0 ~ %2% at generation %3%")
+						          % sps.back() % (sizes.size() - 1) % gens[i]).str());
+		}
+	}
+
+	size_t maxAllele = 0;
+	m_ancestralPops.clear();
+	m_curAncestralGen = 0;
+	for (size_t i = 0; i < gens.size(); ++i) {
+		if (i == 0) {
+			popData pd;
+			readGeneration(in, index, gens[i], sps, kept, fileLoci, lociBlockSize, pd, maxAllele);
+			pd.swap(*this);
+		} else {
+			// read to popData in place because individuals point to its data
+			m_ancestralPops.push_back(popData());
+			readGeneration(in, index, gens[i], sps, kept, fileLoci, lociBlockSize,
+				m_ancestralPops.back(), maxAllele);
+		}
+	}
+	// keep the same number of ancestral generations if all generations are
+	// loaded, and only the loaded generations otherwise.
+	m_ancestralGens = gens.size() == numGens ? ancestralGens : static_cast<int>(gens.size() - 1);
+	m_popSize = m_inds.size();
+	setSubPopStru(m_subPopSize, m_subPopNames);
+
+	readIndexedBlock(in, index, blockKey(BLOCK_VARS, 0), format, data);
+	varsFromString(data, true);
+
+	setIndOrdered(true);
+	DBG_WARNIF(maxAllele > ModuleMaxAllele, (boost::format("Warning: the maximum allele of the loaded population is %1%"
+											               " which is larger than the maximum allowed allele of this module. "
+											               "These alleles have been truncated.") % maxAllele).str());
+}
+
+
+void Population::save(const string & filename, int compress) const
+{
+	PARAM_FAILIF(compress < 0 || compress > 9, ValueError,
+		(boost::format("Compression level should be between 0 and 9, %1% given.") % compress).str());
+
+	std::ofstream out(filename.c_str(), std::ios::binary);
+
+	if (!out)
 		throw ValueError("Cannot write to file " + filename);
-	ofs.push(dest);
-	// if ofs itself get into trouble
-	if (!ofs)
+	saveBinary(out, compress);
+	out.close();
+	if (!out)
 		throw ValueError("Cannot save population to file " + filename);
+}
 
-	boost::archive::text_oarchive oa(ofs);
-	oa << *this;
+
+void Population::load(const string & filename, const subPopList & subPops,
+                      const lociList & loci, const uintList & ancGens, bool keepCheckpoint)
+{
+	loadFile(filename, subPops, loci, ancGens);
+	// states of a checkpoint are only used to resume an evolution
+	if (!keepCheckpoint && PyDict_GetItemString(m_vars.dict(), CHECKPOINT_VAR) != NULL)
+		PyDict_DelItemString(m_vars.dict(), CHECKPOINT_VAR);
 }
 
 
-void Population::load(const string & filename)
+void Population::loadFile(const string & filename, const subPopList & subPops,
+                          const lociList & loci, const uintList & ancGens)
 {
+	// files saved in the binary format start with a magic string, and
+	// files saved in the text format are gzipped archives.
+	{
+		std::ifstream in(filename.c_str(), std::ios::binary);
+		if (!in)
+			throw ValueError("Can not open file " + filename);
+		char magic[sizeof(BinaryPopMagic)];
+		if (in.read(magic, sizeof(magic)) && memcmp(magic, BinaryPopMagic, sizeof(magic)) == 0) {
+			in.seekg(0);
+			try {
+				loadBinary(in, subPops, loci, ancGens);
+			} catch (const IndexError &) {
+				// invalid selection of subpopulations, loci or generations
+				throw;
+			} catch (const std::exception & e) {
+				throw ValueError("Failed to load Population " + filename + " (" + e.what() + ")\n");
+			}
+			return;
+		}
+	}
+
+	if (!subPops.allAvail() || !(loci.allAvail() || loci.unspecified()) ||
+	    !(ancGens.allAvail() || ancGens.unspecified()))
+		throw ValueError("Selected subpopulations, loci or ancestral generations can only be "
+			             "loaded from populations saved in the binary format.");
+
 	boost::iostreams::filtering_istream ifs;
 
 	ifs.push(boost::iostreams::gzip_decompressor());
@@ -4119,6 +5644,38 @@ void Population::load(const string & filename)
 }
 
 
+PyObject * Population::toBytes() const
+{
+	std::ostringstream out(std::ios::binary);
+
+	saveBinary(out, 0);
+	const string data = out.str();
+	return PyBytes_FromStringAndSize(data.data(), static_cast<Py_ssize_t>(data.size()));
+}
+
+
+void Population::fromBytes(PyObject * data)
+{
+	Py_buffer view;
+
+	if (PyObject_GetBuffer(data, &view, PyBUF_C_CONTIGUOUS) != 0) {
+		PyErr_Clear();
+		throw ValueError("An object that supports the buffer protocol is expected.");
+	}
+	// read directly from the buffer, which avoids copying the whole
+	// population to a string stream.
+	boost::iostreams::stream<boost::iostreams::array_source> in(
+		static_cast<const char *>(view.buf), static_cast<size_t>(view.len));
+	try {
+		loadBinary(in, subPopList(), lociList(), uintList());
+	} catch (const std::exception & e) {
+		PyBuffer_Release(&view);
+		throw ValueError(string("Failed to load Population (") + e.what() + ")\n");
+	}
+	PyBuffer_Release(&view);
+}
+
+
 PyObject * Population::vars(vspID vsp)
 {
 	if (!vsp.valid()) {
@@ -4188,15 +5745,17 @@ void Population::syncIndPointers(bool infoOnly) const
 	if (indOrdered())
 		return;
 
-	if (infoOnly) {
+	// individuals of a population view refer to genotypes of another
+	// population so a complete sync is needed.
+	if (infoOnly && m_genotype.size() == m_popSize * genoSize()) {
 		DBG_DO(DBG_POPULATION, cerr << "Adjust info position " << endl);
 		size_t is = infoSize();
 		if (is == 0) {
 			setIndOrdered(true);
 			return;
 		}
-		vectorf tmpInfo(m_popSize * is);
-		vectorf::iterator infoPtr = tmpInfo.begin();
+		vectorinfo tmpInfo(m_popSize * is);
+		InfoIterator infoPtr = tmpInfo.begin();
 
 		IndIterator ind = const_cast<Population *>(this)->indIterator();
 		for (; ind.valid(); ++ind) {
@@ -4214,16 +5773,16 @@ void Population::syncIndPointers(bool infoOnly) const
 		vectorm tmpGenotype(m_popSize * genoSize());
 		vectorm::iterator it = tmpGenotype.begin();
 #else
-		vectora tmpGenotype(m_popSize * genoSize());
+		vectora tmpGenotype(m_popSize * genoSize(), Allele(), m_genotype.get_allocator());
 		vectora::iterator it = tmpGenotype.begin();
 #endif
 #ifdef LINEAGE
-		vectori tmpLineage(m_popSize * genoSize());
-		vectori::iterator lineagePtr = tmpLineage.begin();
+		vectorlineage tmpLineage(m_popSize * genoSize());
+		LineageIterator lineagePtr = tmpLineage.begin();
 #endif
 
-		vectorf tmpInfo(m_popSize * infoSize());
-		vectorf::iterator infoPtr = tmpInfo.begin();
+		vectorinfo tmpInfo(m_popSize * infoSize());
+		InfoIterator infoPtr = tmpInfo.begin();
 
 		IndIterator ind = const_cast<Population *>(this)->indIterator();
 		for (; ind.valid(); ++ind) {
@@ -4254,11 +5813,12 @@ void Population::syncIndPointers(bool infoOnly) const
 }
 
 
-Population & loadPopulation(const string & file)
+Population & loadPopulation(const string & file, const subPopList & subPops,
+                            const lociList & loci, const uintList & ancGens)
 {
 	Population * p = new Population();
 
-	p->load(file);
+	p->load(file, subPops, loci, ancGens);
 	return *p;
 }
 
@@ -66,8 +66,8 @@ namespace simuPOP {
 class pyIndIterator
 {
 public:
-	pyIndIterator(vector<Individual>::iterator const begin,
-		vector<Individual>::iterator const end,
+	pyIndIterator(vectorind::iterator const begin,
+		vectorind::iterator const end,
 		bool allInds, vspFunctor func) :
 		m_begin(begin),
 		m_index(begin),
@@ -123,13 +123,13 @@ public:
 
 private:
 	// current (initial individual)
-	vector<Individual>::iterator m_begin;
+	vectorind::iterator m_begin;
 
 	// current (initial individual)
-	vector<Individual>::iterator m_index;
+	vectorind::iterator m_index;
 
 	// ending idx
-	vector<Individual>::iterator m_end;
+	vectorind::iterator m_end;
 
 	//
 	bool m_allInds;
@@ -181,6 +181,9 @@ class Population : public GenoStruTrait
 {
 public:
 #define HAPLODIPLOID 2.5
+// population variable that holds states of a checkpoint saved by operator
+// Checkpoint, which is removed when a population is loaded.
+#define CHECKPOINT_VAR "_checkpoint"
 
 	/** @name  constructors and destructor */
 	//@{
@@ -242,6 +245,15 @@ public:
 	 *    will have name \c '' if this parameter is not specified.
 	 *  \param infoFields Names of information fields (named float number) that
 	 *    will be attached to each individual.
+	 *  \param storage How genotypes of this population are stored. The
+	 *    default value \c '' stores genotypes in memory. <tt>'mmap:DIR'</tt>
+	 *    stores genotypes in memory-mapped temporary files under directory
+	 *    \c DIR (or the system temporary directory if \c DIR is empty) so
+	 *    that the operating system can page genotypes of large populations
+	 *    out to disk. The temporary files are removed automatically. Offspring
+	 *    and copies of the population use the same storage. This option is not
+	 *    supported for the mutant module, and on platforms without
+	 *    memory-mapped files.
 	 */
 	Population(const uintList & size = vectoru(),
 		float ploidy = 2,
@@ -253,7 +265,8 @@ public:
 		const stringMatrix & alleleNames = stringMatrix(),
 		const stringList & lociNames = vectorstr(),
 		const stringList & subPopNames = vectorstr(),
-		const stringList & infoFields = vectorstr());
+		const stringList & infoFields = vectorstr(),
+		const string & storage = string());
 
 	/// CPPONLY copy constructor
 	Population(const Population & rhs);
@@ -288,10 +301,12 @@ public:
 		m_vars.swap(rhs.m_vars);
 		m_ancestralPops.swap(rhs.m_ancestralPops);
 		std::swap(m_curAncestralGen, rhs.m_curAncestralGen);
+		std::swap(m_compressAncestors, rhs.m_compressAncestors);
 		std::swap(m_indOrdered, rhs.m_indOrdered);
 		std::swap(m_vspSplitter, rhs.m_vspSplitter);
 		std::swap(rhs.m_gen, m_gen);
 		std::swap(rhs.m_rep, m_rep);
+		m_genealogyLoci.swap(rhs.m_genealogyLoci);
 #ifdef MUTANTALLELE
 		// vectorm must be setGenoPtr after swap
 		GenoIterator ptr = m_genotype.begin();
@@ -307,6 +322,48 @@ public:
 	/// destroy a population
 	~Population();
 
+	/** Return how genotypes of this population are stored, which is \c ''
+	 *  for genotypes stored in memory, or <tt>'mmap:DIR'</tt> for genotypes
+	 *  stored in memory-mapped temporary files under directory \c DIR. Please
+	 *  refer to parameter \e storage of the constructor for details.
+	 *  <group>1-pop</group>
+	 */
+	string storage() const;
+
+	/** CPPONLY Move genotypes of all generations to the specified \e storage,
+	 *  which should be \c '' or <tt>'mmap:DIR'</tt>.
+	 */
+	void setStorage(const string & storage);
+
+	/** Return loci of which alleles of the present generation are recorded
+	 *  in a genealogy (see class \c Genealogy) and have not been set by
+	 *  function \c Genealogy.mutate. Statistics, exporters and function
+	 *  \c genotype() raise a \c ValueError for these loci because they hold
+	 *  alleles of individuals of previous generations.
+	 *  <group>1-pop</group>
+	 */
+	vectoru genealogyLoci() const
+	{
+		return m_genealogyLoci;
+	}
+
+
+	/// CPPONLY return true if alleles at some loci are recorded in a
+	/// genealogy and have not been set.
+	bool hasGenealogyLoci() const
+	{
+		return !m_genealogyLoci.empty();
+	}
+
+
+	/// CPPONLY set loci of which alleles are recorded in a genealogy, or
+	/// clear them if \e loci is empty.
+	void setGenealogyLoci(const vectoru & loci);
+
+	/// CPPONLY raise a ValueError if alleles at any of \e loci are recorded
+	/// in a genealogy and have not been set.
+	void checkGenealogyLoci(const vectoru & loci) const;
+
 	/** CPPONLY
 	 * Validate if a population is in good shape. This is mostly used
 	 * to detect if scratch population is prepared properly during
@@ -715,6 +772,20 @@ public:
 
 #endif
 
+	/** CPPONLY Individual iterator for the \e block -th block of
+	 *  \c RNGStream::blockSize individuals of subpopulation \e subPop.
+	 *  The iterator will skip invisible Individuals
+	 */
+	IndIterator indBlockIterator(size_t subPop, size_t block)
+	{
+		CHECKRANGESUBPOP(subPop);
+		size_t begin = std::min(m_subPopIndex[subPop] + block * RNGStream::blockSize, m_subPopIndex[subPop + 1]);
+		size_t end = std::min(begin + RNGStream::blockSize, m_subPopIndex[subPop + 1]);
+		return IndIterator(m_inds.begin() + begin, m_inds.begin() + end,
+			!hasActivatedVirtualSubPop(subPop));
+	}
+
+
 	/** CPPONLY Individual iterator: without subPop info
 	 *  The iterator will skip invisible Individuals
 	 */
@@ -835,6 +906,42 @@ public:
 	/// CPPONLY allele begin, for given subPop
 	ConstIndAlleleIterator alleleIterator(size_t locus, size_t subPop) const;
 
+#ifndef MUTANTALLELE
+	/** CPPONLY Copy alleles at \e loci of individuals in (virtual)
+	 *  subpopulation \e subPop to \e alleles in locus-major order, namely
+	 *  alleles of all individuals at <tt>loci[0]</tt> (ordered by individual
+	 *  and then by homologous copy), followed by alleles at <tt>loci[1]</tt>,
+	 *  etc. The number of alleles at each locus is returned. Functions that
+	 *  scan loci across individuals can copy a block of loci in one pass
+	 *  through individuals and then scan each locus in contiguous memory.
+	 *  Alleles on sex chromosomes and of haplodiploid populations are not
+	 *  handled specially so this function should only be used for loci on
+	 *  autosomes and customized chromosomes of non-haplodiploid populations.
+	 */
+	size_t locusMajorGenotype(const vectoru & loci, size_t subPop, vector<Allele> & alleles);
+
+#endif
+
+#ifdef BINARYALLELE
+	/** CPPONLY Copy alleles at \e loci of individuals in (virtual)
+	 *  subpopulation \e subPop to bit planes \e planes so that alleles of
+	 *  consecutive individuals at a locus and homologous copy are stored as
+	 *  bits of consecutive words. If there are \c n individuals, the
+	 *  <tt>nWords = (n + WORDBIT - 1) / WORDBIT</tt> words starting from
+	 *  <tt>planes[(i * ploidy() + p) * nWords]</tt> hold alleles at
+	 *  <tt>loci[i]</tt> on the \c p-th homologous copy of these individuals,
+	 *  with unused bits of the last word set to zero. Alleles are copied in
+	 *  blocks of WORDBIT loci and WORDBIT individuals and transposed as bit
+	 *  matrices, which is fast if \e loci are consecutive. Allele and
+	 *  genotype counts can then be calculated with bit operations on whole
+	 *  words. The number of individuals is returned. Like
+	 *  locusMajorGenotype, this function does not handle sex chromosomes and
+	 *  haplodiploid populations.
+	 */
+	size_t locusBitPlanes(const vectoru & loci, size_t subPop, vector<WORDTYPE> & planes);
+
+#endif
+
 #ifdef LINEAGE
 	/// CPPONLY lineage begin
 	IndLineageIterator lineageIterator(size_t locus);
@@ -1050,7 +1157,10 @@ public:
 
 	/** Return an editable array of the genotype of all individuals in
 	 *  a population (if <tt>subPop=[]</tt>, default), or individuals in a
-	 *  subpopulation \e subPop. Virtual subpopulation is unsupported.
+	 *  subpopulation \e subPop. Virtual subpopulation is unsupported. Except
+	 *  for binary and mutant modules, the returned array supports the Python
+	 *  buffer protocol so that <tt>numpy.asarray(pop.genotype())</tt> returns
+	 *  a writable view of the genotype of the population without copying.
 	 *  <group>5-genotype</group>
 	 */
 	PyObject * genotype(vspID subPop = vspID());
@@ -1079,21 +1189,35 @@ public:
 	 *  <tt>subPop=[]</tt>) or in a (virtual) subpopulation \e subPop (if
 	 *  <tt>subPop=sp</tt> or <tt>(sp, vsp)</tt>) using a list of alleles
 	 *  \e geno. \e geno will be reused if its length is less than
-	 *  <tt>subPopSize(subPop)*totNumLoci()*ploidy()</tt>.
+	 *  <tt>subPopSize(subPop)*totNumLoci()*ploidy()</tt>. \e geno can also
+	 *  be any object that supports the buffer protocol (e.g. a numpy array
+	 *  of shape individuals x ploidy x loci of any integer type), in which
+	 *  case alleles are read directly from the buffer. If a list of indexes
+	 *  (relative to the beginning of subpopulation \e subPop if specified)
+	 *  is given to parameter \e indexes, only genotypes of these individuals
+	 *  will be set. Similarly, if a list of loci is specified, only alleles
+	 *  at these loci will be set and \e geno should list alleles of these
+	 *  loci only. Parameter \e indexes cannot be used with a virtual
+	 *  subpopulation.
 	 *  <group>5-genotype</group>
 	 */
-	void setGenotype(const uintList & geno, vspID subPop = vspID());
+	void setGenotype(const uintList & geno, vspID subPop = vspID(),
+		const uintList & indexes = uintList(), const lociList & loci = lociList());
 
 
 	/** Fill the lineage of all individuals in a population (if
 	 *  <tt>subPop=[]</tt>) or in a (virtual) subpopulation \e subPop (if
 	 *  <tt>subPop=sp</tt> or <tt>(sp, vsp)</tt>) using a list of IDs
 	 *  \e lineage. \e lineage will be reused if its length is less than
-	 *  <tt>subPopSize(subPop)*totNumLoci()*ploidy()</tt>. This function
+	 *  <tt>subPopSize(subPop)*totNumLoci()*ploidy()</tt>. Similar to function
+	 *  \c setGenotype, \e lineage can be any object that supports the
+	 *  buffer protocol, and parameters \e indexes and \e loci can be used
+	 *  to set lineage of selected individuals and loci. This function
 	 *  returns directly for modules without lineage information.
 	 *  <group>5-genotype</group>
 	 */
-	void setLineage(const uintList & geno, vspID subPop = vspID());
+	void setLineage(const uintList & geno, vspID subPop = vspID(),
+		const uintList & indexes = uintList(), const lociList & loci = lociList());
 
 	//@}
 
@@ -1484,6 +1608,36 @@ public:
 	vectorf indInfo(const uintString & field, vspID subPop = vspID());
 
 
+	/** Return a writable two-dimensional view (a Python \c memoryview
+	 *  object) of information fields \e fields (default to all fields) of
+	 *  all individuals (if <tt>subPop=[]</tt>, default), or individuals in a
+	 *  subpopulation \e subPop. The view has one row per individual and
+	 *  one column per field and refers directly to the information fields
+	 *  of the population so that it can be used, for example, as
+	 *  <tt>numpy.asarray(pop.infoArray())</tt> to read and write
+	 *  information fields without copying. Because the view is strided,
+	 *  fields should be evenly spaced (e.g. all fields or a single field).
+	 *  Virtual subpopulation is unsupported. Similar to function
+	 *  \c genotype(), the view will become invalid once the population
+	 *  changes.
+	 *  <group>8-info</group>
+	 */
+	PyObject * infoArray(const stringList & fields = stringList(), vspID subPop = vspID());
+
+	/** Set information fields \e fields (default to all fields) of all
+	 *  individuals (if <tt>subPop=[]</tt>, default), or individuals in a
+	 *  (virtual) subpopulation (<tt>subPop=sp</tt> or <tt>(sp, vsp)</tt>)
+	 *  from \e values, which can be any object that supports the buffer
+	 *  protocol (e.g. a numpy array of any numeric type). Values are used
+	 *  individual by individual, and field by field for each individual
+	 *  (C order of a matrix with one row per individual), and will be
+	 *  reused if there are not enough values.
+	 *  <group>8-info</group>
+	 */
+	void setInfoArray(PyObject * values, const stringList & fields = stringList(),
+		vspID subPop = vspID());
+
+
 	/** Add a list of information fields \e fields to a population and
 	 *  initialize their values to \e init. If an information field alreay
 	 *  exists, it will be re-initialized.
@@ -1526,6 +1680,23 @@ public:
 	/// CPPONLY remove certain ancestral generations
 	void keepAncestralGens(const uintList & ancGens);
 
+	/** Store genotypes (and lineage) of ancestral generations in compressed
+	 *  form if \e compress is \c True (default), or as regular uncompressed
+	 *  arrays otherwise. Because ancestral generations of a simulation are
+	 *  mostly used to trace pedigrees through information fields of
+	 *  individuals, this can significantly reduce the memory footprint of
+	 *  long pedigree-recording simulations (e.g. <tt>ancGen=-1</tt>).
+	 *  Information fields and individual properties such as sex are not
+	 *  affected. Genotypes of an ancestral generation are decompressed
+	 *  automatically when the generation is accessed (e.g. through
+	 *  \c useAncestralGen or \c ancestor), and are compressed again when the
+	 *  present generation is restored or when a new generation is pushed to
+	 *  the population. This option has no effect for the mutant module, which
+	 *  already stores genotypes sparsely.
+	 *  <group>6-ancestral</group>
+	 */
+	void compressAncestralGens(bool compress = true);
+
 	/** Making ancestral generation \e idx (\c 0 for current generation, \c 1
 	 *  for parental generation, \c 2 for grand-parental generation, etc) the
 	 *  current generation. This is an efficient way to access Population
@@ -1549,15 +1720,42 @@ public:
 	void syncIndPointers(bool infoOnly = false) const;
 
 	/** Save population to a file \e filename, which can be loaded by a global
-	 *  function <tt>loadPopulation(filename)</tt>.
+	 *  function <tt>loadPopulation(filename)</tt>. The population is saved in
+	 *  a versioned binary format with genotype, lineage, information fields
+	 *  and individual status of each generation stored as blocks of
+	 *  little-endian values, and population variables stored in pickled
+	 *  form. Blocks are compressed in parallel if multiple threads are used,
+	 *  at compression level \e compress (\c 1 or \c True (default) for
+	 *  fastest and \c 9 for best compression), or saved uncompressed if
+	 *  \e compress is \c 0 or \c False. Populations saved in the text
+	 *  format used by previous versions of simuPOP can still be loaded.
 	 *  <group>8-pop</group>
 	 */
-	void save(const string & filename) const;
+	void save(const string & filename, int compress = 1) const;
 
-	/** CPPONLY load Population from file \e filename
+	/** CPPONLY load Population from file \e filename, saved in either the
+	 *  binary or the text format. Only selected subpopulations \e subPops,
+	 *  loci \e loci and ancestral generations \e ancGens are loaded from
+	 *  files in the binary format. States of a checkpoint saved by operator
+	 *  \c Checkpoint are removed unless \e keepCheckpoint is \c true.
 	 *  <group>8-pop</group>
 	 */
-	void load(const string & filename);
+	void load(const string & filename, const subPopList & subPops = subPopList(),
+		const lociList & loci = lociList(), const uintList & ancGens = uintList(),
+		bool keepCheckpoint = false);
+
+	/** HIDDEN Return the population in the binary format used by function
+	 *  save(), without compression, as a \c bytes object. This function is
+	 *  used to pickle populations.
+	 */
+	PyObject * toBytes() const;
+
+	/** HIDDEN Replace the content of the population with a population saved
+	 *  in the binary format in \e data, which can be any object that supports
+	 *  the buffer protocol (e.g. \c bytes or \c pickle.PickleBuffer). This
+	 *  function is used to unpickle populations.
+	 */
+	void fromBytes(PyObject * data);
 
 public:
 	/** return variables of a population as a Python dictionary. If a valid
@@ -1631,6 +1829,7 @@ public:
 
 private:
 	friend class boost::serialization::access;
+	friend class PopulationView;
 
 	void save(boost::archive::text_oarchive & ar, const unsigned int /* version */) const;
 
@@ -1638,6 +1837,46 @@ private:
 
 	BOOST_SERIALIZATION_SPLIT_MEMBER();
 
+	/// save population in the binary format, with blocks compressed at
+	/// compression level \e level
+	void saveBinary(std::ostream & out, int level) const;
+
+	/// load selected subpopulations, loci and ancestral generations of a
+	/// population saved in the binary format
+	void loadBinary(std::istream & in, const subPopList & subPops,
+		const lociList & loci, const uintList & ancGens);
+
+	/// load a population saved in either the binary or the text format
+	void loadFile(const string & filename, const subPopList & subPops,
+		const lociList & loci, const uintList & ancGens);
+
+	/// write blocks of subpopulation structure, and individuals, information
+	/// fields, genotype and lineage of each subpopulation (and block of loci)
+	/// of the current generation as generation \e gen, and record their
+	/// offsets in \e index.
+	void writeGeneration(std::ostream & out, size_t gen, int level,
+		map<vectoru, size_t> & index) const;
+
+	/// collect individuals in (virtual) subpopulation \e subPop (all
+	/// individuals if subPop is invalid) that are selected by \e indexes.
+	void selectedIndividuals(vspID subPop, const uintList & indexes,
+		vector<Individual *> & inds);
+
+	/// offsets of alleles at \e loci relative to the beginning of the
+	/// genotype of an individual, ordered by ploidy and then by loci.
+	void lociOffsets(const lociList & loci, vectoru & offsets) const;
+
+	/// decompress genotype of ancestral generation stored at \e genIdx of
+	/// m_ancestralPops if it has been compressed. The generation stays
+	/// decompressed until a new generation is pushed or the ancestral
+	/// generation in use is switched so that individuals returned by
+	/// lookups remain valid.
+	void unpackAncestralGen(size_t genIdx) const;
+
+	/// compress genotypes of all ancestral generations if
+	/// m_compressAncestors is set.
+	void packAncestralGens();
+
 private:
 	/// population size: number of individual
 	size_t m_popSize;
@@ -1662,16 +1901,16 @@ private:
 #endif
 
 #ifdef LINEAGE
-	vectori m_lineage;
+	vectorlineage m_lineage;
 #endif
 
 	/// information
 	/// only in head node
-	vectorf m_info;
+	vectorinfo m_info;
 
 	/// individuals.
 	/// only in head node?
-	vector<Individual> m_inds;
+	vectorind m_inds;
 
 	int m_ancestralGens;
 
@@ -1691,23 +1930,66 @@ private:
 #endif
 
 #ifdef LINEAGE
-		vectori m_lineage;
+		vectorlineage m_lineage;
 #endif
 
-		vectorf m_info;
-		vector<Individual> m_inds;
+		vectorinfo m_info;
+		vectorind m_inds;
 		bool m_indOrdered;
 
+		/// compressed genotype (and lineage) if m_packed is true
+		vector<unsigned char> m_packedGenotype;
+#ifdef LINEAGE
+		vector<unsigned char> m_packedLineage;
+#endif
+		bool m_packed;
+		size_t m_packedGenoSize;
+
+		popData() : m_subPopSize(), m_subPopNames(), m_genotype(),
+#ifdef LINEAGE
+			m_lineage(),
+#endif
+			m_info(), m_inds(), m_indOrdered(true), m_packedGenotype(),
+#ifdef LINEAGE
+			m_packedLineage(),
+#endif
+			m_packed(false), m_packedGenoSize(0)
+		{
+		}
+
+
 		// swap between a popData and existing data.
 		void swap(Population & pop);
 
+		// swap data with another popData.
+		void swap(popData & rhs);
+
+		// compress genotype (and lineage) of individuals in the order of
+		// m_inds and release the uncompressed arrays.
+		void pack();
+
+		// restore genotype (and lineage) from their compressed form.
+		void unpack();
+
 	};
 
+	/// read selected subpopulations \e subPops (all if empty) and sorted
+	/// loci \e loci of generation \e gen saved by writeGeneration to \e pd,
+	/// and record the largest allele in \e maxAllele. \e fileLoci and
+	/// \e lociBlockSize are the number of loci and size of blocks of loci
+	/// in the file.
+	void readGeneration(std::istream & in, const map<vectoru, size_t> & index, size_t gen,
+		const vectoru & subPops, const vectoru & loci, size_t fileLoci,
+		size_t lociBlockSize, popData & pd, size_t & maxAllele);
+
 	std::deque<popData> m_ancestralPops;
 
 	/// current ancestral depth
 	int m_curAncestralGen;
 
+	/// whether or not compress genotypes of ancestral generations
+	bool m_compressAncestors;
+
 	/// whether or not individual genotype and information are in order
 	/// within a population.
 	mutable bool m_indOrdered;
@@ -1715,12 +1997,15 @@ private:
 	mutable size_t m_gen;
 	mutable size_t m_rep;
 
+	/// loci of which alleles are recorded in a genealogy and are not set
+	vectoru m_genealogyLoci;
+
 public:
 	/** CPPONLY
 	 *  current replicate in a simulator which is not meaningful for a stand-alone population
 	 *	<group>evolve</group>
 	 */
-	size_t rep()
+	size_t rep() const
 	{
 		return m_rep;
 	}
@@ -1755,9 +2040,65 @@ public:
 
 };
 
-/** load a population from a file saved by <tt>Population::save()</tt>.
+
+/** A population view is a read-only population that refers to selected
+ *  individuals of the present generation of another population without
+ *  copying their genotypes and information fields. Creating a view costs
+ *  memory and time proportional to the number of selected individuals, not
+ *  to the size of their genomes, so a view can be used in place of an
+ *  extracted population by functions and operators that only read
+ *  populations, such as \c Stat, exporters and samplers. A view becomes an
+ *  independent copy of its individuals if an operation (e.g. \c genotype()
+ *  or \c save()) requires genotypes stored contiguously. A view is only
+ *  valid when the parent population is alive and unchanged, and changing
+ *  genotypes or information fields of individuals in a view changes the
+ *  parent population.
+ */
+class PopulationView : public Population
+{
+public:
+	/** Create a view of individuals in (virtual) subpopulations \e subPops
+	 *  (default to all subpopulations) of population \e pop. If \e rearrange
+	 *  is \c False (default), structure and names of subpopulations are
+	 *  kept. Otherwise each (virtual) subpopulation in \e subPops becomes a
+	 *  subpopulation of the view, as in function
+	 *  \c Population.extractSubPops. Alternatively, a list of absolute
+	 *  indexes of individuals (\e indexes) could be given, in which case
+	 *  individuals are kept in their original subpopulations, as in function
+	 *  \c Population.extractIndividuals.
+	 */
+	PopulationView(Population & pop, const subPopList & subPops = subPopList(),
+		bool rearrange = false, const uintList & indexes = uintList());
+
+};
+
+/** load a population from a file saved by <tt>Population::save()</tt>. If
+ *  the file is saved in the binary format, only subpopulations \e subPops
+ *  (specified by indexes), loci \e loci and ancestral generations \e ancGens
+ *  (\c 0 for the current generation) can be loaded, which only reads and
+ *  decompresses the parts of the file that contain them. Subpopulation
+ *  names, information fields and population variables are kept, and
+ *  loaded ancestral generations become generations \c 0, \c 1, ... of
+ *  the loaded population. Selected subpopulations, loci and generations
+ *  are loaded in their original order, with duplicates ignored. All
+ *  subpopulations, loci and generations are loaded by default
+ *  (\c ALL_AVAIL).
+ */
+Population & loadPopulation(const string & file, const subPopList & subPops = subPopList(),
+                            const lociList & loci = lociList(), const uintList & ancGens = uintList());
+
+/** Return a dictionary with the number of times (key \c count) and the
+ *  total size in bytes (key \c bytes) that storage for genotypes, lineage,
+ *  information fields and individuals of populations, including temporary
+ *  storage used to rearrange them, has been allocated since simuPOP is
+ *  loaded, or since the counters were last reset (if \e reset is \c True).
+ *  Allocations from all threads are counted. Sparse genotypes of the mutant
+ *  module are not counted. Because simulators reuse the storage of
+ *  discarded generations for offspring generations, an evolving population
+ *  with constant or decreasing size should not cause any allocation after
+ *  the first few generations.
  */
-Population & loadPopulation(const string & file);
+PyObject * storageAllocations(bool reset = false);
 
 }
 
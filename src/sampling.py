@@ -88,7 +88,7 @@ __all__ = [
     #
 ]
 
-from simuPOP import ALL_AVAIL, Pedigree, OUTBRED_SPOUSE, COMMON_OFFSPRING, FEMALE_ONLY, \
+from simuPOP import ALL_AVAIL, Pedigree, PopulationView, OUTBRED_SPOUSE, COMMON_OFFSPRING, FEMALE_ONLY, \
     MALE, AFFECTED, tagID, getRNG
 
 import random
@@ -154,11 +154,13 @@ class BaseSampler:
         are used. If samples are drawn separately from specified subpopulations,
         Population ``pop`` will be rearranged (if ``rearrange==True``) so that
         each subpoulation corresponds to one element in parameter ``subPops``.
+        A view of ``pop`` is used so that genotypes of individuals are not
+        copied until they are drawn.
         '''
         if self.subPops == ALL_AVAIL:
             self.pop = pop
         else:
-            self.pop = pop.extractSubPops(self.subPops, rearrange)
+            self.pop = PopulationView(pop, self.subPops, rearrange)
         return True
 
     def drawSample(self, pop):
@@ -359,13 +359,6 @@ enum DBG_CODE {
 typedef unsigned char TraitIndexType;
 extern const unsigned char MaxTraitIndex;
 
-// info is usually used for subpopulation index.
-// signed short should be enough.
-// if this is changed Info_Var_As_Numarray in utility.cpp also needs to be changed.
-typedef std::vector<double>::iterator InfoIterator;
-typedef std::vector<double>::const_iterator ConstInfoIterator;
-typedef std::vector<long>::iterator LineageIterator;
-typedef std::vector<long>::const_iterator ConstLineageIterator;
 extern const size_t InvalidValue;
 
 // FIXME: I need a type that is 32 or 64 bit long depending on platform
@@ -375,7 +368,20 @@ typedef long LONG;
 
 typedef std::vector<long>                                vectori;
 typedef std::vector<double>                              vectorf;
-typedef std::vector<Allele>                              vectora;
+// genotypes are stored in vectors that can be optionally backed by
+// memory-mapped files. Allocations of genotype, lineage and information
+// field storage of populations are counted by the allocator.
+#include "mmap_allocator.h"
+typedef std::vector<Allele, simuPOP::MmapAllocator<Allele> > vectora;
+typedef std::vector<double, simuPOP::MmapAllocator<double> > vectorinfo;
+typedef std::vector<long, simuPOP::MmapAllocator<long> > vectorlineage;
+// info is usually used for subpopulation index.
+// signed short should be enough.
+// if this is changed Info_Var_As_Numarray in utility.cpp also needs to be changed.
+typedef vectorinfo::iterator InfoIterator;
+typedef vectorinfo::const_iterator ConstInfoIterator;
+typedef vectorlineage::iterator LineageIterator;
+typedef vectorlineage::const_iterator ConstLineageIterator;
 #ifdef MUTANTALLELE
 //typedef simuPOP::vectorm         vectorm;
 #endif
@@ -611,8 +617,8 @@ namespace simuPOP {
 typedef simuPOP::vectorm::iterator GenoIterator;
 typedef simuPOP::vectorm::const_iterator ConstGenoIterator;
 #else
-typedef std::vector<Allele>::iterator GenoIterator;
-typedef std::vector<Allele>::const_iterator ConstGenoIterator;
+typedef vectora::iterator GenoIterator;
+typedef vectora::const_iterator ConstGenoIterator;
 #endif
 
 #endif
@@ -242,6 +242,7 @@ namespace std
 %newobject simuPOP::Population::clone;
 %newobject simuPOP::Simulator::extract;
 %newobject simuPOP::Simulator::clone;
+%newobject simuPOP::FreqSimulator::clone;
 %newobject simuPOP::BaseOperator::clone;
 %newobject simuPOP::MatingScheme::clone;
 %newobject simuPOP::Stat::clone;
@@ -24,10 +24,15 @@
  */
 
 #include "simulator.h"
+#include "outputer.h"
 
 #include <sstream>
 using std::ostringstream;
 
+#if PY_VERSION_HEX >= 0x03000000
+#  define PyInt_FromLong(x) PyLong_FromLong(x)
+#endif
+
 namespace simuPOP {
 
 Population & pyPopIterator::next()
@@ -194,7 +199,8 @@ vectoru Simulator::evolve(
                           const MatingScheme & matingScheme,
                           const opList & postOps,
                           const opList & finalOps,
-                          int gens, bool dryrun)
+                          int gens, bool dryrun,
+                          const stringList & resume)
 {
 	if (dryrun) {
 		cerr << describeEvolProcess(initOps, preOps, matingScheme, postOps, finalOps, gens, numRep()) << endl;
@@ -215,18 +221,57 @@ vectoru Simulator::evolve(
 	if (gens == 0)
 		return evolvedGens;
 
+	// checkpoints record the generation at which the evolution starts and
+	// states of objects passed to them.
+	// checkpoints are resumed from the next generation so they can only be
+	// saved after mating.
+	for (size_t i = 0; i < preOps.size(); ++i)
+		PARAM_FAILIF(dynamic_cast<const Checkpoint *>(preOps[i]) != NULL, ValueError,
+			"Operator Checkpoint can only be used as a post-mating operator.");
+	const Checkpoint * checkpoint = NULL;
+	for (size_t i = 0; i < postOps.size() && checkpoint == NULL; ++i)
+		checkpoint = dynamic_cast<const Checkpoint *>(postOps[i]);
+
+	const vectorstr & checkpoints = resume.elems();
+	PARAM_FAILIF(!checkpoints.empty() && checkpoints.size() != m_pops.size(), ValueError,
+		(boost::format("One checkpoint for each of the %1% replicates is required to resume an evolution.")
+		 % m_pops.size()).str());
+	vectoru startGens(m_pops.size());
+	for (size_t curRep = 0; curRep < checkpoints.size(); ++curRep) {
+		Population pop;
+		// global states are restored from the last checkpoint, which is
+		// written after all replicates have evolved the same generation.
+		startGens[curRep] = loadCheckpoint(checkpoints[curRep], pop, curRep + 1 == checkpoints.size(),
+			checkpoint == NULL ? NULL : checkpoint->objs());
+		// keep virtual splitter of the existing population
+		if (m_pops[curRep]->virtualSplitter() != NULL)
+			pop.setVirtualSplitter(m_pops[curRep]->virtualSplitter());
+		m_pops[curRep]->swap(pop);
+	}
+
 	// make sure rep and gen exists in pop
 	for (UINT curRep = 0; curRep < m_pops.size(); curRep++) {
 		if (!m_pops[curRep]->getVars().hasVar("gen"))
 			m_pops[curRep]->setGen(0);
 		m_pops[curRep]->setRep(curRep);
+		if (checkpoints.empty())
+			startGens[curRep] = m_pops[curRep]->gen();
 	}
+	if (checkpoint != NULL)
+		checkpoint->setStartGens(startGens);
 
 	initClock();
 
-	// appy pre-op, most likely initializer. Do not check if they are active
-	// or if they are successful
-	if (!initOps.empty())
+	if (!checkpoints.empty()) {
+		// generations left from the interrupted evolution
+		if (gens > 0) {
+			gens = static_cast<int>(startGens[0] + gens) - static_cast<int>(m_pops[0]->gen());
+			if (gens <= 0)
+				return evolvedGens;
+		}
+	} else if (!initOps.empty())
+		// appy pre-op, most likely initializer. Do not check if they are active
+		// or if they are successful
 		apply(initOps);
 
 	elapsedTime("Start evolution.");
@@ -450,6 +495,384 @@ int Simulator::__cmp__(const Simulator & rhs) const
 }
 
 
+FreqSimulator::FreqSimulator(const uintList & size, const floatMatrix & freq,
+	const floatList & fitness, const floatMatrix & migrRate,
+	const uintListFunc & subPopSize, UINT rep) :
+	m_numLoci(0), m_fitness(fitness.elems()), m_migrRate(migrRate.elems()),
+	m_subPopSize(subPopSize), m_gen(), m_sizes(), m_freq(), m_pops()
+{
+	PARAM_ASSERT(rep >= 1, ValueError,
+		"Number of replicates should be greater than or equal one.");
+
+	const vectoru & sizes = size.elems();
+	PARAM_FAILIF(sizes.empty(), ValueError,
+		"Please specify subpopulation sizes of the initial population.");
+
+	const matrixf & freqs = freq.elems();
+	PARAM_FAILIF(freqs.empty() || freqs[0].empty(), ValueError,
+		"Please specify allele frequencies of at least one locus.");
+	PARAM_FAILIF(freqs.size() != 1 && freqs.size() != sizes.size(), ValueError,
+		"A list of allele frequencies, or a list of allele frequencies for each subpopulation is expected.");
+	m_numLoci = freqs[0].size();
+
+	vectorf initFreq(sizes.size() * m_numLoci);
+	for (size_t sp = 0; sp < sizes.size(); ++sp) {
+		const vectorf & spFreq = freqs[freqs.size() == 1 ? 0 : sp];
+		PARAM_FAILIF(spFreq.size() != m_numLoci, ValueError,
+			"Allele frequencies of all subpopulations should be specified for the same number of loci.");
+		for (size_t loc = 0; loc < m_numLoci; ++loc) {
+			PARAM_FAILIF(fcmp_lt(spFreq[loc], 0.) || fcmp_gt(spFreq[loc], 1.), ValueError,
+				(boost::format("Allele frequency %1% is not in the range of [0, 1].") % spFreq[loc]).str());
+			initFreq[sp * m_numLoci + loc] = spFreq[loc];
+		}
+	}
+
+	if (!m_fitness.empty()) {
+		// number of genotypes at all loci, stop counting if it exceeds the number of fitness values.
+		size_t numGeno = 1;
+		for (size_t loc = 0; loc < m_numLoci && numGeno <= m_fitness.size(); ++loc)
+			numGeno *= 3;
+		PARAM_FAILIF(m_fitness.size() != 3 && m_fitness.size() != 3 * m_numLoci && m_fitness.size() != numGeno,
+			ValueError, (boost::format("Please specify 3, 3*nLoci (%1%), or 3**nLoci fitness values.")
+			             % (3 * m_numLoci)).str());
+		for (size_t i = 0; i < m_fitness.size(); ++i)
+			PARAM_FAILIF(m_fitness[i] < 0, ValueError, "Fitness values should be non-negative.");
+	}
+
+	// set r[i][i] so that each row sums up to one.
+	for (size_t i = 0; i < m_migrRate.size(); ++i) {
+		PARAM_FAILIF(m_migrRate[i].size() != m_migrRate.size(), ValueError,
+			"A m by m matrix is expected for migration rates.");
+		double sum = accumulate(m_migrRate[i].begin(), m_migrRate[i].end(), 0.0) - m_migrRate[i][i];
+		PARAM_FAILIF(fcmp_gt(sum, 1.0), ValueError,
+			"Sum of migrate rate from one subPop should <= 1");
+		m_migrRate[i][i] = std::max(1.0 - sum, 0.);
+	}
+
+	m_gen.resize(rep, 0);
+	m_sizes.resize(rep, sizes);
+	m_freq.resize(rep, initFreq);
+	m_pops.resize(rep, NULL);
+}
+
+
+FreqSimulator::~FreqSimulator()
+{
+	for (size_t i = 0; i < m_pops.size(); ++i)
+		delete m_pops[i];
+}
+
+
+FreqSimulator::FreqSimulator(const FreqSimulator & rhs) :
+	m_numLoci(rhs.m_numLoci), m_fitness(rhs.m_fitness), m_migrRate(rhs.m_migrRate),
+	m_subPopSize(rhs.m_subPopSize), m_gen(rhs.m_gen), m_sizes(rhs.m_sizes),
+	m_freq(rhs.m_freq), m_pops(rhs.m_pops.size(), NULL)
+{
+	for (size_t i = 0; i < m_pops.size(); ++i)
+		if (rhs.m_pops[i] != NULL)
+			m_pops[i] = rhs.m_pops[i]->clone();
+}
+
+
+ULONG FreqSimulator::gen(UINT rep) const
+{
+	if (rep >= numRep())
+		throw ValueError("Replicate index out of range.");
+	return m_gen[rep];
+}
+
+
+vectoru FreqSimulator::subPopSizes(UINT rep) const
+{
+	if (rep >= numRep())
+		throw ValueError("Replicate index out of range.");
+	return m_sizes[rep];
+}
+
+
+PyObject * FreqSimulator::freq(UINT rep) const
+{
+	if (rep >= numRep())
+		throw ValueError("Replicate index out of range.");
+
+	const vectorf & freq = m_freq[rep];
+	size_t numSP = m_sizes[rep].size();
+	PyObject * res = PyList_New(numSP);
+	for (size_t sp = 0; sp < numSP; ++sp) {
+		PyObject * spFreq = PyList_New(m_numLoci);
+		for (size_t loc = 0; loc < m_numLoci; ++loc)
+			PyList_SET_ITEM(spFreq, loc, PyFloat_FromDouble(freq[sp * m_numLoci + loc]));
+		PyList_SET_ITEM(res, sp, spFreq);
+	}
+	return res;
+}
+
+
+void FreqSimulator::locusFitness(const double * freq, size_t loc, double * fit) const
+{
+	if (m_fitness.size() == 3) {
+		std::copy(m_fitness.begin(), m_fitness.end(), fit);
+		return;
+	} else if (m_fitness.size() == 3 * m_numLoci) {
+		std::copy(m_fitness.begin() + 3 * loc, m_fitness.begin() + 3 * loc + 3, fit);
+		return;
+	}
+	// marginal fitness f(X=g) = Sum_h P(Y=h) * f(X=g, Y=h) where h is the
+	// genotype at all other loci, assuming Hardy-Weinberg equilibrium.
+	// Fitness values are indexed as in MaSelector, with the first locus
+	// being the most significant digit.
+	std::fill(fit, fit + 3, 0.);
+	size_t numGeno = m_fitness.size() / 3;
+	for (size_t it = 0; it < numGeno; ++it) {
+		size_t num = it;
+		size_t index = 0;
+		size_t step = 0;
+		double prob = 1.;
+		size_t p3 = 1;
+		for (size_t l = m_numLoci; l > 0; --l, p3 *= 3) {
+			if (l - 1 == loc) {
+				step = p3;
+				continue;
+			}
+			size_t g = num % 3;
+			num /= 3;
+			double x = freq[l - 1];
+			prob *= g == 0 ? (1. - x) * (1. - x) : (g == 1 ? 2. * x * (1. - x) : x * x);
+			index += g * p3;
+		}
+		for (size_t g = 0; g < 3; ++g)
+			fit[g] += prob * m_fitness[index + g * step];
+	}
+}
+
+
+bool FreqSimulator::monomorphic(size_t rep) const
+{
+	const vectoru & sizes = m_sizes[rep];
+	const vectorf & freq = m_freq[rep];
+
+	for (size_t loc = 0; loc < m_numLoci; ++loc) {
+		bool hasAllele[2] = { false, false };
+		for (size_t sp = 0; sp < sizes.size(); ++sp) {
+			if (sizes[sp] == 0)
+				continue;
+			double x = freq[sp * m_numLoci + loc];
+			if (x != 0.)
+				hasAllele[1] = true;
+			if (x != 1.)
+				hasAllele[0] = true;
+			if (hasAllele[0] && hasAllele[1])
+				return false;
+		}
+	}
+	return true;
+}
+
+
+bool FreqSimulator::parentalSources(size_t rep, vectoru & offSizes, matrixf & sources)
+{
+	const vectoru & sizes = m_sizes[rep];
+	size_t numSP = sizes.size();
+
+	Population * pop = NULL;
+	size_t srcIdx = 0;
+	if (m_subPopSize.empty() && !m_subPopSize.func().isValid())
+		offSizes = sizes;
+	else if (!m_subPopSize.empty())
+		offSizes = m_subPopSize.elems();
+	else {
+		const pyFunc & func = m_subPopSize.func();
+		if (func.hasArg("pop")) {
+			// a population without genotype is used to keep track of the
+			// parental subpopulation of each individual as the function
+			// splits, merges or resizes the population. Because the function
+			// can operate on individuals, this population has one individual
+			// per member of the parental generation and the cost of this
+			// step is proportional to population size.
+			if (m_pops[rep] == NULL)
+				m_pops[rep] = new Population(sizes, 1, vectoru(), vectoru(), vectorf(),
+					0, vectorstr(), stringMatrix(), vectorstr(), vectorstr(),
+					stringList("parent_subpop"));
+			pop = m_pops[rep];
+			if (pop->subPopSizes() != sizes)
+				pop->fitSubPopStru(sizes, pop->subPopNames());
+			srcIdx = pop->infoIdx("parent_subpop");
+			for (size_t sp = 0; sp < numSP; ++sp)
+				for (RawIndIterator ind = pop->rawIndBegin(sp); ind != pop->rawIndEnd(sp); ++ind)
+					ind->setInfo(static_cast<double>(sp), srcIdx);
+			pop->setGen(m_gen[rep]);
+			pop->setRep(rep);
+		}
+
+		PyObject * args = PyTuple_New(func.numArgs());
+		DBG_ASSERT(args, RuntimeError, "Failed to create a parameter tuple");
+
+		for (size_t i = 0; i < func.numArgs(); ++i) {
+			const string & arg = func.arg(i);
+			if (arg == "gen")
+				PyTuple_SET_ITEM(args, i, PyInt_FromLong(static_cast<long>(m_gen[rep])));
+			else if (arg == "pop")
+				PyTuple_SET_ITEM(args, i, pyPopObj(static_cast<void *>(pop)));
+			else {
+				DBG_FAILIF(true, ValueError,
+					"Only parameters 'gen' and 'pop' are acceptable in a demographic function.");
+			}
+		}
+		vectori res = func(PyObj_As_IntArray, args);
+		Py_XDECREF(args);
+
+		if (res.empty()) {
+			DBG_DO(DBG_SIMULATOR, cerr << "Stop iteration due to empty offspring population size." << endl);
+			return false;
+		}
+		offSizes.resize(res.size());
+		for (size_t i = 0; i < res.size(); i++) {
+			if (res[i] < 0)
+				throw ValueError((boost::format("Negative population size %1% returned for subpopulation %2%") % res[i] % i).str());
+			offSizes[i] = static_cast<ULONG>(res[i]);
+		}
+	}
+
+	size_t numOffSP = offSizes.size();
+	sources.assign(numOffSP, vectorf(numSP, 0.));
+	if (pop != NULL) {
+		// offspring are produced from parents in the same subpopulation
+		if (pop->numSubPop() != numOffSP)
+			throw ValueError((boost::format("number of subPopulaitons must agree.\n Pre: %1% now: %2%")
+				              % pop->numSubPop() % numOffSP).str());
+		for (size_t sp = 0; sp < numOffSP; ++sp)
+			for (RawIndIterator ind = pop->rawIndBegin(sp); ind != pop->rawIndEnd(sp); ++ind) {
+				size_t src = static_cast<size_t>(ind->info(srcIdx));
+				DBG_ASSERT(src < numSP, RuntimeError, "Invalid parental subpopulation index");
+				sources[sp][src] += 1;
+			}
+		pop->fitSubPopStru(offSizes, pop->subPopNames());
+	} else if (numOffSP == numSP) {
+		for (size_t sp = 0; sp < numSP; ++sp)
+			sources[sp][sp] = 1.;
+	} else if (numSP == 1) {
+		// split from one population
+		for (size_t sp = 0; sp < numOffSP; ++sp)
+			sources[sp][0] = 1.;
+	} else if (numOffSP == 1) {
+		// merge into one population
+		for (size_t sp = 0; sp < numSP; ++sp)
+			sources[0][sp] = static_cast<double>(sizes[sp]);
+	} else
+		throw ValueError((boost::format("Can not produce %1% offspring subpopulations from %2% parental subpopulations.")
+			              % numOffSP % numSP).str());
+	return true;
+}
+
+
+bool FreqSimulator::evolveRep(size_t rep)
+{
+	vectoru & sizes = m_sizes[rep];
+	vectorf & freq = m_freq[rep];
+	size_t numSP = sizes.size();
+
+	// migration: the number of migrants from each subpopulation follows a
+	// multinomial distribution, and migrants carry the allele frequencies
+	// of the subpopulations they migrate from.
+	if (!m_migrRate.empty() && m_migrRate.size() == numSP) {
+		vectoru newSizes(numSP, 0);
+		vectorf newFreq(numSP * m_numLoci, 0.);
+		for (size_t from = 0; from < numSP; ++from) {
+			if (sizes[from] == 0)
+				continue;
+			vectoru num = getRNG().randMultinomial(static_cast<unsigned int>(sizes[from]), m_migrRate[from]);
+			for (size_t to = 0; to < numSP; ++to) {
+				if (num[to] == 0)
+					continue;
+				newSizes[to] += num[to];
+				for (size_t loc = 0; loc < m_numLoci; ++loc)
+					newFreq[to * m_numLoci + loc] += num[to] * freq[from * m_numLoci + loc];
+			}
+		}
+		for (size_t to = 0; to < numSP; ++to)
+			if (newSizes[to] > 0)
+				for (size_t loc = 0; loc < m_numLoci; ++loc)
+					newFreq[to * m_numLoci + loc] /= newSizes[to];
+		sizes.swap(newSizes);
+		freq.swap(newFreq);
+	}
+
+	vectoru offSizes;
+	matrixf sources;
+	if (!parentalSources(rep, offSizes, sources))
+		return false;
+
+	// mean fitness and frequency of allele 1 in gametes of parents who are
+	// selected according to their fitness.
+	vectorf meanFitness(numSP * m_numLoci, 1.);
+	vectorf gameteFreq(freq);
+	if (!m_fitness.empty()) {
+		double fit[3];
+		for (size_t sp = 0; sp < numSP; ++sp) {
+			for (size_t loc = 0; loc < m_numLoci; ++loc) {
+				size_t idx = sp * m_numLoci + loc;
+				double x = freq[idx];
+				locusFitness(&freq[sp * m_numLoci], loc, fit);
+				double w = fit[0] * (1. - x) * (1. - x) + 2. * fit[1] * x * (1. - x) + fit[2] * x * x;
+				meanFitness[idx] = w;
+				if (w > 0.)
+					gameteFreq[idx] = (fit[1] * x * (1. - x) + fit[2] * x * x) / w;
+			}
+		}
+	}
+
+	// genetic drift
+	size_t numOffSP = offSizes.size();
+	vectorf offFreq(numOffSP * m_numLoci, 0.);
+	for (size_t sp = 0; sp < numOffSP; ++sp) {
+		if (offSizes[sp] == 0)
+			continue;
+		UINT numAlleles = static_cast<UINT>(2 * offSizes[sp]);
+		for (size_t loc = 0; loc < m_numLoci; ++loc) {
+			double weight = 0.;
+			double p = 0.;
+			for (size_t src = 0; src < numSP; ++src) {
+				if (sources[sp][src] == 0. || sizes[src] == 0)
+					continue;
+				double w = sources[sp][src] * meanFitness[src * m_numLoci + loc];
+				weight += w;
+				p += w * gameteFreq[src * m_numLoci + loc];
+			}
+			if (weight <= 0.)
+				throw ValueError((boost::format("No parent is available to produce offspring in subpopulation %1%.") % sp).str());
+			p = std::min(std::max(p / weight, 0.), 1.);
+			offFreq[sp * m_numLoci + loc] = static_cast<double>(getRNG().randBinomial(numAlleles, p)) / numAlleles;
+		}
+	}
+	sizes.swap(offSizes);
+	freq.swap(offFreq);
+	++m_gen[rep];
+	return true;
+}
+
+
+vectoru FreqSimulator::evolve(int gen)
+{
+	vectoru evolvedGens(numRep(), 0U);
+	vector<bool> activeReps(numRep(), true);
+	size_t numActive = numRep();
+
+	for (int curGen = 0; (gen < 0 || curGen < gen) && numActive > 0; ++curGen) {
+		for (size_t rep = 0; rep < numRep(); ++rep) {
+			if (!activeReps[rep])
+				continue;
+			if ((gen < 0 && monomorphic(rep)) || !evolveRep(rep)) {
+				activeReps[rep] = false;
+				--numActive;
+				continue;
+			}
+			++evolvedGens[rep];
+		}
+	}
+	return evolvedGens;
+}
+
+
 string describeEvolProcess(const opList & initOps,
                            const opList & preOps,
                            const MatingScheme & matingScheme,
@@ -215,6 +215,16 @@ public:
 	 *  If parameter \e dryrun is set to \c True, this function will print a
 	 *  description of the evolutionary process generated by function
 	 *  \c describeEvolProcess() and exits.
+	 *
+	 *  An evolution that saves checkpoints using operator \c Checkpoint can
+	 *  be resumed by calling this function with the same parameters and
+	 *  checkpoints \e resume (one for each replicate). Populations in the
+	 *  simulator are replaced by populations in the checkpoints, random
+	 *  number generators, individual IDs and attributes of objects passed
+	 *  to operator \c Checkpoint are restored from the last checkpoint, and
+	 *  the evolution continues from the generation after the checkpoints
+	 *  without applying \e initOps. Parameter \e gen is counted from the
+	 *  generation at which the interrupted evolution started.
 	 *  <group>2-evolve</group>
 	 */
 	vectoru evolve(
@@ -223,7 +233,8 @@ public:
 		const MatingScheme & matingScheme = MatingScheme(),
 		const opList & postOps = opList(),
 		const opList & finalOps = opList(),
-		int gen = -1, bool dryrun = false);
+		int gen = -1, bool dryrun = false,
+		const stringList & resume = vectorstr());
 
 
 	/// CPPONLY apply a list of operators to all populations
@@ -264,6 +275,157 @@ private:
 };
 
 
+/** A frequency simulator evolves allele frequencies of one or more unlinked
+ *  biallelic loci in one or more replicates of a diploid population, without
+ *  creating any individual. Each generation, migrants are exchanged between
+ *  subpopulations, parents of each offspring subpopulation are selected
+ *  according to their fitness, and allele counts of the offspring generation
+ *  are drawn from a binomial distribution. Unless a demographic function
+ *  with parameter \c pop is used (see parameter \e subPopSize), the cost of
+ *  a generation depends only on the number of subpopulations and loci, so
+ *  this simulator can be used to simulate allele frequency trajectories in
+ *  very large populations, or a large number of replicates.
+ */
+class FreqSimulator
+{
+public:
+	/** Create a frequency simulator with \e rep (default to \c 1) replicates
+	 *  of a diploid population with subpopulation sizes \e size. Parameter
+	 *  \e freq specifies the frequency of allele \c 1 at each locus, which can
+	 *  be a list of frequencies for all subpopulations, or a list of such
+	 *  lists for each subpopulation. The number of loci is determined by the
+	 *  length of these lists.
+	 *
+	 *  Parameter \e fitness accepts a list of fitness values of genotypes
+	 *  \c 00, \c 01 and \c 11, in the same format as the \e fitness parameter
+	 *  of a \c MaSelector with wildtype allele \c 0. It can be a list of 3
+	 *  values for all loci, a list of <tt>3*nLoci</tt> values for each locus,
+	 *  or a list of <tt>3**nLoci</tt> values for each combination of genotypes
+	 *  (in the order of \c MaSelector), in which case marginal fitness values
+	 *  of each locus are calculated from allele frequencies at other loci.
+	 *  No selection is applied if \e fitness is empty (default).
+	 *
+	 *  Parameter \e migrRate accepts a \c m by \c m matrix of migration
+	 *  probabilities between \c m subpopulations, similar to the \e rate
+	 *  parameter of a \c Migrator in \c BY_PROBABILITY mode. Rates
+	 *  <tt>r[i][i]</tt> are ignored and are set to one minus the rates of
+	 *  migrating out of subpopulation \c i. The number of migrants between
+	 *  subpopulations is drawn from a multinomial distribution so subpopulation
+	 *  sizes change after migration. Migration happens before mating and is
+	 *  skipped if the number of subpopulations does not match \e migrRate.
+	 *
+	 *  Parameter \e subPopSize determines offspring subpopulation sizes in the
+	 *  same way as parameter \e subPopSize of a mating scheme, which can be a
+	 *  list of subpopulation sizes, or a demographic function with optional
+	 *  parameters \c gen and \c pop. If the function accepts parameter \c pop,
+	 *  it is called with a haploid population without any locus and with the
+	 *  sizes of the parental generation, so that demographic models derived
+	 *  from \c DemographicModel can be used. Offspring in each subpopulation
+	 *  are produced from parents in the corresponding subpopulation of this
+	 *  population after it is split, merged or resized by the function.
+	 *  Because this population holds one individual for each member of the
+	 *  parental generation, memory and time used by each generation are then
+	 *  proportional to population size. Otherwise, the number of subpopulations can only change from one to
+	 *  many (split) or from many to one (merge). Subpopulation sizes are kept
+	 *  unchanged if \e subPopSize is unspecified.
+	 */
+	FreqSimulator(const uintList & size, const floatMatrix & freq,
+		const floatList & fitness = vectorf(),
+		const floatMatrix & migrRate = floatMatrix(),
+		const uintListFunc & subPopSize = uintListFunc(), UINT rep = 1);
+
+	/// destroy a frequency simulator
+	~FreqSimulator();
+
+	/// CPPONLY Copy constructor
+	FreqSimulator(const FreqSimulator & rhs);
+
+	/** Clone a frequency simulator, along with the state of all replicates.
+	 */
+	FreqSimulator * clone() const
+	{
+		return new FreqSimulator(*this);
+	}
+
+
+	/** Return the number of replicates.
+	 */
+	size_t numRep() const
+	{
+		return m_freq.size();
+	}
+
+
+	/** Return the number of simulated loci.
+	 */
+	size_t numLoci() const
+	{
+		return m_numLoci;
+	}
+
+
+	/** Return the generation number of replicate \e rep.
+	 */
+	ULONG gen(UINT rep = 0) const;
+
+	/** Return the subpopulation sizes of replicate \e rep.
+	 */
+	vectoru subPopSizes(UINT rep = 0) const;
+
+	/** Return the frequencies of allele \c 1 of replicate \e rep, as a list
+	 *  of frequencies at all loci for each subpopulation.
+	 */
+	PyObject * freq(UINT rep = 0) const;
+
+	/** Evolve all replicates for \e gen generations, or until all replicates
+	 *  stop if \e gen is negative (default). A replicate stops evolving if
+	 *  the demographic function returns an empty list, or, if \e gen is
+	 *  negative, if all loci are fixed for the same allele in all
+	 *  subpopulations. Similar to
+	 *  \c Simulator.evolve, this function returns a tuple with the number of
+	 *  evolved generations of each replicate. Because this function can be
+	 *  called repeatedly, a trajectory of allele frequencies can be recorded
+	 *  by evolving one generation at a time.
+	 */
+	vectoru evolve(int gen = -1);
+
+private:
+	/// CPPONLY evolve one generation of a replicate
+	bool evolveRep(size_t rep);
+
+	/// CPPONLY proportions of parents of each offspring subpopulation that
+	/// come from each parental subpopulation.
+	bool parentalSources(size_t rep, vectoru & sizes, matrixf & sources);
+
+	/// CPPONLY fitness values of genotypes 00, 01 and 11 at a locus
+	void locusFitness(const double * freq, size_t loc, double * fit) const;
+
+	/// CPPONLY
+	bool monomorphic(size_t rep) const;
+
+private:
+	size_t m_numLoci;
+
+	vectorf m_fitness;
+
+	matrixf m_migrRate;
+
+	uintListFunc m_subPopSize;
+
+	/// generation number of each replicate
+	vectoru m_gen;
+
+	/// subpopulation sizes of each replicate
+	vector<vectoru> m_sizes;
+
+	/// allele frequencies of each replicate, with m_numLoci values for each subpopulation
+	matrixf m_freq;
+
+	/// populations passed to demographic functions, created on demand
+	vector<Population *> m_pops;
+};
+
+
 /** This function takes the same parameters as \c Simulator.evolve and
  *  output a description of how an evolutionary process will be executed.
  *  It is recommended that you call this function if you have any doubt how
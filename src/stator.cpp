@@ -47,6 +47,78 @@ typedef std::tr1::unordered_map<size_t, pair<size_t, size_t> > IndexMap;
 
 namespace simuPOP {
 
+// maximum number of bytes of a locus-major block, which holds alleles of
+// a subpopulation at a number of loci
+#define LOCUS_BLOCK_BYTES (16 * 1024 * 1024)
+
+// number of loci that are copied to a locus-major block at a time if each
+// locus takes locusBytes bytes in the block
+static size_t locusBlockSize(size_t locusBytes)
+{
+	return std::max(static_cast<size_t>(1), LOCUS_BLOCK_BYTES / std::max(locusBytes, static_cast<size_t>(1)));
+}
+
+
+#ifndef MUTANTALLELE
+// whether or not alleles at loci can be copied to a locus-major block
+// (see Population::locusMajorGenotype) without special handling of
+// sex chromosomes and haplodiploid populations.
+static bool locusMajorLoci(const Population & pop, const vectoru & loci)
+{
+	if (pop.isHaplodiploid())
+		return false;
+	for (size_t i = 0; i < loci.size(); ++i) {
+		size_t chromType = pop.chromType(pop.chromLocusPair(loci[i]).first);
+		if (chromType != AUTOSOME && chromType != CUSTOMIZED)
+			return false;
+	}
+	return true;
+}
+
+
+#endif
+
+#ifdef BINARYALLELE
+
+// maximum number of loci of haplotypes that are counted from bit planes
+#  define BIT_HAPLOTYPE_LOCI 6
+
+// Count haplotypes on the p-th homologous copy from bit planes returned by
+// Population::locusBitPlanes. Words in masks[depth * numWords, ...) mark
+// individuals whose alleles at the first depth loci match haplotype, and
+// they are split by allele at the next locus so that only observed
+// haplotypes are visited.
+static void countBitHaplotypes(const vector<WORDTYPE> & planes, size_t p, size_t ply,
+                               size_t numWords, size_t depth, vector<WORDTYPE> & masks,
+                               vectori & haplotype, tupleDict & haplotypes)
+{
+	const WORDTYPE * mask = &masks[depth * numWords];
+
+	if (depth == haplotype.size()) {
+		size_t cnt = 0;
+		for (size_t w = 0; w < numWords; ++w)
+			cnt += countBits(mask[w]);
+		haplotypes[haplotype] += static_cast<double>(cnt);
+		return;
+	}
+	const WORDTYPE * plane = &planes[(depth * ply + p) * numWords];
+	WORDTYPE * next = &masks[(depth + 1) * numWords];
+	for (int allele = 0; allele < 2; ++allele) {
+		bool observed = false;
+		for (size_t w = 0; w < numWords; ++w) {
+			next[w] = mask[w] & (allele ? plane[w] : ~plane[w]);
+			observed |= next[w] != 0;
+		}
+		if (!observed)
+			continue;
+		haplotype[depth] = allele;
+		countBitHaplotypes(planes, p, ply, numWords, depth + 1, masks, haplotype, haplotypes);
+	}
+}
+
+
+#endif
+
 string PyEval::describe(bool /* format */) const
 {
 	string desc = m_expr.expr();
@@ -724,6 +796,7 @@ bool statNumOfSegSites::apply(Population & pop) const
 	if (m_loci.empty())
 		return true;
 
+	pop.checkGenealogyLoci(m_loci.elems(&pop));
 #ifndef MUTANTALLELE
 	// get actual list of loci, only used for non-mutant modules
 	const vectoru & loci = m_loci.elems(&pop);
@@ -893,6 +966,7 @@ bool statNumOfMutants::apply(Population & pop) const
 		return true;
 
 	const vectoru & loci = m_loci.elems(&pop);
+	pop.checkGenealogyLoci(loci);
 
 	size_t allMutantCount = 0;
 
@@ -983,6 +1057,7 @@ bool statAlleleFreq::apply(Population & pop) const
 		return true;
 
 	const vectoru & loci = m_loci.elems(&pop);
+	pop.checkGenealogyLoci(loci);
 
 	// count for all specified subpopulations
 	ALLELECNTLIST alleleCnt(loci.size());
@@ -1124,77 +1199,128 @@ bool statAlleleFreq::apply(Population & pop) const
 		}
 #else       // for mutant allele
 
+		// alleles at blocks of loci are copied in locus-major order so that
+		// alleles at each locus can be counted from contiguous memory.
+		bool locusMajor = locusMajorLoci(pop, loci);
+#  ifdef BINARYALLELE
+		// for binary alleles, the number of allele 1 is counted from bit
+		// planes of alleles a word at a time.
+		vector<WORDTYPE> & block = m_block;
+		size_t ply = pop.ploidy();
+		size_t numWords = 0;
+		size_t locusBytes = ply * ((pop.subPopSize(it->subPop()) + WORDBIT - 1) / WORDBIT) * sizeof(WORDTYPE);
+#  else
+		vector<Allele> & block = m_block;
+		size_t locusBytes = pop.ploidy() * pop.subPopSize(it->subPop()) * sizeof(Allele);
+#  endif
+		size_t blockSize = locusMajor ? locusBlockSize(locusBytes) : loci.size();
+		for (size_t blockStart = 0; blockStart < loci.size(); blockStart += blockSize) {
+			size_t blockEnd = std::min(blockStart + blockSize, loci.size());
+			size_t blockAlleles = 0;
+			if (locusMajor) {
+				vectoru blockLoci(loci.begin() + blockStart, loci.begin() + blockEnd);
+#  ifdef BINARYALLELE
+				size_t numInds = pop.locusBitPlanes(blockLoci, it->subPop(), block);
+				numWords = (numInds + WORDBIT - 1) / WORDBIT;
+				blockAlleles = numInds * ply;
+#  else
+				blockAlleles = pop.locusMajorGenotype(blockLoci, it->subPop(), block);
+#  endif
+			}
 
 #  pragma omp parallel for if(numThreads() > 1)
-		for (ssize_t idx = 0; idx < static_cast<ssize_t>(loci.size()); ++idx) {
-			size_t loc = loci[idx];
+			for (ssize_t idx = static_cast<ssize_t>(blockStart); idx < static_cast<ssize_t>(blockEnd); ++idx) {
+				size_t loc = loci[idx];
 
 #  ifdef LONGALLELE
-			intDict alleles;
+				intDict alleles;
 #  else
-			vectoru alleles(2, 0);
+				vectoru alleles(2, 0);
 #  endif
-			size_t allAlleles = 0;
-
-			// go through all alleles
-			IndAlleleIterator a = pop.alleleIterator(loc, it->subPop());
-			// use allAllelel here because some marker does not have full number
-			// of alleles (e.g. markers on chromosome X and Y).
-			for (; a.valid(); ++a) {
-				Allele v = a.value();
-#  ifndef BINARYALLELE
+				size_t allAlleles = 0;
+
+				if (locusMajor) {
+#  ifdef BINARYALLELE
+					vector<WORDTYPE>::const_iterator a = block.begin() + (idx - blockStart) * ply * numWords;
+					vector<WORDTYPE>::const_iterator aEnd = a + ply * numWords;
+					for (; a != aEnd; ++a)
+						alleles[1] += countBits(*a);
+					alleles[0] = blockAlleles - alleles[1];
+#  else
+					vector<Allele>::const_iterator a = block.begin() + (idx - blockStart) * blockAlleles;
+					vector<Allele>::const_iterator aEnd = a + blockAlleles;
+					for (; a != aEnd; ++a) {
+						Allele v = *a;
 #    ifndef LONGALLELE
-				if (v >= alleles.size())
-					alleles.resize(v + 1, 0);
+						if (v >= alleles.size())
+							alleles.resize(v + 1, 0);
 #    endif
+						alleles[v]++;
+					}
 #  endif
-				alleles[v]++;
-				allAlleles++;
-			}
-			// total allele count
-#  ifdef LONGALLELE
-			intDict::iterator cnt = alleles.begin();
-			intDict::iterator cntEnd = alleles.end();
-			for ( ; cnt != cntEnd; ++cnt)
-				alleleCnt[idx][cnt->first] += cnt->second;
-#  else
-			for (size_t i = 0; i < alleles.size(); ++i)
-				if (alleles[i] != 0)
-					alleleCnt[idx][i] += alleles[i];
+					allAlleles = blockAlleles;
+				} else {
+					// go through all alleles
+					IndAlleleIterator a = pop.alleleIterator(loc, it->subPop());
+					// use allAllelel here because some marker does not have full number
+					// of alleles (e.g. markers on chromosome X and Y).
+					for (; a.valid(); ++a) {
+						Allele v = a.value();
+#  ifndef BINARYALLELE
+#    ifndef LONGALLELE
+						if (v >= alleles.size())
+							alleles.resize(v + 1, 0);
+#    endif
 #  endif
-			allAllelesCnt[idx] += allAlleles;
-			// output variable.
+						alleles[v]++;
+						allAlleles++;
+					}
+				}
+				// total allele count
 #  ifdef LONGALLELE
-			if (m_vars.contains(AlleleNum_sp_String)) {
-#    pragma omp critical
-				pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleNum_String, m_suffix) % loc).str(), alleles);
-			}
-			if (m_vars.contains(AlleleFreq_sp_String)) {
 				intDict::iterator cnt = alleles.begin();
 				intDict::iterator cntEnd = alleles.end();
 				for ( ; cnt != cntEnd; ++cnt)
-					cnt->second /= static_cast<double>(allAlleles);
-#    pragma omp critical
-				pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleFreq_String, m_suffix) % loc).str(), alleles);
-			}
+					alleleCnt[idx][cnt->first] += cnt->second;
 #  else
-			if (m_vars.contains(AlleleNum_sp_String)) {
-				uintDict d;
 				for (size_t i = 0; i < alleles.size(); ++i)
 					if (alleles[i] != 0)
-						d[i] = static_cast<double>(alleles[i]);
+						alleleCnt[idx][i] += alleles[i];
+#  endif
+				allAllelesCnt[idx] += allAlleles;
+				// output variable.
+#  ifdef LONGALLELE
+				if (m_vars.contains(AlleleNum_sp_String)) {
 #    pragma omp critical
-				pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleNum_String, m_suffix) % loc).str(), d);
-			}
-			if (m_vars.contains(AlleleFreq_sp_String)) {
-				uintDict d;
-				for (size_t i = 0; i < alleles.size(); ++i)
-					if (alleles[i] != 0)
-						d[i] = alleles[i] / static_cast<double>(allAlleles);
+					pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleNum_String, m_suffix) % loc).str(), alleles);
+				}
+				if (m_vars.contains(AlleleFreq_sp_String)) {
+					intDict::iterator cnt = alleles.begin();
+					intDict::iterator cntEnd = alleles.end();
+					for ( ; cnt != cntEnd; ++cnt)
+						cnt->second /= static_cast<double>(allAlleles);
 #    pragma omp critical
-				pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleFreq_String, m_suffix) % loc).str(), d);
-			}
+					pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleFreq_String, m_suffix) % loc).str(), alleles);
+				}
+#  else
+				if (m_vars.contains(AlleleNum_sp_String)) {
+					uintDict d;
+					for (size_t i = 0; i < alleles.size(); ++i)
+						if (alleles[i] != 0)
+							d[i] = static_cast<double>(alleles[i]);
+#    pragma omp critical
+					pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleNum_String, m_suffix) % loc).str(), d);
+				}
+				if (m_vars.contains(AlleleFreq_sp_String)) {
+					uintDict d;
+					for (size_t i = 0; i < alleles.size(); ++i)
+						if (alleles[i] != 0)
+							d[i] = alleles[i] / static_cast<double>(allAlleles);
+#    pragma omp critical
+					pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleFreq_String, m_suffix) % loc).str(), d);
+				}
 #  endif
+			}
 		}
 #endif      // for mutant allele type
 		pop.deactivateVirtualSubPop(it->subPop());
@@ -1275,6 +1401,7 @@ bool statHeteroFreq::apply(Population & pop) const
 		return true;
 
 	const vectoru & loci = m_loci.elems(&pop);
+	pop.checkGenealogyLoci(loci);
 
 	DBG_FAILIF(pop.ploidy() != 2, ValueError,
 		"Heterozygote frequency can only be calculated for diploid populations.");
@@ -1295,33 +1422,91 @@ bool statHeteroFreq::apply(Population & pop) const
 		uintDict heteroCnt;
 		uintDict homoCnt;
 
+#ifdef MUTANTALLELE
+		bool locusMajor = false;
+		size_t locusBytes = 0;
+#else
+		// alleles at blocks of loci are copied in locus-major order so that
+		// genotypes at each locus can be compared from contiguous memory.
+		bool locusMajor = locusMajorLoci(pop, loci);
+#  ifdef BINARYALLELE
+		// for binary alleles, heterozygotes are counted from bit planes of
+		// the two homologous copies a word at a time.
+		vector<WORDTYPE> & block = m_block;
+		size_t numWords = 0;
+		size_t locusBytes = 2 * ((pop.subPopSize(it->subPop()) + WORDBIT - 1) / WORDBIT) * sizeof(WORDTYPE);
+#  else
+		vector<Allele> & block = m_block;
+		size_t locusBytes = pop.ploidy() * pop.subPopSize(it->subPop()) * sizeof(Allele);
+#  endif
+#endif
+		size_t blockSize = locusMajor ? locusBlockSize(locusBytes) : loci.size();
+		for (size_t blockStart = 0; blockStart < loci.size(); blockStart += blockSize) {
+			size_t blockEnd = std::min(blockStart + blockSize, loci.size());
+#ifndef MUTANTALLELE
+			size_t blockAlleles = 0;
+			if (locusMajor) {
+				vectoru blockLoci(loci.begin() + blockStart, loci.begin() + blockEnd);
+#  ifdef BINARYALLELE
+				size_t numInds = pop.locusBitPlanes(blockLoci, it->subPop(), block);
+				numWords = (numInds + WORDBIT - 1) / WORDBIT;
+				blockAlleles = numInds * 2;
+#  else
+				blockAlleles = pop.locusMajorGenotype(blockLoci, it->subPop(), block);
+#  endif
+			}
+#endif
+
 #pragma omp parallel for if(numThreads() > 1)
-		for (ssize_t idx = 0; idx < static_cast<ssize_t>(loci.size()); ++idx) {
-			size_t loc = loci[idx];
+			for (ssize_t idx = static_cast<ssize_t>(blockStart); idx < static_cast<ssize_t>(blockEnd); ++idx) {
+				size_t loc = loci[idx];
 
 #ifndef OPTIMIZED
-			size_t chromType = pop.chromType(pop.chromLocusPair(loc).first);
-			DBG_FAILIF(chromType == CHROMOSOME_X || chromType == CHROMOSOME_Y || chromType == MITOCHONDRIAL,
-				ValueError, "Heterozygosity count for sex and mitochondrial chromosomes is not supported.");
+				size_t chromType = pop.chromType(pop.chromLocusPair(loc).first);
+				DBG_FAILIF(chromType == CHROMOSOME_X || chromType == CHROMOSOME_Y || chromType == MITOCHONDRIAL,
+					ValueError, "Heterozygosity count for sex and mitochondrial chromosomes is not supported.");
 #endif
-			size_t hetero = 0;
-			size_t homo = 0;
+				size_t hetero = 0;
+				size_t homo = 0;
 
-			// go through all alleles
-			IndAlleleIterator a = pop.alleleIterator(loc, it->subPop());
-			for (; a.valid(); a += 2) {
-				if (a.value() != (a + 1).value())
-					hetero += 1;
-				else
-					homo += 1;
-			}
+#ifndef MUTANTALLELE
+				if (locusMajor) {
+#  ifdef BINARYALLELE
+					vector<WORDTYPE>::const_iterator a = block.begin() + (idx - blockStart) * 2 * numWords;
+					vector<WORDTYPE>::const_iterator b = a + numWords;
+					for (size_t w = 0; w < numWords; ++w)
+						hetero += countBits(*(a + w) ^ *(b + w));
+					homo = blockAlleles / 2 - hetero;
+#  else
+					vector<Allele>::const_iterator a = block.begin() + (idx - blockStart) * blockAlleles;
+					vector<Allele>::const_iterator aEnd = a + blockAlleles;
+					for (; a != aEnd; a += 2) {
+						if (*a != *(a + 1))
+							hetero += 1;
+						else
+							homo += 1;
+					}
+#  endif
+				} else
+#endif
+				{
+					// go through all alleles
+					IndAlleleIterator a = pop.alleleIterator(loc, it->subPop());
+					for (; a.valid(); a += 2) {
+						if (a.value() != (a + 1).value())
+							hetero += 1;
+						else
+							homo += 1;
+					}
+				}
 #pragma omp critical
-			{
-				heteroCnt[loc] = static_cast<double>(hetero);
-				homoCnt[loc] = static_cast<double>(homo);
-				//
-				allHeteroCnt[loc] += heteroCnt[loc];
-				allHomoCnt[loc] += homoCnt[loc];
+				{
+					heteroCnt[loc] = static_cast<double>(hetero);
+					homoCnt[loc] = static_cast<double>(homo);
+					//
+					allHeteroCnt[loc] += heteroCnt[loc];
+					allHomoCnt[loc] += homoCnt[loc];
+				}
 			}
 		}
 		pop.deactivateVirtualSubPop(it->subPop());
@@ -1446,6 +1631,7 @@ bool statGenoFreq::apply(Population & pop) const
 		return true;
 
 	const vectoru & loci = m_loci.elems(&pop);
+	pop.checkGenealogyLoci(loci);
 
 	vectoru chromTypes;
 	for (size_t i = 0; i < loci.size(); ++i)
@@ -1469,66 +1655,113 @@ bool statGenoFreq::apply(Population & pop) const
 
 		pop.activateVirtualSubPop(*it);
 
+#ifdef BINARYALLELE
+		// diploid genotypes of binary alleles are counted from bit planes of
+		// the two homologous copies a word at a time.
+		bool bitPlanes = ply == 2 && locusMajorLoci(pop, loci);
+		vector<WORDTYPE> & block = m_block;
+		size_t numWords = 0;
+		size_t numInds = 0;
+		size_t locusBytes = 2 * ((pop.subPopSize(it->subPop()) + WORDBIT - 1) / WORDBIT) * sizeof(WORDTYPE);
+		size_t blockSize = bitPlanes ? locusBlockSize(locusBytes) : loci.size();
+#else
+		size_t blockSize = loci.size();
+#endif
+		for (size_t blockStart = 0; blockStart < loci.size(); blockStart += blockSize) {
+			size_t blockEnd = std::min(blockStart + blockSize, loci.size());
+#ifdef BINARYALLELE
+			if (bitPlanes) {
+				numInds = pop.locusBitPlanes(vectoru(loci.begin() + blockStart, loci.begin() + blockEnd),
+					it->subPop(), block);
+				numWords = (numInds + WORDBIT - 1) / WORDBIT;
+			}
+#endif
+
 #pragma omp parallel for if(numThreads() > 1)
-		for (ssize_t idx = 0; idx < static_cast<ssize_t>(loci.size()); ++idx) {
-			size_t loc = loci[idx];
+			for (ssize_t idx = static_cast<ssize_t>(blockStart); idx < static_cast<ssize_t>(blockEnd); ++idx) {
+				size_t loc = loci[idx];
 
-			tupleDict genotypes;
-			size_t allGenotypes = 0;
+				tupleDict genotypes;
+				size_t allGenotypes = 0;
 
-			// go through all alleles
-			IndIterator ind = pop.indIterator(it->subPop());
-			// the simple case, the speed is potentially faster
-			if (!pop.isHaplodiploid() && (chromTypes[idx] == AUTOSOME || chromTypes[idx] == CUSTOMIZED)) {
-				for (; ind.valid(); ++ind) {
-					vectori genotype(ply);
-					for (size_t p = 0; p < ply; ++p)
-						genotype[p] = ind->allele(loc, p);
-					genotypes[genotype]++;
-					allGenotypes++;
-				}
-			} else {
-				for (; ind.valid(); ++ind) {
-					vectori genotype;
-					for (size_t p = 0; p < ply; ++p) {
-						if (p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
-							continue;
-						if (chromTypes[idx] == CHROMOSOME_Y && ind->sex() == FEMALE)
-							continue;
-						if (((chromTypes[idx] == CHROMOSOME_X && p == 1) ||
-						     (chromTypes[idx] == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
-							continue;
-						if (chromTypes[idx] == MITOCHONDRIAL && p > 0)
-							continue;
-						genotype.push_back(ind->allele(loc, p));
+				// go through all alleles
+				IndIterator ind = pop.indIterator(it->subPop());
+#ifdef BINARYALLELE
+				if (bitPlanes) {
+					vector<WORDTYPE>::const_iterator a = block.begin() + (idx - blockStart) * 2 * numWords;
+					vector<WORDTYPE>::const_iterator b = a + numWords;
+					// padding bits are zero in both planes and are not counted
+					size_t cnt[3] = { 0, 0, 0 };
+					for (size_t w = 0; w < numWords; ++w) {
+						cnt[0] += countBits(*(a + w) & ~*(b + w));
+						cnt[1] += countBits(~*(a + w) & *(b + w));
+						cnt[2] += countBits(*(a + w) & *(b + w));
+					}
+					vectori genotype(2);
+					size_t cnt00 = numInds - cnt[0] - cnt[1] - cnt[2];
+					if (cnt00 != 0)
+						genotypes[genotype] = static_cast<double>(cnt00);
+					for (size_t i = 0; i < 3; ++i) {
+						genotype[0] = (i + 1) & 1;
+						genotype[1] = (i + 1) >> 1;
+						if (cnt[i] != 0)
+							genotypes[genotype] = static_cast<double>(cnt[i]);
+					}
+					allGenotypes = numInds;
+				} else
+#endif
+				// the simple case, the speed is potentially faster
+				if (!pop.isHaplodiploid() && (chromTypes[idx] == AUTOSOME || chromTypes[idx] == CUSTOMIZED)) {
+					for (; ind.valid(); ++ind) {
+						vectori genotype(ply);
+						for (size_t p = 0; p < ply; ++p)
+							genotype[p] = ind->allele(loc, p);
+						genotypes[genotype]++;
+						allGenotypes++;
+					}
+				} else {
+					for (; ind.valid(); ++ind) {
+						vectori genotype;
+						for (size_t p = 0; p < ply; ++p) {
+							if (p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
+								continue;
+							if (chromTypes[idx] == CHROMOSOME_Y && ind->sex() == FEMALE)
+								continue;
+							if (((chromTypes[idx] == CHROMOSOME_X && p == 1) ||
+							     (chromTypes[idx] == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
+								continue;
+							if (chromTypes[idx] == MITOCHONDRIAL && p > 0)
+								continue;
+							genotype.push_back(ind->allele(loc, p));
+						}
+						genotypes[genotype]++;
+						allGenotypes++;
 					}
-					genotypes[genotype]++;
-					allGenotypes++;
 				}
-			}
-			// total allele count
-			tupleDict::iterator dct = genotypes.begin();
-			tupleDict::iterator dctEnd = genotypes.end();
-			for (; dct != dctEnd; ++dct)
-				genotypeCnt[idx][dct->first] += dct->second;
-			allGenotypeCnt[idx] += allGenotypes;
-			// output variable.
-			if (m_vars.contains(GenotypeNum_sp_String)) {
+				// total allele count
+				tupleDict::iterator dct = genotypes.begin();
+				tupleDict::iterator dctEnd = genotypes.end();
+				for (; dct != dctEnd; ++dct)
+					genotypeCnt[idx][dct->first] += dct->second;
+				allGenotypeCnt[idx] += allGenotypes;
+				// output variable.
+				if (m_vars.contains(GenotypeNum_sp_String)) {
 #pragma omp critical
-				pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, GenotypeNum_String, m_suffix)
-					                  % loc).str(), genotypes);
-			}
-			// note that genotyeps is changed in place.
-			if (m_vars.contains(GenotypeFreq_sp_String)) {
-				if (allGenotypes != 0) {
-					tupleDict::iterator dct = genotypes.begin();
-					tupleDict::iterator dctEnd = genotypes.end();
-					for (; dct != dctEnd; ++dct)
-						dct->second /= allGenotypes;
+					pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, GenotypeNum_String, m_suffix)
+						                  % loc).str(), genotypes);
 				}
+				// note that genotyeps is changed in place.
+				if (m_vars.contains(GenotypeFreq_sp_String)) {
+					if (allGenotypes != 0) {
+						tupleDict::iterator dct = genotypes.begin();
+						tupleDict::iterator dctEnd = genotypes.end();
+						for (; dct != dctEnd; ++dct)
+							dct->second /= allGenotypes;
+					}
 #pragma omp critical
-				pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, GenotypeFreq_String, m_suffix)
-					                  % loc).str(), genotypes);
+					pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, GenotypeFreq_String, m_suffix)
+						                  % loc).str(), genotypes);
+				}
 			}
 		}
 		pop.deactivateVirtualSubPop(it->subPop());
@@ -1607,6 +1840,8 @@ bool statHaploFreq::apply(Population & pop) const
 		return true;
 
 	DBG_DO(DBG_STATOR, cerr << "Calculated haplotype frequency for loci " << m_loci << endl);
+	for (size_t i = 0; i < m_loci.size(); ++i)
+		pop.checkGenealogyLoci(vectoru(m_loci[i].begin(), m_loci[i].end()));
 
 	// count for all specified subpopulations
 	vector<tupleDict> haplotypeCnt(m_loci.size());
@@ -1643,24 +1878,45 @@ bool statHaploFreq::apply(Population & pop) const
 			tupleDict haplotypes;
 			size_t allHaplotypes = 0;
 
-			// go through all individual
-			IndIterator ind = pop.indIterator(it->subPop());
-			for (; ind.valid(); ++ind) {
-				vectori haplotype(loci.size());
-				for (size_t p = 0; p < ply; ++p) {
-					if (p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
-						continue;
-					if (chromType == CHROMOSOME_Y && ind->sex() == FEMALE)
-						continue;
-					if (((chromType == CHROMOSOME_X && p == 1) ||
-					     (chromType == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
-						continue;
-					if (chromType == MITOCHONDRIAL && p > 0)
-						continue;
-					for (size_t idx = 0; idx < nLoci; ++idx)
-						haplotype[idx] = ind->allele(loci[idx], p);
-					haplotypes[haplotype]++;
-					allHaplotypes++;
+#ifdef BINARYALLELE
+			// short haplotypes of binary alleles are counted from bit planes
+			// a word at a time.
+			vectoru haploLoci(loci.begin(), loci.end());
+			if (nLoci <= BIT_HAPLOTYPE_LOCI && locusMajorLoci(pop, haploLoci)) {
+				vector<WORDTYPE> planes;
+				size_t numInds = pop.locusBitPlanes(haploLoci, it->subPop(), planes);
+				size_t numWords = (numInds + WORDBIT - 1) / WORDBIT;
+				if (numInds > 0) {
+					vector<WORDTYPE> masks((nLoci + 1) * numWords, ~WORDTYPE(0));
+					if (numInds % WORDBIT != 0)
+						masks[numWords - 1] = (WORDTYPE(1) << (numInds % WORDBIT)) - 1;
+					vectori haplotype(nLoci);
+					for (size_t p = 0; p < ply; ++p)
+						countBitHaplotypes(planes, p, ply, numWords, 0, masks, haplotype, haplotypes);
+				}
+				allHaplotypes = numInds * ply;
+			} else
+#endif
+			{
+				// go through all individual
+				IndIterator ind = pop.indIterator(it->subPop());
+				for (; ind.valid(); ++ind) {
+					vectori haplotype(loci.size());
+					for (size_t p = 0; p < ply; ++p) {
+						if (p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
+							continue;
+						if (chromType == CHROMOSOME_Y && ind->sex() == FEMALE)
+							continue;
+						if (((chromType == CHROMOSOME_X && p == 1) ||
+						     (chromType == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
+							continue;
+						if (chromType == MITOCHONDRIAL && p > 0)
+							continue;
+						for (size_t idx = 0; idx < nLoci; ++idx)
+							haplotype[idx] = ind->allele(loci[idx], p);
+						haplotypes[haplotype]++;
+						allHaplotypes++;
+					}
 				}
 			}
 			// total haplotype count
@@ -1768,6 +2024,8 @@ bool statHaploHomoFreq::apply(Population & pop) const
 		return true;
 
 	DBG_DO(DBG_STATOR, cerr << "Calculated haplotype homozygosity frequency for loci " << m_loci << endl);
+	for (size_t i = 0; i < m_loci.size(); ++i)
+		pop.checkGenealogyLoci(vectoru(m_loci[i].begin(), m_loci[i].end()));
 
 	DBG_FAILIF(pop.ploidy() != 2, ValueError,
 		"Haplotype heterozygote frequency can only be calculated for diploid populations.");
@@ -2444,6 +2702,7 @@ bool statLD::apply(Population & pop) const
 			pop.chromType(pop.chromLocusPair(m_LD[i][1]).first),
 			ValueError, "Two loci must be on chromosome(s) of the same type");
 	}
+	pop.checkGenealogyLoci(loci);
 	size_t nLoci = loci.size();
 
 	ALLELECNTLIST allAlleleCnt(loci.size());
@@ -2470,35 +2729,76 @@ bool statLD::apply(Population & pop) const
 		ALLELECNTLIST alleleCnt(loci.size());
 		HAPLOCNTLIST haploCnt(m_LD.size());
 
-		// count allele and genotype
-		IndIterator ind = pop.indIterator(it->subPop());
-		for (; ind.valid(); ++ind) {
-			for (size_t p = 0; p < ply; ++p) {
-				if (ply == 2 && p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
-					continue;
-				GenoIterator geno = ind->genoBegin(p);
-				// allele frequency
-				for (size_t idx = 0; idx < nLoci; ++idx) {
-					if (ply == 2 && chromTypes[idx] == CHROMOSOME_Y && ind->sex() == FEMALE)
-						continue;
-					if (ply == 2 && ((chromTypes[idx] == CHROMOSOME_X && p == 1) ||
-					                 (chromTypes[idx] == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
-						continue;
-					if (chromTypes[idx] == MITOCHONDRIAL && p > 0)
-						continue;
-					alleleCnt[idx][DEREF_ALLELE(geno + loci[idx])]++;
-				}
-				// haplotype frequency
-				for (size_t idx = 0; idx < nLD; ++idx) {
-					size_t chromType = chromTypes[lociMap[m_LD[idx][0]]];
-					if (chromType == CHROMOSOME_Y && ind->sex() == FEMALE)
-						continue;
-					if (((chromType == CHROMOSOME_X && p == 1) ||
-					     (chromType == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
-						continue;
-					if (chromType == MITOCHONDRIAL && p > 0)
+#ifdef BINARYALLELE
+		// for binary alleles, alleles and haplotypes are counted from bit
+		// planes of alleles a word at a time.
+		if (locusMajorLoci(pop, loci)) {
+			vector<WORDTYPE> planes;
+			size_t numInds = pop.locusBitPlanes(loci, it->subPop(), planes);
+			size_t numWords = (numInds + WORDBIT - 1) / WORDBIT;
+			size_t numAlleles = numInds * ply;
+			vectoru ones(nLoci, 0);
+			for (size_t idx = 0; idx < nLoci; ++idx) {
+				vector<WORDTYPE>::const_iterator a = planes.begin() + idx * ply * numWords;
+				vector<WORDTYPE>::const_iterator aEnd = a + ply * numWords;
+				for (; a != aEnd; ++a)
+					ones[idx] += countBits(*a);
+				if (ones[idx] != numAlleles)
+					alleleCnt[idx][0] = numAlleles - ones[idx];
+				if (ones[idx] != 0)
+					alleleCnt[idx][1] = ones[idx];
+			}
+			for (size_t idx = 0; idx < nLD; ++idx) {
+				size_t i = lociMap[m_LD[idx][0]];
+				size_t j = lociMap[m_LD[idx][1]];
+				vector<WORDTYPE>::const_iterator a = planes.begin() + i * ply * numWords;
+				vector<WORDTYPE>::const_iterator b = planes.begin() + j * ply * numWords;
+				size_t cnt11 = 0;
+				for (size_t w = 0; w < ply * numWords; ++w)
+					cnt11 += countBits(*(a + w) & *(b + w));
+				size_t cnt[2][2];
+				cnt[1][1] = cnt11;
+				cnt[1][0] = ones[i] - cnt11;
+				cnt[0][1] = ones[j] - cnt11;
+				cnt[0][0] = numAlleles - ones[i] - ones[j] + cnt11;
+				for (size_t x = 0; x < 2; ++x)
+					for (size_t y = 0; y < 2; ++y)
+						if (cnt[x][y] != 0)
+							haploCnt[idx][HAPLOCNT::key_type(x, y)] = cnt[x][y];
+			}
+		} else
+#endif
+		{
+			// count allele and genotype
+			IndIterator ind = pop.indIterator(it->subPop());
+			for (; ind.valid(); ++ind) {
+				for (size_t p = 0; p < ply; ++p) {
+					if (ply == 2 && p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
 						continue;
-					haploCnt[idx][HAPLOCNT::key_type(DEREF_ALLELE(geno + m_LD[idx][0]), DEREF_ALLELE(geno + m_LD[idx][1]))]++;
+					GenoIterator geno = ind->genoBegin(p);
+					// allele frequency
+					for (size_t idx = 0; idx < nLoci; ++idx) {
+						if (ply == 2 && chromTypes[idx] == CHROMOSOME_Y && ind->sex() == FEMALE)
+							continue;
+						if (ply == 2 && ((chromTypes[idx] == CHROMOSOME_X && p == 1) ||
+						                 (chromTypes[idx] == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
+							continue;
+						if (chromTypes[idx] == MITOCHONDRIAL && p > 0)
+							continue;
+						alleleCnt[idx][DEREF_ALLELE(geno + loci[idx])]++;
+					}
+					// haplotype frequency
+					for (size_t idx = 0; idx < nLD; ++idx) {
+						size_t chromType = chromTypes[lociMap[m_LD[idx][0]]];
+						if (chromType == CHROMOSOME_Y && ind->sex() == FEMALE)
+							continue;
+						if (((chromType == CHROMOSOME_X && p == 1) ||
+						     (chromType == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
+							continue;
+						if (chromType == MITOCHONDRIAL && p > 0)
+							continue;
+						haploCnt[idx][HAPLOCNT::key_type(DEREF_ALLELE(geno + m_LD[idx][0]), DEREF_ALLELE(geno + m_LD[idx][1]))]++;
+					}
 				}
 			}
 		}
@@ -2753,6 +3053,7 @@ bool statAssociation::apply(Population & pop) const
 		return true;
 
 	const vectoru & loci = m_loci.elems(&pop);
+	pop.checkGenealogyLoci(loci);
 
 	vectoru chromTypes;
 	for (size_t i = 0; i < loci.size(); ++i)
@@ -2991,6 +3292,7 @@ bool statNeutrality::apply(Population & pop) const
 		return true;
 
 	const vectoru & loci = m_loci.elems(&pop);
+	pop.checkGenealogyLoci(loci);
 
 	size_t nLoci = loci.size();
 	size_t chromType = pop.chromType(pop.chromLocusPair(loci[0]).first);
@@ -3209,6 +3511,7 @@ bool statStructure::apply(Population & pop) const
 		return true;
 
 	const vectoru & loci = m_loci.elems(&pop);
+	pop.checkGenealogyLoci(loci);
 
 	bool use_observed_het = true;
 	for (size_t idx = 0; idx < loci.size(); ++idx) {
@@ -3385,6 +3688,7 @@ bool statHWE::apply(Population & pop) const
 		return true;
 
 	const vectoru & loci = m_loci.elems(&pop);
+	pop.checkGenealogyLoci(loci);
 
 	DBG_FAILIF(pop.ploidy() != 2, ValueError,
 		"HWE test is only available for diploid populations.");
@@ -3487,6 +3791,7 @@ bool statInbreeding::apply(Population & pop) const
 		return true;
 
 	const vectoru & loci = m_loci.elems(&pop);
+	pop.checkGenealogyLoci(loci);
 
 	// count for all specified subpopulations
 	uintDict allIBDCnt;
@@ -3855,6 +4160,7 @@ bool statEffectiveSize::apply(Population & pop) const
 {
 	if (m_loci.empty())
 		return true;
+	pop.checkGenealogyLoci(m_loci.elems(&pop));
 
 	if (m_vars.contains(Ne_demo_base_String) || m_vars.contains(Ne_demo_base_sp_String)
 	    || m_vars.contains(Ne_demo_String) || m_vars.contains(Ne_demo_sp_String))
@@ -482,6 +482,15 @@ private:
 
 	stringList m_vars;
 	string m_suffix;
+
+#ifndef MUTANTALLELE
+	// alleles in locus-major order, which are kept between calls
+#  ifdef BINARYALLELE
+	mutable vector<WORDTYPE> m_block;
+#  else
+	mutable vector<Allele> m_block;
+#  endif
+#endif
 };
 
 /// CPPONLY
@@ -512,6 +521,15 @@ private:
 	subPopList m_subPops;
 	stringList m_vars;
 	string m_suffix;
+
+#ifndef MUTANTALLELE
+	// alleles in locus-major order, which are kept between calls
+#  ifdef BINARYALLELE
+	mutable vector<WORDTYPE> m_block;
+#  else
+	mutable vector<Allele> m_block;
+#  endif
+#endif
 };
 
 
@@ -539,6 +557,11 @@ private:
 	subPopList m_subPops;
 	stringList m_vars;
 	string m_suffix;
+
+#ifdef BINARYALLELE
+	// bit planes of alleles, which are kept between calls
+	mutable vector<WORDTYPE> m_block;
+#endif
 };
 
 
@@ -27,6 +27,7 @@
 #include "pedigree.h"
 
 #include <sstream>
+#include <cstring>
 using std::ostringstream;
 
 namespace simuPOP {
@@ -35,6 +36,11 @@ namespace simuPOP {
 // treats 0 as missing.
 ATOMICLONG g_indID = 1;
 
+ULONG nextIndID()
+{
+	return static_cast<ULONG>(g_indID);
+}
+
 
 void IdTagger::reset(ULONG startID)
 {
@@ -311,9 +317,50 @@ string PedigreeTagger::describe(bool /* format */) const
 }
 
 
+void PedigreeTagger::outputRecord(ostream & out, const Individual * ind,
+                                  const vectorf & IDs, bool header) const
+{
+	size_t numFields = m_outputFields.allAvail() ? ind->infoSize() : m_outputFields.elems().size();
+	size_t numLoci = m_outputLoci.allAvail() ? ind->totNumLoci() : m_outputLoci.elems().size();
+	size_t pldy = ind->ploidy();
+	size_t alleleBytes = ModuleMaxAllele <= 0xFF ? 1 : sizeof(Allele);
+
+	string record;
+	if (header) {
+		record.append(BinaryPedigreeMagic, sizeof(BinaryPedigreeMagic));
+		putLE(record, BinaryPedigreeVersion, 4);
+		putLE(record, IDs.size(), 4);
+		putLE(record, numFields, 4);
+		putLE(record, pldy, 4);
+		putLE(record, numLoci, 4);
+		putLE(record, alleleBytes, 4);
+	}
+	putLE(record, toID(ind->info(m_idField)), 8);
+	for (size_t i = 0; i < IDs.size(); ++i)
+		putLE(record, toID(IDs[i]), 8);
+	record.push_back(static_cast<char>((ind->sex() == FEMALE ? 1 : 0) | (ind->affected() ? 2 : 0)));
+	for (size_t i = 0; i < numFields; ++i) {
+		double value = m_outputFields.allAvail() ? ind->info(i) : ind->info(m_outputFields.elems()[i]);
+		uint64_t bits;
+		memcpy(&bits, &value, sizeof(double));
+		putLE(record, bits, sizeof(double));
+	}
+	for (size_t i = 0; i < numLoci; ++i) {
+		size_t loc = m_outputLoci.allAvail() ? i : m_outputLoci.elems()[i];
+		for (size_t p = 0; p < pldy; ++p)
+			putLE(record, ind->allele(loc, p), alleleBytes);
+	}
+	out.write(record.data(), record.size());
+}
+
+
 void PedigreeTagger::outputIndividual(ostream & out, const Individual * ind,
-                                      const vectorf & IDs) const
+                                      const vectorf & IDs, bool header) const
 {
+	if (m_binary) {
+		outputRecord(out, ind, IDs, header);
+		return;
+	}
 	// out << .... is very slow compared to the sprintf implementation.
 	//
 	// three numbers (maximum 20 charameters) + M F, the buffer should be long enough
@@ -371,6 +418,8 @@ bool PedigreeTagger::apply(Population & pop) const
 
 	size_t idIdx = pop.infoIdx(m_idField);
 	size_t curGen = pop.curAncestralGen();
+	// binary records follow a header at the beginning of a file
+	bool header = m_binary && out.tellp() == std::streampos(0);
 	for (int depth = pop.ancestralGens(); depth >= 0; --depth) {
 		pop.useAncestralGen(depth);
 		ConstRawIndIterator it = pop.rawIndBegin();
@@ -383,7 +432,8 @@ bool PedigreeTagger::apply(Population & pop) const
 				if (idMap.find(toID(IDs[i])) == idMap.end())
 					IDs[i] = 0;
 			}
-			outputIndividual(out, &*it, IDs);
+			outputIndividual(out, &*it, IDs, header);
+			header = false;
 		}
 	}
 	pop.useAncestralGen(curGen);
@@ -421,7 +471,20 @@ bool PedigreeTagger::applyDuringMating(Population & pop, Population & offPop, Ra
 		return true;
 
 	ostream & out = getOstream(pop.dict());
-	outputIndividual(out, &*offspring, IDs);
+	// a file can only be (re)opened between generations so there is no need
+	// to check the position of the output for each offspring.
+	// replicates of a simulator share this operator but can write to
+	// different files.
+	bool header = false;
+	if (m_binary) {
+		if (m_headerGens.size() <= pop.rep())
+			m_headerGens.resize(pop.rep() + 1, -1);
+		if (m_headerGens[pop.rep()] != static_cast<int>(pop.gen())) {
+			header = out.tellp() == std::streampos(0);
+			m_headerGens[pop.rep()] = static_cast<int>(pop.gen());
+		}
+	}
+	outputIndividual(out, &*offspring, IDs, header);
 	return true;
 }
 
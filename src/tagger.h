@@ -33,6 +33,10 @@
 
 namespace simuPOP {
 
+/// CPPONLY return the ID that will be assigned to the next individual by
+/// an IdTagger
+ULONG nextIndID();
+
 
 /** An IdTagger gives a unique ID for each individual it is applies to. These
  *  ID can be used to uniquely identify an individual in a multi-generational
@@ -405,14 +409,24 @@ public:
 	 *  affection status and genotype can be changed by other operators so this
 	 *  operator should usually be applied after all other operators are
 	 *  applied.
+	 *
+	 *  If \e binary is set to \c True, each individual is written as a
+	 *  fixed-width binary record with little-endian IDs of offspring and
+	 *  parents, a byte for sex and affection status, values of information
+	 *  fields, and alleles at specified loci, after a header that describes
+	 *  the size of these records. This format is much faster to write and
+	 *  to load than the text format, and can also be loaded by function
+	 *  \c loadPedigree.
 	 */
 	PedigreeTagger(const string & idField = "ind_id", const stringFunc & output = "",
 		const stringList & outputFields = vectorstr(), const uintList & outputLoci = vectoru(),
 		int begin = 0, int end = -1, int step = 1, const intList & at = vectori(),
 		const intList & reps = intList(), const subPopList & subPops = subPopList(),
-		const stringList & infoFields = stringList("father_id", "mother_id")) :
+		const stringList & infoFields = stringList("father_id", "mother_id"),
+		bool binary = false) :
 		BaseOperator(output, begin, end, step, at, reps, subPops, infoFields),
-		m_idField(idField), m_outputFields(outputFields), m_outputLoci(outputLoci)
+		m_idField(idField), m_outputFields(outputFields), m_outputLoci(outputLoci),
+		m_binary(binary), m_headerGens()
 	{
 	}
 
@@ -451,12 +465,22 @@ public:
 
 private:
 	void outputIndividual(ostream & out, const Individual * ind,
-		const vectorf & IDs) const;
+		const vectorf & IDs, bool header = false) const;
+
+	/// write individual as a binary record, after a header if \e header is true
+	void outputRecord(ostream & out, const Individual * ind,
+		const vectorf & IDs, bool header) const;
 
 private:
 	const string m_idField;
 	stringList m_outputFields;
 	uintList m_outputLoci;
+
+	bool m_binary;
+
+	/// generation at which the output of each replicate was last checked
+	/// for a header
+	mutable vectori m_headerGens;
 };
 
 
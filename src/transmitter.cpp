@@ -24,12 +24,562 @@
  */
 
 #include "transmitter.h"
+#include <cstring>
 
 using std::min;
 using std::max;
 
 namespace simuPOP {
 
+struct GenealogyTables
+{
+	// an edge that indicates that neutral loci [left, right) of node child
+	// are copied from node parent. Generation at which child is produced is
+	// kept for edges that have not been flushed to the edge table.
+	struct Edge
+	{
+		Edge(size_t l, size_t r, ULONG p, ULONG c, long t) :
+			left(l), right(r), parent(p), child(c), time(t)
+		{
+		}
+
+
+		size_t left;
+		size_t right;
+		ULONG parent;
+		ULONG child;
+		long time;
+	};
+
+	// a mutation on the branch above node, which shifts the allele at
+	// neutral locus site by shift (modulus the number of alleles).
+	struct Mutation
+	{
+		Mutation(size_t s, ULONG n, UINT sh) : site(s), node(n), shift(sh)
+		{
+		}
+
+
+		size_t site;
+		ULONG node;
+		UINT shift;
+	};
+
+	// a segment of neutral loci [left, right) of which node carries the
+	// ancestral material of individuals being simplified.
+	struct Segment
+	{
+		Segment(size_t l, size_t r, ULONG n) : left(l), right(r), node(n)
+		{
+		}
+
+
+		size_t left;
+		size_t right;
+		ULONG node;
+	};
+
+	GenealogyTables(const lociList & l, const string & field) :
+		loci(l), idField(field), genoStru(MaxTraitIndex), idIdx(0),
+		sites(), sitesBefore(), copyBegin(), copyEnd(), edges(), pending(numThreads()),
+		time(), mutations(), mutated(false), mutatedUntil(0), rep(-1)
+	{
+	}
+
+
+	const lociList loci;
+	const string idField;
+
+	// genotypic structure for which the following are cached
+	TraitIndexType genoStru;
+	size_t idIdx;
+	// neutral loci, and number of neutral loci before each locus
+	vectoru sites;
+	vectoru sitesBefore;
+	// ranges of non-neutral loci that are copied from parents
+	vectoru copyBegin;
+	vectoru copyEnd;
+
+	vector<Edge> edges;
+	// edges recorded by each thread that are not flushed to edges
+	vector<vector<Edge> > pending;
+	// generation at which each node is produced
+	std::map<ULONG, long> time;
+
+	vector<Mutation> mutations;
+	// mutations have been dropped to branches before generation mutatedUntil
+	bool mutated;
+	long mutatedUntil;
+	// replicate of the population of which the genealogy is recorded
+	long rep;
+};
+
+
+namespace {
+
+// order edges so that younger parents come first. Because IDs are assigned
+// to individuals sequentially, nodes of offspring always have larger IDs
+// than nodes of their parents.
+bool youngerParent(const GenealogyTables::Edge & a, const GenealogyTables::Edge & b)
+{
+	if (a.parent != b.parent)
+		return a.parent > b.parent;
+	if (a.child != b.child)
+		return a.child < b.child;
+	return a.left < b.left;
+}
+
+
+// add a segment to the ancestry of a node, merging it with the last segment
+// if they are adjacent and are carried by the same node.
+void addSegment(vector<GenealogyTables::Segment> & segs, size_t left, size_t right, ULONG node)
+{
+	if (!segs.empty() && segs.back().right == left && segs.back().node == node)
+		segs.back().right = right;
+	else
+		segs.push_back(GenealogyTables::Segment(left, right, node));
+}
+
+
+}
+
+Genealogy::Genealogy(const lociList & loci, const string & idField) :
+	m_tables(new GenealogyTables(loci, idField))
+{
+}
+
+
+string Genealogy::describe(bool /* format */) const
+{
+	return "<simuPOP.Genealogy>";
+}
+
+
+void Genealogy::initialize(const GenoStruTrait & trait) const
+{
+	GenealogyTables & t = *m_tables;
+
+	if (t.pending.size() < numThreads())
+		t.pending.resize(numThreads());
+
+	if (t.genoStru == trait.genoStruIdx())
+		return;
+
+	PARAM_FAILIF(!t.edges.empty(), ValueError,
+		"Genotypic structure of a population can not be changed after its genealogy is recorded.");
+
+	t.sites = t.loci.elems(&trait);
+	std::sort(t.sites.begin(), t.sites.end());
+	t.sites.erase(std::unique(t.sites.begin(), t.sites.end()), t.sites.end());
+
+	size_t numLoci = trait.totNumLoci();
+	vector<bool> neutral(numLoci, false);
+	for (size_t i = 0; i < t.sites.size(); ++i) {
+		PARAM_FAILIF(t.sites[i] >= numLoci, IndexError,
+			(boost::format("Locus index %1% out of range of 0 ~ %2%.") % t.sites[i] % numLoci).str());
+		PARAM_FAILIF(trait.chromType(trait.chromLocusPair(t.sites[i]).first) != AUTOSOME, ValueError,
+			"Neutral loci of a genealogy should be on autosomes.");
+		neutral[t.sites[i]] = true;
+	}
+	// number of neutral loci before each locus, and ranges of non-neutral
+	// loci.
+	t.sitesBefore.resize(numLoci + 1);
+	t.sitesBefore[0] = 0;
+	t.copyBegin.clear();
+	t.copyEnd.clear();
+	for (size_t loc = 0; loc < numLoci; ++loc) {
+		t.sitesBefore[loc + 1] = t.sitesBefore[loc] + (neutral[loc] ? 1 : 0);
+		if (neutral[loc])
+			continue;
+		if (!t.copyEnd.empty() && t.copyEnd.back() == loc)
+			++t.copyEnd.back();
+		else {
+			t.copyBegin.push_back(loc);
+			t.copyEnd.push_back(loc + 1);
+		}
+	}
+	if (!t.sites.empty()) {
+		PARAM_FAILIF(!trait.hasInfoField(t.idField), ValueError,
+			"Information field " + t.idField + " is needed to record a genealogy.");
+		t.idIdx = trait.infoIdx(t.idField);
+	}
+	t.genoStru = trait.genoStruIdx();
+}
+
+
+bool Genealogy::isValid() const
+{
+	return !m_tables->sites.empty();
+}
+
+
+void Genealogy::checkPopulation(const Population & pop) const
+{
+	GenealogyTables & t = *m_tables;
+	long rep = static_cast<long>(pop.rep());
+
+	if (t.rep == rep)
+		return;
+	// node IDs of different replicates overlap
+	PARAM_FAILIF(t.rep >= 0, ValueError,
+		"A genealogy can only be recorded for one population. Please use a separate "
+		"genealogy (and genotype transmitter) for each replicate of a simulator.");
+#pragma omp critical
+	t.rep = rep;
+}
+
+
+void Genealogy::markPopulation(Population & pop) const
+{
+	if (pop.hasGenealogyLoci())
+		return;
+#pragma omp critical
+	pop.setGenealogyLoci(m_tables->sites);
+}
+
+
+void Genealogy::transmitSegment(const Individual & parent, int parPloidy,
+                                Individual & offspring, int ploidy, size_t begin, size_t end, size_t gen) const
+{
+	GenealogyTables & t = *m_tables;
+
+	// copy alleles at non-neutral loci in this segment
+	size_t i = std::upper_bound(t.copyEnd.begin(), t.copyEnd.end(), begin) - t.copyEnd.begin();
+
+	for (; i < t.copyBegin.size() && t.copyBegin[i] < end; ++i) {
+		size_t b = max(begin, t.copyBegin[i]);
+		size_t e = min(end, t.copyEnd[i]);
+#ifdef BINARYALLELE
+		copyGenotype(parent.genoBegin(parPloidy) + b, offspring.genoBegin(ploidy) + b, e - b);
+#else
+#  ifdef MUTANTALLELE
+		copyGenotype(parent.genoBegin(parPloidy) + b, parent.genoBegin(parPloidy) + e,
+			offspring.genoBegin(ploidy) + b);
+#  else
+		copy(parent.genoBegin(parPloidy) + b, parent.genoBegin(parPloidy) + e,
+			offspring.genoBegin(ploidy) + b);
+#  endif
+#endif
+		LINEAGE_EXPR(copy(parent.lineageBegin(parPloidy) + b, parent.lineageBegin(parPloidy) + e,
+				offspring.lineageBegin(ploidy) + b));
+	}
+
+	// record an edge for neutral loci in this segment
+	size_t left = t.sitesBefore[begin];
+	size_t right = t.sitesBefore[end];
+	if (left == right)
+		return;
+
+	ULONG parentNode = 2 * toID(parent.info(t.idIdx)) + parPloidy;
+	ULONG childNode = 2 * toID(offspring.info(t.idIdx)) + ploidy;
+#ifdef _OPENMP
+	vector<GenealogyTables::Edge> & edges = t.pending[omp_get_thread_num()];
+#else
+	vector<GenealogyTables::Edge> & edges = t.pending[0];
+#endif
+	// extend the last edge if this segment continues it
+	if (!edges.empty() && edges.back().child == childNode &&
+	    edges.back().parent == parentNode && edges.back().right == left)
+		edges.back().right = right;
+	else
+		edges.push_back(GenealogyTables::Edge(left, right, parentNode, childNode,
+				static_cast<long>(gen) + 1));
+}
+
+
+void Genealogy::flush() const
+{
+	GenealogyTables & t = *m_tables;
+
+	for (size_t i = 0; i < t.pending.size(); ++i) {
+		vector<GenealogyTables::Edge> & edges = t.pending[i];
+		for (size_t j = 0; j < edges.size(); ++j) {
+			// a parent that is not recorded as an offspring is a root of
+			// the genealogy, which is assumed to be produced a generation
+			// before its offspring.
+			t.time.insert(std::make_pair(edges[j].parent, edges[j].time - 1));
+			t.time[edges[j].child] = edges[j].time;
+		}
+		t.edges.insert(t.edges.end(), edges.begin(), edges.end());
+		edges.clear();
+	}
+	if (t.pending.size() < numThreads())
+		t.pending.resize(numThreads());
+}
+
+
+void Genealogy::simplify(const Population & pop) const
+{
+	typedef GenealogyTables::Edge Edge;
+	typedef GenealogyTables::Segment Segment;
+	typedef GenealogyTables::Mutation Mutation;
+	typedef std::map<ULONG, vector<Segment> > AncestryMap;
+
+	GenealogyTables & t = *m_tables;
+
+	flush();
+	initialize(pop);
+	if (t.sites.empty())
+		return;
+	checkPopulation(pop);
+
+	PARAM_FAILIF(pop.ploidy() != 2, ValueError,
+		"Genealogies can only be recorded for diploid populations.");
+
+	size_t numSites = t.sites.size();
+	size_t idIdx = pop.infoIdx(t.idField);
+
+	// segments of ancestral material carried by each node, which are
+	// initialized with chromosomes of the present generation.
+	AncestryMap ancestry;
+	std::set<ULONG> samples;
+	for (ConstRawIndIterator it = pop.rawIndBegin(); it != pop.rawIndEnd(); ++it) {
+		ULONG node = 2 * toID(it->info(idIdx));
+		for (ULONG p = 0; p < 2; ++p) {
+			samples.insert(node + p);
+			ancestry[node + p].push_back(Segment(0, numSites, node + p));
+		}
+	}
+
+	// nodes that have parents
+	std::set<ULONG> children;
+	for (size_t i = 0; i < t.edges.size(); ++i)
+		children.insert(t.edges[i].child);
+
+	std::sort(t.edges.begin(), t.edges.end(), youngerParent);
+
+	vector<Edge> edges;
+	std::set<ULONG> kept(samples);
+	size_t i = 0;
+	while (i < t.edges.size()) {
+		ULONG u = t.edges[i].parent;
+		// ancestral materials that are inherited from u
+		vector<Segment> inherited;
+		for (; i < t.edges.size() && t.edges[i].parent == u; ++i) {
+			const Edge & e = t.edges[i];
+			AncestryMap::const_iterator it = ancestry.find(e.child);
+			if (it == ancestry.end())
+				continue;
+			for (size_t j = 0; j < it->second.size(); ++j) {
+				const Segment & seg = it->second[j];
+				if (seg.right > e.left && seg.left < e.right)
+					inherited.push_back(Segment(max(seg.left, e.left), min(seg.right, e.right), seg.node));
+			}
+		}
+		if (inherited.empty())
+			continue;
+
+		size_t firstEdge = edges.size();
+		if (samples.find(u) != samples.end()) {
+			// a parent in the present generation carries all its ancestral
+			// material.
+			for (size_t j = 0; j < inherited.size(); ++j)
+				if (inherited[j].node != u)
+					edges.push_back(Edge(inherited[j].left, inherited[j].right, u, inherited[j].node, 0));
+		} else {
+			// roots are kept so that branches above coalescent events are
+			// not lost.
+			bool root = children.find(u) == children.end();
+			vector<Segment> & anc = ancestry[u];
+			vectoru bps;
+			for (size_t j = 0; j < inherited.size(); ++j) {
+				bps.push_back(inherited[j].left);
+				bps.push_back(inherited[j].right);
+			}
+			std::sort(bps.begin(), bps.end());
+			bps.erase(std::unique(bps.begin(), bps.end()), bps.end());
+			for (size_t k = 0; k + 1 < bps.size(); ++k) {
+				size_t left = bps[k];
+				size_t right = bps[k + 1];
+				vector<ULONG> nodes;
+				for (size_t j = 0; j < inherited.size(); ++j)
+					if (inherited[j].left <= left && inherited[j].right >= right)
+						nodes.push_back(inherited[j].node);
+				if (nodes.empty())
+					continue;
+				if (nodes.size() == 1 && !root) {
+					// ancestral material passes through u without coalescence
+					addSegment(anc, left, right, nodes[0]);
+					continue;
+				}
+				for (size_t j = 0; j < nodes.size(); ++j)
+					edges.push_back(Edge(left, right, u, nodes[j], 0));
+				addSegment(anc, left, right, u);
+			}
+		}
+		if (edges.size() == firstEdge)
+			continue;
+		kept.insert(u);
+		// merge adjacent edges between the same nodes
+		std::sort(edges.begin() + firstEdge, edges.end(), youngerParent);
+		size_t last = firstEdge;
+		for (size_t j = firstEdge + 1; j < edges.size(); ++j) {
+			if (edges[j].child == edges[last].child && edges[j].left == edges[last].right)
+				edges[last].right = edges[j].right;
+			else
+				edges[++last] = edges[j];
+		}
+		edges.erase(edges.begin() + last + 1, edges.end());
+	}
+	t.edges.swap(edges);
+
+	// move mutations on removed nodes to the nodes below them, or remove
+	// them if they are not ancestral to the present generation.
+	vector<Mutation> mutations;
+	for (size_t j = 0; j < t.mutations.size(); ++j) {
+		const Mutation & m = t.mutations[j];
+		AncestryMap::const_iterator it = ancestry.find(m.node);
+		if (it == ancestry.end())
+			continue;
+		for (size_t k = 0; k < it->second.size(); ++k) {
+			if (it->second[k].left <= m.site && m.site < it->second[k].right) {
+				mutations.push_back(Mutation(m.site, it->second[k].node, m.shift));
+				break;
+			}
+		}
+	}
+	t.mutations.swap(mutations);
+
+	std::map<ULONG, long> time;
+	for (std::set<ULONG>::const_iterator it = kept.begin(); it != kept.end(); ++it) {
+		std::map<ULONG, long>::const_iterator tit = t.time.find(*it);
+		if (tit != t.time.end())
+			time[*it] = tit->second;
+	}
+	t.time.swap(time);
+}
+
+
+void Genealogy::mutate(Population & pop, double rate, UINT k) const
+{
+	typedef GenealogyTables::Edge Edge;
+	typedef GenealogyTables::Mutation Mutation;
+
+	PARAM_FAILIF(k < 2 || k - 1 > ModuleMaxAllele, ValueError,
+		"Number of alleles of a k-allele mutation model should be between 2 and the maximum allowed allele plus 1.");
+	PARAM_FAILIF(fcmp_lt(rate, 0.), ValueError, "Mutation rate should be non-negative.");
+
+	simplify(pop);
+
+	GenealogyTables & t = *m_tables;
+	if (t.sites.empty())
+		return;
+
+	size_t idIdx = pop.infoIdx(t.idField);
+	// chromosomes of the present generation
+	std::map<ULONG, size_t> samples;
+	long now = 0;
+	bool hasTime = false;
+	for (size_t i = 0; i < pop.popSize(); ++i) {
+		ULONG node = 2 * toID(pop.individual(i).info(idIdx));
+		for (size_t p = 0; p < 2; ++p) {
+			samples[node + p] = 2 * i + p;
+			std::map<ULONG, long>::const_iterator it = t.time.find(node + p);
+			if (it != t.time.end() && (!hasTime || it->second > now)) {
+				now = it->second;
+				hasTime = true;
+			}
+		}
+	}
+
+	// drop mutations to parts of branches after the last call.
+	for (size_t i = 0; rate > 0 && i < t.edges.size(); ++i) {
+		const Edge & e = t.edges[i];
+		std::map<ULONG, long>::const_iterator cit = t.time.find(e.child);
+		std::map<ULONG, long>::const_iterator pit = t.time.find(e.parent);
+		if (cit == t.time.end() || pit == t.time.end())
+			continue;
+		long start = t.mutated ? max(pit->second, t.mutatedUntil) : pit->second;
+		if (cit->second <= start)
+			continue;
+		ULONG num = getRNG().randPoisson(rate * (cit->second - start) * (e.right - e.left));
+		for (ULONG j = 0; j < num; ++j)
+			t.mutations.push_back(Mutation(e.left + getRNG().randInt(e.right - e.left), e.child,
+					k == 2 ? 1 : 1 + static_cast<UINT>(getRNG().randInt(k - 1))));
+	}
+	if (hasTime) {
+		t.mutated = true;
+		t.mutatedUntil = now;
+	}
+
+	// set alleles at neutral loci
+	for (IndIterator it = pop.indIterator(); it.valid(); ++it)
+		for (size_t j = 0; j < t.sites.size(); ++j) {
+			it->setAllele(0, t.sites[j], 0);
+			it->setAllele(0, t.sites[j], 1);
+		}
+
+	std::map<ULONG, vectoru> below;
+	for (size_t i = 0; i < t.edges.size(); ++i)
+		below[t.edges[i].parent].push_back(i);
+
+	for (size_t i = 0; i < t.mutations.size(); ++i) {
+		const Mutation & m = t.mutations[i];
+		size_t locus = t.sites[m.site];
+		// apply the mutation to all chromosomes below it
+		vector<ULONG> nodes(1, m.node);
+		while (!nodes.empty()) {
+			ULONG node = nodes.back();
+			nodes.pop_back();
+			std::map<ULONG, size_t>::const_iterator sit = samples.find(node);
+			if (sit != samples.end()) {
+				Individual & ind = pop.individual(sit->second / 2);
+				int p = static_cast<int>(sit->second % 2);
+				ind.setAllele(TO_ALLELE((ind.allele(locus, p) + m.shift) % k), locus, p);
+			}
+			std::map<ULONG, vectoru>::const_iterator bit = below.find(node);
+			if (bit == below.end())
+				continue;
+			for (size_t j = 0; j < bit->second.size(); ++j) {
+				const Edge & e = t.edges[bit->second[j]];
+				if (e.left <= m.site && m.site < e.right)
+					nodes.push_back(e.child);
+			}
+		}
+	}
+	// alleles at neutral loci of the present generation are set
+	pop.setGenealogyLoci(vectoru());
+}
+
+
+PyObject * Genealogy::nodes() const
+{
+	flush();
+	const std::map<ULONG, long> & time = m_tables->time;
+	PyObject * res = PyList_New(0);
+	for (std::map<ULONG, long>::const_iterator it = time.begin(); it != time.end(); ++it) {
+		PyObject * item = Py_BuildValue("(kl)", it->first, it->second);
+		PyList_Append(res, item);
+		Py_DECREF(item);
+	}
+	return res;
+}
+
+
+PyObject * Genealogy::edges() const
+{
+	flush();
+	const vector<GenealogyTables::Edge> & edges = m_tables->edges;
+	PyObject * res = PyList_New(edges.size());
+	for (size_t i = 0; i < edges.size(); ++i)
+		PyList_SET_ITEM(res, i, Py_BuildValue("(nnkk)", static_cast<Py_ssize_t>(edges[i].left),
+				static_cast<Py_ssize_t>(edges[i].right), edges[i].parent, edges[i].child));
+	return res;
+}
+
+
+PyObject * Genealogy::mutations() const
+{
+	const vector<GenealogyTables::Mutation> & mutations = m_tables->mutations;
+	PyObject * res = PyList_New(mutations.size());
+
+	for (size_t i = 0; i < mutations.size(); ++i)
+		PyList_SET_ITEM(res, i, Py_BuildValue("(nk)", static_cast<Py_ssize_t>(mutations[i].site),
+				mutations[i].node));
+	return res;
+}
+
+
 void GenoTransmitter::initializeIfNeeded(const Individual & ind) const
 {
 	if (m_lastGenoStru != ind.genoStruIdx()) {
@@ -52,6 +602,63 @@ void GenoTransmitter::initialize(const Individual & ind) const
 			m_lociToCopy.push_back(ind.numLoci(ch));
 	m_ploidy = ind.ploidy();
 	m_chromIdx = ind.chromIndex();
+	// contiguous non-customized chromosomes are copied in one block
+	m_copyPlan.clear();
+	for (size_t ch = 0; ch < ind.numChrom(); ++ch)
+		if (m_lociToCopy[ch] != 0)
+			addSpan(m_copyPlan, m_chromIdx[ch], m_chromIdx[ch + 1], 0);
+}
+
+
+void GenoTransmitter::addSpan(TransmitPlan & plan, size_t begin, size_t end, int source)
+{
+	if (begin == end)
+		return;
+	// spans with random source are determined for each offspring and
+	// cannot be merged
+	if (!plan.empty() && plan.back().end == begin && plan.back().source == source &&
+	    source != RANDOM_COPY)
+		plan.back().end = end;
+	else
+		plan.push_back(TransmitSpan(begin, end, source));
+}
+
+
+void GenoTransmitter::copySpan(const Individual & parent, size_t src,
+                               Individual & offspring, size_t dst, size_t length) const
+{
+#ifdef BINARYALLELE
+	copyGenotype(parent.genoBegin() + src, offspring.genoBegin() + dst, length);
+#else
+#  ifdef MUTANTALLELE
+	copyGenotype(parent.genoBegin() + src, parent.genoBegin() + src + length,
+		offspring.genoBegin() + dst);
+#  else
+	memcpy(&*(offspring.genoBegin() + dst), &*(parent.genoBegin() + src),
+		length * sizeof(Allele));
+#  endif
+#endif
+#ifdef LINEAGE
+	copy(parent.lineageBegin() + src, parent.lineageBegin() + src + length,
+		offspring.lineageBegin() + dst);
+#endif
+}
+
+
+void GenoTransmitter::clearSpan(Individual & offspring, size_t dst, size_t length) const
+{
+#ifdef BINARYALLELE
+	clearGenotype(offspring.genoBegin() + dst, length);
+#else
+#  ifdef MUTANTALLELE
+	clearGenotype(offspring.genoBegin() + dst, offspring.genoBegin() + dst + length);
+#  else
+	fill(offspring.genoBegin() + dst, offspring.genoBegin() + dst + length, 0);
+#  endif
+#endif
+#ifdef LINEAGE
+	fill(offspring.lineageBegin() + dst, offspring.lineageBegin() + dst + length, 0);
+#endif
 }
 
 
@@ -114,45 +721,12 @@ void GenoTransmitter::copyChromosomes(const Individual & parent,
 {
 	initializeIfNeeded(offspring);
 
-	// troublesome ...
-	if (m_hasCustomizedChroms) {
-		for (size_t ch = 0; ch < parent.numChrom(); ++ch) {
-			if (m_lociToCopy[ch] == 0)
-				continue;
-			GenoIterator par = parent.genoBegin(parPloidy, ch);
-			GenoIterator off = offspring.genoBegin(ploidy, ch);
-
-#ifdef LINEAGE
-			LineageIterator parLineage = parent.lineageBegin(parPloidy, ch);
-			LineageIterator offLineage = offspring.lineageBegin(ploidy, ch);
-			LineageIterator lineage_end = parent.lineageEnd(parPloidy, ch);
-#endif
-
-#ifdef BINARYALLELE
-			copyGenotype(par, off, m_lociToCopy[ch]);
-#else
-			GenoIterator par_end = parent.genoEnd(parPloidy, ch);
-#  ifdef MUTANTALLELE
-			copyGenotype(par, par_end, off);
-#  else
-			copy(par, par_end, off);
-#  endif
-#endif
-			LINEAGE_EXPR(copy(parLineage, lineage_end, offLineage));
-		}
-	} else {             // easy
-#ifdef BINARYALLELE
-		copyGenotype(parent.genoBegin(parPloidy), offspring.genoBegin(ploidy),
-			offspring.totNumLoci());
-#else
-#  ifdef MUTANTALLELE
-		copyGenotype(parent.genoBegin(parPloidy), parent.genoEnd(parPloidy), offspring.genoBegin(ploidy));
-#  else
-		copy(parent.genoBegin(parPloidy), parent.genoEnd(parPloidy), offspring.genoBegin(ploidy));
-#  endif
-#endif
-		LINEAGE_EXPR(copy(parent.lineageBegin(parPloidy), parent.lineageEnd(parPloidy), offspring.lineageBegin(ploidy)));
-	}
+	size_t totNumLoci = m_chromIdx.back();
+	TransmitPlan::const_iterator it = m_copyPlan.begin();
+	TransmitPlan::const_iterator it_end = m_copyPlan.end();
+	for (; it != it_end; ++it)
+		copySpan(parent, parPloidy * totNumLoci + it->begin,
+			offspring, ploidy * totNumLoci + it->begin, it->end - it->begin);
 }
 
 
@@ -162,6 +736,35 @@ string CloneGenoTransmitter::describe(bool /* format */) const
 }
 
 
+void CloneGenoTransmitter::initialize(const Individual & ind) const
+{
+	GenoTransmitter::initialize(ind);
+
+	// chromosomes to copy, in the order of their positions on the genome
+	vectoru chroms;
+	if (m_chroms.allAvail()) {
+		for (size_t ch = 0; ch < ind.numChrom(); ++ch)
+			if (m_lociToCopy[ch] != 0)
+				chroms.push_back(ch);
+	} else {
+		chroms = m_chroms.elems();
+		for (size_t i = 0; i < chroms.size(); ++i) {
+			DBG_FAILIF(chroms[i] >= ind.numChrom(), IndexError,
+				(boost::format("Chromosome index %1% out of range of 0 ~ %2%") % chroms[i] % (ind.numChrom() - 1)).str());
+		}
+		std::sort(chroms.begin(), chroms.end());
+	}
+	// spans across all homologous copies so that the whole genotype
+	// can be copied in one block if there is no customized chromosome
+	size_t totNumLoci = m_chromIdx.back();
+	m_plan.clear();
+	for (size_t p = 0; p < m_ploidy; ++p)
+		for (size_t i = 0; i < chroms.size(); ++i)
+			addSpan(m_plan, p * totNumLoci + m_chromIdx[chroms[i]],
+				p * totNumLoci + m_chromIdx[chroms[i] + 1], 0);
+}
+
+
 bool CloneGenoTransmitter::applyDuringMating(Population & pop, Population & offPop, RawIndIterator offspring,
                                              Individual * dad, Individual * mom) const
 {
@@ -176,74 +779,11 @@ bool CloneGenoTransmitter::applyDuringMating(Population & pop, Population & offP
 
 	Individual * parent = mom != NULL ? mom : dad;
 
-	// troublesome ...
-	if (!m_chroms.allAvail()) {
-		const vectoru chroms = m_chroms.elems();
-		for (size_t p = 0; p != m_ploidy; ++p) {
-			for (size_t i = 0; i < chroms.size(); ++i) {
-				size_t ch = chroms[i];
-				GenoIterator par = parent->genoBegin(p, ch);
-				GenoIterator off = offspring->genoBegin(p, ch);
-
-#ifdef LINEAGE
-				LineageIterator parLineage = parent->lineageBegin(p, ch);
-				LineageIterator offLineage = offspring->lineageBegin(p, ch);
-				LineageIterator lineage_end = parent->lineageEnd(p, ch);
-#endif
+	TransmitPlan::const_iterator it = m_plan.begin();
+	TransmitPlan::const_iterator it_end = m_plan.end();
+	for (; it != it_end; ++it)
+		copySpan(*parent, it->begin, *offspring, it->begin, it->end - it->begin);
 
-#ifdef BINARYALLELE
-				copyGenotype(par, off, offspring->numLoci(ch));
-#else
-				GenoIterator par_end = parent->genoEnd(p, ch);
-#  ifdef MUTANTALLELE
-				copyGenotype(par, par_end, off);
-#  else
-				copy(par, par_end, off);
-#  endif
-#endif
-				LINEAGE_EXPR(copy(parLineage, lineage_end, offLineage));
-			}
-		}
-	} else if (m_hasCustomizedChroms) {
-		for (size_t p = 0; p != m_ploidy; ++p) {
-			for (size_t ch = 0; ch < pop.numChrom(); ++ch) {
-				if (m_lociToCopy[ch] == 0)
-					continue;
-				GenoIterator par = parent->genoBegin(p, ch);
-				GenoIterator off = offspring->genoBegin(p, ch);
-
-#ifdef LINEAGE
-				LineageIterator parLineage = parent->lineageBegin(p, ch);
-				LineageIterator offLineage = offspring->lineageBegin(p, ch);
-				LineageIterator lineage_end = parent->lineageEnd(p, ch);
-#endif
-
-#ifdef BINARYALLELE
-				copyGenotype(par, off, m_lociToCopy[ch]);
-#else
-				GenoIterator par_end = parent->genoEnd(p, ch);
-#  ifdef MUTANTALLELE
-				copyGenotype(par, par_end, off);
-#  else
-				copy(par, par_end, off);
-#  endif
-#endif
-				LINEAGE_EXPR(copy(parLineage, lineage_end, offLineage));
-			}
-		}
-	} else {             // easy
-#ifdef BINARYALLELE
-		copyGenotype(parent->genoBegin(), offspring->genoBegin(),
-			offspring->genoSize());
-#else
-#  ifdef MUTANTALLELE
-		copyGenotype(parent->genoBegin(), parent->genoEnd(), offspring->genoBegin());
-#  else
-		copy(parent->genoBegin(), parent->genoEnd(), offspring->genoBegin());
-#  endif
-#endif
-		LINEAGE_EXPR(copy(parent->lineageBegin(), parent->lineageEnd(), offspring->lineageBegin()));
-	}
 	// for clone transmitter, sex is also transmitted
 	offspring->setSex(parent->sex());
 	offspring->setAffected(parent->affected());
@@ -263,10 +803,33 @@ bool CloneGenoTransmitter::applyDuringMating(Population & pop, Population & offP
 void MendelianGenoTransmitter::initialize(const Individual & ind) const
 {
 	GenoTransmitter::initialize(ind);
+	m_genealogy.initialize(ind);
 	m_chromX = ind.chromX();
 	m_chromY = ind.chromY();
 	m_mitochondrial = ind.mitochondrial();
 	m_numChrom = ind.numChrom();
+
+	// plans for the first homologous copy, and the second homologous
+	// copy of male and female offspring
+	for (size_t i = 0; i < 3; ++i) {
+		m_plans[i].clear();
+		for (int ch = 0; static_cast<size_t>(ch) < m_numChrom; ++ch) {
+			// customized chromosome?
+			if (m_lociToCopy[ch] == 0)
+				continue;
+			int source = RANDOM_COPY;
+			if ((i == 0 && ch == m_chromY) ||   // maternal, Y chromosome
+			    (i == 1 && ch == m_chromX) ||   // paternal X of a male
+			    (i == 2 && ch == m_chromY) ||   // paternal Y of a female
+			    (i != 0 && ch == m_mitochondrial))
+				source = CLEAR_COPY;
+			else if (i != 0 && ch == m_chromX)
+				source = 0;
+			else if (i != 0 && ch == m_chromY)
+				source = 1;         // copy chrom Y from second ploidy
+			addSpan(m_plans[i], m_chromIdx[ch], m_chromIdx[ch + 1], source);
+		}
+	}
 }
 
 
@@ -275,101 +838,60 @@ void MendelianGenoTransmitter::transmitGenotype(const Individual & parent,
 {
 	initializeIfNeeded(offspring);
 
-	// current parental ploidy (copy from which chromosome copy)
+	const TransmitPlan & plan = m_plans[ploidy == 0 ? 0 : (offspring.sex() == MALE ? 1 : 2)];
+	size_t totNumLoci = m_chromIdx.back();
+	size_t offBegin = ploidy * totNumLoci;
+	// pending block that is copied from the same parental copy
+	size_t begin = 0;
+	size_t end = 0;
 	int parPloidy = 0;
 
-#ifdef BINARYALLELE
-	// for the simple case, use faster algorithm
-	if (m_chromX < 0 && m_chromY < 0 && !m_hasCustomizedChroms) {
-		// pointer to parental, and offspring chromosome copies
-		GenoIterator par[2];
-		GenoIterator off;
-#  ifdef LINEAGE
-		LineageIterator parLineage[2];
-		LineageIterator offLineage;
-#  endif
-
-		//
-		par[0] = parent.genoBegin(0);
-		par[1] = parent.genoBegin(1);
-		off = offspring.genoBegin(ploidy);
-#  ifdef LINEAGE
-		parLineage[0] = parent.lineageBegin(0);
-		parLineage[1] = parent.lineageBegin(1);
-		offLineage = offspring.lineageBegin(ploidy);
-#  endif
-
-		//
-		//
-		// 1. try to copy in blocks,
-		// 2. if two chromosomes can be copied together, copy together
-		// 3. if length is short, using the old method.
-		//
-		size_t parBegin = 0;
-		size_t parEnd = 0;
-		// first chromosome
-		parPloidy = getRNG().randBit();
-		//
-		int nextParPloidy = 0;
-		bool copyPar;
-		for (size_t ch = 0; ch < m_numChrom; ++ch) {
-			// if it is the last chromosome, copy anyway
-			if (ch == m_numChrom - 1)
-				copyPar = true;
-			else {                                                                 // is there a different chromosome?
-				nextParPloidy = getRNG().randBit();
-				copyPar = parPloidy != nextParPloidy;
-			}
-			if (copyPar) {
-				// end of this chromosome, is the beginning of the next
-				parEnd = m_chromIdx[ch + 1];
-				size_t length = parEnd - parBegin;
-				//
-				// the easiest case, try to get some speed up...
-				if (length == 1) {
-					off[parBegin] = par[parPloidy][parBegin];
-					LINEAGE_EXPR(offLineage[parBegin] = parLineage[parPloidy][parBegin]);
-				} else {
-					copyGenotype(par[parPloidy] + parBegin, off + parBegin, length);
-					LINEAGE_EXPR(copy(parLineage[parPloidy] + parBegin,
-							parLineage[parPloidy] + parBegin + length,
-							offLineage + parBegin));
-				}
-				//
-				if (ch != m_numChrom - 1)
-					parPloidy = nextParPloidy;
-				parBegin = parEnd;
-			}
+	TransmitPlan::const_iterator it = plan.begin();
+	TransmitPlan::const_iterator it_end = plan.end();
+	for (; it != it_end; ++it) {
+		if (it->source == CLEAR_COPY) {
+			clearSpan(offspring, offBegin + it->begin, it->end - it->begin);
+			continue;
 		}
-		return;
-	}
-#endif
-	//
-	for (int ch = 0; static_cast<size_t>(ch) < m_numChrom; ++ch) {
-		// customized chromosome?
-		if (m_lociToCopy[ch] == 0)
+		int source = it->source == RANDOM_COPY ? getRNG().randBit() : it->source;
+		// merge with the pending block if possible
+		if (end == it->begin && source == parPloidy && end != begin) {
+			end = it->end;
 			continue;
-		if ((ploidy == 0 && ch == m_chromY) ||   // maternal, Y chromosome
-		    (ploidy == 1 &&
-		     ((ch == m_chromX && offspring.sex() == MALE) ||
-		      (ch == m_chromY && offspring.sex() == FEMALE) ||
-		      (ch == m_mitochondrial)))) {
-			clearChromosome(offspring, ploidy, ch);
+		}
+		if (end != begin)
+			copySpan(parent, parPloidy * totNumLoci + begin, offspring, offBegin + begin, end - begin);
+		begin = it->begin;
+		end = it->end;
+		parPloidy = source;
+	}
+	if (end != begin)
+		copySpan(parent, parPloidy * totNumLoci + begin, offspring, offBegin + begin, end - begin);
+}
+
+
+void MendelianGenoTransmitter::recordGenotype(const Individual & parent,
+                                              Individual & offspring, int ploidy, size_t gen) const
+{
+	const TransmitPlan & plan = m_plans[ploidy == 0 ? 0 : (offspring.sex() == MALE ? 1 : 2)];
+	size_t offBegin = ploidy * m_chromIdx.back();
+
+	TransmitPlan::const_iterator it = plan.begin();
+	TransmitPlan::const_iterator it_end = plan.end();
+	for (; it != it_end; ++it) {
+		if (it->source == CLEAR_COPY) {
+			clearSpan(offspring, offBegin + it->begin, it->end - it->begin);
 			continue;
 		}
-		if (ploidy == 1 && ch == m_chromX)
-			parPloidy = 0;
-		else if (ploidy == 1 && ch == m_chromY)
-			parPloidy = 1;          // copy chrom Y from second ploidy
-		else
-			parPloidy = getRNG().randBit();
-		//
-		copyChromosome(parent, parPloidy, offspring, ploidy, ch);
+		int parPloidy = it->source == RANDOM_COPY ? getRNG().randBit() : it->source;
+		// neutral loci are only on autosomes so sex chromosomes are copied
+		m_genealogy.transmitSegment(parent, parPloidy, offspring, ploidy,
+			it->begin, it->end, gen);
 	}
 }
 
 
-bool MendelianGenoTransmitter::applyDuringMating(Population & /* pop */,
+bool MendelianGenoTransmitter::applyDuringMating(Population & pop,
                                                  Population & offPop, RawIndIterator offspring,
                                                  Individual * dad, Individual * mom) const
 {
@@ -383,6 +905,13 @@ bool MendelianGenoTransmitter::applyDuringMating(Population & /* pop */,
 		"Mendelian genotype transmitter only works for diploid individuals.");
 
 	initializeIfNeeded(*offspring);
+	if (m_genealogy.isValid()) {
+		m_genealogy.checkPopulation(pop);
+		m_genealogy.markPopulation(pop);
+		recordGenotype(*mom, *offspring, 0, pop.gen());
+		recordGenotype(*dad, *offspring, 1, pop.gen());
+		return true;
+	}
 	// the next two functions.
 	transmitGenotype(*mom, *offspring, 0);
 	transmitGenotype(*dad, *offspring, 1);
@@ -526,13 +1055,16 @@ bool MitochondrialGenoTransmitter::applyDuringMating(Population & pop, Populatio
 
 
 Recombinator::Recombinator(const floatList & rates, double intensity,
-	const lociList & loci, const floatList & convMode,
-	const stringFunc & output, int begin, int end, int step, const intList & at,
+	const lociList & loci, const floatList & convMode, const Genealogy * genealogy,
+	bool continuousMap, const stringFunc & output, int begin, int end, int step, const intList & at,
 	const intList & reps, const subPopList & subPops, const stringList & infoFields)
 	:
 	GenoTransmitter(output, begin, end, step, at, reps, subPops, infoFields),
 	m_intensity(intensity), m_rates(rates.elems()), m_loci(loci),
-	m_recBeforeLoci(0), m_convMode(convMode.elems()), m_chromX(-1), m_chromY(-1), m_mitochondrial(-1),
+	m_recBeforeLoci(0), m_convMode(convMode.elems()),
+	m_genealogy(genealogy ? *genealogy : Genealogy(vectoru())),
+	m_continuousMap(continuousMap), m_mapLength(),
+	m_chromX(-1), m_chromY(-1), m_mitochondrial(-1),
 	m_customizedBegin(-1), m_customizedEnd(-1), m_algorithm(0), m_debugOutput(NULL),
 #ifdef _OPENMP
 	m_bt(numThreads(), getRNG())
@@ -617,6 +1149,29 @@ void Recombinator::initialize(const Individual & ind) const
 		m_customizedBegin = m_mitochondrial;
 		m_customizedEnd = m_mitochondrial;
 	}
+	m_genealogy.initialize(ind);
+	PARAM_FAILIF(m_genealogy.isValid() && (m_chromX >= 0 || m_chromY >= 0 || m_customizedBegin >= 0),
+		ValueError, "Recombinator does not record genealogy for populations with sex, mitochondrial or customized chromosomes.");
+
+	if (m_continuousMap) {
+		PARAM_FAILIF(m_intensity <= 0 || !m_rates.empty() || !m_loci.allAvail(), ValueError,
+			"Please specify a positive recombination intensity, but not rates or loci, to use a continuous genetic map.");
+		PARAM_FAILIF(m_chromX >= 0 || m_chromY >= 0 || m_customizedBegin >= 0, ValueError,
+			"Recombinator does not use a continuous genetic map for populations with sex, mitochondrial or customized chromosomes.");
+		// length of each chromosome on the genetic map. No per-locus
+		// recombination rate is needed.
+		m_mapLength.resize(ind.numChrom());
+		for (size_t ch = 0; ch < ind.numChrom(); ++ch) {
+			size_t chBegin = ind.chromBegin(ch);
+			size_t chEnd = ind.chromEnd(ch);
+			m_mapLength[ch] = chBegin == chEnd ? 0. :
+			                  (ind.locusPos(chEnd - 1) - ind.locusPos(chBegin)) * m_intensity;
+		}
+		m_recBeforeLoci.assign(1, ind.totNumLoci());
+		m_algorithm = 3;
+		DBG_DO(DBG_TRANSMITTER, cerr << "Algorithm " << m_algorithm << " is being used " << endl);
+		return;
+	}
 	// prepare m_bt
 	vectorf vecP;
 	//
@@ -770,6 +1325,11 @@ void Recombinator::transmitGenotype(const Individual & parent,
 {
 	initializeIfNeeded(offspring);
 
+	if (m_algorithm == 3) {
+		transmitSegments(parent, offspring, ploidy, 0);
+		return;
+	}
+
 	//Bernullitrial for each thread
 #ifdef _OPENMP
 	Bernullitrials_T & bt = m_bt[omp_get_thread_num()];
@@ -1325,6 +1885,175 @@ void Recombinator::transmitGenotype(const Individual & parent,
 }
 
 
+int Recombinator::recombinationPoints(const Individual & parent, vectoru & breaks) const
+{
+	// locations of recombination events, drawn in the same way as
+	// transmitGenotype, except that there is no sex chromosome.
+	int curCp = 0;
+	size_t numPos = m_recBeforeLoci.size();
+	if (m_algorithm == 3) {
+		// crossovers are placed uniformly on the genetic map of each
+		// chromosome, and chromosomes are inherited independently.
+		curCp = getRNG().randBit();
+		for (size_t ch = 0; ch + 1 < m_chromIdx.size(); ++ch) {
+			size_t chBegin = m_chromIdx[ch];
+			size_t chEnd = m_chromIdx[ch + 1];
+			if (chBegin == chEnd)
+				continue;
+			if (chBegin > 0 && getRNG().randBit())
+				breaks.push_back(chBegin);
+			ULONG numCrossovers = m_mapLength[ch] > 0. ? getRNG().randPoisson(m_mapLength[ch]) : 0;
+			if (numCrossovers == 0)
+				continue;
+			size_t first = breaks.size();
+			double beginPos = parent.locusPos(chBegin);
+			double endPos = parent.locusPos(chEnd - 1);
+			for (ULONG i = 0; i < numCrossovers; ++i) {
+				double pos = beginPos + getRNG().randUniform() * (endPos - beginPos);
+				// the first locus after the crossover (inverse of the
+				// cumulative genetic map)
+				size_t lo = chBegin + 1;
+				size_t hi = chEnd - 1;
+				while (lo < hi) {
+					size_t mid = lo + (hi - lo) / 2;
+					if (parent.locusPos(mid) > pos)
+						hi = mid;
+					else
+						lo = mid + 1;
+				}
+				breaks.push_back(lo);
+			}
+			std::sort(breaks.begin() + first, breaks.end());
+			// two crossovers between the same adjacent loci cancel each other
+			size_t last = first;
+			for (size_t i = first; i < breaks.size(); ++i) {
+				if (last > first && breaks[last - 1] == breaks[i])
+					--last;
+				else
+					breaks[last++] = breaks[i];
+			}
+			breaks.resize(last);
+		}
+	} else if (m_algorithm == 2) {
+		curCp = getRNG().randBit();
+		size_t step = getRNG().randGeometric(m_rates[0]);
+		size_t pos = (step == 0 || step > numPos) ? Bernullitrials_T::npos : (step - 1);
+		while (pos != Bernullitrials_T::npos) {
+			breaks.push_back(m_recBeforeLoci[pos]);
+			step = getRNG().randGeometric(m_rates[0]);
+			if (step == 0 || step + pos >= numPos)
+				break;
+			pos += step;
+		}
+	} else {
+#ifdef _OPENMP
+		Bernullitrials_T & bt = m_bt[omp_get_thread_num()];
+#else
+		Bernullitrials_T & bt = m_bt;
+#endif
+		bt.trial();
+		curCp = bt.trialSucc(numPos - 1) ? 0 : 1;
+		bt.setTrialSucc(numPos - 1, false);
+		for (size_t pos = bt.probFirstSucc(); pos != Bernullitrials_T::npos; pos = bt.probNextSucc(pos))
+			breaks.push_back(m_recBeforeLoci[pos]);
+	}
+	return curCp;
+}
+
+
+void Recombinator::copySegment(const Individual & parent, int parPloidy,
+                               Individual & offspring, int ploidy, size_t begin, size_t end) const
+{
+	if (begin == end)
+		return;
+#ifdef BINARYALLELE
+	copyGenotype(parent.genoBegin(parPloidy) + begin, offspring.genoBegin(ploidy) + begin, end - begin);
+#else
+#  ifdef MUTANTALLELE
+	copyGenotype(parent.genoBegin(parPloidy) + begin, parent.genoBegin(parPloidy) + end,
+		offspring.genoBegin(ploidy) + begin);
+#  else
+	copy(parent.genoBegin(parPloidy) + begin, parent.genoBegin(parPloidy) + end,
+		offspring.genoBegin(ploidy) + begin);
+#  endif
+#endif
+	LINEAGE_EXPR(copy(parent.lineageBegin(parPloidy) + begin, parent.lineageBegin(parPloidy) + end,
+			offspring.lineageBegin(ploidy) + begin));
+}
+
+
+void Recombinator::transmitSegments(const Individual & parent,
+                                    Individual & offspring, int ploidy, size_t gen) const
+{
+	vectoru breaks;
+	int curCp = recombinationPoints(parent, breaks);
+	bool record = m_genealogy.isValid();
+	ostream * out = record ? NULL : m_debugOutput;
+
+	if (out)
+		*out << offspring.intInfo(infoField(0)) << ' ' << parent.intInfo(infoField(0)) << ' ' << curCp;
+
+	bool withConversion = static_cast<int>(m_convMode[0]) != NO_CONVERSION
+	                      && m_convMode[1] > 0.;
+	size_t gtEnd = m_recBeforeLoci.back();
+	size_t gt = 0;
+	// end of a pending conversion event, 0 for no conversion
+	size_t convEnd = 0;
+	for (size_t i = 0; i < breaks.size() && breaks[i] < gtEnd; ++i) {
+		if (convEnd > 0 && convEnd < breaks[i]) {
+			if (record)
+				m_genealogy.transmitSegment(parent, curCp, offspring, ploidy, gt, convEnd, gen);
+			else
+				copySegment(parent, curCp, offspring, ploidy, gt, convEnd);
+			gt = convEnd;
+			curCp = (curCp + 1) % 2;
+			if (out)
+				*out << ' ' << gt - 1;
+		}
+		// another recombination stops the previous conversion
+		convEnd = 0;
+		if (record)
+			m_genealogy.transmitSegment(parent, curCp, offspring, ploidy, gt, breaks[i], gen);
+		else
+			copySegment(parent, curCp, offspring, ploidy, gt, breaks[i]);
+		gt = breaks[i];
+		curCp = (curCp + 1) % 2;
+		if (out)
+			*out << ' ' << gt - 1;
+		if (withConversion &&
+		    parent.lociLeft(gt - 1) != 1 &&             // can not be at the end of a chromosome
+		    (m_convMode[1] == 1. || getRNG().randUniform() < m_convMode[1])) {
+			size_t convCount = markersConverted(gt, parent);
+			if (convCount > 0)
+				convEnd = gt + convCount;
+		}
+	}
+	if (convEnd > 0 && convEnd < gtEnd) {
+		if (record)
+			m_genealogy.transmitSegment(parent, curCp, offspring, ploidy, gt, convEnd, gen);
+		else
+			copySegment(parent, curCp, offspring, ploidy, gt, convEnd);
+		gt = convEnd;
+		curCp = (curCp + 1) % 2;
+		if (out)
+			*out << ' ' << gt - 1;
+	}
+	if (record)
+		m_genealogy.transmitSegment(parent, curCp, offspring, ploidy, gt, gtEnd, gen);
+	else
+		copySegment(parent, curCp, offspring, ploidy, gt, gtEnd);
+	if (out)
+		*out << '\n';
+}
+
+
+bool SimplifyGenealogy::apply(Population & pop) const
+{
+	m_genealogy.simplify(pop);
+	return true;
+}
+
+
 bool Recombinator::applyDuringMating(Population & pop, Population & offPop, RawIndIterator offspring,
                                      Individual * dad, Individual * mom) const
 {
@@ -1341,6 +2070,14 @@ bool Recombinator::applyDuringMating(Population & pop, Population & offPop, RawI
 		return true;
 	//, ValueError, "Uninitialized Recombinator");
 
+	if (m_genealogy.isValid()) {
+		m_genealogy.checkPopulation(pop);
+		m_genealogy.markPopulation(pop);
+		transmitSegments(*(mom ? mom : dad), *offspring, 0, pop.gen());
+		transmitSegments(*(dad ? dad : mom), *offspring, 1, pop.gen());
+		return true;
+	}
+
 	if (infoSize() == 1 && !noOutput())
 		m_debugOutput = &getOstream(pop.dict());
 	else
@@ -35,8 +35,128 @@
 using std::ostream;
 using std::ostream_iterator;
 
+#include <boost/shared_ptr.hpp>
+
 namespace simuPOP {
 
+/// CPPONLY tables of a genealogy, which are shared by copies of a Genealogy
+struct GenealogyTables;
+
+/** A genealogy records how neutral loci are transmitted from parents to
+ *  offspring, so that alleles at these loci do not have to be copied (and
+ *  recombined) during evolution. Neutral mutations are dropped to the
+ *  recorded genealogy when they are needed. Copies of a genealogy share the
+ *  same tables so a genealogy passed to a genotype transmitter can be
+ *  simplified and examined by the object that has been passed.
+ */
+class Genealogy
+{
+public:
+	/** Create a genealogy that records the transmission of alleles at
+	 *  neutral \e loci (default to all loci), which should be on autosomes.
+	 *  When this genealogy is passed to parameter \e genealogy of a
+	 *  \c MendelianGenoTransmitter or a \c Recombinator, alleles at these
+	 *  loci are not copied from parents to offspring. Instead, an edge
+	 *  <tt>(left, right, parent, child)</tt> is recorded for each segment
+	 *  of chromosomes that is copied from a parental chromosome, where
+	 *  \c left and \c right are indexes of the first and after the last
+	 *  neutral loci of the segment (counted from the first neutral locus),
+	 *  and \c parent and \c child are nodes of the parental and offspring
+	 *  homologous copies of chromosomes. A node is identified by
+	 *  <tt>2*ID+p</tt> where \c ID is the ID of an individual, which is
+	 *  stored in information field \e idField (default to \c ind_id), and
+	 *  \c p is the index of the homologous copy. An \c IdTagger should
+	 *  therefore be applied before genotypes are transmitted. Because the
+	 *  tables grow with the number of recombination events, they should be
+	 *  simplified regularly (see operator \c SimplifyGenealogy). Parental
+	 *  chromosomes without any recorded parent (e.g. chromosomes of the
+	 *  initial population) are assumed to carry allele \c 0 at all neutral
+	 *  loci. Because alleles at neutral loci of offspring are not set until
+	 *  function \c mutate is called, statistics, exporters and function
+	 *  \c Population.genotype() raise a \c ValueError for these loci (see
+	 *  \c Population.genealogyLoci()) before then. Because IDs of
+	 *  individuals in different replicates of a simulator overlap, a
+	 *  genealogy can only be used with one population, and a \c ValueError
+	 *  is raised if a genealogy is used with replicates of a simulator,
+	 *  which share the same genotype transmitters.
+	 */
+	Genealogy(const lociList & loci = lociList(), const string & idField = "ind_id");
+
+	/// HIDDEN
+	string describe(bool format = true) const;
+
+	/** CPPONLY Prepare the genealogy for the genotypic structure of
+	 *  \e trait (e.g. an individual or a population).
+	 */
+	void initialize(const GenoStruTrait & trait) const;
+
+	/// CPPONLY return true if there is any neutral locus to record
+	bool isValid() const;
+
+	/** CPPONLY Check if the genealogy is recorded for population \e pop,
+	 *  which should be the only population (replicate) the genealogy is
+	 *  used with.
+	 */
+	void checkPopulation(const Population & pop) const;
+
+	/** CPPONLY Mark neutral loci of population \e pop, offspring of which
+	 *  are being produced, as loci of which alleles are recorded in this
+	 *  genealogy and are not set until function mutate() is called.
+	 */
+	void markPopulation(Population & pop) const;
+
+	/** CPPONLY Copy alleles at non-neutral loci between \e begin and
+	 *  \e end of the \e parPloidy-th homologous copy of chromosomes of
+	 *  \e parent to the \e ploidy-th homologous copy of \e offspring, and
+	 *  record an edge for neutral loci in this region. \e gen is the
+	 *  generation at which the offspring is produced. This function can be
+	 *  called from multiple threads.
+	 */
+	void transmitSegment(const Individual & parent, int parPloidy,
+		Individual & offspring, int ploidy, size_t begin, size_t end, size_t gen) const;
+
+	/** Simplify the genealogy so that it keeps only nodes, edges and
+	 *  mutations that are needed to describe the genealogies of neutral
+	 *  loci of individuals in the present generation of population \e pop.
+	 *  Nodes at which no coalescence happens are removed, except for the
+	 *  oldest recorded nodes that are kept as roots of the genealogy.
+	 */
+	void simplify(const Population & pop) const;
+
+	/** Simplify the genealogy with population \e pop, drop neutral
+	 *  mutations to branches of the genealogy with a mutation \e rate per
+	 *  locus per generation, and set alleles at neutral loci of all
+	 *  individuals in the present generation of \e pop. Mutations follow a
+	 *  k-allele model with \e k alleles (default to \c 2) so that an allele
+	 *  mutates to any other allele with equal probability. Mutations are
+	 *  kept in the genealogy so that mutations are only dropped to parts of
+	 *  the genealogy that are recorded after the last call to this function.
+	 */
+	void mutate(Population & pop, double rate, UINT k = 2) const;
+
+	/** Return a list of nodes as pairs of node and the generation at which
+	 *  the node is produced.
+	 */
+	PyObject * nodes() const;
+
+	/** Return a list of edges as tuples of
+	 *  <tt>(left, right, parent, child)</tt>.
+	 */
+	PyObject * edges() const;
+
+	/** Return a list of mutations as pairs of neutral locus (counted from
+	 *  the first neutral locus) and the node below the mutation.
+	 */
+	PyObject * mutations() const;
+
+private:
+	// flush edges recorded by all threads to the edge table
+	void flush() const;
+
+	boost::shared_ptr<GenealogyTables> m_tables;
+};
+
+
 /** This during mating operator is the base class of all genotype transmitters.
  *  It is made available to users because it provides a few member functions
  *  that can be used by derived transmitters, and by customized Python
@@ -121,6 +241,43 @@ public:
 	/// CPPONLY
 	virtual void initializeIfNeeded(const Individual & ind) const;
 
+protected:
+	/// source of a span that is copied from a random homologous copy of
+	/// parental chromosomes
+	static const int RANDOM_COPY = -1;
+	/// source of a span that is cleared
+	static const int CLEAR_COPY = -2;
+
+	/// a contiguous range of loci that is transmitted from the \e source-th
+	/// homologous copy of parental chromosomes (or RANDOM_COPY, CLEAR_COPY)
+	struct TransmitSpan
+	{
+		TransmitSpan(size_t b, size_t e, int s) : begin(b), end(e), source(s)
+		{
+		}
+
+
+		size_t begin;
+		size_t end;
+		int source;
+	};
+
+	/// spans of a transmission, which are computed once for each genotypic
+	/// structure so that chromosome types do not have to be checked for
+	/// each offspring
+	typedef vector<TransmitSpan> TransmitPlan;
+
+	/// add a span to a plan, merging it with the last span if possible
+	static void addSpan(TransmitPlan & plan, size_t begin, size_t end, int source);
+
+	/// copy \e length alleles (and lineage) starting from \e src of the
+	/// genotype of \e parent to \e dst of the genotype of \e offspring
+	void copySpan(const Individual & parent, size_t src,
+		Individual & offspring, size_t dst, size_t length) const;
+
+	/// clear \e length alleles (and lineage) starting from \e dst
+	void clearSpan(Individual & offspring, size_t dst, size_t length) const;
+
 protected:
 	// record the last handled population type. If this is change,
 	// everything has to be changed.
@@ -131,6 +288,8 @@ protected:
 	mutable bool m_hasCustomizedChroms;
 	mutable vectoru m_lociToCopy;
 	mutable vectoru m_chromIdx;
+	// non-customized chromosomes of a homologous copy of chromosomes
+	mutable TransmitPlan m_copyPlan;
 };
 
 
@@ -178,6 +337,9 @@ public:
 	string describe(bool format = true) const;
 
 
+	/// CPPONLY
+	void initialize(const Individual & ind) const;
+
 	/// CPPONLY
 	bool applyDuringMating(Population & pop, Population & offPop,
 		RawIndIterator offspring,
@@ -195,6 +357,9 @@ public:
 private:
 	// this is user input.
 	const uintList m_chroms;
+
+	// spans of all homologous copies of chromosomes to copy
+	mutable TransmitPlan m_plan;
 };
 
 
@@ -212,12 +377,16 @@ public:
 	 *  Autosomes and sex chromosomes are handled but customized chromosomes
 	 *  are ignored. Parameters \e subPops and \e infoFields are ignored. This
 	 *  operator also copies allelic lineage when it is executed in a module
-	 *  with lineage allele type.
+	 *  with lineage allele type. If a \e genealogy is given, alleles at its
+	 *  neutral loci are not copied. The transmission of these loci is
+	 *  recorded to the genealogy instead.
 	 */
-	MendelianGenoTransmitter(const stringFunc & output = "", int begin = 0, int end = -1, int step = 1, const intList & at = vectori(),
+	MendelianGenoTransmitter(const Genealogy * genealogy = NULL,
+		const stringFunc & output = "", int begin = 0, int end = -1, int step = 1, const intList & at = vectori(),
 		const intList & reps = intList(), const subPopList & subPops = subPopList(),
 		const stringList & infoFields = vectorstr()) :
 		GenoTransmitter(output, begin, end, step, at, reps, subPops, infoFields),
+		m_genealogy(genealogy ? *genealogy : Genealogy(vectoru())),
 		m_chromX(-1), m_chromY(-1), m_mitochondrial(-1), m_numChrom(0)
 	{
 	}
@@ -265,7 +434,15 @@ public:
 	}
 
 
+private:
+	// transmit genotype and record the transmission of neutral loci to
+	// the genealogy
+	void recordGenotype(const Individual & parent,
+		Individual & offspring, int ploidy, size_t gen) const;
+
 protected:
+	const Genealogy m_genealogy;
+
 	// cache chromBegin, chromEnd for better performance.
 	mutable vectoru m_chIdx;
 
@@ -276,6 +453,10 @@ protected:
 	mutable int m_mitochondrial;
 
 	mutable size_t m_numChrom;
+
+	// transmission plans for the first homologous copy, and the second
+	// homologous copy of male and female offspring
+	mutable TransmitPlan m_plans[3];
 };
 
 
@@ -296,7 +477,7 @@ public:
 	SelfingGenoTransmitter(const stringFunc & output = "", int begin = 0, int end = -1, int step = 1, const intList & at = vectori(),
 		const intList & reps = intList(), const subPopList & subPops = subPopList(),
 		const stringList & infoFields = vectorstr())
-		: MendelianGenoTransmitter(output, begin, end, step, at, reps, subPops, infoFields)
+		: MendelianGenoTransmitter(NULL, output, begin, end, step, at, reps, subPops, infoFields)
 	{
 	}
 
@@ -345,7 +526,7 @@ public:
 	HaplodiploidGenoTransmitter(const stringFunc & output = "", int begin = 0, int end = -1, int step = 1, const intList & at = vectori(),
 		const intList & reps = intList(), const subPopList & subPops = subPopList(),
 		const stringList & infoFields = vectorstr())
-		: MendelianGenoTransmitter(output, begin, end, step, at, reps, subPops, infoFields),
+		: MendelianGenoTransmitter(NULL, output, begin, end, step, at, reps, subPops, infoFields),
 		m_copier()
 	{
 	}
@@ -571,6 +752,27 @@ public:
 	 *  In addition to genotypes, this operator also copies alleleic lineage if
 	 *  it is executed in a module with lineage allele type.
 	 *
+	 *  If \e continuousMap is set to \c True, loci positions multiplied by
+	 *  \e intensity are used as a continuous genetic map (in Morgans) and
+	 *  parameters \e rates and \e loci should not be specified. For each
+	 *  chromosome, the number of crossovers is drawn from a Poisson
+	 *  distribution with the length of the chromosome on the map as its mean,
+	 *  and crossovers are placed uniformly on the map, between the pair of
+	 *  adjacent loci that surround them. Genotypes are then copied in
+	 *  segments between crossovers, so the time to transmit a chromosome
+	 *  depends on the number of crossovers rather than the number of loci.
+	 *  Because no table of per-locus recombination rates is created, this
+	 *  mode is recommended for dense genetic maps with millions of loci. It
+	 *  is not supported for populations with sex, mitochondrial or
+	 *  customized chromosomes.
+	 *
+	 *  If a \e genealogy is given, alleles at its neutral loci are not
+	 *  copied. The transmission of these loci, with recombination and gene
+	 *  conversion, is recorded to the genealogy instead. This operator does
+	 *  not support genealogies for populations with sex, mitochondrial or
+	 *  customized chromosomes, and does not output recombination events
+	 *  in this case.
+	 *
 	 *  \note conversion tract length is usually short, and is estimated to be
 	 *      between 337 and 456 bp, with overall range between maybe 50 - 2500
 	 *      bp. This is usually not enough to convert, for example, two adjacent
@@ -584,6 +786,7 @@ public:
 	 */
 	Recombinator(const floatList & rates = vectorf(), double intensity = -1,
 		const lociList & loci = lociList(), const floatList & convMode = NO_CONVERSION,
+		const Genealogy * genealogy = NULL, bool continuousMap = false,
 		const stringFunc & output = "", int begin = 0, int end = -1, int step = 1,
 		const intList & at = vectori(),
 		const intList & reps = intList(), const subPopList & subPops = subPopList(),
@@ -638,6 +841,19 @@ private:
 	/// determine number of markers to convert
 	size_t markersConverted(size_t index, const Individual & ind) const;
 
+	/// draw indexes of loci before which the copy of parental chromosomes
+	/// is switched, and return the copy to start with
+	int recombinationPoints(const Individual & parent, vectoru & breaks) const;
+
+	/// copy alleles between begin and end of a parental chromosome
+	void copySegment(const Individual & parent, int parPloidy,
+		Individual & offspring, int ploidy, size_t begin, size_t end) const;
+
+	/// transmit genotype in segments between recombination points, or record
+	/// the transmission of neutral loci to the genealogy
+	void transmitSegments(const Individual & parent,
+		Individual & offspring, int ploidy, size_t gen) const;
+
 private:
 	/// intensity
 	const double m_intensity;
@@ -653,6 +869,14 @@ private:
 
 	const vectorf m_convMode;
 
+	const Genealogy m_genealogy;
+
+	/// use loci positions as a continuous genetic map
+	const bool m_continuousMap;
+
+	/// length of each chromosome on the genetic map
+	mutable vectorf m_mapLength;
+
 	// locataion of special chromosomes
 	mutable int m_chromX;
 	mutable int m_chromY;
@@ -660,7 +884,8 @@ private:
 	mutable int m_customizedBegin;
 	mutable int m_customizedEnd;
 
-	/// algorithm to use (frequent or seldom recombinations)
+	/// algorithm to use (frequent, seldom or uniform rare recombinations,
+	/// or crossovers on a continuous genetic map)
 	mutable int m_algorithm;
 
 	mutable ostream * m_debugOutput;
@@ -676,6 +901,51 @@ private:
 };
 
 
+/** This operator simplifies a genealogy that is recorded by a genotype
+ *  transmitter so that it only keeps the genealogy of individuals in the
+ *  present generation of the population. It is usually applied every few
+ *  generations to limit the size of the genealogy.
+ */
+class SimplifyGenealogy : public BaseOperator
+{
+public:
+	/** Create an operator that simplifies \e genealogy with individuals in
+	 *  the present generation of the population it is applied to. Parameters
+	 *  \e subPops and \e infoFields are ignored.
+	 */
+	SimplifyGenealogy(const Genealogy & genealogy, const stringFunc & output = "",
+		int begin = 0, int end = -1, int step = 1, const intList & at = vectori(),
+		const intList & reps = intList(), const subPopList & subPops = subPopList(),
+		const stringList & infoFields = vectorstr()) :
+		BaseOperator(output, begin, end, step, at, reps, subPops, infoFields),
+		m_genealogy(genealogy)
+	{
+	}
+
+
+	/// HIDDEN Deep copy of a SimplifyGenealogy operator
+	virtual BaseOperator * clone() const
+	{
+		return new SimplifyGenealogy(*this);
+	}
+
+
+	/// HIDDEN
+	string describe(bool format = true) const
+	{
+		(void)format;  // avoid warning about unused parameter
+		return "<simuPOP.SimplifyGenealogy> simplify genealogy";
+	}
+
+
+	/// HIDDEN
+	bool apply(Population & pop) const;
+
+private:
+	const Genealogy m_genealogy;
+};
+
+
 #ifdef LONGALLELE
 
 /** This during mating operator recombine chromosomes, which records mutant
@@ -33,6 +33,7 @@
 #include "time.h"
 
 #include <bitset>
+#include <zlib.h>
 
 #include "gsl/gsl_machine.h"
 #ifdef _OPENMP
@@ -496,6 +497,23 @@ ATOMICLONG fetchAndIncrement(ATOMICLONG * val)
 }
 
 
+ATOMICLONG fetchAndAdd(ATOMICLONG * val, ATOMICLONG inc)
+{
+	if (g_numThreads == 1) {
+		ATOMICLONG old = *val;
+		*val += inc;
+		return old;
+	} else
+#ifdef _WIN64
+		return InterlockedExchangeAdd64(val, inc);
+#elif defined(_WIN32)
+		return InterlockedExchangeAdd(val, inc);
+#else
+		return __sync_fetch_and_add(val, inc);
+#endif
+}
+
+
 // return the global RNG
 RNG & getRNG()
 {
@@ -511,6 +529,75 @@ RNG & getRNG()
 }
 
 
+const size_t RNGStream::blockSize = 1024;
+
+RNGStream::RNGStream(uint64_t key, size_t block) : m_RNG(getRNG()), m_state(m_RNG.state()),
+	m_inStream(m_RNG.inStream())
+{
+	m_RNG.setStream(key, block);
+}
+
+
+RNGStream::~RNGStream()
+{
+	if (!m_inStream)
+		m_RNG.endStream();
+	m_RNG.setState(m_state);
+}
+
+
+uint64_t RNGStream::newKey()
+{
+	RNG & rng = getRNG();
+	uint64_t high = rng.randInt(0xFFFFFFFFUL);
+
+	return (high << 32) | rng.randInt(0xFFFFFFFFUL);
+}
+
+
+vectorstr getRNGStates()
+{
+#ifdef _OPENMP
+#  if THREADPRIVATE_SUPPORT == 0
+	vectorstr states(g_RNGs.size());
+	for (size_t i = 0; i < g_RNGs.size(); ++i)
+		states[i] = g_RNGs[i]->state();
+#  else
+	vectorstr states(numThreads());
+#    pragma omp parallel
+	{
+		states[omp_get_thread_num()] = g_RNG->state();
+	}
+#  endif
+#else
+	vectorstr states(1, g_RNG.state());
+#endif
+	return states;
+}
+
+
+void setRNGStates(const string & name, unsigned long seed, const vectorstr & states)
+{
+	PARAM_FAILIF(states.size() != numThreads(), ValueError,
+		(boost::format("Random number generators of %1% threads cannot be restored with %2% threads.")
+		 % states.size() % numThreads()).str());
+	setOptions(-1, name.c_str(), seed);
+#ifdef _OPENMP
+#  if THREADPRIVATE_SUPPORT == 0
+	for (size_t i = 0; i < g_RNGs.size(); ++i)
+		g_RNGs[i]->setState(states[i]);
+#  else
+#    pragma omp parallel
+	{
+		g_RNG->setState(states[omp_get_thread_num()]);
+	}
+#  endif
+#else
+	g_RNG.setState(states[0]);
+#endif
+}
+
+
 }
 
 namespace std {
@@ -1105,6 +1192,53 @@ PyObject * pyGenerator::next()
 }
 
 
+pyBuffer::pyBuffer(PyObject * obj) : m_type('u'), m_size(0)
+{
+	if (obj == NULL || !PyObject_CheckBuffer(obj))
+		throw ValueError("An object that supports the buffer protocol (e.g. a numpy array) is expected.");
+	if (PyObject_GetBuffer(obj, &m_buffer, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) != 0) {
+		PyErr_Clear();
+		throw ValueError("Failed to obtain a C-contiguous buffer from passed object.");
+	}
+	// format string such as 'B', '<u4' and '=d'. We use itemsize to determine
+	// the size of items so native and standard sizes are handled alike.
+	const char * fmt = m_buffer.format == NULL ? "B" : m_buffer.format;
+	if (*fmt == '@' || *fmt == '=' || *fmt == '<')
+		++fmt;
+	bool supported = fmt[0] != '\0' && fmt[1] == '\0';
+	if (supported) {
+		switch (*fmt) {
+		case 'b': case 'h': case 'i': case 'l': case 'q': case 'n':
+			m_type = 'i';
+			break;
+		case 'B': case 'H': case 'I': case 'L': case 'Q': case 'N': case '?':
+			m_type = 'u';
+			break;
+		case 'f': case 'd':
+			m_type = 'f';
+			break;
+		default:
+			supported = false;
+		}
+	}
+	if (!supported || (m_type == 'f' && m_buffer.itemsize != sizeof(float) && m_buffer.itemsize != sizeof(double))
+	    || (m_type != 'f' && m_buffer.itemsize != 1 && m_buffer.itemsize != 2
+	        && m_buffer.itemsize != 4 && m_buffer.itemsize != 8)) {
+		string format = m_buffer.format == NULL ? "B" : m_buffer.format;
+		PyBuffer_Release(&m_buffer);
+		throw ValueError("Unsupported buffer format " + format
+			+ ". Only buffers of native integer, boolean or floating point numbers are supported.");
+	}
+	m_size = m_buffer.itemsize == 0 ? 0 : m_buffer.len / m_buffer.itemsize;
+}
+
+
+pyBuffer::~pyBuffer()
+{
+	PyBuffer_Release(&m_buffer);
+}
+
+
 uintList::uintList(PyObject * obj) : m_elems(), m_status(REGULAR)
 {
 	if (obj == NULL)
@@ -1113,7 +1247,19 @@ uintList::uintList(PyObject * obj) : m_elems(), m_status(REGULAR)
 	else if (PyBool_Check(obj))
 		// accept True/False
 		m_status = obj == Py_True ? ALL_AVAIL : UNSPECIFIED;
-	else if (PyNumber_Check(obj)) {
+	else if (PyObject_CheckBuffer(obj)) {
+		// accept a numpy array or other objects with the buffer protocol,
+		// without going through individual python objects. This has to be
+		// checked before PyNumber_Check because numpy arrays are numbers.
+		pyBuffer buf(obj);
+		m_elems.resize(buf.size());
+		const unsigned char * data = buf.data<unsigned char>();
+		if (data)
+			std::copy(data, data + m_elems.size(), m_elems.begin());
+		else
+			for (size_t i = 0, iEnd = m_elems.size(); i < iEnd; ++i)
+				m_elems[i] = buf.value<UINT>(i);
+	} else if (PyNumber_Check(obj)) {
 		// accept a number
 		m_elems.push_back(static_cast<UINT>(PyInt_AsLong(obj)));
 	} else if (PySequence_Check(obj)) {
@@ -3272,14 +3418,201 @@ void closeOutput(const string & output)
 }
 
 
+// Blocks of BGZF files start with a gzip header with an extra field 'BC'
+// that stores the size of the block minus one, followed by raw deflated
+// data, the CRC32 checksum and size of uncompressed data. Input is split so
+// that a compressed block, even of incompressible data, fits in 64K bytes.
+#define BGZF_BLOCK_SIZE 0xff00
+#define BGZF_HEADER_SIZE 18
+#define BGZF_TRAILER_SIZE 8
+
+namespace {
+
+const unsigned char BGZFHeader[BGZF_HEADER_SIZE] = {
+	0x1f, 0x8b, 8, 4, 0, 0, 0, 0, 0, 0xff, 6, 0, 'B', 'C', 2, 0, 0, 0
+};
+
+// an empty block that marks the end of file
+const unsigned char BGZFEof[28] = {
+	0x1f, 0x8b, 8, 4, 0, 0, 0, 0, 0, 0xff, 6, 0, 'B', 'C', 2, 0,
+	0x1b, 0, 3, 0, 0, 0, 0, 0, 0, 0, 0, 0
+};
+
+void putUInt(string & buf, size_t pos, unsigned long val, size_t bytes)
+{
+	for (size_t i = 0; i < bytes; ++i, val >>= 8)
+		buf[pos + i] = static_cast<char>(val & 0xff);
+}
+
+
+unsigned long getUInt(const string & buf, size_t pos, size_t bytes)
+{
+	unsigned long val = 0;
+
+	for (size_t i = bytes; i > 0; --i)
+		val = (val << 8) | static_cast<unsigned char>(buf[pos + i - 1]);
+	return val;
+}
+
+
+bool deflateBGZFBlock(const char * data, size_t size, int level, string & block)
+{
+	z_stream zs;
+
+	memset(&zs, 0, sizeof(zs));
+	if (deflateInit2(&zs, level, Z_DEFLATED, -15, 8, Z_DEFAULT_STRATEGY) != Z_OK)
+		return false;
+	size_t bound = deflateBound(&zs, static_cast<uLong>(size));
+	block.assign(BGZF_HEADER_SIZE + bound + BGZF_TRAILER_SIZE, '\0');
+	zs.next_in = reinterpret_cast<Bytef *>(const_cast<char *>(data));
+	zs.avail_in = static_cast<uInt>(size);
+	zs.next_out = reinterpret_cast<Bytef *>(&block[BGZF_HEADER_SIZE]);
+	zs.avail_out = static_cast<uInt>(bound);
+	int ret = deflate(&zs, Z_FINISH);
+	size_t packedSize = zs.total_out;
+	deflateEnd(&zs);
+	if (ret != Z_STREAM_END)
+		return false;
+	block.resize(BGZF_HEADER_SIZE + packedSize + BGZF_TRAILER_SIZE);
+	memcpy(&block[0], BGZFHeader, BGZF_HEADER_SIZE);
+	putUInt(block, 16, block.size() - 1, 2);
+	putUInt(block, BGZF_HEADER_SIZE + packedSize,
+		crc32(0L, reinterpret_cast<const Bytef *>(data), static_cast<uInt>(size)), 4);
+	putUInt(block, BGZF_HEADER_SIZE + packedSize + 4, size, 4);
+	return block.size() <= 0x10000;
+}
+
+
+bool inflateBGZFBlock(const char * block, size_t packedSize, char * data, size_t size)
+{
+	z_stream zs;
+
+	memset(&zs, 0, sizeof(zs));
+	if (inflateInit2(&zs, -15) != Z_OK)
+		return false;
+	zs.next_in = reinterpret_cast<Bytef *>(const_cast<char *>(block));
+	zs.avail_in = static_cast<uInt>(packedSize);
+	zs.next_out = reinterpret_cast<Bytef *>(data);
+	zs.avail_out = static_cast<uInt>(size);
+	int ret = inflate(&zs, Z_FINISH);
+	size_t unpackedSize = zs.total_out;
+	inflateEnd(&zs);
+	return ret == Z_STREAM_END && unpackedSize == size;
+}
+
+
+}
+
+void writeBGZF(std::ostream & out, string & data, int level, bool last)
+{
+	PARAM_FAILIF(level < 0 || level > 9, ValueError,
+		(boost::format("Compression level should be between 0 and 9, %1% given.") % level).str());
+
+	// incomplete block is kept for the next call
+	size_t numBlocks = last ? (data.size() + BGZF_BLOCK_SIZE - 1) / BGZF_BLOCK_SIZE
+	                   : data.size() / BGZF_BLOCK_SIZE;
+	// compress at most 64 blocks per thread at a time to limit memory usage
+	size_t batchSize = 64 * std::max(numThreads(), 1U);
+	vector<string> blocks(std::min(numBlocks, batchSize));
+	// status of each block, which is written by one thread only
+	vector<char> deflated(blocks.size());
+
+	for (size_t batch = 0; batch < numBlocks; batch += batchSize) {
+		ssize_t batchEnd = static_cast<ssize_t>(std::min(numBlocks, batch + batchSize));
+		std::fill(deflated.begin(), deflated.end(), 1);
+#pragma omp parallel for if(numThreads() > 1)
+		for (ssize_t i = static_cast<ssize_t>(batch); i < batchEnd; ++i) {
+			size_t start = i * BGZF_BLOCK_SIZE;
+			size_t size = std::min(static_cast<size_t>(BGZF_BLOCK_SIZE), data.size() - start);
+			deflated[i - batch] = deflateBGZFBlock(data.data() + start, size, level, blocks[i - batch]);
+		}
+		if (std::find(deflated.begin(), deflated.end(), 0) != deflated.end())
+			throw RuntimeError("Failed to compress data.");
+		for (ssize_t i = static_cast<ssize_t>(batch); i < batchEnd; ++i)
+			out.write(blocks[i - batch].data(), blocks[i - batch].size());
+	}
+	data.erase(0, std::min(data.size(), numBlocks * BGZF_BLOCK_SIZE));
+	if (last)
+		out.write(reinterpret_cast<const char *>(BGZFEof), sizeof(BGZFEof));
+}
+
+
+bool readBGZF(const string & filename, string & data)
+{
+	ifstream in(filename.c_str(), std::ios::binary);
+
+	if (!in)
+		throw RuntimeError("Cannot open file " + filename);
+	char header[BGZF_HEADER_SIZE];
+	if (!in.read(header, BGZF_HEADER_SIZE) || memcmp(header, BGZFHeader, 16) != 0)
+		return false;
+	in.seekg(0);
+	string content((std::istreambuf_iterator<char>(in)), std::istreambuf_iterator<char>());
+
+	// locate blocks and their positions in uncompressed data
+	vectoru blockStart;
+	vectoru dataStart(1, 0);
+	for (size_t pos = 0; pos < content.size(); ) {
+		if (pos + BGZF_HEADER_SIZE + BGZF_TRAILER_SIZE > content.size() ||
+		    memcmp(content.data() + pos, BGZFHeader, 16) != 0)
+			throw ValueError("Corrupted block in file " + filename);
+		size_t blockSize = getUInt(content, pos + 16, 2) + 1;
+		if (pos + blockSize > content.size())
+			throw ValueError("Unexpected end of file " + filename);
+		blockStart.push_back(pos);
+		dataStart.push_back(dataStart.back() + getUInt(content, pos + blockSize - 4, 4));
+		pos += blockSize;
+	}
+
+	data.resize(dataStart.back());
+	// status of each block, which is written by one thread only
+	vector<char> inflated(blockStart.size(), 1);
+#pragma omp parallel for if(numThreads() > 1)
+	for (ssize_t i = 0; i < static_cast<ssize_t>(blockStart.size()); ++i) {
+		size_t pos = blockStart[i];
+		size_t blockSize = getUInt(content, pos + 16, 2) + 1;
+		size_t size = dataStart[i + 1] - dataStart[i];
+		if (size == 0)
+			continue;
+		if (!inflateBGZFBlock(content.data() + pos + BGZF_HEADER_SIZE,
+			    blockSize - BGZF_HEADER_SIZE - BGZF_TRAILER_SIZE, &data[dataStart[i]], size) ||
+		    crc32(0L, reinterpret_cast<const Bytef *>(&data[dataStart[i]]), static_cast<uInt>(size))
+		    != getUInt(content, pos + blockSize - 8, 4))
+			inflated[i] = 0;
+	}
+	if (std::find(inflated.begin(), inflated.end(), 0) != inflated.end())
+		throw ValueError("Failed to decompress file " + filename);
+	return true;
+}
+
+
+void putLE(string & buf, uint64_t value, size_t bytes)
+{
+	for (size_t i = 0; i < bytes; ++i, value >>= 8)
+		buf.push_back(static_cast<char>(value & 0xFF));
+}
+
+
+uint64_t getLE(const char * ptr, size_t bytes)
+{
+	uint64_t value = 0;
+
+	for (size_t i = bytes; i > 0; --i)
+		value = (value << 8) | static_cast<unsigned char>(ptr[i - 1]);
+	return value;
+}
+
+
 // Random number generator
-RNG::RNG(const char * rng, unsigned long seed) : m_RNG(NULL)
+RNG::RNG(const char * rng, unsigned long seed) : m_RNG(NULL), m_serial(0),
+	m_streamRNG(NULL), m_mainRNG(NULL)
 {
 	set(rng, seed);
 }
 
 
-RNG::RNG(const RNG & rhs) : m_RNG(NULL)
+RNG::RNG(const RNG & rhs) : m_RNG(NULL), m_serial(0),
+	m_streamRNG(NULL), m_mainRNG(NULL)
 {
 	// this will create a new instance of m_RNG.
 	set(rhs.name(), rhs.seed());
@@ -3288,8 +3621,11 @@ RNG::RNG(const RNG & rhs) : m_RNG(NULL)
 
 RNG::~RNG()
 {
+	endStream();
 	// free current RNG
 	gsl_rng_free(m_RNG);
+	if (m_streamRNG != NULL)
+		gsl_rng_free(m_streamRNG);
 }
 
 
@@ -3385,11 +3721,155 @@ unsigned long RNG::generateRandomSeed()
 #endif
 
 
+string RNG::state() const
+{
+	// state of the gsl RNG, followed by cached random bits
+	string state(static_cast<const char *>(gsl_rng_state(m_RNG)), gsl_rng_size(m_RNG));
+
+	state.append(reinterpret_cast<const char *>(&m_bitByte), sizeof(m_bitByte));
+	state.append(reinterpret_cast<const char *>(&m_bitIndex), sizeof(m_bitIndex));
+	return state;
+}
+
+
+void RNG::setState(const string & state)
+{
+	size_t size = gsl_rng_size(m_RNG);
+
+	if (state.size() != size + sizeof(m_bitByte) + sizeof(m_bitIndex))
+		throw ValueError((boost::format("Incompatible state of random number generator %1%.") % name()).str());
+	memcpy(gsl_rng_state(m_RNG), state.data(), size);
+	memcpy(&m_bitByte, state.data() + size, sizeof(m_bitByte));
+	memcpy(&m_bitIndex, state.data() + size + sizeof(m_bitByte), sizeof(m_bitIndex));
+	++m_serial;
+}
+
+
+namespace {
+
+// Philox4x32-10, a counter-based random number generator (Salmon et al.,
+// Parallel random numbers: as easy as 1, 2, 3, SC11) used for the random
+// number streams of blocks of parallel tasks. Each random number is a
+// function of a 64-bit key, a 64-bit block index and a 64-bit counter, so
+// streams of all 2^64 keys and blocks are independent of each other.
+typedef struct
+{
+	uint32_t key[2];
+	// block index followed by counter
+	uint32_t ctr[4];
+	uint32_t out[4];
+	unsigned int idx;
+} philox_state_t;
+
+
+void philox_round(uint32_t * ctr, const uint32_t * key)
+{
+	uint64_t p0 = static_cast<uint64_t>(0xD2511F53UL) * ctr[0];
+	uint64_t p1 = static_cast<uint64_t>(0xCD9E8D57UL) * ctr[2];
+	uint32_t c1 = ctr[1];
+	uint32_t c3 = ctr[3];
+
+	ctr[0] = static_cast<uint32_t>(p1 >> 32) ^ c1 ^ key[0];
+	ctr[1] = static_cast<uint32_t>(p1);
+	ctr[2] = static_cast<uint32_t>(p0 >> 32) ^ c3 ^ key[1];
+	ctr[3] = static_cast<uint32_t>(p0);
+}
+
+
+unsigned long philox_get(void * vstate)
+{
+	philox_state_t * state = static_cast<philox_state_t *>(vstate);
+
+	if (state->idx == 4) {
+		uint32_t key[2] = { state->key[0], state->key[1] };
+		std::copy(state->ctr, state->ctr + 4, state->out);
+		for (size_t r = 0; r < 10; ++r) {
+			if (r > 0) {
+				key[0] += 0x9E3779B9UL;
+				key[1] += 0xBB67AE85UL;
+			}
+			philox_round(state->out, key);
+		}
+		// increase the 64-bit counter
+		if (++state->ctr[2] == 0)
+			++state->ctr[3];
+		state->idx = 0;
+	}
+	return state->out[state->idx++];
+}
+
+
+double philox_get_double(void * vstate)
+{
+	return philox_get(vstate) / 4294967296.0;
+}
+
+
+void philox_set(void * vstate, unsigned long seed)
+{
+	philox_state_t * state = static_cast<philox_state_t *>(vstate);
+	uint64_t key = static_cast<uint64_t>(seed);
+
+	state->key[0] = static_cast<uint32_t>(key);
+	state->key[1] = static_cast<uint32_t>(key >> 32);
+	std::fill(state->ctr, state->ctr + 4, 0U);
+	state->idx = 4;
+}
+
+
+const gsl_rng_type philox_type = {
+	"philox4x32",
+	0xFFFFFFFFUL,
+	0,
+	sizeof(philox_state_t),
+	&philox_set,
+	&philox_get,
+	&philox_get_double
+};
+
+}
+
+void RNG::setStream(uint64_t key, size_t block)
+{
+	if (m_streamRNG == NULL)
+		m_streamRNG = gsl_rng_alloc(&philox_type);
+	philox_state_t * state = static_cast<philox_state_t *>(gsl_rng_state(m_streamRNG));
+	uint64_t blk = static_cast<uint64_t>(block);
+	state->key[0] = static_cast<uint32_t>(key);
+	state->key[1] = static_cast<uint32_t>(key >> 32);
+	state->ctr[0] = static_cast<uint32_t>(blk);
+	state->ctr[1] = static_cast<uint32_t>(blk >> 32);
+	state->ctr[2] = 0;
+	state->ctr[3] = 0;
+	state->idx = 4;
+	// draw random numbers from the stream until endStream() is called
+	if (m_mainRNG == NULL) {
+		m_mainRNG = m_RNG;
+		m_RNG = m_streamRNG;
+	}
+	m_bitByte = 0;
+	m_bitIndex = 0;
+	++m_serial;
+}
+
+
+void RNG::endStream()
+{
+	if (m_mainRNG == NULL)
+		return;
+	m_RNG = m_mainRNG;
+	m_mainRNG = NULL;
+	++m_serial;
+}
+
+
 // choose an random number generator.
 void RNG::set(const char * rng, unsigned long seed)
 {
 	const char * rng_name = rng;
 
+	endStream();
+
 	// if RNG name is not given, try GSL_RNG_TYPE
 	if (m_RNG == NULL && rng_name == NULL)
 		rng_name = getenv("GSL_RNG_TYPE");
@@ -3436,6 +3916,7 @@ void RNG::set(const char * rng, unsigned long seed)
 	gsl_rng_set(m_RNG, m_seed);
 	m_bitByte = 0;
 	m_bitIndex = 0;
+	++m_serial;
 }
 
 
@@ -3890,6 +4371,26 @@ vectoru WeightedSampler::drawSamples(ULONG num)
 }
 
 
+void WeightedSampler::fillSamples(vectoru & res)
+{
+	size_t num = res.size();
+
+	if (m_algorithm != 3) {
+		for (size_t i = 0; i < num; ++i)
+			res[i] = draw();
+		return;
+	}
+	// draw all random numbers before looking up the alias table
+	vectorf rN(num);
+	for (size_t i = 0; i < num; ++i)
+		rN[i] = getRNG().randUniform() * m_N;
+	for (size_t i = 0; i < num; ++i) {
+		size_t K = static_cast<size_t>(rN[i]);
+		res[i] = rN[i] - K < m_q[K] ? K : m_a[K];
+	}
+}
+
+
 // this is used for Bernullitrials and copyGenotype
 WORDTYPE g_bitMask[WORDBIT];
 
@@ -4210,13 +4711,13 @@ double Bernullitrials::probSuccRate() const
 // ###############################################
 
 Bernullitrials_T::Bernullitrials_T(RNG & /* rng */)
-	: m_N(1024), m_prob(0), m_table(0), m_pointer(0), m_cur(npos)
+	: m_N(1024), m_prob(0), m_table(0), m_pointer(0), m_cur(npos), m_RNG(NULL), m_serial(0)
 {
 }
 
 
 Bernullitrials_T::Bernullitrials_T(RNG & /* rng */, const vectorf & prob, size_t N)
-	: m_N(N), m_prob(prob), m_table(N), m_pointer(N), m_cur(npos)
+	: m_N(N), m_prob(prob), m_table(N), m_pointer(N), m_cur(npos), m_RNG(NULL), m_serial(0)
 {
 	//DBG_FAILIF(trials_T <= 0, ValueError, "trial number can not be zero.");
 	DBG_FAILIF(prob.empty(), ValueError, "probability table can not be empty.");
@@ -4262,6 +4763,8 @@ void Bernullitrials_T::setAll(size_t idx, bool v)
 
 void Bernullitrials_T::doTrial()
 {
+	m_RNG = &getRNG();
+	m_serial = m_RNG->serial();
 	// reset all values to 0
 	for (size_t i = 0; i < m_N; ++i) {
 		m_table[i].clear();
@@ -4307,7 +4810,8 @@ void Bernullitrials_T::doTrial()
 // get a trial corresponding to m_prob.
 void Bernullitrials_T::trial()
 {
-	if (m_cur == npos || m_cur == m_N - 1)  // reach the last trial
+	// reach the last trial, or the random number generator has been reseeded
+	if (m_cur == npos || m_cur == m_N - 1 || m_RNG != &getRNG() || m_serial != m_RNG->serial())
 		doTrial();
 	else
 		m_cur++;
@@ -4699,23 +5203,17 @@ void copyGenotype(GenoIterator fr, GenoIterator to, size_t n)
 	size_t fr_off = BITOFF(fr);
 	size_t to_off = BITOFF(to);
 
-	// if offset is different, can not copy in block.
+	// less than a word, read all bits at once and write them to one or
+	// two words.
 	if (n < WORDBIT) {
-		for (size_t i = 0; i < n; ++i) {
-			// set bit according to from bit
-			if (*fr_p & (1UL << fr_off))
-				*to_p |= (1UL << to_off);
-			else
-				*to_p &= ~(1UL << to_off);
-			// next location
-			if (fr_off++ == WORDBIT - 1) {
-				fr_off = 0;
-				++fr_p;
-			}
-			if (to_off++ == WORDBIT - 1) {
-				to_off = 0;
-				++to_p;
-			}
+		if (n == 0)
+			return;
+		WORDTYPE bits = readBits(fr, n);
+		*to_p = (*to_p & ~(g_bitMask[n] << to_off)) | (bits << to_off);
+		if (to_off + n > WORDBIT) {
+			size_t done = WORDBIT - to_off;
+			WORDTYPE mask = g_bitMask[n - done];
+			*(to_p + 1) = (*(to_p + 1) & ~mask) | (bits >> done);
 		}
 	} else if (fr_off == to_off) {
 		// copy first block, fr_off + 1 bits
@@ -4897,18 +5395,57 @@ void clearGenotype(GenoIterator to, size_t n)
 	WORDTYPE * to_p = const_cast<WORDTYPE *>(BITPTR(to));
 	size_t to_off = BITOFF(to);
 
-	// This can be made more efficient.
-	for (size_t i = 0; i < n; ++i) {
-		// set bit according to from bit
-		*to_p &= ~(1UL << to_off);
-		if (to_off++ == WORDBIT - 1) {
-			while (i + WORDBIT < n) {
-				*++to_p = 0;
-				i += WORDBIT;
-			}
-			++to_p;
-			to_off = 0;
+	if (n == 0)
+		return;
+	// bits in the first word
+	if (to_off + n <= WORDBIT) {
+		WORDTYPE mask = n == WORDBIT ? ~WORDTYPE(0) : g_bitMask[n];
+		*to_p &= ~(mask << to_off);
+		return;
+	}
+	*to_p &= g_bitMask[to_off];
+	n -= WORDBIT - to_off;
+	// whole words
+	for (; n >= WORDBIT; n -= WORDBIT)
+		*++to_p = 0;
+	// the rest of the bits
+	if (n != 0) {
+		++to_p;
+		*to_p &= ~g_bitMask[n];
+	}
+}
+
+
+WORDTYPE readBits(GenoIterator fr, size_t n)
+{
+	const WORDTYPE * fr_p = BITPTR(fr);
+	size_t fr_off = BITOFF(fr);
+
+	WORDTYPE bits = *fr_p >> fr_off;
+
+	// fr_off can not be zero if bits span two words.
+	if (fr_off + n > WORDBIT)
+		bits |= *(fr_p + 1) << (WORDBIT - fr_off);
+	return n == WORDBIT ? bits : (bits & g_bitMask[n]);
+}
+
+
+void transposeBits(WORDTYPE * block)
+{
+	// Swap the off-diagonal halves of the bit matrix, then the off-diagonal
+	// quarters of each half, and so on (Hacker's Delight, section 7-3).
+	// bit c of block[r] is moved to bit r of block[c].
+	size_t j = WORDBIT / 2;
+	WORDTYPE mask = g_bitMask[j];
+
+	while (j != 0) {
+		for (size_t k = 0; k < WORDBIT; k = ((k | j) + 1) & ~j) {
+			WORDTYPE t = ((block[k] >> j) ^ block[k | j]) & mask;
+			block[k] ^= t << j;
+			block[k | j] ^= t;
 		}
+		j >>= 1;
+		mask ^= mask << j;
 	}
 }
 
@@ -163,6 +163,9 @@ UINT numThreads();
 /// CPPONLY return val and increase val by 1, ensuring thread safety
 ATOMICLONG fetchAndIncrement(ATOMICLONG * val);
 
+/// CPPONLY return val and increase val by inc, ensuring thread safety
+ATOMICLONG fetchAndAdd(ATOMICLONG * val, ATOMICLONG inc);
+
 /// CPPONLY parallel sort by using tbb or gnu parallel
 template<class T1, class T2>
 void parallelSort(T1 start, T1 end, T2 cmp)
@@ -215,11 +218,11 @@ ostream & operator<<(ostream & out, const pair<T1, T2> & pair)
 
 
 /// CPPONLY how to output any vector.
-template<class T>
-ostream & operator<<(ostream & out, const vector<T> & vec)
+template<class T, class A>
+ostream & operator<<(ostream & out, const vector<T, A> & vec)
 {
 	if (!vec.empty()) {
-		typename vector<T>::const_iterator it = vec.begin();
+		typename vector<T, A>::const_iterator it = vec.begin();
 		out << *it;
 		for (++it; it != vec.end(); ++it)
 			out << ", " << *it ;
@@ -486,6 +489,96 @@ private:
 };
 
 
+/** CPPONLY
+ *  A wrapper to a Python object that supports the buffer protocol (e.g. a
+ *  numpy array or an array.array object). Items of the buffer are read in
+ *  C order and are converted from their native types (integer, boolean or
+ *  floating point numbers of any size) to the requested type.
+ */
+class pyBuffer
+{
+public:
+	pyBuffer(PyObject * obj);
+
+	~pyBuffer();
+
+	/// number of items in the buffer
+	size_t size() const
+	{
+		return m_size;
+	}
+
+
+	/// number of dimensions of the buffer
+	size_t ndim() const
+	{
+		return m_buffer.ndim;
+	}
+
+
+	/// length of dimension \e dim
+	size_t shape(size_t dim) const
+	{
+		return m_buffer.shape == NULL ? m_size : m_buffer.shape[dim];
+	}
+
+
+	/// return item \e idx of the buffer as type T
+	template <typename T>
+	T value(size_t idx) const
+	{
+		const char * ptr = static_cast<const char *>(m_buffer.buf) + idx * m_buffer.itemsize;
+
+		switch (m_type) {
+		case 'i':
+			switch (m_buffer.itemsize) {
+			case 1: return static_cast<T>(*reinterpret_cast<const int8_t *>(ptr));
+			case 2: return static_cast<T>(*reinterpret_cast<const int16_t *>(ptr));
+			case 4: return static_cast<T>(*reinterpret_cast<const int32_t *>(ptr));
+			default: return static_cast<T>(*reinterpret_cast<const int64_t *>(ptr));
+			}
+		case 'u':
+			switch (m_buffer.itemsize) {
+			case 1: return static_cast<T>(*reinterpret_cast<const uint8_t *>(ptr));
+			case 2: return static_cast<T>(*reinterpret_cast<const uint16_t *>(ptr));
+			case 4: return static_cast<T>(*reinterpret_cast<const uint32_t *>(ptr));
+			default: return static_cast<T>(*reinterpret_cast<const uint64_t *>(ptr));
+			}
+		default:
+			if (m_buffer.itemsize == sizeof(float))
+				return static_cast<T>(*reinterpret_cast<const float *>(ptr));
+			return static_cast<T>(*reinterpret_cast<const double *>(ptr));
+		}
+	}
+
+
+	/// return a pointer to the beginning of the buffer if the buffer
+	/// consists of items of type T, and NULL otherwise.
+	template <typename T>
+	const T * data() const
+	{
+		if (m_buffer.itemsize != sizeof(T) || (m_type == 'f') != (static_cast<T>(0.5) != 0))
+			return NULL;
+		if (m_type != 'f' && (m_type == 'i') != (static_cast<T>(-1) < 0))
+			return NULL;
+		return static_cast<const T *>(m_buffer.buf);
+	}
+
+
+private:
+	pyBuffer(const pyBuffer &);
+
+	pyBuffer & operator=(const pyBuffer &);
+
+	Py_buffer m_buffer;
+
+	/// 'i' for signed, 'u' for unsigned integers, 'f' for floating point numbers
+	char m_type;
+
+	size_t m_size;
+};
+
+
 /** A class to specify replicate list. The reason why I cannot simple
  *  use vectori() is that users have got used to use a single number
  *  to specify a single replicate.
@@ -1762,6 +1855,29 @@ private:
  */
 void closeOutput(const string & output = string());
 
+/** CPPONLY compress \e data at compression \e level in independent blocks
+ *  of at most 64K bytes, in parallel if multiple threads are used, and
+ *  write them to \e out as concatenated gzip members that record their
+ *  sizes in an extra field (the BGZF format). The output can be
+ *  decompressed by gzip. If \e last is \c false, only complete blocks are
+ *  written and the rest of \e data is kept for the next call, so that
+ *  large data can be written in pieces. Compressed data is removed from
+ *  \e data, and an end-of-file block is written after the last piece.
+ */
+void writeBGZF(std::ostream & out, string & data, int level, bool last = true);
+
+/** CPPONLY read file \e filename written in the BGZF format to \e data,
+ *  decompressing its blocks in parallel if multiple threads are used.
+ *  Return \c false if the file is not in this format.
+ */
+bool readBGZF(const string & filename, string & data);
+
+/// CPPONLY append \e value to \e buf as a little-endian integer of \e bytes bytes
+void putLE(string & buf, uint64_t value, size_t bytes);
+
+/// CPPONLY read a little-endian integer of \e bytes bytes from \e ptr
+uint64_t getLE(const char * ptr, size_t bytes);
+
 // ////////////////////////////////////////////////////////////
 // / Random number generator
 // ////////////////////////////////////////////////////////////
@@ -1827,7 +1943,7 @@ public:
 	 */
 	const char * name() const
 	{
-		return gsl_rng_name(m_RNG);
+		return gsl_rng_name(m_mainRNG == NULL ? m_RNG : m_mainRNG);
 	}
 
 
@@ -1844,6 +1960,41 @@ public:
 	/// CPPONLY
 	static unsigned long generateRandomSeed();
 
+	/// CPPONLY return the internal state of the RNG, which can be used to
+	/// restore the RNG with the same name.
+	string state() const;
+
+	/// CPPONLY restore the internal state of the RNG from \e state returned
+	/// by function state().
+	void setState(const string & state);
+
+	/// CPPONLY draw random numbers from the stream of block \e block of a
+	/// task identified by \e key (see class RNGStream), which are generated
+	/// by a counter-based generator (Philox4x32-10) keyed by \e key and
+	/// \e block, until endStream() is called. The state of the current
+	/// generator and the seed returned by function seed() are not changed.
+	void setStream(uint64_t key, size_t block);
+
+	/// CPPONLY stop using the random number stream set by setStream() and
+	/// continue with the current generator.
+	void endStream();
+
+	/// CPPONLY return true if random numbers are drawn from a random number
+	/// stream set by setStream().
+	bool inStream() const
+	{
+		return m_mainRNG != NULL;
+	}
+
+	/// CPPONLY a number that is changed whenever the RNG is reseeded or its
+	/// state is restored, so that random numbers generated in advance (e.g.
+	/// by class Bernullitrials_T) can be discarded.
+	unsigned long serial() const
+	{
+		return m_serial;
+	}
+
+
 
 	/** Generate a random number following a rng_uniform [0, 1) distribution.
 	 *  <group>3-rng</group>
@@ -1997,11 +2148,72 @@ private:
 	/// to reset a RNG when a new seed is set.
 	uint16_t m_bitByte;
 	UINT m_bitIndex;
+
+	/// see serial()
+	unsigned long m_serial;
+
+	/// counter-based generator used by setStream()
+	gsl_rng * m_streamRNG;
+
+	/// generator replaced by m_streamRNG during a stream
+	gsl_rng * m_mainRNG;
 };
 
 /// return the currently used random number generator
 RNG & getRNG();
 
+/** CPPONLY Use the random number stream of a block of a task in the current
+ *  thread. Tasks that can be executed in parallel (e.g. generation of
+ *  offspring) are divided into blocks of \c RNGStream::blockSize individuals,
+ *  which do not depend on the number of threads. A key is drawn from the
+ *  random number generator of the main thread (newKey()) before the task
+ *  starts, and each block is executed with random numbers drawn from a
+ *  counter-based generator keyed by the key and the index of the block.
+ *  Results are therefore identical regardless of the number of threads and the order at
+ *  which blocks are executed. The state of the random number generator is
+ *  restored when the object is destroyed.
+ */
+class RNGStream
+{
+public:
+	/// number of individuals in each block
+	static const size_t blockSize;
+
+	RNGStream(uint64_t key, size_t block);
+
+	~RNGStream();
+
+	/// draw a key of a new task from the random number generator of the
+	/// current thread, which should be called outside of parallel regions.
+	static uint64_t newKey();
+
+	/// number of blocks of \e size individuals
+	static size_t numBlocks(size_t size)
+	{
+		return (size + blockSize - 1) / blockSize;
+	}
+
+
+private:
+	RNGStream(const RNGStream &);
+
+	RNGStream & operator=(const RNGStream &);
+
+	RNG & m_RNG;
+
+	string m_state;
+
+	/// if the RNG is already in a stream (nested blocks)
+	bool m_inStream;
+};
+
+/// CPPONLY return the states of random number generators of all threads
+vectorstr getRNGStates();
+
+/// CPPONLY restore random number generators of all threads using RNG
+/// \e name, seed \e seed and \e states returned by getRNGStates().
+void setRNGStates(const string & name, unsigned long seed, const vectorstr & states);
+
 /// CPPONLY
 void chisqTest(const vector<vectoru> & table, double & chisq, double & chisq_p);
 
@@ -2222,6 +2434,12 @@ public:
 	 */
 	vectoru drawSamples(ULONG n = 1);
 
+	/** CPPONLY
+	 *  Fill \e res with random numbers. Uniform random numbers are drawn
+	 *  in one pass before they are looked up in the alias table.
+	 */
+	void fillSamples(vectoru & res);
+
 private:
 	/// which algorithm to use
 	int m_algorithm;
@@ -2483,6 +2701,12 @@ private:
 
 	/// current trial. Used when user want to access the table row by row
 	size_t m_cur;
+
+	/// random number generator and its serial number when the trial
+	/// table was generated. The table is regenerated if the random number
+	/// generator of the thread has been reseeded.
+	const RNG * m_RNG;
+	unsigned long m_serial;
 };
 
 
@@ -2522,6 +2746,31 @@ void copyGenotype(GenoIterator fr, GenoIterator to, size_t n);
 /// will not do here.
 void clearGenotype(GenoIterator to, size_t n);
 
+/// CPPONLY
+/// Return \e n (<= WORDBIT) bits starting from \e fr as the lowest bits
+/// of a word.
+WORDTYPE readBits(GenoIterator fr, size_t n);
+
+/// CPPONLY
+/// Transpose a WORDBIT x WORDBIT bit matrix stored in \e block, so that
+/// bit \c c of <tt>block[r]</tt> becomes bit \c r of <tt>block[c]</tt>.
+void transposeBits(WORDTYPE * block);
+
+/// CPPONLY
+/// Return the number of bits that are set in \e bits.
+inline size_t countBits(WORDTYPE bits)
+{
+#  if defined(__GNUC__)
+	return __builtin_popcountl(bits);
+#  else
+	size_t cnt = 0;
+	for (; bits != 0; ++cnt)
+		bits &= bits - 1;
+	return cnt;
+#  endif
+}
+
+
 #  ifndef OPTIMIZED
 void testCopyGenotype();
 
@@ -2985,6 +2985,12 @@ class Exporter(PyOperator):
         return subPops
         
     def _export(self, pop):
+        # alleles at loci recorded by a genealogy are not set until
+        # Genealogy.mutate() is called. Only MapExporter does not export
+        # genotypes.
+        if pop.genealogyLoci() and not isinstance(self.exporter, MapExporter):
+            raise ValueError('Alleles at loci recorded in a genealogy have not '
+                'been set. Please call Genealogy.mutate() first.')
         bin_mode = False
         if hasattr(self.output, '_with_output') and hasattr(self.output, '_with_mode'):
             bin_mode  = 'b' in self.output._with_mode
@@ -262,6 +262,41 @@ class TestPyParentChooser(PerformanceTest):
         return gens
 
 
+class TestPyParentChooserArray(PerformanceTest):
+    def __init__(self, logger, time=30):
+        PerformanceTest.__init__(self, 'HomoMating scheme with PyParentChooser that yields arrays of parents, results are number of generations in %d seconds.' % int(time),
+            logger)
+        self.time = time
+ 
+    def run(self):
+        # overall running case
+        return self.productRun(size=[10000, 100000], loci=[10, 100, 10000])
+
+
+    def _run(self, size, loci):
+        # single test case
+        if size * loci * moduleInfo()['alleleBits'] / 8 > 1e9:
+            return 0
+        import numpy as np
+        def retIndexes(pop, subPop):
+            sz = pop.subPopSize(subPop)
+            while True:
+                yield np.random.randint(0, sz, size=(sz, 2))
+        pop = Population(size=size, loci=loci)
+        gens = pop.evolve(
+            initOps=InitSex(),
+            preOps=TicToc(output='', stopAfter=self.time),
+            matingScheme=HomoMating(
+                chooser=PyParentsChooser(retIndexes),
+                generator=OffspringGenerator(
+                    ops=[CloneGenoTransmitter()],
+                    numOffspring=1,
+                    sexMode=RANDOM_SEX),
+            ),
+        )
+        return gens
+
+
 class TestIdTagger(PerformanceTest):
     def __init__(self, logger, time=30):
         PerformanceTest.__init__(self, 'Test idTagger, results are number of generations in %d seconds.' % int(time),
@@ -430,6 +465,53 @@ class TestRecombinator(PerformanceTest):
         )
         return gens
 
+class TestRecombinatorGenealogy(PerformanceTest):
+    def __init__(self, logger, time=30):
+        PerformanceTest.__init__(self, 'Recombinator that records genealogy of neutral loci, results are number of generations in %d seconds.' % int(time),
+            logger)
+        self.time = time
+
+    def run(self):
+        # overall running case
+        return self.productRun(size=[10000, 100000], loci=[10, 100, 10000])
+
+    def _run(self, size, loci):
+        # single test case
+        if size * loci * moduleInfo()['alleleBits'] / 8 > 1e9:
+            return 0
+        pop = Population(size=size, loci=loci, infoFields='ind_id')
+        genealogy = Genealogy(loci=range(1, loci))
+        gens = pop.evolve(
+            initOps=[InitSex(), IdTagger()],
+            preOps=TicToc(output='', stopAfter=self.time),
+            matingScheme=RandomMating(ops=[IdTagger(),
+                Recombinator(rates=1e-4, genealogy=genealogy)]),
+            postOps=SimplifyGenealogy(genealogy, step=10),
+        )
+        return gens
+
+class TestRecombinatorContinuousMap(PerformanceTest):
+    def __init__(self, logger, time=30):
+        PerformanceTest.__init__(self, 'Recombinator with a continuous genetic map, results are number of generations in %d seconds.' % int(time),
+            logger)
+        self.time = time
+
+    def run(self):
+        # overall running case
+        return self.productRun(size=[1000, 10000], loci=[10000, 1000000, 10000000])
+
+    def _run(self, size, loci):
+        # single test case
+        if size * loci * moduleInfo()['alleleBits'] / 8 > 1e9:
+            return 0
+        pop = Population(size=size, loci=loci, lociPos=[x * 1e-6 for x in range(loci)])
+        gens = pop.evolve(
+            initOps=InitSex(),
+            preOps=TicToc(output='', stopAfter=self.time),
+            matingScheme=RandomMating(ops=Recombinator(intensity=1, continuousMap=True)),
+        )
+        return gens
+
 class TestCombinedParentsChooser(PerformanceTest):
     def __init__(self, logger, time=30):
         PerformanceTest.__init__(self, 'CombinedParentsChooser, results are number of generations in %d seconds.' % int(time),
@@ -482,6 +564,37 @@ class TestHeteroMating(PerformanceTest):
         )
         return gens
 
+class TestHeteroMatingScaling(PerformanceTest):
+    def __init__(self, logger, repeats=10):
+        PerformanceTest.__init__(self, 'HeteroMating with different number of threads, results are time (not processor time) to evolve %d generations.' % int(repeats),
+            logger)
+        self.repeats = repeats
+
+    def run(self):
+        # overall running case
+        return self.productRun(numThreads=[1, 2, 4, 8], size=[100000])
+
+    def _run(self, numThreads, size):
+        # single test case, each case is run in a separate process because
+        # the number of threads can only be set before simuPOP is imported.
+        script = ('import time, simuOpt\n'
+            "simuOpt.setOptions(alleleType='%s', quiet=True, optimized=True, numThreads=%d)\n"
+            'from simuPOP import *\n'
+            "pop = Population(size=[%d]*2, loci=[100]*10, infoFields=['father_idx', 'mother_idx'])\n"
+            'pop.setVirtualSplitter(RangeSplitter([[0, %d], [%d, %d]]))\n'
+            'initGenotype(pop, freq=[0.5, 0.5])\n'
+            'start = time.time()\n'
+            'pop.evolve(initOps=InitSex(),\n'
+            '    matingScheme=HeteroMating([\n'
+            '        RandomMating(subPops=0, ops=[Recombinator(rates=0.001), ParentsTagger()]),\n'
+            '        RandomMating(subPops=[(1, 0)], ops=[Recombinator(rates=0.001), ParentsTagger()]),\n'
+            '        RandomMating(subPops=[(1, 1)], numOffspring=2, ops=[MendelianGenoTransmitter(), ParentsTagger()])]),\n'
+            '    gen=%d)\n'
+            'print(time.time() - start)\n') % (moduleInfo()['alleleType'], numThreads, size,
+                size // 2, size // 2, size, self.repeats)
+        out = subprocess.check_output([sys.executable, '-c', script])
+        return float(out.decode().strip())
+
 class TestPedigreeMating(PerformanceTest):
 
     def __init__(self, logger, repeats=5):
@@ -1144,6 +1257,27 @@ class TestRandomMatingWithSelection(PerformanceTest):
         return gens
 
 
+class TestFreqSimulator(PerformanceTest):
+    def __init__(self, logger, time=30):
+        PerformanceTest.__init__(self, 'Frequency simulator with selection and migration, results are number of generations in %d seconds.' % int(time),
+            logger)
+        self.time = time
+
+    def run(self):
+        # overall running case
+        return self.productRun(size=[1000, 100000, 10000000], loci=[10, 100, 10000])
+
+    def _run(self, size, loci):
+        # single test case
+        simu = FreqSimulator(size=[size, size], freq=[0.5] * loci,
+            fitness=[1, 0.999, 0.998], migrRate=[[0, 0.01], [0.01, 0]])
+        gens = 0
+        start = time.time()
+        while time.time() - start < self.time:
+            gens += simu.evolve(gen=10)[0]
+        return gens
+
+
 class TestPyOperatorFuncCall(PerformanceTest):
     def __init__(self, logger, time=60):
         PerformanceTest.__init__(self, 'Test the performance of function call for operator PyOperator.'
@@ -167,6 +167,35 @@ class TestPopulation(unittest.TestCase):
         self.assertEqual(len(arr), pop.genoSize()*pop.subPopSize(1))
         self.assertRaises(IndexError, pop.genotype, 2)
 
+    def testGenotypeBuffer(self):
+        'Testing buffer interface of Population::genotype() and Individual::genotype()'
+        if moduleInfo()['alleleType'] in ['binary', 'mutant']:
+            return
+        pop = Population(loci=[1, 2], size=[1, 2])
+        pop.setGenotype([1, 2, 3])
+        view = memoryview(pop.genotype())
+        self.assertEqual(view.format, 'L' if moduleInfo()['alleleType'] == 'long' else 'B')
+        self.assertEqual(view.ndim, 1)
+        self.assertEqual(len(view), pop.genoSize()*pop.popSize())
+        self.assertEqual(view.tolist(), [1, 2, 3] * 6)
+        # the view is writable and shares storage with the population
+        view[0] = 4
+        self.assertEqual(pop.individual(0).allele(0), 4)
+        view = memoryview(pop.genotype(1))
+        view[1] = 5
+        self.assertEqual(pop.individual(1).allele(1), 5)
+        view = memoryview(pop.individual(2).genotype(1))
+        self.assertEqual(len(view), pop.totNumLoci())
+        view[2] = 6
+        self.assertEqual(pop.individual(2).allele(2, 1), 6)
+        if moduleInfo()['alleleType'] == 'lineage':
+            initLineage(pop, range(6))
+            view = memoryview(pop.lineage())
+            self.assertEqual(view.format, 'l')
+            self.assertEqual(view.tolist(), list(range(6)) * 3)
+            view[0] = 10
+            self.assertEqual(pop.individual(0).alleleLineage(0), 10)
+
 
 
     def testSetGenotype(self):
@@ -216,6 +245,62 @@ class TestPopulation(unittest.TestCase):
             for idx, ind in enumerate(pop.individuals([0, 1])):
                 self.assertEqual(ind.allele(idx%6), 6)
 
+    def testSetGenotypeFromBuffer(self):
+        'Testing Population::setGenotype(geno, subPop, indexes, loci) with buffers'
+        import array
+        pop = Population(loci=[1, 2], size=[2, 3])
+        # set from buffers of different types
+        for t in ['B', 'H', 'I', 'l']:
+            pop.setGenotype(array.array(t, [0, 1, 1]))
+            self.assertEqual(pop.individual(4).genotype(), [0, 1, 1, 0, 1, 1])
+        # selected individuals and loci
+        pop.setGenotype([0])
+        pop.setGenotype(array.array('B', [1]), 1, indexes=[0, 2])
+        self.assertEqual(pop.individual(2).genotype(), [1] * 6)
+        self.assertEqual(pop.individual(3).genotype(), [0] * 6)
+        self.assertEqual(pop.individual(4).genotype(), [1] * 6)
+        pop.setGenotype(array.array('B', [0, 1, 1, 0]), loci=[0, 2])
+        for ind in pop.individuals():
+            self.assertEqual(ind.genotype(0)[0], 0)
+            self.assertEqual(ind.genotype(0)[2], 1)
+            self.assertEqual(ind.genotype(1)[0], 1)
+            self.assertEqual(ind.genotype(1)[2], 0)
+        self.assertEqual(pop.individual(0).genotype(0)[1], 0)
+        self.assertEqual(pop.individual(2).genotype(0)[1], 1)
+        self.assertRaises(IndexError, pop.setGenotype, [1], 0, indexes=[2])
+        pop.setVirtualSplitter(SexSplitter())
+        self.assertRaises(ValueError, pop.setGenotype, [1], [0, 0], indexes=[0])
+        if moduleInfo()['alleleType'] == 'lineage':
+            pop.setLineage(array.array('l', [5, 6]), 1, indexes=[1], loci=[1])
+            self.assertEqual(pop.individual(3).lineage(), [0, 5, 0, 0, 6, 0])
+
+    def testMmapStorage(self):
+        'Testing Population(storage) with memory-mapped genotypes'
+        import tempfile
+        if moduleInfo()['alleleType'] == 'mutant':
+            self.assertRaises(ValueError, Population, 10, loci=5, storage='mmap:')
+            return
+        self.assertRaises(ValueError, Population, 10, loci=5, storage='disk')
+        tmpDir = tempfile.mkdtemp()
+        pop = Population([20, 30], loci=[5, 10], ancGen=2, storage='mmap:' + tmpDir)
+        self.assertEqual(pop.storage(), 'mmap:' + tmpDir)
+        self.assertEqual(Population(10).storage(), '')
+        # temporary files are removed right after they are mapped
+        self.assertEqual(os.listdir(tmpDir), [])
+        initSex(pop)
+        initGenotype(pop, freq=[0.4, 0.6])
+        geno = list(pop.genotype())
+        pop1 = pop.clone()
+        self.assertEqual(pop1.storage(), pop.storage())
+        self.assertEqual(list(pop1.genotype()), geno)
+        self.assertEqual(pop1, pop)
+        pop.evolve(matingScheme=RandomMating(), gen=3)
+        self.assertEqual(pop.storage(), 'mmap:' + tmpDir)
+        self.assertEqual(pop.ancestralGens(), 2)
+        pop.setGenotype([1, 0])
+        self.assertEqual(pop.individual(10).genotype(), [1, 0] * 15)
+        os.rmdir(tmpDir)
+
     def testAncestor(self):
         'Testing Population::ancestor(idx, gen), ancestor(idx, gen, subPop), push(pop)'
         pop = Population([100, 200], loci=[10, 20], infoFields=['x', 'y'],
@@ -294,6 +379,46 @@ class TestPopulation(unittest.TestCase):
         pop.setAncestralDepth(3)
         self.assertEqual(pop.ancestralGens(), 3)
 
+    def testCompressAncestralGens(self):
+        'Testing Population::compressAncestralGens(compress)'
+        pop = Population(size=[30, 50], loci=[20, 30], ancGen=-1, infoFields=['x'])
+        pop.compressAncestralGens()
+        geno = []
+        info = []
+        for gen in range(4):
+            initSex(pop)
+            initGenotype(pop, freq=[.2, .8])
+            pop.setIndInfo([random.random() for x in range(80)], 'x')
+            geno.insert(0, list(pop.genotype()))
+            info.insert(0, pop.indInfo('x'))
+            if gen < 3:
+                pop.push(Population(size=[30, 50], loci=[20, 30], infoFields=['x']))
+        self.assertEqual(pop.ancestralGens(), 3)
+        # individual access materializes genotype
+        self.assertEqual(pop.ancestor(5, 2).genotype(), geno[2][500:600])
+        # individuals returned by lookups remain valid after other lookups
+        a = pop.ancestor(5, 1)
+        b = pop.ancestor(5, 3)
+        self.assertEqual(a.genotype(), geno[1][500:600])
+        self.assertEqual(b.genotype(), geno[3][500:600])
+        for i in range(3):
+            for gen in [1, 3, 2]:
+                self.assertEqual(pop.ancestor(7, gen).genotype(), geno[gen][700:800])
+        pop.useAncestralGen(2)
+        self.assertEqual(pop.ancestor(7, 3).genotype(), geno[3][700:800])
+        self.assertEqual(pop.ancestor(7, 0).genotype(), geno[0][700:800])
+        self.assertEqual(list(pop.genotype()), geno[2])
+        for gen in range(4):
+            pop.useAncestralGen(gen)
+            self.assertEqual(list(pop.genotype()), geno[gen])
+            self.assertEqual(pop.indInfo('x'), info[gen])
+        pop.useAncestralGen(0)
+        pop1 = pop.clone()
+        pop1.useAncestralGen(3)
+        self.assertEqual(list(pop1.genotype()), geno[3])
+        pop.compressAncestralGens(False)
+        self.assertEqual(pop.ancestor(5, 1).genotype(), geno[1][500:600])
+
     def testAddChrom(self):
         'Testing Population::addChrom'
         pop = self.getPop(chromNames=['c1', 'c2'], lociPos=[1, 3, 5], lociNames = ['l1', 'l2', 'l3'], ancGen=5)
@@ -985,6 +1110,43 @@ class TestPopulation(unittest.TestCase):
                 self.assertEqual(ind, pop.indByID(ind.ind_id), gen)
         self.assertEqual(sum(sz1), len(include))
 
+    def testPopulationView(self):
+        'Testing PopulationView(pop, subPops, rearrange, indexes)'
+        pop = Population([20, 30], loci=[5, 10], infoFields=['x'])
+        initSex(pop)
+        initGenotype(pop, freq=[0.3, 0.7])
+        pop.setIndInfo(range(50), 'x')
+        pop.setVirtualSplitter(SexSplitter())
+        view = PopulationView(pop, subPops=[1])
+        self.assertEqual(view.subPopSizes(), (30,))
+        for idx, ind in enumerate(view.individuals()):
+            self.assertEqual(ind.genotype(), pop.individual(20 + idx).genotype())
+            self.assertEqual(ind.x, 20 + idx)
+        # statistics calculated from a view
+        stat(view, alleleFreq=[0, 3])
+        ext = pop.extractSubPops([1])
+        stat(ext, alleleFreq=[0, 3])
+        self.assertEqual(view.dvars().alleleFreq, ext.dvars().alleleFreq)
+        self.assertEqual(list(view.genotype()), list(ext.genotype()))
+        # rearrange virtual subpopulations
+        view = PopulationView(pop, subPops=[(0, 0), (0, 1)], rearrange=True)
+        self.assertEqual(view.subPopSizes(), (pop.subPopSize([0, 0]), pop.subPopSize([0, 1])))
+        for ind in view.individuals(0):
+            self.assertEqual(ind.sex(), MALE)
+        # individuals selected by indexes
+        view = PopulationView(pop, indexes=[3, 25, 4])
+        self.assertEqual(view.subPopSizes(), (2, 1))
+        self.assertEqual(view.individual(2).genotype(), pop.individual(25).genotype())
+        self.assertRaises(IndexError, PopulationView, pop, indexes=[50])
+        self.assertRaises(ValueError, PopulationView, pop, subPops=[0], indexes=[0])
+        sample = view.extractIndividuals(indexes=[2])
+        self.assertEqual(sample.individual(0).genotype(), pop.individual(25).genotype())
+        self.assertRaises(ValueError, view.evolve, matingScheme=RandomMating(), gen=1)
+        # the parent population is kept alive by the view
+        geno = list(pop.individual(25).genotype())
+        del pop
+        self.assertEqual(list(view.individual(2).genotype()), geno)
+
     def testRemoveLoci(self):
         'Testing Population::removeLoci(loci=[], keep=[])'
         # Fixme: test loci, and keep, and test unordered parameters
@@ -1255,6 +1417,44 @@ class TestPopulation(unittest.TestCase):
         self.assertRaises(ValueError, testVSPSetAndRead, self.getPop())
         testVSPSetAndRead(self.getPop(VSP=True))
 
+    def testInfoArray(self):
+        'Testing Population::infoArray(fields, subPop), setInfoArray(values, fields, subPop)'
+        import array
+        pop = self.getPop(size=[20, 80], infoFields=['a', 'b', 'c'])
+        pop.setIndInfo(range(100), 'a')
+        pop.setIndInfo([1], 'b')
+        pop.setIndInfo([2], 'c')
+        view = pop.infoArray()
+        self.assertEqual(view.shape, (100, 3))
+        self.assertEqual(view.format, 'd')
+        self.assertEqual(view[5, 0], 5)
+        self.assertEqual(view[5, 1], 1)
+        # a single field
+        view = pop.infoArray('c', 1)
+        self.assertEqual(view.shape, (80, 1))
+        self.assertEqual(view[0, 0], 2)
+        # evenly spaced fields
+        self.assertEqual(pop.infoArray(['a', 'c']).shape, (100, 2))
+        self.assertRaises(ValueError, pop.infoArray, ['a', 'b', 'a'])
+        self.assertRaises(ValueError, pop.infoArray, 'a', [0, 0])
+        # the view shares storage with the population
+        view = pop.infoArray('b', 1)
+        view[0, 0] = 10
+        self.assertEqual(pop.individual(20).info('b'), 10)
+        # set from buffers of different types
+        pop.setInfoArray(array.array('i', [4, 5]), 'c')
+        self.assertEqual(pop.indInfo('c'), tuple([4, 5] * 50))
+        pop.setInfoArray(array.array('d', [0.5, 1.5, 2.5]), ['a', 'b', 'c'], 0)
+        self.assertEqual(pop.indInfo('a', 0), tuple([0.5] * 20))
+        self.assertEqual(pop.indInfo('c', 0), tuple([2.5] * 20))
+        self.assertEqual(pop.indInfo('c', 1), tuple([4, 5] * 40))
+        # virtual subpopulation
+        pop.setVirtualSplitter(SexSplitter())
+        pop.setInfoArray(array.array('B', [7]), 'b', [1, 0])
+        for ind in pop.individuals(1):
+            self.assertEqual(ind.info('b'), 7 if ind.sex() == MALE else 1)
+        self.assertRaises(ValueError, pop.setInfoArray, [1, 2], 'b')
+
     def testSetInfoFields(self):
         'Testing Population::setInfoFields(fields, init=0)'
         pop = self.getPop()
@@ -1305,6 +1505,146 @@ class TestPopulation(unittest.TestCase):
         self.assertFalse('module_os' in pop1.vars())
         os.remove('popout')
 
+    def testSaveBinary(self):
+        'Testing the binary format of Population::save(filename)'
+        pop = self.getPop(ancGen=3, infoFields=['a', 'b'])
+        for gen in range(pop.ancestralGens(), -1, -1):
+            pop.useAncestralGen(gen)
+            initGenotype(pop, freq=[0.3, 0.7])
+            initSex(pop)
+            initInfo(pop, lambda:random.random(), infoFields=['a', 'b'])
+            for ind in pop.individuals():
+                ind.setAffected(random.random() < 0.3)
+        pop.useAncestralGen(0)
+        pop.dvars().note = 'binary'
+        for compress in [True, False, 0, 6, 9]:
+            pop.save('popout', compress=compress)
+            with open('popout', 'rb') as out:
+                self.assertEqual(out.read(7), b'simuPOP')
+            pop1 = loadPopulation('popout')
+            self.assertEqual(pop, pop1)
+            self.assertEqual(pop1.ancestralGens(), pop.ancestralGens())
+            self.assertEqual(pop1.dvars().note, 'binary')
+            for gen in range(pop.ancestralGens() + 1):
+                pop.useAncestralGen(gen)
+                pop1.useAncestralGen(gen)
+                self.assertEqual(pop.subPopSizes(), pop1.subPopSizes())
+                self.assertEqual(pop.subPopNames(), pop1.subPopNames())
+                self.assertEqual(pop.indInfo('a'), pop1.indInfo('a'))
+                self.assertEqual(pop.indInfo('b'), pop1.indInfo('b'))
+                self.assertEqual([x.sex() for x in pop.individuals()],
+                    [x.sex() for x in pop1.individuals()])
+                self.assertEqual([x.affected() for x in pop.individuals()],
+                    [x.affected() for x in pop1.individuals()])
+                self.assertEqual(pop.genotype(), pop1.genotype())
+            pop.useAncestralGen(0)
+        os.remove('popout')
+
+    def testLoadPartial(self):
+        'Testing loading selected subpopulations, loci and generations'
+        pop = Population(size=[20, 30, 40], loci=[1500, 700], ancGen=2,
+            subPopNames=['a', 'b', 'c'], infoFields='x')
+        for gen in range(pop.ancestralGens(), -1, -1):
+            pop.useAncestralGen(gen)
+            initGenotype(pop, freq=[0.3, 0.7])
+            initSex(pop)
+            initInfo(pop, lambda:random.random(), infoFields='x')
+        pop.useAncestralGen(0)
+        pop.save('popout')
+        loci = [2, 3, 4, 1200, 1800, 1510, 3]
+        pop1 = loadPopulation('popout', subPops=[2, 1], loci=loci, ancGens=[2, 0])
+        self.assertEqual(pop1.totNumLoci(), 6)
+        self.assertEqual(pop1.numLoci(), (4, 2))
+        self.assertEqual(pop1.ancestralGens(), 1)
+        kept = sorted(set(loci))
+        for gen, gen1 in [(0, 0), (2, 1)]:
+            pop.useAncestralGen(gen)
+            pop1.useAncestralGen(gen1)
+            self.assertEqual(pop1.subPopNames(), ('b', 'c'))
+            self.assertEqual(pop1.subPopSizes(), (30, 40))
+            self.assertEqual(pop1.indInfo('x'), pop.indInfo('x', subPop=1) + pop.indInfo('x', subPop=2))
+            inds = list(pop.individuals(1)) + list(pop.individuals(2))
+            for ind, ind1 in zip(inds, pop1.individuals()):
+                self.assertEqual(ind.sex(), ind1.sex())
+                for p in range(2):
+                    self.assertEqual([ind.allele(x, p) for x in kept],
+                        [ind1.allele(x, p) for x in range(6)])
+        # everything is loaded by default
+        pop.useAncestralGen(0)
+        self.assertEqual(loadPopulation('popout'), pop)
+        self.assertEqual(loadPopulation('popout', subPops=[1, 1]).subPopSizes(), (30,))
+        self.assertRaises(IndexError, loadPopulation, 'popout', subPops=[3])
+        self.assertRaises(IndexError, loadPopulation, 'popout', loci=[2200])
+        self.assertRaises(IndexError, loadPopulation, 'popout', ancGens=[3])
+        self.assertRaises(ValueError, loadPopulation, 'popout', subPops=[(0, 0)])
+        os.remove('popout')
+
+    def testPickle(self):
+        'Testing pickling of populations, pedigrees and simulators'
+        import pickle
+        pop = self.getPop(ancGen=2, infoFields=['ind_id', 'father_id', 'mother_id'])
+        for gen in range(pop.ancestralGens(), -1, -1):
+            pop.useAncestralGen(gen)
+            initGenotype(pop, freq=[0.3, 0.7])
+            initSex(pop)
+            initInfo(pop, lambda:random.random(), infoFields=['father_id', 'mother_id'])
+            tagID(pop, reset=gen == pop.ancestralGens())
+        pop.useAncestralGen(0)
+        pop.dvars().note = 'pickled'
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            pop1 = pickle.loads(pickle.dumps(pop, protocol))
+            self.assertEqual(pop, pop1)
+            self.assertEqual(pop1.ancestralGens(), 2)
+            self.assertEqual(pop1.dvars().note, 'pickled')
+        # the population is passed out-of-band with protocol 5
+        if pickle.HIGHEST_PROTOCOL >= 5:
+            buffers = []
+            data = pickle.dumps(pop, protocol=5, buffer_callback=buffers.append)
+            self.assertEqual(len(buffers), 1)
+            self.assertTrue(len(data) < 1000)
+            pop1 = pickle.loads(data, buffers=buffers)
+            self.assertEqual(pop, pop1)
+        # pedigree
+        ped = Pedigree(pop, motherField='')
+        ped1 = pickle.loads(pickle.dumps(ped, pickle.HIGHEST_PROTOCOL))
+        self.assertTrue(isinstance(ped1, Pedigree))
+        self.assertEqual(ped, ped1)
+        self.assertEqual(ped1.pedigreeFields(), ('ind_id', 'father_id', ''))
+        # simulator
+        simu = Simulator(pop, rep=3, stealPops=False)
+        simu1 = pickle.loads(pickle.dumps(simu, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(simu1.numRep(), 3)
+        self.assertEqual(simu, simu1)
+        # copy.copy still refers to the same population
+        self.assertTrue(copy.copy(pop).this is pop.this)
+
+    def testSharedMemory(self):
+        'Testing Population.toSharedMemory and Population.fromSharedMemory'
+        try:
+            from multiprocessing import shared_memory
+        except ImportError:
+            return
+        pop = self.getPop(ancGen=1, infoFields=['ind_id', 'father_id', 'mother_id'])
+        initGenotype(pop, freq=[0.3, 0.7])
+        initSex(pop)
+        tagID(pop, reset=True)
+        shm = pop.toSharedMemory()
+        try:
+            for handle in [shm, shm.name]:
+                pop1 = Population.fromSharedMemory(handle)
+                self.assertEqual(pop, pop1)
+                stat(pop1, alleleFreq=0)
+                stat(pop, alleleFreq=0)
+                self.assertEqual(pop1.dvars().alleleFreq[0], pop.dvars().alleleFreq[0])
+                ped = Pedigree(pop1)
+                self.assertEqual(ped.popSize(), pop.popSize())
+                # changes to an attached population are not shared
+                initGenotype(pop1, genotype=0)
+                self.assertEqual(Population.fromSharedMemory(shm).genotype(), pop.genotype())
+        finally:
+            shm.close()
+            shm.unlink()
+
     def testCrossPlatformLoad(self):
         'Testing loading populations created from other platform and allele types'
         localFile = 'sample_%d_%s_v3.pop' % ( \
@@ -1927,10 +2267,83 @@ class TestPopulation(unittest.TestCase):
         ped.useAncestralGen(0)
         self.assertNotEqual(ped.individual(0).father_id, 0)
         self.assertNotEqual(ped.individual(0).mother_id, 0)
+        # compressed in blocks that can be read by gzip
+        import gzip
+        ped1.save('test1.ped', loci=0)
+        for level in [1, 6, 9]:
+            ped1.save('test2.ped', loci=0, compress=level)
+            with open('test1.ped', 'rb') as text, gzip.open('test2.ped') as packed:
+                self.assertEqual(text.read(), packed.read())
+            self.assertEqual(loadPedigree('test2.ped'), ped1)
+        self.assertRaises(ValueError, ped1.save, 'test2.ped', compress=10)
         # cleanup
         for file in ['test.ped', 'test1.ped', 'test2.ped']:
             os.remove(file)
 
+    def testBinaryPedigree(self):
+        'Testing loading pedigrees saved by PedigreeTagger in binary format'
+        pop = Population(500, loci=[2, 3], ancGen=-1, infoFields=['ind_id', 'father_id', 'mother_id', 'x'])
+        tagID(pop, reset=True)
+        pop.evolve(
+            initOps = [
+                InitSex(),
+                InitGenotype(freq=[0.5, 0.5]),
+                # values that are written exactly in text format
+                InitInfo(lambda:random.randint(0, 100) / 4., infoFields='x'),
+                PedigreeTagger(output='>>text.ped', outputFields='x', outputLoci=ALL_AVAIL),
+                PedigreeTagger(output='>>binary.ped', outputFields='x', outputLoci=ALL_AVAIL,
+                    binary=True),
+            ],
+            matingScheme=RandomMating(ops=[
+                MendelianGenoTransmitter(),
+                IdTagger(),
+                InfoExec('x = ind_id / 10.'),
+                PedigreeTagger(output='>>text.ped', outputFields='x', outputLoci=ALL_AVAIL),
+                PedigreeTagger(output='>>binary.ped', outputFields='x', outputLoci=ALL_AVAIL,
+                    binary=True)]),
+            gen = 5
+        )
+        with open('binary.ped', 'rb') as ped:
+            self.assertEqual(ped.read(7), b'simuPED')
+        ped1 = loadPedigree('text.ped', infoFields='x', loci=[2, 3])
+        ped2 = loadPedigree('binary.ped', infoFields='x', loci=[2, 3])
+        self.assertEqual(ped1.ancestralGens(), 5)
+        self.assertEqual(ped1, ped2)
+        # records appended after another header
+        closeOutput()
+        pop.evolve(
+            matingScheme=RandomMating(ops=[
+                MendelianGenoTransmitter(),
+                IdTagger(),
+                PedigreeTagger(output='>>>binary.ped', outputFields='x', outputLoci=ALL_AVAIL,
+                    binary=True)]),
+            gen = 2
+        )
+        ped2 = loadPedigree('binary.ped', infoFields='x', loci=[2, 3])
+        self.assertEqual(ped2.ancestralGens(), 7)
+        for file in ['text.ped', 'binary.ped']:
+            os.remove(file)
+        # replicates that write to their own files
+        pop = Population(100, loci=2, infoFields=['ind_id', 'father_id', 'mother_id'])
+        tagID(pop, reset=True)
+        simu = Simulator(pop, rep=2)
+        simu.evolve(
+            initOps=[InitSex(), InitGenotype(freq=[0.5, 0.5])],
+            matingScheme=RandomMating(ops=[
+                MendelianGenoTransmitter(),
+                IdTagger(),
+                PedigreeTagger(output="!'binary_%d.ped' % rep", outputLoci=ALL_AVAIL,
+                    binary=True)]),
+            gen = 3
+        )
+        closeOutput()
+        for rep in range(2):
+            with open('binary_%d.ped' % rep, 'rb') as ped:
+                self.assertEqual(ped.read(7), b'simuPED')
+            ped = loadPedigree('binary_%d.ped' % rep, loci=[0, 1])
+            self.assertEqual(ped.popSize(), 100)
+            os.remove('binary_%d.ped' % rep)
+
     def testDiscardIf(self):
         'Testing operator DiscardIf'
         pop = Population(1000, loci=2, infoFields=['a', 'b'])
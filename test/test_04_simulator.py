@@ -191,5 +191,180 @@ class TestSimulator(unittest.TestCase):
             matingScheme=RandomMating(subPopSize=self.demo),
             gen=10)
 
+    def testStorageReuse(self):
+        'Testing reuse of storage of discarded generations during evolution'
+        for ancGen in [0, 2]:
+            pop = Population(size=[500, 800], loci=[20, 30], ancGen=ancGen,
+                infoFields='a')
+            simu = Simulator(pop, rep=2)
+            simu.evolve(initOps=InitSex(), matingScheme=RandomMating(), gen=5)
+            storageAllocations(reset=True)
+            simu.evolve(matingScheme=RandomMating(), gen=5)
+            self.assertEqual(storageAllocations()['count'], 0)
+            # a growing population allocates storage in chunks
+            simu.evolve(matingScheme=RandomMating(
+                subPopSize=lambda gen: [500 + gen, 800 + gen]), gen=20)
+            self.assertTrue(storageAllocations()['count'] < 20)
+
+    def testCheckpoint(self):
+        'Testing operator Checkpoint and resuming an evolution'
+        def run(resume=[]):
+            getRNG().set(seed=12345)
+            pop = Population(size=[100, 200], loci=[5, 10], infoFields='ind_id')
+            model = ExponentialGrowthModel(T=20, N0=[100, 200], NT=[300, 400])
+            simu = Simulator(pop, rep=2)
+            gens = simu.evolve(
+                initOps=[InitSex(), InitGenotype(freq=[0.3, 0.7]), IdTagger()],
+                matingScheme=RandomMating(ops=[MendelianGenoTransmitter(), IdTagger()],
+                    subPopSize=model),
+                postOps=[Stat(alleleFreq=0),
+                    Checkpoint("!'ckpt_%d.pop' % rep", objs=model, at=9)],
+                gen=20, resume=resume)
+            return simu, gens
+        simu, gens = run()
+        self.assertEqual(gens, (20, 20))
+        for rep in range(2):
+            ckpt = loadPopulation('ckpt_%d.pop' % rep)
+            self.assertEqual(ckpt.dvars().gen, 9)
+            self.assertFalse('_checkpoint' in ckpt.vars())
+        # resume from generation 10
+        simu1, gens = run(['ckpt_0.pop', 'ckpt_1.pop'])
+        self.assertEqual(gens, (10, 10))
+        for rep in range(2):
+            self.assertEqual(simu1.population(rep).dvars().gen, 20)
+            self.assertEqual(simu1.population(rep).subPopSizes(), (300, 400))
+            self.assertEqual(simu1.population(rep), simu.population(rep))
+            self.assertEqual(simu1.population(rep).indInfo('ind_id'),
+                simu.population(rep).indInfo('ind_id'))
+        self.assertRaises(ValueError, run, ['ckpt_0.pop'])
+        # a population that is not a checkpoint, or with invalid states
+        pop = Population(size=10)
+        pop.save('ckpt_2.pop')
+        self.assertRaises(ValueError, run, ['ckpt_0.pop', 'ckpt_2.pop'])
+        pop.dvars()._checkpoint = {'start_gen': 0}
+        pop.save('ckpt_2.pop')
+        self.assertRaises(ValueError, run, ['ckpt_0.pop', 'ckpt_2.pop'])
+        # checkpoints cannot be saved before mating
+        self.assertRaises(ValueError, Simulator(pop).evolve,
+            preOps=Checkpoint('ckpt_2.pop'), matingScheme=CloneMating(), gen=1)
+        for rep in range(3):
+            os.remove('ckpt_%d.pop' % rep)
+
+    def testFreqSimulator(self):
+        'Testing the evolution of allele frequencies without individuals'
+        simu = FreqSimulator(size=[1000, 2000], freq=[0.2, 0.5, 0.8], rep=3)
+        self.assertEqual(simu.numRep(), 3)
+        self.assertEqual(simu.numLoci(), 3)
+        self.assertEqual(simu.evolve(gen=10), (10, 10, 10))
+        for rep in range(3):
+            self.assertEqual(simu.gen(rep), 10)
+            self.assertEqual(simu.subPopSizes(rep), (1000, 2000))
+            self.assertEqual(len(simu.freq(rep)), 2)
+            self.assertEqual(len(simu.freq(rep)[0]), 3)
+        self.assertRaises(ValueError, simu.freq, 3)
+        # a cloned simulator evolves independently
+        simu1 = simu.clone()
+        simu1.evolve(gen=5)
+        self.assertEqual(simu.gen(0), 10)
+        self.assertEqual(simu1.gen(0), 15)
+        # monomorphic populations stop evolving
+        simu = FreqSimulator(size=100, freq=[[0, 1], [0, 1]], rep=2)
+        self.assertEqual(simu.evolve(), (0, 0))
+        self.assertEqual(simu.evolve(gen=5), (5, 5))
+        simu = FreqSimulator(size=[100, 100], freq=[[0, 1], [1, 1]])
+        self.assertEqual(simu.evolve(gen=5), (5,))
+        # average allele frequency does not change without selection
+        simu = FreqSimulator(size=1000, freq=[0.3], rep=200)
+        simu.evolve(gen=10)
+        avg = sum([simu.freq(rep)[0][0] for rep in range(200)]) / 200.
+        self.assertTrue(abs(avg - 0.3) < 0.02)
+        # no selection at the first locus, selection for allele 1 at the second
+        simu = FreqSimulator(size=10000, freq=[0.5, 0.5], rep=5,
+            fitness=[1, 1, 1, 0.9, 0.95, 1])
+        simu.evolve(gen=20)
+        for rep in range(5):
+            self.assertTrue(abs(simu.freq(rep)[0][0] - 0.5) < 0.1)
+            self.assertTrue(simu.freq(rep)[0][1] > 0.6)
+        # interaction fitness values in the order of MaSelector
+        simu = FreqSimulator(size=10000, freq=[0.5, 0.5],
+            fitness=[1, 1, 1, 1, 1, 1, 1, 1, 0.5])
+        simu.evolve(gen=20)
+        self.assertTrue(simu.freq()[0][0] < 0.5)
+        self.assertTrue(simu.freq()[0][1] < 0.5)
+        self.assertRaises(ValueError, FreqSimulator, size=100, freq=[0.5, 0.5],
+            fitness=[1, 1, 1, 1])
+        self.assertRaises(ValueError, FreqSimulator, size=[100, 200],
+            freq=[[0.5], [0.5], [0.5]])
+        self.assertRaises(ValueError, FreqSimulator, size=100, freq=[1.5])
+        # migration
+        simu = FreqSimulator(size=[10000, 10000], freq=[[0], [1]],
+            migrRate=[[0, 0.1], [0.1, 0]])
+        simu.evolve(gen=1)
+        self.assertTrue(abs(simu.freq()[0][0] - 0.1) < 0.02)
+        self.assertTrue(abs(simu.freq()[1][0] - 0.9) < 0.02)
+        self.assertEqual(sum(simu.subPopSizes()), 20000)
+        self.assertRaises(ValueError, FreqSimulator, size=[100, 200],
+            freq=[0.5], migrRate=[[0, 0.6, 0.6], [0, 0, 0]])
+        # split and merge by a demographic function
+        simu = FreqSimulator(size=1000, freq=[0.5],
+            subPopSize=lambda gen: [1000] if gen < 5 or gen >= 10 else [400, 600])
+        self.assertEqual(simu.evolve(gen=6), (6,))
+        self.assertEqual(simu.subPopSizes(), (400, 600))
+        simu.evolve(gen=6)
+        self.assertEqual(simu.subPopSizes(), (1000,))
+        simu = FreqSimulator(size=[100, 200, 300], freq=[0.5],
+            subPopSize=[100, 200])
+        self.assertRaises(ValueError, simu.evolve, gen=1)
+        # demographic models
+        simu = FreqSimulator(size=[100, 200], freq=[0.5],
+            subPopSize=ExponentialGrowthModel(T=10, NT=[1000, 2000]))
+        self.assertEqual(simu.evolve(), (10,))
+        self.assertEqual(simu.subPopSizes(), (1000, 2000))
+        simu = FreqSimulator(size=[100, 200], freq=[0.5], rep=2,
+            subPopSize=LinearGrowthModel(T=10, NT=[1000, 2000]))
+        self.assertEqual(simu.evolve(gen=10), (10, 10))
+        for rep in range(2):
+            self.assertEqual(simu.subPopSizes(rep), (1000, 2000))
+        simu = FreqSimulator(size=1000, freq=[[0.5, 0]], subPopSize=
+            EventBasedModel(T=10, events=[
+                SplitEvent(sizes=[0.5, 0.5], at=2),
+                ResizeEvent(sizes=[500, 1000], at=5),
+            ]))
+        self.assertEqual(simu.evolve(gen=10), (10,))
+        self.assertEqual(simu.subPopSizes(), (500, 1000))
+        self.assertEqual(simu.freq()[0][1], 0)
+
+    def testThreadIndependentEvolve(self):
+        'Testing if evolution does not depend on the number of threads'
+        import subprocess
+        script = """
+import sys
+from simuOpt import setOptions
+setOptions(quiet=True, numThreads=int(sys.argv[1]))
+from simuPOP import *
+getRNG().set(seed=1234)
+pop = Population(size=[3000, 2500], loci=[20, 30], infoFields='migrate_to')
+pop.evolve(
+    initOps=[InitSex(maleFreq=0.4), InitGenotype(freq=[0.3, 0.7])],
+    preOps=[
+        Migrator(rate=[[0.9, 0.1], [0.2, 0.8]]),
+        MaPenetrance(loci=0, penetrance=[0.1, 0.3, 0.6]),
+    ],
+    matingScheme=RandomMating(ops=Recombinator(rates=0.01)),
+    gen=5
+)
+pop.save(sys.argv[2])
+"""
+        for nThreads in [1, 4]:
+            subprocess.check_call([sys.executable, '-c', script, str(nThreads),
+                'threads_%d.pop' % nThreads])
+        pop1 = loadPopulation('threads_1.pop')
+        pop4 = loadPopulation('threads_4.pop')
+        self.assertEqual(pop1.subPopSizes(), pop4.subPopSizes())
+        self.assertEqual(pop1, pop4)
+        self.assertEqual(pop1.indInfo('migrate_to'), pop4.indInfo('migrate_to'))
+        for nThreads in [1, 4]:
+            os.remove('threads_%d.pop' % nThreads)
+
 if __name__ == '__main__':
     unittest.main()
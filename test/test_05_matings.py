@@ -213,6 +213,48 @@ class TestMatingSchemes(unittest.TestCase):
                 sexMode=sexFunc)),
             'FMFMFMFMFMFMFMFMFMFMFMFMFMFMFMFMFMFMFMFM')
         
+    def testNumOffspringSexArray(self):
+        'Testing functions that return arrays of numbers of offspring and sex'
+        import numpy as np
+        # number of offspring for all families
+        def nos(size):
+            return np.array([2] * (size // 2))
+        self.assertEqual(self.getFamSize(numOffspring=nos, N=100), [2]*50)
+        # an array that does not cover all offspring, and families with
+        # no offspring are ignored
+        def nos(gen, size):
+            return [3, 0, 1]
+        self.assertEqual(self.getFamSize(numOffspring=nos, N=200),
+            [3, 1]*50)
+        # a generator that yields arrays
+        def nos_gen(size):
+            while True:
+                yield np.random.randint(1, 4, size=size)
+        cnt = self.getFamSize(numOffspring=nos_gen, N=1000)
+        self.assertEqual(sum(cnt), 1000)
+        self.assertTrue(max(cnt) <= 3)
+        # sex of all offspring
+        def sexFunc(pop, subPop, size):
+            self.assertEqual(subPop, 0)
+            self.assertEqual(size, pop.subPopSize(0))
+            return np.array([MALE, FEMALE] * (size // 2))
+        self.assertEqual(
+            self.checkSexMode(RandomMating(numOffspring=(UNIFORM_DISTRIBUTION, 2, 6),
+                sexMode=sexFunc)),
+            'MF' * 20)
+        # a generator that yields arrays of sex
+        def sexFunc():
+            while True:
+                yield [FEMALE, FEMALE, MALE]
+        self.assertEqual(
+            self.checkSexMode(RandomMating(numOffspring=(UNIFORM_DISTRIBUTION, 2, 6),
+                sexMode=sexFunc)),
+            ('FFM' * 14)[:40])
+        # parameters other than gen, pop, subPop and size are not allowed
+        def sexFunc(ind):
+            return MALE
+        self.assertRaises(ValueError, self.checkSexMode, RandomMating(sexMode=sexFunc))
+
 
     def testMonoMating(self):
         'Testing monogemous mating scheme'
@@ -275,6 +317,28 @@ class TestMatingSchemes(unittest.TestCase):
                 famSize.append(1)
         self.assertEqual(famSize, [1]*20000+[2]*10000)
          
+    def testHeteroMatingParents(self):
+        'Testing parents of offspring populated concurrently by heterogeneous mating schemes'
+        pop = Population(size=[10000, 5000], loci=[20], infoFields=['father_idx', 'mother_idx'])
+        pop.setVirtualSplitter(RangeSplitter([[0, 3000], [3000, 10000]]))
+        pop.evolve(
+            initOps=[InitSex(), InitGenotype(freq=[0.5, 0.5])],
+            matingScheme=HeteroMating([
+                RandomMating(subPops=[(0, 0)], weight=-1, ops=[Recombinator(rates=0.01), ParentsTagger()]),
+                RandomMating(subPops=[(0, 1)], numOffspring=2, ops=[MendelianGenoTransmitter(), ParentsTagger()]),
+                CloneMating(subPops=1, ops=[CloneGenoTransmitter(), ParentsTagger()])],
+                shuffleOffspring=False),
+            gen=1
+        )
+        self.assertEqual(pop.subPopSizes(), (10000, 5000))
+        for idx in ['father_idx', 'mother_idx']:
+            parents = pop.indInfo(idx, subPop=0)
+            self.assertTrue(min(parents[:3000]) >= 0)
+            self.assertTrue(max(parents[:3000]) < 3000)
+            self.assertTrue(min(parents[3000:]) >= 3000)
+            self.assertTrue(max(parents[3000:]) < 10000)
+        self.assertEqual(pop.indInfo('father_idx', subPop=1), tuple(range(10000, 15000)))
+
     def testWeightingScheme(self):
         'Testing weighting schemes of heterogeneous mating schemes'
         pop = Population(size=[1000], loci=2, infoFields='mark')
@@ -454,6 +518,58 @@ class TestMatingSchemes(unittest.TestCase):
         self.assertRaises(ValueError, testPyRetValue, retWrongIndex)
         self.assertRaises(ValueError, testPyRetValue, retWrongIndexes)
 
+
+    def testPyParentsChooserArray(self):
+        'Testing Python parents chooser that yields arrays of parents'
+        import numpy as np
+        def retPairs(pop, subPop):
+            sz = pop.subPopSize(subPop)
+            while True:
+                # parents are paired with the next individual
+                dads = np.random.randint(0, sz - 1, size=64)
+                yield np.column_stack([dads, dads + 1])
+        def retParents(pop, subPop):
+            sz = pop.subPopSize(subPop)
+            while True:
+                yield np.random.randint(0, sz, size=(100, 1)).astype(np.int32)
+        def retWrongShape(pop, subPop):
+            while True:
+                yield np.zeros((10, 3), dtype=int)
+        def retWrongIndex(pop, subPop):
+            while True:
+                yield np.array([[0, pop.subPopSize(subPop)]])
+        pop = Population([200, 300], infoFields=['father_idx', 'mother_idx'])
+        pop.evolve(
+            matingScheme=HomoMating(
+                PyParentsChooser(retPairs),
+                OffspringGenerator([MendelianGenoTransmitter(), ParentsTagger()], numOffspring=2)
+            ),
+            gen=1
+        )
+        self.assertEqual(pop.subPopSizes(), (200, 300))
+        for sp in range(2):
+            for dad, mom in zip(pop.indInfo('father_idx', subPop=sp), pop.indInfo('mother_idx', subPop=sp)):
+                self.assertEqual(mom, dad + 1)
+                self.assertTrue(200 * sp <= dad < 200 + 300 * sp)
+        pop = Population([200, 300], infoFields=['father_idx', 'mother_idx'])
+        pop.evolve(
+            matingScheme=HomoMating(
+                PyParentsChooser(retParents),
+                OffspringGenerator([CloneGenoTransmitter(), ParentsTagger()])
+            ),
+            gen=1
+        )
+        self.assertEqual(set(pop.indInfo('mother_idx')), set([-1]))
+        self.assertTrue(max(pop.indInfo('father_idx', subPop=0)) < 200)
+        self.assertTrue(min(pop.indInfo('father_idx', subPop=1)) >= 200)
+        for func in [retWrongShape, retWrongIndex]:
+            pop = Population([200]*2)
+            self.assertRaises(ValueError, pop.evolve,
+                matingScheme=HomoMating(
+                    PyParentsChooser(func),
+                    OffspringGenerator(CloneGenoTransmitter())
+                ),
+                gen=1)
   
     def testHaploidRandomMating(self):
         'Testing random mating in haploid populations'
@@ -580,6 +696,28 @@ class TestMatingSchemes(unittest.TestCase):
             self.assertLess(ind.a, 5)
             self.assertGreaterEqual(ind.a, 0)
 
+    def testRandomMatingWithFitness(self):
+        'Test parents chosen in batch by random mating schemes with fitness'
+        pop = Population(5000, loci=[1], infoFields=['fitness', 'father_idx', 'mother_idx'])
+        initSex(pop, sex=[MALE, FEMALE])
+        initInfo(pop, [1, 2] * 1250 + [0] * 2500, infoFields='fitness')
+        parSex = [ind.sex() for ind in pop.individuals()]
+        pop.evolve(
+            matingScheme=RandomMating(ops=[MendelianGenoTransmitter(), ParentsTagger()]),
+            gen=1)
+        for dad, mom in zip(pop.indInfo('father_idx'), pop.indInfo('mother_idx')):
+            self.assertLess(dad, 2500)
+            self.assertLess(mom, 2500)
+            self.assertEqual(parSex[int(dad)], MALE)
+            self.assertEqual(parSex[int(mom)], FEMALE)
+        # random selection
+        pop = Population(5000, loci=[1], infoFields=['fitness', 'father_idx'])
+        initInfo(pop, [0] * 2500 + [0.5, 2] * 1250, infoFields='fitness')
+        pop.evolve(
+            matingScheme=RandomSelection(ops=[CloneGenoTransmitter(), ParentsTagger(infoFields='father_idx')]),
+            gen=1)
+        self.assertGreaterEqual(min(pop.indInfo('father_idx')), 2500)
+
     def testRandomParentChooserWithoutReplacement(self):
         'Test random parent chooser'
         pop = Population([10, 10], loci=[1], infoFields='a')
@@ -389,6 +389,69 @@ class TestStat(unittest.TestCase):
         self.assertNotEqual(pop.dvars().heteroFreq[0], 0)
         self.assertNotEqual(pop.dvars().heteroFreq[1], 0)
 
+    def testAlleleCountManyLoci(self):
+        'Testing counting of alleles and heterozygotes at blocks of loci'
+        pop = Population(size=[300, 200], loci=[100, 50], infoFields='x')
+        initSex(pop)
+        initGenotype(pop, freq=[0.3, 0.7])
+        pop.setIndInfo([1, 2] * 250, 'x')
+        pop.setVirtualSplitter(InfoSplitter(field='x', values=[1]))
+        stat(pop, alleleFreq=ALL_AVAIL, heteroFreq=ALL_AVAIL, subPops=[(0, 0), 1],
+            vars=['alleleNum', 'alleleNum_sp', 'heteroNum', 'heteroNum_sp'])
+        for loc in (0, 63, 64, 99, 100, 149):
+            for sp in [(0, 0), 1]:
+                num = [0, 0]
+                hetero = 0
+                for ind in pop.individuals(sp):
+                    num[ind.allele(loc, 0)] += 1
+                    num[ind.allele(loc, 1)] += 1
+                    if ind.allele(loc, 0) != ind.allele(loc, 1):
+                        hetero += 1
+                self.assertEqual(pop.dvars(sp).alleleNum[loc][0], num[0])
+                self.assertEqual(pop.dvars(sp).alleleNum[loc][1], num[1])
+                self.assertEqual(pop.dvars(sp).heteroNum[loc], hetero)
+        # sex chromosomes are counted as before
+        pop = Population(size=100, loci=[20, 10], chromTypes=[AUTOSOME, CHROMOSOME_X])
+        initSex(pop, sex=[MALE, FEMALE])
+        initGenotype(pop, freq=[0.5, 0.5])
+        stat(pop, alleleFreq=ALL_AVAIL)
+        self.assertEqual(sum(pop.dvars().alleleNum[0].values()), 200)
+        self.assertEqual(sum(pop.dvars().alleleNum[25].values()), 150)
+
+    def testGenoHaploCountManyLoci(self):
+        'Testing counting of genotypes, haplotypes and LD at many loci'
+        pop = Population(size=[130, 70], loci=[100])
+        initGenotype(pop, freq=[0.4, 0.6])
+        # loci across word boundaries and in arbitrary order
+        loci = [0, 1, 63, 64, 65, 99]
+        stat(pop, genoFreq=ALL_AVAIL, haploFreq=[[63, 64, 99], [99, 1], [5, 6]],
+            LD=[[63, 64], [99, 0]], subPops=[0, 1],
+            vars=['genoNum', 'haploNum_sp', 'LD', 'R2'])
+        for loc in loci:
+            cnt = {}
+            for ind in pop.individuals():
+                geno = (ind.allele(loc, 0), ind.allele(loc, 1))
+                cnt[geno] = cnt.get(geno, 0) + 1
+            self.assertEqual(pop.dvars().genoNum[loc], cnt)
+        for sp in range(2):
+            for hap in [(63, 64, 99), (99, 1), (5, 6)]:
+                cnt = {}
+                for ind in pop.individuals(sp):
+                    for p in range(2):
+                        key = tuple([ind.allele(x, p) for x in hap])
+                        cnt[key] = cnt.get(key, 0) + 1
+                self.assertEqual(pop.dvars(sp).haploNum[hap], cnt)
+        for loc1, loc2 in [(63, 64), (99, 0)]:
+            N = pop.popSize() * 2.
+            p = sum([ind.allele(loc1, x) == 0 for ind in pop.individuals() for x in range(2)]) / N
+            q = sum([ind.allele(loc2, x) == 0 for ind in pop.individuals() for x in range(2)]) / N
+            pq = sum([ind.allele(loc1, x) == 0 and ind.allele(loc2, x) == 0
+                for ind in pop.individuals() for x in range(2)]) / N
+            self.assertAlmostEqual(abs(pq - p * q), abs(pop.dvars().LD[loc1][loc2]))
+            if p * q * (1 - p) * (1 - q) != 0:
+                self.assertAlmostEqual((pq - p * q)**2 / (p * q * (1 - p) * (1 - q)),
+                    pop.dvars().R2[loc1][loc2])
+
     def testGenoFreq(self):
         'Testing the counting of genotype frequency'
         pop = Population(size=[500,100,1000], ploidy=2, loci = [1])
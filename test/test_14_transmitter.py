@@ -8,7 +8,7 @@
 # $LastChangedDate$
 #
 
-import unittest, os, sys
+import unittest, os, sys, math
 from simuOpt import setOptions
 setOptions(quiet=True)
 new_argv = []
@@ -61,6 +61,19 @@ class TestTransmitters(unittest.TestCase):
                     # and 0 is not copied to 2
                     self.assertNotEqual(pop.individual(0).genotype(p, ch),
                         pop.individual(idx).genotype(p, ch))
+        #
+        # only specified chromosomes are copied
+        pop = self.getPop(size=100, loci=[10, 20, 30, 40])
+        applyDuringMatingOperator(CloneGenoTransmitter(chroms=[3, 1]),
+            pop, pop, dad = 0, mom = 1, off=(2, pop.popSize()))
+        for idx in range(2, pop.popSize()):
+            for p in range(2):
+                for ch in [1, 3]:
+                    self.assertEqual(pop.individual(1).genotype(p, ch),
+                        pop.individual(idx).genotype(p, ch))
+                for ch in [0, 2]:
+                    self.assertNotEqual(pop.individual(1).genotype(p, ch),
+                        pop.individual(idx).genotype(p, ch))
 
 
     def testMendelianGenoTransmitter(self):
@@ -1151,6 +1164,123 @@ class TestTransmitters(unittest.TestCase):
         for ind in simu.population(0).individuals():
             self.assertEqual(ind.genotype(1), [0]*8)
 
+    def testContinuousMap(self):
+        'Testing recombination on a continuous genetic map'
+        if moduleInfo()['alleleType'] == 'binary':
+            a1, a2 = 0, 1
+        else:
+            a1, a2 = 1, 2
+        pop = Population(10000, loci=[3, 2], lociPos=[0, 1, 5, 0, 10])
+        initSex(pop)
+        initGenotype(pop, genotype=[a1]*5+[a2]*5)
+        pop.evolve(
+            matingScheme=RandomMating(ops=Recombinator(intensity=0.1, continuousMap=True)),
+            postOps=Stat(haploFreq=[[0, 1], [1, 2], [2, 3], [3, 4]]),
+            gen=1)
+        # the probability of an odd number of crossovers is (1 - exp(-2d))/2
+        # for a distance of d Morgans.
+        for (loci, d) in [((0, 1), 0.1), ((1, 2), 0.4), ((3, 4), 1.)]:
+            r = (1 - math.exp(-2 * d)) / 2
+            self.assertTrue(abs(pop.dvars().haploFreq[loci][(a1, a2)] - r / 2) < 0.015)
+        # free recombination between chromosomes
+        self.assertTrue(abs(pop.dvars().haploFreq[(2, 3)][(a1, a2)] - 0.25) < 0.015)
+        # no allele is created or lost
+        pop = Population(200, loci=[100000], lociPos=list(range(100000)))
+        initSex(pop)
+        initGenotype(pop, genotype=[a1]*100000+[a2]*100000)
+        pop.evolve(
+            matingScheme=RandomMating(ops=Recombinator(intensity=1e-5, continuousMap=True)),
+            postOps=Stat(alleleFreq=[0, 50000, 99999]),
+            gen=1)
+        for loc in [0, 50000, 99999]:
+            self.assertEqual(pop.dvars().alleleNum[loc][a1] + pop.dvars().alleleNum[loc][a2], 400)
+        # rates and loci can not be used
+        self.assertRaises(ValueError, pop.evolve,
+            matingScheme=RandomMating(ops=Recombinator(rates=0.1, continuousMap=True)),
+            gen=1)
+        self.assertRaises(ValueError, pop.evolve,
+            matingScheme=RandomMating(ops=Recombinator(intensity=0.1, loci=[0, 1], continuousMap=True)),
+            gen=1)
+        # sex chromosomes are not supported
+        pop = Population(100, loci=[10, 5], chromTypes=[AUTOSOME, CHROMOSOME_X])
+        initSex(pop)
+        self.assertRaises(ValueError, pop.evolve,
+            matingScheme=RandomMating(ops=Recombinator(intensity=0.1, continuousMap=True)),
+            gen=1)
+
+    def testGenealogy(self):
+        'Testing the recording of genealogy of neutral loci'
+        for name, op in [('mendelian', MendelianGenoTransmitter),
+            ('recombinator', lambda genealogy: Recombinator(rates=0.01,
+                convMode=(NUM_MARKERS, 0.1, 2), genealogy=genealogy))]:
+            genealogy = Genealogy(loci=range(5, 50))
+            pop = Population(size=200, loci=[20, 30], infoFields='ind_id')
+            pop.evolve(
+                initOps=[InitSex(), InitGenotype(freq=[0.5, 0.5]), IdTagger()],
+                matingScheme=RandomMating(ops=[IdTagger(), op(genealogy=genealogy)]),
+                postOps=SimplifyGenealogy(genealogy, step=10),
+                gen=25)
+            # alleles at non-neutral loci are still transmitted
+            stat(pop, alleleFreq=range(5))
+            for loc in range(5):
+                self.assertTrue(0 < pop.dvars().alleleFreq[loc][0] < 1)
+            # ancestral materials of all chromosomes are recorded
+            edges = genealogy.edges()
+            for ind in pop.individuals():
+                for p in range(2):
+                    node = 2 * int(ind.ind_id) + p
+                    segs = sorted([(x[0], x[1]) for x in edges if x[3] == node])
+                    self.assertEqual(segs[0][0], 0)
+                    self.assertEqual(segs[-1][1], 45)
+                    for x, y in zip(segs[:-1], segs[1:]):
+                        self.assertEqual(x[1], y[0])
+            if name == 'mendelian':
+                # chromosomes are transmitted as a whole
+                for edge in edges:
+                    self.assertTrue(edge[0] in [0, 15] and edge[1] in [15, 45])
+            # all nodes are ancestral to the present generation
+            nodes = set([x[0] for x in genealogy.nodes()])
+            self.assertEqual(nodes, set([x[2] for x in edges] + [x[3] for x in edges]))
+            # alleles at neutral loci are not set before mutate is called
+            self.assertEqual(pop.genealogyLoci(), tuple(range(5, 50)))
+            self.assertRaises(ValueError, stat, pop, alleleFreq=[4, 5])
+            self.assertRaises(ValueError, pop.genotype)
+            # no mutation
+            genealogy.mutate(pop, rate=0)
+            self.assertEqual(pop.genealogyLoci(), ())
+            self.assertEqual(genealogy.mutations(), [])
+            stat(pop, alleleFreq=range(5, 50))
+            for loc in range(5, 50):
+                self.assertEqual(pop.dvars().alleleFreq[loc][0], 1)
+            # neutral mutations
+            genealogy.mutate(pop, rate=0.001)
+            self.assertTrue(len(genealogy.mutations()) > 0)
+            stat(pop, alleleFreq=range(5, 50))
+            self.assertTrue(any([pop.dvars().alleleFreq[loc][0] < 1 for loc in range(5, 50)]))
+            # mutations are not dropped again to the same genealogy
+            geno = list(pop.genotype())
+            genealogy.mutate(pop, rate=0.001)
+            self.assertEqual(list(pop.genotype()), geno)
+            # mutations are kept after the population evolves
+            num = len(genealogy.mutations())
+            pop.evolve(
+                matingScheme=RandomMating(ops=[IdTagger(), op(genealogy=genealogy)]),
+                gen=5)
+            genealogy.mutate(pop, rate=0)
+            self.assertTrue(len(genealogy.mutations()) <= num)
+        # genealogy of neutral loci on sex chromosomes is not recorded
+        self.assertRaises(ValueError, Genealogy(loci=range(15)).mutate,
+            Population(10, loci=[10, 10], chromTypes=[AUTOSOME, CHROMOSOME_X],
+            infoFields='ind_id'), rate=0.001)
+        # a genealogy cannot be shared by replicates of a simulator
+        genealogy = Genealogy(loci=range(5, 50))
+        simu = Simulator(Population(size=200, loci=[20, 30], infoFields='ind_id'), rep=2)
+        self.assertRaises(ValueError, simu.evolve,
+            initOps=[InitSex(), IdTagger()],
+            matingScheme=RandomMating(ops=[IdTagger(),
+                MendelianGenoTransmitter(genealogy=genealogy)]),
+            gen=2)
+
     def testLineage(self):
         'Testing the transmission of lineage information'
         # pretend that we advance a generation